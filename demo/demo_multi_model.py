@@ -25,7 +25,7 @@ from mmengine.logging import print_log
 from mmengine.structures import InstanceData
 
 from mmdet.apis import DetInferencer
-from mmdet.models.utils import weighted_boxes_fusion
+from mmdet.models.utils import batched_weighted_boxes_fusion
 from mmdet.registry import VISUALIZERS
 from mmdet.structures import DetDataSample
 
@@ -162,15 +162,16 @@ def main():
     visualizer = VISUALIZERS.build(cfg_visualizer)
     visualizer.dataset_meta = dataset_meta
 
-    for i in range(len(results)):
-        bboxes, scores, labels = weighted_boxes_fusion(
-            results[i]['bboxes_list'],
-            results[i]['scores_list'],
-            results[i]['labels_list'],
-            weights=args.weights,
-            iou_thr=args.fusion_iou_thr,
-            skip_box_thr=args.skip_box_thr,
-            conf_type=args.conf_type)
+    fused_results = batched_weighted_boxes_fusion(
+        [res['bboxes_list']
+         for res in results], [res['scores_list'] for res in results],
+        [res['labels_list'] for res in results],
+        weights=args.weights,
+        iou_thr=args.fusion_iou_thr,
+        skip_box_thr=args.skip_box_thr,
+        conf_type=args.conf_type)
+
+    for i, (bboxes, scores, labels) in enumerate(fused_results):
 
         pred_instances = InstanceData()
         pred_instances.bboxes = bboxes
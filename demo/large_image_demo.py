@@ -23,15 +23,9 @@ from mmengine.logging import print_log
 from mmengine.utils import ProgressBar
 
 from mmdet.apis import inference_detector, init_detector
-
-try:
-    from sahi.slicing import slice_image
-except ImportError:
-    raise ImportError('Please run "pip install -U sahi" '
-                      'to install sahi first for large image inference.')
-
 from mmdet.registry import VISUALIZERS
-from mmdet.utils.large_image import merge_results_by_nms, shift_predictions
+from mmdet.utils.large_image import (get_tiles, merge_tile_results,
+                                     shift_predictions)
 from mmdet.utils.misc import get_file_list
 
 
@@ -70,7 +64,8 @@ def parse_args():
         '--merge-nms-type',
         type=str,
         default='nms',
-        help='NMS type for merging results')
+        choices=['nms', 'soft_nms', 'wbf'],
+        help='Strategy for merging results, wbf means weighted boxes fusion')
     parser.add_argument(
         '--batch-size',
         type=int,
@@ -140,30 +135,13 @@ def main():
 
         # arrange slices
         height, width = img.shape[:2]
-        sliced_image_object = slice_image(
-            img,
-            slice_height=args.patch_size,
-            slice_width=args.patch_size,
-            auto_slice_resolution=False,
-            overlap_height_ratio=args.patch_overlap_ratio,
-            overlap_width_ratio=args.patch_overlap_ratio,
-        )
-        # perform sliced inference
-        slice_results = []
-        start = 0
-        while True:
-            # prepare batch slices
-            end = min(start + args.batch_size, len(sliced_image_object))
-            images = []
-            for sliced_image in sliced_image_object.images[start:end]:
-                images.append(sliced_image)
-
-            # forward the model
-            slice_results.extend(inference_detector(model, images))
-
-            if end >= len(sliced_image_object):
-                break
-            start += args.batch_size
+        tiles = get_tiles((height, width), args.patch_size,
+                          args.patch_overlap_ratio)
+        tile_imgs = [img[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles.tolist()]
+        # perform sliced inference, the augmented tiles of tta are not
+        # batched
+        slice_results = inference_detector(
+            model, tile_imgs, batch_size=1 if args.tta else args.batch_size)
 
         if source_type['is_dir']:
             filename = os.path.relpath(file, args.img).replace('/', '_')
@@ -180,7 +158,7 @@ def main():
 
             shifted_instances = shift_predictions(
                 slice_results,
-                sliced_image_object.starting_pixels,
+                tiles[:, :2].tolist(),
                 src_image_shape=(height, width))
             merged_result = slice_results[0].clone()
             merged_result.pred_instances = shifted_instances
@@ -190,15 +168,7 @@ def main():
                 args.out_dir, debug_file_name)
             visualizer.set_image(img.copy())
 
-            debug_grids = []
-            for starting_point in sliced_image_object.starting_pixels:
-                start_point_x = starting_point[0]
-                start_point_y = starting_point[1]
-                end_point_x = start_point_x + args.patch_size
-                end_point_y = start_point_y + args.patch_size
-                debug_grids.append(
-                    [start_point_x, start_point_y, end_point_x, end_point_y])
-            debug_grids = np.array(debug_grids)
+            debug_grids = tiles.copy()
             debug_grids[:, 0::2] = np.clip(debug_grids[:, 0::2], 1,
                                            img.shape[1] - 1)
             debug_grids[:, 1::2] = np.clip(debug_grids[:, 1::2], 1,
@@ -238,8 +208,7 @@ def main():
                     patch_out_file = os.path.join(
                         debug_patch_out_dir,
                         f'{filename}_slice_{i}_result.jpg')
-                    image = mmcv.imconvert(sliced_image_object.images[i],
-                                           'bgr', 'rgb')
+                    image = mmcv.imconvert(tile_imgs[i], 'bgr', 'rgb')
 
                     visualizer.add_datasample(
                         'patch_result',
@@ -252,11 +221,11 @@ def main():
                         pred_score_thr=args.score_thr,
                     )
 
-        image_result = merge_results_by_nms(
-            slice_results,
-            sliced_image_object.starting_pixels,
-            src_image_shape=(height, width),
-            nms_cfg={
+        image_result = merge_tile_results(
+            slice_results, (height, width),
+            args.patch_size,
+            args.patch_overlap_ratio,
+            merge_cfg={
                 'type': args.merge_nms_type,
                 'iou_threshold': args.merge_iou_thr
             })
@@ -1,9 +1,12 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+from .async_detector import AsyncDetector
 from .det_inferencer import DetInferencer
 from .inference import (async_inference_detector, inference_detector,
                         inference_mot, init_detector, init_track_model)
+from .multi_stream import MultiStreamRunner
 
 __all__ = [
     'init_detector', 'async_inference_detector', 'inference_detector',
-    'DetInferencer', 'inference_mot', 'init_track_model'
+    'DetInferencer', 'inference_mot', 'init_track_model', 'AsyncDetector',
+    'MultiStreamRunner'
 ]
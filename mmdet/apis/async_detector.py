@@ -0,0 +1,181 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+from mmcv.ops import RoIPool
+from mmcv.transforms import Compose
+
+from ..structures import DetDataSample
+from ..utils import get_test_pipeline_cfg
+
+
+class AsyncDetector:
+    """Asyncio front end of a detector that batches concurrent requests.
+
+    Each call of :meth:`submit` runs the test pipeline in a thread pool and
+    puts the data into a queue. A background task takes the first data in
+    the queue, waits at most ``max_latency`` seconds for more data until
+    ``max_batch_size`` is reached, forwards them as one batch in another
+    thread, and resolves the results of each request. Therefore a web
+    service, e.g. aiohttp or FastAPI, can serve many concurrent clients with
+    one model instance.
+
+    Note that the images of a batch are padded to the same size by the data
+    preprocessor, so the results can be slightly different from the ones
+    of :func:`inference_detector`.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        max_batch_size (int): Maximum number of images forwarded at once.
+            Defaults to 8.
+        max_latency (float): Maximum seconds that a request waits for the
+            following requests to form a batch. Defaults to 0.01.
+        num_workers (int): Number of threads running the test pipeline.
+            Defaults to 4.
+
+    Examples:
+        >>> from mmdet.apis import AsyncDetector, init_detector
+        >>> model = init_detector(config_file, checkpoint_file)
+        >>> async def main(imgs):
+        ...     async with AsyncDetector(model) as detector:
+        ...         return await asyncio.gather(
+        ...             *[detector.submit(img) for img in imgs])
+        >>> results = asyncio.run(main(imgs))
+    """
+
+    def __init__(self,
+                 model: nn.Module,
+                 max_batch_size: int = 8,
+                 max_latency: float = 0.01,
+                 num_workers: int = 4) -> None:
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        if model.data_preprocessor.device.type == 'cpu':
+            for m in model.modules():
+                assert not isinstance(
+                    m, RoIPool
+                ), 'CPU inference with RoIPool is not supported currently.'
+
+        # the pipeline of ``model.cfg`` is shared by ``Config.copy``
+        pipeline_cfg = copy.deepcopy(get_test_pipeline_cfg(model.cfg))
+        self.file_pipeline = Compose(pipeline_cfg)
+        # Calling this method across libraries will result
+        # in module unregistered error if not prefixed with mmdet.
+        pipeline_cfg[0].type = 'mmdet.LoadImageFromNDArray'
+        self.ndarray_pipeline = Compose(pipeline_cfg)
+
+        self._pipeline_executor = ThreadPoolExecutor(num_workers)
+        # the model is forwarded in one thread so that the event loop is not
+        # blocked and the batches are forwarded one by one
+        self._model_executor = ThreadPoolExecutor(1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+
+    def _prepare_data(self, img: Union[str, np.ndarray]) -> dict:
+        """Run the test pipeline on an image."""
+        if isinstance(img, np.ndarray):
+            # TODO: remove img_id.
+            return self.ndarray_pipeline(dict(img=img, img_id=0))
+        # TODO: remove img_id.
+        return self.file_pipeline(dict(img_path=img, img_id=0))
+
+    def _forward(self, data_list: List[dict]) -> List[DetDataSample]:
+        """Forward a batch of data."""
+        data = dict(
+            inputs=[data['inputs'] for data in data_list],
+            data_samples=[data['data_samples'] for data in data_list])
+        with torch.no_grad():
+            return self.model.test_step(data)
+
+    async def submit(self, img: Union[str, np.ndarray]) -> DetDataSample:
+        """Inference an image with the detector.
+
+        Args:
+            img (str or ndarray): Either an image file or a loaded image.
+
+        Returns:
+            :obj:`DetDataSample`: The detection results.
+        """
+        loop = asyncio.get_running_loop()
+        if self._batch_task is None:
+            self._queue = asyncio.Queue()
+            self._batch_task = loop.create_task(self._batch_loop())
+        data = await loop.run_in_executor(self._pipeline_executor,
+                                          self._prepare_data, img)
+        future = loop.create_future()
+        self._queue.put_nowait((data, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        """Get the requests in the queue as a batch within the latency
+        budget of the first request."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            if self._queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+            else:
+                batch.append(self._queue.get_nowait())
+        # the cancelled requests are not forwarded
+        return [(data, future) for data, future in batch
+                if not future.cancelled()]
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if len(batch) == 0:
+                continue
+            try:
+                results = await loop.run_in_executor(
+                    self._model_executor, self._forward,
+                    [data for data, _ in batch])
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        """Stop batching requests and release the threads."""
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+            # cancel the requests that are not forwarded
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                future.cancel()
+        self._pipeline_executor.shutdown()
+        self._model_executor.shutdown()
+
+    async def __aenter__(self) -> 'AsyncDetector':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
@@ -1,12 +1,18 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
+import glob
+import itertools
 import os.path as osp
 import warnings
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (Dict, Iterable, Iterator, List, Optional, Sequence, Tuple,
+                    Union)
 
 import mmcv
 import mmengine
 import numpy as np
+import torch
 import torch.nn as nn
 from mmcv.transforms import LoadImageFromFile
 from mmengine.dataset import Compose
@@ -22,7 +28,8 @@ from rich.progress import track
 from mmdet.evaluation import INSTANCE_OFFSET
 from mmdet.registry import DATASETS
 from mmdet.structures import DetDataSample
-from mmdet.structures.mask import encode_mask_results, mask2bbox
+from mmdet.structures.mask import (BaseInstanceMasks, RLEMasks,
+                                   encode_mask_results)
 from mmdet.utils import ConfigType
 from ..evaluation import get_classes
 
@@ -40,6 +47,45 @@ ImgType = Union[np.ndarray, Sequence[np.ndarray]]
 
 IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.ppm', '.bmp', '.pgm', '.tif',
                   '.tiff', '.webp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.webm')
+
+# the pipeline of the current preprocessing worker process
+_worker_pipeline: Optional[Compose] = None
+
+
+def _init_pipeline_worker(pipeline: Compose, scope: Optional[str]) -> None:
+    """Initialize a preprocessing worker process."""
+    global _worker_pipeline
+    if scope is not None:
+        init_default_scope(scope)
+    _worker_pipeline = pipeline
+
+
+def _run_pipeline_worker(inputs: Union[InputType, dict]) -> dict:
+    """Run the pipeline in a preprocessing worker process."""
+    return _worker_pipeline(inputs)
+
+
+def _split_inputs(inputs: Union[InputType, dict]) -> tuple:
+    """Get the original input for visualization and the input of the
+    pipeline.
+
+    The pipeline adds keys to a dict input, so the dict is copied. Only the
+    dicts with non-scalar values, e.g. images and lists, are deep copied.
+    """
+    if not isinstance(inputs, dict):
+        return inputs, inputs
+    if 'img' in inputs:
+        ori_inputs = inputs['img']
+    else:
+        ori_inputs = inputs['img_path']
+    if all(
+            isinstance(value, (str, int, float, bool, type(None)))
+            for value in inputs.values()):
+        inputs = inputs.copy()
+    else:
+        inputs = copy.deepcopy(inputs)
+    return ori_inputs, inputs
 
 
 class DetInferencer(BaseInferencer):
@@ -65,7 +111,7 @@ class DetInferencer(BaseInferencer):
             bar during the inference process. Defaults to True.
     """
 
-    preprocess_kwargs: set = set()
+    preprocess_kwargs: set = {'num_workers', 'worker_type', 'prefetch_chunks'}
     forward_kwargs: set = set()
     visualize_kwargs: set = {
         'return_vis',
@@ -81,6 +127,9 @@ class DetInferencer(BaseInferencer):
         'pred_out_dir',
         'return_datasamples',
         'no_save_pred',
+        'score_thr',
+        'pred_out_format',
+        'pred_shard_size',
     }
 
     def __init__(self,
@@ -94,6 +143,9 @@ class DetInferencer(BaseInferencer):
         # naming of the output images
         self.num_visualized_imgs = 0
         self.num_predicted_imgs = 0
+        self.num_pred_shards = 0
+        # Buffered predictions to be saved in a shard
+        self._pred_shard = None
         self.palette = palette
         init_default_scope(scope)
         super().__init__(
@@ -247,7 +299,69 @@ class DetInferencer(BaseInferencer):
 
         return list(inputs)
 
-    def preprocess(self, inputs: InputsType, batch_size: int = 1, **kwargs):
+    def _iter_inputs(self, inputs: InputsType) -> Iterator:
+        """Lazily iterate the inputs.
+
+        Different from :meth:`_inputs_to_list`, the files of a directory are
+        listed while iterating, so that the memory does not grow with the
+        number of files. Besides the inputs supported by
+        :meth:`_inputs_to_list`, the inputs can also be:
+
+        - str: A glob pattern of image files, e.g. ``data/**/*.jpg``.
+        - str: A video file, whose frames are read one by one.
+        - Iterable: Any iterable of inputs, e.g. a generator.
+
+        Args:
+            inputs (InputsType): Inputs for the inferencer.
+
+        Yields:
+            Input for the :meth:`preprocess`.
+        """
+        if isinstance(inputs, str):
+            backend = get_file_backend(inputs)
+            if hasattr(backend, 'isdir') and isdir(inputs):
+                for filename in list_dir_or_file(
+                        inputs, list_dir=False, suffix=IMG_EXTENSIONS):
+                    yield join_path(inputs, filename)
+            elif glob.has_magic(inputs):
+                for filename in glob.iglob(inputs, recursive=True):
+                    if filename.lower().endswith(IMG_EXTENSIONS):
+                        yield filename
+            elif inputs.lower().endswith(VIDEO_EXTENSIONS):
+                yield from mmcv.VideoReader(inputs)
+            else:
+                yield inputs
+        elif isinstance(inputs, (np.ndarray, dict)):
+            yield inputs
+        else:
+            yield from inputs
+
+    @staticmethod
+    def _add_text_prompt(inputs: InputType,
+                         text: str,
+                         custom_entities: bool = False,
+                         tokens_positive: Optional[Union[int, list]] = None,
+                         stuff_text: Optional[str] = None) -> dict:
+        """Pack an input with its text prompt into a dict."""
+        if isinstance(inputs, str):
+            inputs = {'img_path': inputs}
+        else:
+            inputs = {'img': inputs}
+        inputs.update(
+            text=text,
+            custom_entities=custom_entities,
+            tokens_positive=tokens_positive)
+        if stuff_text is not None:
+            inputs['stuff_text'] = stuff_text
+        return inputs
+
+    def preprocess(self,
+                   inputs: InputsType,
+                   batch_size: int = 1,
+                   num_workers: int = 0,
+                   worker_type: str = 'thread',
+                   prefetch_chunks: int = 2,
+                   **kwargs):
         """Process the inputs into a model-feedable format.
 
         Customize your preprocess by overriding this method. Preprocess should
@@ -267,48 +381,92 @@ class DetInferencer(BaseInferencer):
         Args:
             inputs (InputsType): Inputs given by user.
             batch_size (int): batch size. Defaults to 1.
+            num_workers (int): Number of workers running the pipeline on the
+                following inputs while the model is forwarding. If 0, the
+                pipeline runs in the main thread. Defaults to 0.
+            worker_type (str): Type of the workers, either ``'thread'`` or
+                ``'process'``. Processes avoid the contention of the GIL in
+                the pipeline, at the cost of pickling the pipeline and its
+                results. Defaults to 'thread'.
+            prefetch_chunks (int): Number of chunks prepared ahead of the
+                forwarded one, which bounds the memory of the pending data.
+                Defaults to 2.
 
         Yields:
             Any: Data processed by the ``pipeline`` and ``collate_fn``.
         """
-        chunked_data = self._get_chunk_data(inputs, batch_size)
+        chunked_data = self._get_chunk_data(inputs, batch_size, num_workers,
+                                            worker_type, prefetch_chunks)
         yield from map(self.collate_fn, chunked_data)
 
-    def _get_chunk_data(self, inputs: Iterable, chunk_size: int):
+    def _get_chunk_data(self,
+                        inputs: Iterable,
+                        chunk_size: int,
+                        num_workers: int = 0,
+                        worker_type: str = 'thread',
+                        prefetch_chunks: int = 2):
         """Get batch data from inputs.
 
+        The order of the inputs is preserved even if the pipeline runs in
+        multiple workers.
+
         Args:
             inputs (Iterable): An iterable dataset.
             chunk_size (int): Equivalent to batch size.
+            num_workers (int): Number of workers running the pipeline.
+                Defaults to 0.
+            worker_type (str): Type of the workers, either ``'thread'`` or
+                ``'process'``. Defaults to 'thread'.
+            prefetch_chunks (int): Number of chunks prepared ahead.
+                Defaults to 2.
 
         Yields:
             list: batch data.
         """
-        inputs_iter = iter(inputs)
+        if num_workers > 0:
+            max_pending = max(prefetch_chunks * chunk_size, num_workers)
+            data_iter = self._prefetch_data(inputs, max_pending, num_workers,
+                                            worker_type)
+        else:
+            data_iter = ((ori_inputs, self.pipeline(inputs_))
+                         for ori_inputs, inputs_ in map(_split_inputs, inputs))
         while True:
-            try:
-                chunk_data = []
-                for _ in range(chunk_size):
-                    inputs_ = next(inputs_iter)
-                    if isinstance(inputs_, dict):
-                        if 'img' in inputs_:
-                            ori_inputs_ = inputs_['img']
-                        else:
-                            ori_inputs_ = inputs_['img_path']
-                        chunk_data.append(
-                            (ori_inputs_,
-                             self.pipeline(copy.deepcopy(inputs_))))
-                    else:
-                        chunk_data.append((inputs_, self.pipeline(inputs_)))
-                yield chunk_data
-            except StopIteration:
-                if chunk_data:
-                    yield chunk_data
+            chunk_data = list(itertools.islice(data_iter, chunk_size))
+            if not chunk_data:
                 break
-
-    # TODO: Video and Webcam are currently not supported and
-    #  may consume too much memory if your input folder has a lot of images.
-    #  We will be optimized later.
+            yield chunk_data
+
+    def _prefetch_data(self, inputs: Iterable, max_pending: int,
+                       num_workers: int, worker_type: str) -> Iterator[tuple]:
+        """Run the pipeline on the inputs in a pool of workers, keeping at
+        most ``max_pending`` inputs in flight to bound the memory."""
+        if worker_type == 'thread':
+            executor = ThreadPoolExecutor(num_workers)
+            run_pipeline = self.pipeline
+        elif worker_type == 'process':
+            # only the pipeline is sent to the processes, not the model
+            executor = ProcessPoolExecutor(
+                num_workers,
+                initializer=_init_pipeline_worker,
+                initargs=(self.pipeline, self.scope))
+            run_pipeline = _run_pipeline_worker
+        else:
+            raise ValueError('worker_type should be "thread" or "process", '
+                             f'but got {worker_type}')
+        with executor:
+            futures = deque()
+            for ori_inputs, inputs_ in map(_split_inputs, inputs):
+                futures.append(
+                    (ori_inputs, executor.submit(run_pipeline, inputs_)))
+                if len(futures) >= max_pending:
+                    ori_inputs, future = futures.popleft()
+                    yield ori_inputs, future.result()
+            while futures:
+                ori_inputs, future = futures.popleft()
+                yield ori_inputs, future.result()
+
+    # TODO: Webcam is currently not supported. Use :meth:`stream` to infer
+    #  a video or a folder with a lot of images within bounded memory.
     def __call__(
             self,
             inputs: InputsType,
@@ -389,20 +547,9 @@ class DetInferencer(BaseInferencer):
         if texts is not None:
             assert len(texts) == len(ori_inputs)
             for i in range(len(texts)):
-                if isinstance(ori_inputs[i], str):
-                    ori_inputs[i] = {
-                        'text': texts[i],
-                        'img_path': ori_inputs[i],
-                        'custom_entities': custom_entities,
-                        'tokens_positive': tokens_positive[i]
-                    }
-                else:
-                    ori_inputs[i] = {
-                        'text': texts[i],
-                        'img': ori_inputs[i],
-                        'custom_entities': custom_entities,
-                        'tokens_positive': tokens_positive[i]
-                    }
+                ori_inputs[i] = self._add_text_prompt(ori_inputs[i], texts[i],
+                                                      custom_entities,
+                                                      tokens_positive[i])
         if stuff_texts is not None:
             assert len(stuff_texts) == len(ori_inputs)
             for i in range(len(stuff_texts)):
@@ -437,8 +584,122 @@ class DetInferencer(BaseInferencer):
             results_dict['predictions'].extend(results['predictions'])
             if results['visualization'] is not None:
                 results_dict['visualization'].extend(results['visualization'])
+        self.flush_pred_shard()
         return results_dict
 
+    def stream(self,
+               inputs: Union[InputsType, Iterable],
+               batch_size: int = 1,
+               num_workers: int = 2,
+               return_vis: bool = False,
+               show: bool = False,
+               wait_time: int = 0,
+               no_save_vis: bool = False,
+               draw_pred: bool = True,
+               pred_score_thr: float = 0.3,
+               return_datasamples: bool = False,
+               print_result: bool = False,
+               no_save_pred: bool = True,
+               out_dir: str = '',
+               texts: Optional[Union[str, Iterable]] = None,
+               stuff_texts: Optional[Union[str, Iterable]] = None,
+               custom_entities: bool = False,
+               tokens_positive: Optional[Union[int, list]] = None,
+               **kwargs) -> Iterator[dict]:
+        """Infer the inputs lazily and yield the results image by image.
+
+        Different from :meth:`__call__`, which collects the results of all
+        inputs before returning, the inputs are read while iterating and the
+        results are yielded (and saved to ``out_dir`` if specified) once a
+        batch is forwarded. The pipeline of the following inputs runs in
+        ``num_workers`` threads while the model is forwarding the current
+        batch. Therefore the memory does not grow with the number of inputs,
+        which makes it suitable for large folders and videos.
+
+        Args:
+            inputs (InputsType | Iterable): Inputs for the inferencer. Besides
+                the inputs of :meth:`__call__`, it can also be a glob pattern
+                of image files, a video file or an iterable of inputs. See
+                :meth:`_iter_inputs` for details.
+            batch_size (int): Inference batch size. Defaults to 1.
+            num_workers (int): Number of threads running the pipeline. If 0,
+                the pipeline runs in the main thread. Defaults to 2.
+            texts (str | Iterable[str], optional): Text prompts. If it is not
+                a string, it should have the same length as the inputs.
+                Defaults to None.
+            stuff_texts (str | Iterable[str], optional): Stuff text prompts of
+                open panoptic task. Defaults to None.
+            tokens_positive (int | list, optional): The positive tokens of
+                the text prompts, which are shared by all inputs as in
+                :meth:`__call__`. Defaults to None.
+            **kwargs: The other arguments are the same as :meth:`__call__`.
+
+        Yields:
+            dict: Inference and visualization results of an image with key
+            ``predictions`` and ``visualization``, where ``visualization`` is
+            None if no visualization is returned.
+
+        Examples:
+            >>> inferencer = DetInferencer('rtmdet-t')
+            >>> for result in inferencer.stream('demo/demo.mp4',
+            ...                                 batch_size=4,
+            ...                                 out_dir='outputs'):
+            ...     print(result['predictions']['labels'])
+        """
+        (
+            preprocess_kwargs,
+            forward_kwargs,
+            visualize_kwargs,
+            postprocess_kwargs,
+        ) = self._dispatch_kwargs(**kwargs)
+        preprocess_kwargs['num_workers'] = num_workers
+
+        ori_inputs = self._iter_inputs(inputs)
+        if texts is not None:
+            if isinstance(texts, str):
+                texts = itertools.repeat(texts)
+            if stuff_texts is None or isinstance(stuff_texts, str):
+                stuff_texts = itertools.repeat(stuff_texts)
+            # Currently only supports bs=1
+            tokens_positive = itertools.repeat(tokens_positive)
+            ori_inputs = (self._add_text_prompt(inputs_, text, custom_entities,
+                                                tokens, stuff_text)
+                          for inputs_, text, tokens, stuff_text in zip(
+                              ori_inputs, texts, tokens_positive, stuff_texts))
+
+        inputs = self.preprocess(
+            ori_inputs, batch_size=batch_size, **preprocess_kwargs)
+        try:
+            for ori_imgs, data in inputs:
+                preds = self.forward(data, **forward_kwargs)
+                visualization = self.visualize(
+                    ori_imgs,
+                    preds,
+                    return_vis=return_vis,
+                    show=show,
+                    wait_time=wait_time,
+                    draw_pred=draw_pred,
+                    pred_score_thr=pred_score_thr,
+                    no_save_vis=no_save_vis,
+                    img_out_dir=out_dir,
+                    **visualize_kwargs)
+                results = self.postprocess(
+                    preds,
+                    visualization,
+                    return_datasamples=return_datasamples,
+                    print_result=print_result,
+                    no_save_pred=no_save_pred,
+                    pred_out_dir=out_dir,
+                    **postprocess_kwargs)
+                visualization = results['visualization']
+                if visualization is None:
+                    visualization = [None] * len(results['predictions'])
+                for pred, vis in zip(results['predictions'], visualization):
+                    yield dict(predictions=pred, visualization=vis)
+        finally:
+            # save the buffered predictions even if the stream is closed
+            self.flush_pred_shard()
+
     def visualize(self,
                   inputs: InputsType,
                   preds: PredType,
@@ -526,6 +787,9 @@ class DetInferencer(BaseInferencer):
         print_result: bool = False,
         no_save_pred: bool = False,
         pred_out_dir: str = '',
+        score_thr: float = 0.,
+        pred_out_format: str = 'json',
+        pred_shard_size: int = 1000,
         **kwargs,
     ) -> Dict:
         """Process the predictions and visualization results from ``forward``
@@ -549,6 +813,15 @@ class DetInferencer(BaseInferencer):
             pred_out_dir: Dir to save the inference results w/o
                 visualization. If left as empty, no file will be saved.
                 Defaults to ''.
+            score_thr (float): The instances with scores lower than it are
+                dropped on the device before being converted, which saves the
+                conversion of low score instances. Defaults to 0.
+            pred_out_format (str): Format of the saved predictions. ``'json'``
+                saves a json file per image. ``'npz'`` buffers the instance
+                predictions and saves them in columnar shards, see
+                :meth:`flush_pred_shard`. Defaults to 'json'.
+            pred_shard_size (int): Number of images in a shard if
+                ``pred_out_format='npz'``. Defaults to 1000.
 
         Returns:
             dict: Inference and visualization results with key ``predictions``
@@ -563,14 +836,36 @@ class DetInferencer(BaseInferencer):
         """
         if no_save_pred is True:
             pred_out_dir = ''
+        if pred_out_format not in ('json', 'npz'):
+            raise ValueError('pred_out_format should be "json" or "npz", '
+                             f'but got {pred_out_format}')
+
+        if score_thr > 0:
+            for pred in preds:
+                if 'pred_instances' in pred:
+                    pred_instances = pred.pred_instances
+                    pred.pred_instances = pred_instances[
+                        pred_instances.scores >= score_thr]
 
         result_dict = {}
         results = preds
         if not return_datasamples:
-            results = []
-            for pred in preds:
-                result = self.pred2dict(pred, pred_out_dir)
-                results.append(result)
+            save_json = pred_out_format == 'json'
+            instances_list = self._instances_to_numpy(preds)
+            # the names are shared by the json files and the shards
+            img_names = [
+                self._get_pred_name(pred) if pred_out_dir != '' else None
+                for pred in preds
+            ]
+            results = [
+                self._pred2dict(pred, pred_instances, pred_out_dir, save_json,
+                                img_name)
+                for pred, pred_instances, img_name in zip(
+                    preds, instances_list, img_names)
+            ]
+            if pred_out_dir != '' and not save_json:
+                self._add_to_pred_shard(img_names, instances_list,
+                                        pred_out_dir, pred_shard_size)
         elif pred_out_dir != '':
             warnings.warn('Currently does not support saving datasample '
                           'when return_datasamples is set to True. '
@@ -582,6 +877,69 @@ class DetInferencer(BaseInferencer):
         result_dict['visualization'] = visualization
         return result_dict
 
+    def _instances_to_numpy(self, preds: PredType) -> List[Optional[dict]]:
+        """Convert the instance predictions of a batch to numpy arrays.
+
+        Each field of the batch is moved to CPU in one transfer, and the
+        masks are encoded to RLEs in bulk, on the device if they are on GPU.
+
+        Args:
+            preds (List[:obj:`DetDataSample`]): Predictions of the model.
+
+        Returns:
+            list[dict, optional]: ``labels``, ``scores``, ``bboxes`` (if any)
+            and ``masks`` (:obj:`RLEMasks`, if any) of each image, which is
+            None if the image has no instance prediction. The bboxes are
+            obtained from the masks if they are all zeros, e.g. SOLO.
+        """
+        instances_list = [
+            pred.pred_instances if 'pred_instances' in pred else None
+            for pred in preds
+        ]
+        results = [
+            None if instances is None else {} for instances in instances_list
+        ]
+        inds = [
+            i for i, instances in enumerate(instances_list)
+            if instances is not None
+        ]
+        if len(inds) == 0:
+            return results
+
+        for key in ['labels', 'scores', 'bboxes']:
+            values = [instances_list[i].get(key) for i in inds]
+            if any(value is None for value in values):
+                continue
+            if all(isinstance(value, torch.Tensor) for value in values):
+                # transfer the whole batch at once
+                values = torch.cat(values).cpu().numpy()
+                values = np.split(
+                    values,
+                    np.cumsum([len(instances_list[i]) for i in inds])[:-1])
+            else:
+                values = [
+                    value.cpu().numpy()
+                    if isinstance(value, torch.Tensor) else np.asarray(value)
+                    for value in values
+                ]
+            for i, value in zip(inds, values):
+                results[i][key] = value
+
+        for i in inds:
+            masks = instances_list[i].get('masks')
+            if masks is None:
+                continue
+            if not isinstance(masks, RLEMasks):
+                if isinstance(masks, BaseInstanceMasks):
+                    masks = masks.to_ndarray()
+                masks = RLEMasks.from_bitmaps(masks)
+            results[i]['masks'] = masks
+            bboxes = results[i].get('bboxes')
+            if bboxes is None or bboxes.sum() == 0:
+                # Fake bbox, such as the SOLO.
+                results[i]['bboxes'] = masks.get_bboxes('hbox').numpy()
+        return results
+
     # TODO: The data format and fields saved in json need further discussion.
     #  Maybe should include model name, timestamp, filename, image info etc.
     def pred2dict(self,
@@ -602,41 +960,45 @@ class DetInferencer(BaseInferencer):
         Returns:
             dict: Prediction results.
         """
+        return self._pred2dict(data_sample,
+                               self._instances_to_numpy([data_sample])[0],
+                               pred_out_dir)
+
+    def _pred2dict(self,
+                   data_sample: DetDataSample,
+                   pred_instances: Optional[dict],
+                   pred_out_dir: str = '',
+                   save_json: bool = True,
+                   img_name: Optional[str] = None) -> Dict:
+        """Implementation of :meth:`pred2dict` with the instance predictions
+        converted by :meth:`_instances_to_numpy`.
+
+        If ``save_json`` is False, the json file is not saved, but the
+        panoptic segmentation is still saved to ``pred_out_dir``. The saved
+        files are named by ``img_name``, which is obtained by
+        :meth:`_get_pred_name` if not given.
+        """
         is_save_pred = True
         if pred_out_dir == '':
             is_save_pred = False
 
-        if is_save_pred and 'img_path' in data_sample:
-            img_path = osp.basename(data_sample.img_path)
-            img_path = osp.splitext(img_path)[0]
+        if is_save_pred:
+            if img_name is None:
+                img_name = self._get_pred_name(data_sample)
             out_img_path = osp.join(pred_out_dir, 'preds',
-                                    img_path + '_panoptic_seg.png')
-            out_json_path = osp.join(pred_out_dir, 'preds', img_path + '.json')
-        elif is_save_pred:
-            out_img_path = osp.join(
-                pred_out_dir, 'preds',
-                f'{self.num_predicted_imgs}_panoptic_seg.png')
-            out_json_path = osp.join(pred_out_dir, 'preds',
-                                     f'{self.num_predicted_imgs}.json')
-            self.num_predicted_imgs += 1
+                                    img_name + '_panoptic_seg.png')
+            out_json_path = osp.join(pred_out_dir, 'preds', img_name + '.json')
 
         result = {}
-        if 'pred_instances' in data_sample:
-            masks = data_sample.pred_instances.get('masks')
-            pred_instances = data_sample.pred_instances.numpy()
+        if pred_instances is not None:
             result = {
-                'labels': pred_instances.labels.tolist(),
-                'scores': pred_instances.scores.tolist()
+                'labels': pred_instances['labels'].tolist(),
+                'scores': pred_instances['scores'].tolist()
             }
             if 'bboxes' in pred_instances:
-                result['bboxes'] = pred_instances.bboxes.tolist()
-            if masks is not None:
-                if 'bboxes' not in pred_instances or pred_instances.bboxes.sum(
-                ) == 0:
-                    # Fake bbox, such as the SOLO.
-                    bboxes = mask2bbox(masks.cpu()).numpy().tolist()
-                    result['bboxes'] = bboxes
-                encode_masks = encode_mask_results(pred_instances.masks)
+                result['bboxes'] = pred_instances['bboxes'].tolist()
+            if 'masks' in pred_instances:
+                encode_masks = encode_mask_results(pred_instances['masks'])
                 for encode_mask in encode_masks:
                     if isinstance(encode_mask['counts'], bytes):
                         encode_mask['counts'] = encode_mask['counts'].decode()
@@ -660,7 +1022,109 @@ class DetInferencer(BaseInferencer):
             else:
                 result['panoptic_seg'] = pan
 
-        if is_save_pred:
+        if is_save_pred and save_json:
             mmengine.dump(result, out_json_path)
 
         return result
+
+    def _get_pred_name(self, data_sample: DetDataSample) -> str:
+        """Get the name of the saved predictions of an image, which is the
+        name of the image file, or the number of the predicted images if the
+        input is not a file, e.g. an ndarray or a video frame."""
+        img_path = data_sample.get('img_path')
+        if img_path is not None:
+            return osp.splitext(osp.basename(img_path))[0]
+        img_name = str(self.num_predicted_imgs)
+        self.num_predicted_imgs += 1
+        return img_name
+
+    def _add_to_pred_shard(self, img_names: List[str],
+                           instances_list: List[Optional[dict]],
+                           pred_out_dir: str, pred_shard_size: int) -> None:
+        """Buffer the instance predictions of a batch and save a shard once
+        it has ``pred_shard_size`` images."""
+        shard = self._pred_shard
+        if shard is not None and shard['out_dir'] != pred_out_dir:
+            self.flush_pred_shard()
+            shard = None
+        if shard is None:
+            shard = self._pred_shard = dict(
+                out_dir=pred_out_dir, img_names=[], instances=[])
+        for img_name, pred_instances in zip(img_names, instances_list):
+            shard['img_names'].append(img_name)
+            shard['instances'].append(pred_instances or {})
+        if len(shard['instances']) >= pred_shard_size:
+            self.flush_pred_shard()
+
+    def flush_pred_shard(self) -> Optional[str]:
+        """Save the buffered predictions in a shard.
+
+        The shard is saved as ``{pred_out_dir}/preds/shard_{idx:05d}.npz``
+        with the instance predictions of all images concatenated, so that
+        they can be loaded by ``np.load`` without pickle:
+
+        - ``img_names``: Names of the images, i.e. the names of the json
+          files in the ``'json'`` format.
+        - ``offsets``: Offsets of the instances of each image, i.e. the
+          instances of the i-th image are in ``[offsets[i], offsets[i + 1])``.
+        - ``labels``, ``scores``, ``bboxes``: Instance predictions.
+        - ``mask_sizes``, ``mask_counts``, ``mask_counts_offsets``: Sizes and
+          compressed RLE counts of the masks, if the model predicts masks.
+          The counts of the i-th mask are ``mask_counts[
+          mask_counts_offsets[i]:mask_counts_offsets[i + 1]]``.
+
+        It is called at the end of :meth:`__call__` and :meth:`stream`, and
+        should be called manually if :meth:`postprocess` is used directly.
+
+        Returns:
+            str, optional: Path of the shard, which is None if there is no
+            buffered prediction.
+        """
+        shard = self._pred_shard
+        self._pred_shard = None
+        if shard is None or len(shard['instances']) == 0:
+            return None
+        instances_list = shard['instances']
+        offsets = np.zeros(len(instances_list) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(instances.get('labels', [])) for instances in instances_list],
+            out=offsets[1:])
+
+        def concat(key, dtype, shape):
+            # fill zeros for the images without the key
+            return np.concatenate([np.zeros((0, ) + shape, dtype=dtype)] + [
+                instances[key].astype(dtype).reshape((-1, ) + shape) if key in
+                instances else np.zeros((num, ) + shape, dtype=dtype)
+                for instances, num in zip(instances_list, np.diff(offsets))
+            ])
+
+        arrays = dict(
+            img_names=np.array(shard['img_names']),
+            offsets=offsets,
+            labels=concat('labels', np.int64, ()),
+            scores=concat('scores', np.float32, ()),
+            bboxes=concat('bboxes', np.float32, (4, )))
+        if any('masks' in instances for instances in instances_list):
+            rles = [
+                rle for instances in instances_list if 'masks' in instances
+                for rle in instances['masks'].masks
+            ]
+            counts = [
+                rle['counts'].encode()
+                if isinstance(rle['counts'], str) else rle['counts']
+                for rle in rles
+            ]
+            counts_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum([len(c) for c in counts], out=counts_offsets[1:])
+            arrays['mask_sizes'] = np.array([rle['size'] for rle in rles],
+                                            dtype=np.int64)
+            arrays['mask_counts'] = np.frombuffer(
+                b''.join(counts), dtype=np.uint8)
+            arrays['mask_counts_offsets'] = counts_offsets
+
+        out_file = osp.join(shard['out_dir'], 'preds',
+                            f'shard_{self.num_pred_shards:05d}.npz')
+        mmengine.mkdir_or_exist(osp.dirname(out_file))
+        np.savez(out_file, **arrays)
+        self.num_pred_shards += 1
+        return out_file
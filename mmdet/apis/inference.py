@@ -1,6 +1,10 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import asyncio
 import copy
+import itertools
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Sequence, Union
 
@@ -21,6 +25,7 @@ from ..evaluation import get_classes
 from ..registry import MODELS
 from ..structures import DetDataSample, SampleList
 from ..utils import get_test_pipeline_cfg
+from .async_detector import AsyncDetector
 
 
 def init_detector(
@@ -125,6 +130,8 @@ def inference_detector(
     test_pipeline: Optional[Compose] = None,
     text_prompt: Optional[str] = None,
     custom_entities: bool = False,
+    batch_size: int = 1,
+    num_workers: int = 0,
 ) -> Union[DetDataSample, SampleList]:
     """Inference image(s) with the detector.
 
@@ -133,6 +140,12 @@ def inference_detector(
         imgs (str, ndarray, Sequence[str/ndarray]):
            Either image files or loaded images.
         test_pipeline (:obj:`Compose`): Test pipeline.
+        batch_size (int): Number of images forwarded by the model at once.
+            The images of a batch are padded to the same size by the data
+            preprocessor, so the results can be slightly different from
+            the ones of inferring the images one by one. Defaults to 1.
+        num_workers (int): Number of threads used to run the test pipeline.
+            If 0, the pipeline runs in the main thread. Defaults to 0.
 
     Returns:
         :obj:`DetDataSample` or list[:obj:`DetDataSample`]:
@@ -149,8 +162,8 @@ def inference_detector(
     cfg = model.cfg
 
     if test_pipeline is None:
-        cfg = cfg.copy()
-        test_pipeline = get_test_pipeline_cfg(cfg)
+        # the pipeline of ``cfg`` is shared by ``Config.copy``
+        test_pipeline = copy.deepcopy(get_test_pipeline_cfg(cfg))
         if isinstance(imgs[0], np.ndarray):
             # Calling this method across libraries will result
             # in module unregistered error if not prefixed with mmdet.
@@ -164,9 +177,7 @@ def inference_detector(
                 m, RoIPool
             ), 'CPU inference with RoIPool is not supported currently.'
 
-    result_list = []
-    for i, img in enumerate(imgs):
-        # prepare data
+    def prepare_data(img):
         if isinstance(img, np.ndarray):
             # TODO: remove img_id.
             data_ = dict(img=img, img_id=0)
@@ -179,16 +190,37 @@ def inference_detector(
             data_['custom_entities'] = custom_entities
 
         # build the data pipeline
-        data_ = test_pipeline(data_)
+        return test_pipeline(data_)
+
+    def iter_data():
+        if num_workers <= 0:
+            yield from map(prepare_data, imgs)
+            return
+        # prepare the following images while the model is forwarding, and
+        # limit the number of pending images to bound the memory
+        max_pending = 2 * max(batch_size, num_workers)
+        with ThreadPoolExecutor(num_workers) as executor:
+            futures = deque()
+            for img in imgs:
+                futures.append(executor.submit(prepare_data, img))
+                if len(futures) >= max_pending:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
 
-        data_['inputs'] = [data_['inputs']]
-        data_['data_samples'] = [data_['data_samples']]
+    result_list = []
+    data_iter = iter_data()
+    for _ in range(0, len(imgs), batch_size):
+        batch = list(itertools.islice(data_iter, batch_size))
+        data_ = dict(
+            inputs=[data['inputs'] for data in batch],
+            data_samples=[data['data_samples'] for data in batch])
 
         # forward the model
         with torch.no_grad():
-            results = model.test_step(data_)[0]
+            results = model.test_step(data_)
 
-        result_list.append(results)
+        result_list.extend(results)
 
     if not is_batch:
         return result_list[0]
@@ -196,53 +228,38 @@ def inference_detector(
         return result_list
 
 
-# TODO: Awaiting refactoring
-async def async_inference_detector(model, imgs):
+async def async_inference_detector(
+        model: nn.Module,
+        imgs: ImagesType) -> Union[DetDataSample, SampleList]:
     """Async inference image(s) with the detector.
 
+    The images are inferred concurrently in batches by
+    :class:`AsyncDetector`. To serve concurrent requests, please use one
+    :class:`AsyncDetector` instead.
+
     Args:
         model (nn.Module): The loaded detector.
-        img (str | ndarray): Either image files or loaded images.
+        imgs (str, ndarray, Sequence[str/ndarray]):
+           Either image files or loaded images.
 
     Returns:
-        Awaitable detection results.
+        :obj:`DetDataSample` or list[:obj:`DetDataSample`]:
+        If imgs is a list or tuple, the same length list type results
+        will be returned, otherwise return the detection results directly.
     """
-    if not isinstance(imgs, (list, tuple)):
+    if isinstance(imgs, (list, tuple)):
+        is_batch = True
+    else:
         imgs = [imgs]
+        is_batch = False
 
-    cfg = model.cfg
-
-    if isinstance(imgs[0], np.ndarray):
-        cfg = cfg.copy()
-        # set loading pipeline type
-        cfg.data.test.pipeline[0].type = 'LoadImageFromNDArray'
-
-    # cfg.data.test.pipeline = replace_ImageToTensor(cfg.data.test.pipeline)
-    test_pipeline = Compose(cfg.data.test.pipeline)
+    async with AsyncDetector(model) as detector:
+        results = await asyncio.gather(*[detector.submit(img) for img in imgs])
 
-    datas = []
-    for img in imgs:
-        # prepare data
-        if isinstance(img, np.ndarray):
-            # directly add img
-            data = dict(img=img)
-        else:
-            # add information into dict
-            data = dict(img_info=dict(filename=img), img_prefix=None)
-        # build the data pipeline
-        data = test_pipeline(data)
-        datas.append(data)
-
-    for m in model.modules():
-        assert not isinstance(
-            m,
-            RoIPool), 'CPU inference with RoIPool is not supported currently.'
-
-    # We don't restore `torch.is_grad_enabled()` value during concurrent
-    # inference since execution can overlap
-    torch.set_grad_enabled(False)
-    results = await model.aforward_test(data, rescale=True)
-    return results
+    if not is_batch:
+        return results[0]
+    else:
+        return list(results)
 
 
 def build_test_pipeline(cfg: ConfigType) -> ConfigType:
@@ -0,0 +1,227 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import time
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import torch
+import torch.nn as nn
+from mmcv.ops import RoIPool
+from mmengine.dataset import default_collate
+
+from ..structures import TrackDataSample
+from .inference import build_test_pipeline
+
+
+class _Stream:
+    """The tracker and the counters of a stream."""
+
+    def __init__(self, tracker: nn.Module) -> None:
+        self.tracker = tracker
+        self.frame_id = 0
+        self.total_latency = 0.
+        self.last_latency = 0.
+        self.start_time = time.perf_counter()
+
+
+class MultiStreamRunner:
+    """Track the objects in many video streams with one MOT model.
+
+    Each stream keeps an independent tracker. In each :meth:`step`, the
+    current frames of the streams are batched into one forward of the
+    detector, where the frames are padded to the same size by the
+    ``TrackDataPreprocessor`` of the model, and then the detections of each
+    stream are associated by the tracker of the stream. Streams can be added
+    and removed between the steps, e.g. when cameras go online or offline.
+
+    Note that the post-processing over a whole video, e.g. the
+    interpolation of StrongSORT, is not applied to the streams.
+
+    Args:
+        model (nn.Module): The MOT model loaded by :func:`init_track_model`.
+        max_batch_size (int, optional): Maximum number of frames forwarded
+            by the detector at once. Defaults to None, which forwards the
+            frames of all streams of a step at once.
+
+    Examples:
+        >>> from mmdet.apis import MultiStreamRunner, init_track_model
+        >>> model = init_track_model(config_file, checkpoint_file)
+        >>> runner = MultiStreamRunner(model)
+        >>> runner.add_stream('cam0')
+        >>> runner.add_stream('cam1')
+        >>> results = runner.step({'cam0': frame0, 'cam1': frame1})
+        >>> results['cam0'][0].pred_track_instances.instances_id
+        >>> runner.get_stats('cam0')
+    """
+
+    def __init__(self,
+                 model: nn.Module,
+                 max_batch_size: Optional[int] = None) -> None:
+        self.model = model
+        self.max_batch_size = max_batch_size
+
+        if model.data_preprocessor.device.type == 'cpu':
+            for m in model.modules():
+                assert not isinstance(
+                    m, RoIPool
+                ), 'CPU inference with RoIPool is not supported currently.'
+
+        self.test_pipeline = build_test_pipeline(model.cfg)
+        self._tracker = copy.deepcopy(model.tracker)
+        # QDTrack associates the objects by the features of its detector
+        self._with_feats = hasattr(model, 'track_head')
+        self._streams: Dict[Hashable, _Stream] = dict()
+
+    @property
+    def stream_ids(self) -> List[Hashable]:
+        """list: The ids of the streams."""
+        return list(self._streams.keys())
+
+    def add_stream(self, stream_id: Hashable) -> None:
+        """Add a stream with a new tracker.
+
+        Args:
+            stream_id (Hashable): The id of the stream.
+        """
+        if stream_id in self._streams:
+            raise ValueError(f'The stream {stream_id} already exists.')
+        tracker = copy.deepcopy(self._tracker)
+        tracker.reset()
+        self._streams[stream_id] = _Stream(tracker)
+
+    def remove_stream(self, stream_id: Hashable) -> dict:
+        """Remove a stream and its tracks.
+
+        Args:
+            stream_id (Hashable): The id of the stream.
+
+        Returns:
+            dict: The final counters of the stream, see :meth:`get_stats`.
+        """
+        stats = self.get_stats(stream_id)
+        del self._streams[stream_id]
+        return stats
+
+    def get_stats(self, stream_id: Hashable) -> dict:
+        """Get the counters of a stream.
+
+        Args:
+            stream_id (Hashable): The id of the stream.
+
+        Returns:
+            dict: The counters, including
+
+            - num_frames (int): Number of frames processed.
+            - latency (float): Mean seconds from the start of a step to the
+              results of the stream.
+            - last_latency (float): Seconds of the last frame.
+            - fps (float): Frames processed per second since the stream was
+              added.
+        """
+        if stream_id not in self._streams:
+            raise KeyError(f'The stream {stream_id} does not exist.')
+        stream = self._streams[stream_id]
+        duration = time.perf_counter() - stream.start_time
+        return dict(
+            num_frames=stream.frame_id,
+            latency=stream.total_latency / max(stream.frame_id, 1),
+            last_latency=stream.last_latency,
+            fps=stream.frame_id / duration if duration > 0 else 0.)
+
+    def _prepare_data(self, img: np.ndarray, frame_id: int) -> dict:
+        """Run the test pipeline on a frame, the same as
+        :func:`inference_mot`."""
+        data = dict(
+            img=[img.astype(np.float32)],
+            frame_id=[frame_id],
+            ori_shape=[img.shape[:2]],
+            img_id=[frame_id + 1],
+            ori_video_length=[-1])
+        return self.test_pipeline(data)
+
+    def _detect(self, inputs: torch.Tensor,
+                data_samples: List[TrackDataSample]) -> List[dict]:
+        """Detect the objects in a batch of frames.
+
+        Returns:
+            list[dict]: The keyword arguments to track each frame.
+        """
+        img_data_samples = [
+            track_data_sample[0] for track_data_sample in data_samples
+        ]
+        imgs = inputs[:, 0].contiguous()
+        detector = self.model.detector
+        if self._with_feats:
+            feats = detector.extract_feat(imgs)
+            rpn_results_list = detector.rpn_head.predict(
+                feats, img_data_samples)
+            det_results = detector.roi_head.predict(
+                feats, rpn_results_list, img_data_samples, rescale=True)
+            for img_data_sample, det_result in zip(img_data_samples,
+                                                   det_results):
+                img_data_sample.pred_instances = det_result
+        else:
+            feats = None
+            detector.predict(imgs, img_data_samples)
+
+        # e.g. the normalization config of the ReID model in DeepSORT
+        preprocess_cfg = getattr(self.model, 'preprocess_cfg', None)
+        track_kwargs = []
+        for i, img_data_sample in enumerate(img_data_samples):
+            img_feats = None
+            if feats is not None:
+                img_feats = [feat[i:i + 1] for feat in feats]
+            track_kwargs.append(
+                dict(
+                    model=self.model,
+                    img=imgs[i:i + 1],
+                    feats=img_feats,
+                    data_sample=img_data_sample,
+                    data_preprocessor=preprocess_cfg,
+                    rescale=True))
+        return track_kwargs
+
+    def step(self, frames: Dict[Hashable, np.ndarray]) -> dict:
+        """Track the objects in the current frames of some streams.
+
+        Args:
+            frames (dict[Hashable, np.ndarray]): The current frame of each
+                stream, which is a BGR image. The streams without frames in
+                this step are skipped.
+
+        Returns:
+            dict[Hashable, :obj:`TrackDataSample`]: The tracking results of
+            each stream, where ``result[0].pred_track_instances`` are the
+            tracked objects of the frame.
+        """
+        start = time.perf_counter()
+        for stream_id in frames:
+            if stream_id not in self._streams:
+                raise KeyError(f'The stream {stream_id} does not exist.')
+        stream_ids = list(frames.keys())
+        batch_size = self.max_batch_size or max(len(stream_ids), 1)
+
+        results = dict()
+        for i in range(0, len(stream_ids), batch_size):
+            batch_ids = stream_ids[i:i + batch_size]
+            data = [
+                self._prepare_data(frames[stream_id],
+                                   self._streams[stream_id].frame_id)
+                for stream_id in batch_ids
+            ]
+            with torch.no_grad():
+                data = self.model.data_preprocessor(
+                    default_collate(data), False)
+                track_kwargs = self._detect(data['inputs'],
+                                            data['data_samples'])
+                for stream_id, track_data_sample, kwargs in zip(
+                        batch_ids, data['data_samples'], track_kwargs):
+                    stream = self._streams[stream_id]
+                    track_data_sample[0].pred_track_instances = \
+                        stream.tracker.track(**kwargs)
+                    results[stream_id] = track_data_sample
+
+                    stream.frame_id += 1
+                    stream.last_latency = time.perf_counter() - start
+                    stream.total_latency += stream.last_latency
+        return results
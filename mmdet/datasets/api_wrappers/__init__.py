@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .coco_api import COCO, COCOeval, COCOPanoptic
+from .coco_cache import COCOCache
 from .cocoeval_mp import COCOevalMP
 
-__all__ = ['COCO', 'COCOeval', 'COCOPanoptic', 'COCOevalMP']
+__all__ = ['COCO', 'COCOeval', 'COCOPanoptic', 'COCOevalMP', 'COCOCache']
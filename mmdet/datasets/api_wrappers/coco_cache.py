@@ -0,0 +1,306 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import json
+import os
+import os.path as osp
+import pickle
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+_MAGIC = b'MMDETANN'
+_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _is_valid_ann(ann: dict, img_info: dict) -> bool:
+    """Whether an annotation is kept by ``CocoDataset.parse_data_info``
+    regardless of its category."""
+    if ann.get('ignore', False):
+        return False
+    x1, y1, w, h = ann['bbox']
+    inter_w = max(0, min(x1 + w, img_info['width']) - max(x1, 0))
+    inter_h = max(0, min(y1 + h, img_info['height']) - max(y1, 0))
+    if inter_w * inter_h == 0:
+        return False
+    if ann['area'] <= 0 or w < 1 or h < 1:
+        return False
+    return True
+
+
+def _encode_strings(strings: List[bytes]) -> Dict[str, np.ndarray]:
+    """Encode a list of bytes as a flat buffer and the offsets."""
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in strings], out=offsets[1:])
+    data = np.frombuffer(b''.join(strings), dtype=np.uint8)
+    return dict(data=data, offsets=offsets)
+
+
+class COCOCache:
+    """Memory-mapped columnar cache of a COCO style annotation file.
+
+    Parsing a large annotation file (e.g. Objects365 and V3Det) with
+    :class:`COCO` takes minutes and the resulting Python objects are copied
+    by every process. The cache stores the images and annotations as flat
+    arrays in a single binary file, which is memory-mapped so that the
+    processes on a node share the same pages.
+
+    The file starts with a magic number and a json header describing the
+    source annotation file and the arrays, followed by the 64-byte aligned
+    arrays:
+
+        - ``img_ids``, ``heights``, ``widths``: Image information.
+        - ``file_names``: File names of images in a string table.
+        - ``ann_offsets``: Offsets of the annotations of each image, i.e.
+          the annotations of the i-th image are in
+          ``[ann_offsets[i], ann_offsets[i + 1])``.
+        - ``ann_ids``, ``category_ids``: Ids of annotations.
+        - ``bboxes``: Boxes of annotations in (x1, y1, x2, y2) format.
+        - ``iscrowd``: Whether annotations are crowd annotations.
+        - ``valid``: Whether annotations are kept by
+          :meth:`CocoDataset.parse_data_info` regardless of their
+          categories, i.e. they are not ignored, empty or too small.
+        - ``segmentations``: Pickled polygons or RLEs of annotations in a
+          string table, which is empty if there is no segmentation.
+
+    Args:
+        cache_file (str): Path of the cache file generated by :meth:`dump`.
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_file: str) -> None:
+        self.cache_file = cache_file
+        header, header_len = self._read_header(cache_file)
+        if header['version'] != self.VERSION:
+            raise ValueError(
+                f'The version of {cache_file} is {header["version"]}, but '
+                f'{self.VERSION} is expected. Please remove it to regenerate '
+                'the cache.')
+        self.source = header['source']
+        self.categories = header['categories']
+        self.ann_ids_unique = header['ann_ids_unique']
+
+        # use plain arrays to avoid the overhead of indexing `np.memmap`
+        buffer = np.memmap(
+            cache_file, dtype=np.uint8, mode='r').view(np.ndarray)
+        data_start = _align(len(_MAGIC) + 8 + header_len)
+        arrays = {}
+        for name, info in header['arrays'].items():
+            start = data_start + info['offset']
+            dtype = np.dtype(info['dtype'])
+            num_bytes = int(np.prod(info['shape'])) * dtype.itemsize
+            arrays[name] = buffer[start:start + num_bytes].view(dtype).reshape(
+                info['shape'])
+        self._arrays = arrays
+
+        self.img_ids = arrays['img_ids']
+        self.heights = arrays['heights']
+        self.widths = arrays['widths']
+        self.ann_offsets = arrays['ann_offsets']
+        self.ann_ids = arrays['ann_ids']
+        self.category_ids = arrays['category_ids']
+        self.bboxes = arrays['bboxes']
+        self.iscrowd = arrays['iscrowd']
+        self.valid = arrays['valid']
+
+    def __len__(self) -> int:
+        return self.img_ids.shape[0]
+
+    @staticmethod
+    def _read_header(cache_file: str) -> Tuple[dict, int]:
+        with open(cache_file, 'rb') as f:
+            magic = f.read(len(_MAGIC))
+            if magic != _MAGIC:
+                raise ValueError(f'{cache_file} is not an annotation cache.')
+            header_len = int.from_bytes(f.read(8), 'little')
+            return json.loads(f.read(header_len)), header_len
+
+    @staticmethod
+    def get_source(ann_file: str) -> dict:
+        """Get the information of an annotation file that identifies its
+        cache, i.e. the path, and the size and modification time if the file
+        is local."""
+        source = dict(path=ann_file)
+        if osp.isfile(ann_file):
+            stat = os.stat(ann_file)
+            source.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        return source
+
+    @classmethod
+    def is_valid(cls, cache_file: str, source: dict) -> bool:
+        """Whether a cache file exists and is generated from the annotation
+        file by the current version.
+
+        Args:
+            cache_file (str): Path of the cache file.
+            source (dict): Information of the annotation file returned by
+                :meth:`get_source`.
+
+        Returns:
+            bool: Whether the cache file is up to date.
+        """
+        if not osp.exists(cache_file):
+            return False
+        header, _ = cls._read_header(cache_file)
+        return header['version'] == cls.VERSION and header.get(
+            'source') == source
+
+    def __getstate__(self) -> dict:
+        # reopen the file instead of pickling the arrays, so that the
+        # processes share the memory-mapped pages
+        return dict(cache_file=self.cache_file)
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['cache_file'])
+
+    @staticmethod
+    def _get_string(data: np.ndarray, offsets: np.ndarray, idx: int) -> bytes:
+        start, end = offsets[idx:idx + 2].tolist()
+        return data[start:end].tobytes()
+
+    def get_file_name(self, idx: int) -> str:
+        """Get the file name of the idx-th image."""
+        return self._get_string(self._arrays['file_names_data'],
+                                self._arrays['file_names_offsets'],
+                                idx).decode('utf-8')
+
+    def get_segmentations(
+            self, ann_inds: np.ndarray) -> List[Optional[Union[list, dict]]]:
+        """Get the segmentations of annotations.
+
+        Args:
+            ann_inds (np.ndarray): Sorted indices of the annotations, which
+                usually belong to the same image.
+
+        Returns:
+            list: Polygons or RLEs of the annotations, which are None if the
+            annotations have no segmentation.
+        """
+        if len(ann_inds) == 0:
+            return []
+        offsets = self._arrays['segmentations_offsets']
+        starts = offsets[ann_inds].tolist()
+        ends = offsets[ann_inds + 1].tolist()
+        # read the adjacent blobs in one go
+        base = starts[0]
+        blobs = self._arrays['segmentations_data'][base:ends[-1]].tobytes()
+        return [
+            pickle.loads(blobs[start - base:end -
+                               base]) if end > start else None
+            for start, end in zip(starts, ends)
+        ]
+
+    def get_cat_ids(self, cat_names: list = []) -> List[int]:
+        """Get category ids by category names, which is the same as
+        :meth:`COCO.get_cat_ids`."""
+        if not isinstance(cat_names, (list, tuple)):
+            cat_names = [cat_names]
+        cats = self.categories
+        if len(cat_names) > 0:
+            cats = [cat for cat in cats if cat['name'] in cat_names]
+        return [cat['id'] for cat in cats]
+
+    def get_ann_img_inds(self) -> np.ndarray:
+        """Get the index of the image that each annotation belongs to."""
+        return np.repeat(
+            np.arange(len(self), dtype=np.int64), np.diff(self.ann_offsets))
+
+    def get_cat_img_map(self) -> Dict[int, np.ndarray]:
+        """Get the ids of images that contain each category, which is the
+        same as ``COCO.cat_img_map`` except that the ids are arrays."""
+        img_ids = self.img_ids[self.get_ann_img_inds()]
+        order = np.argsort(self.category_ids, kind='stable')
+        cat_ids, starts = np.unique(
+            self.category_ids[order], return_index=True)
+        img_ids = np.split(img_ids[order], starts[1:])
+        return {cat_id.item(): ids for cat_id, ids in zip(cat_ids, img_ids)}
+
+    @classmethod
+    def dump(cls,
+             coco,
+             cache_file: str,
+             source: Optional[dict] = None) -> None:
+        """Generate the cache of a loaded annotation file.
+
+        The file is written to a temporary file and then renamed, so that
+        concurrent readers never see a partially written cache.
+
+        Args:
+            coco (COCO): The loaded annotation file.
+            cache_file (str): Path of the cache file.
+            source (dict, optional): Information of the annotation file
+                returned by :meth:`get_source`, which is checked by
+                :meth:`is_valid`. Defaults to None.
+        """
+        img_ids = coco.get_img_ids()
+        heights, widths, file_names = [], [], []
+        ann_counts, ann_ids, category_ids, bboxes = [], [], [], []
+        iscrowd, valid, segmentations = [], [], []
+        for img_id in img_ids:
+            img_info = coco.load_imgs([img_id])[0]
+            heights.append(img_info['height'])
+            widths.append(img_info['width'])
+            file_names.append(img_info['file_name'].encode('utf-8'))
+            img_ann_ids = coco.get_ann_ids(img_ids=[img_id])
+            ann_counts.append(len(img_ann_ids))
+            ann_ids.extend(img_ann_ids)
+            for ann in coco.load_anns(img_ann_ids):
+                x1, y1, w, h = ann['bbox']
+                bboxes.append([x1, y1, x1 + w, y1 + h])
+                category_ids.append(ann['category_id'])
+                iscrowd.append(bool(ann.get('iscrowd', False)))
+                valid.append(_is_valid_ann(ann, img_info))
+                segmentation = ann.get('segmentation', None)
+                segmentations.append(
+                    pickle.dumps(segmentation, protocol=4
+                                 ) if segmentation else b'')
+
+        ann_offsets = np.zeros(len(img_ids) + 1, dtype=np.int64)
+        np.cumsum(ann_counts, out=ann_offsets[1:])
+        arrays = dict(
+            img_ids=np.array(img_ids, dtype=np.int64),
+            heights=np.array(heights, dtype=np.int64),
+            widths=np.array(widths, dtype=np.int64),
+            ann_offsets=ann_offsets,
+            ann_ids=np.array(ann_ids, dtype=np.int64),
+            category_ids=np.array(category_ids, dtype=np.int64),
+            bboxes=np.array(bboxes, dtype=np.float64).reshape(-1, 4),
+            iscrowd=np.array(iscrowd, dtype=bool),
+            valid=np.array(valid, dtype=bool))
+        for name, strings in [('file_names', file_names),
+                              ('segmentations', segmentations)]:
+            for key, value in _encode_strings(strings).items():
+                arrays[f'{name}_{key}'] = value
+
+        header = dict(
+            version=cls.VERSION,
+            source=source,
+            categories=[
+                dict(id=cat['id'], name=cat['name'])
+                for cat in coco.dataset.get('categories', [])
+            ],
+            ann_ids_unique=len(set(ann_ids)) == len(ann_ids),
+            arrays={})
+        offset = 0
+        for name, array in arrays.items():
+            header['arrays'][name] = dict(
+                dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+            offset = _align(offset + array.nbytes)
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_start = _align(len(_MAGIC) + 8 + len(header_bytes))
+
+        dir_name = osp.dirname(osp.abspath(cache_file))
+        os.makedirs(dir_name, exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, 'little'))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_file, cache_file)
@@ -8,10 +8,37 @@ import numpy as np
 import torch.multiprocessing as mp
 from mmengine.logging import MMLogger
 from pycocotools.cocoeval import COCOeval
-from tqdm import tqdm
+
+# The evaluator shared with pool workers, see ``COCOevalMP._run_pool``.
+_WORKER_EVALUATOR = None
+
+
+def _init_worker(evaluator):
+    global _WORKER_EVALUATOR
+    _WORKER_EVALUATOR = evaluator
+
+
+def _evaluate_task(task):
+    return _WORKER_EVALUATOR._evaluateTask(*task)
 
 
 class COCOevalMP(COCOeval):
+    """Multi-processing version of :class:`COCOeval`.
+
+    Args:
+        cocoGt (COCO, optional): Ground truth COCO api. Defaults to None.
+        cocoDt (COCO, optional): Detection COCO api. Defaults to None.
+        iouType (str): Type of IoU, one of 'segm', 'bbox' and 'keypoints'.
+            Defaults to 'segm'.
+        nproc (int): Number of processes used for evaluation. When it
+            exceeds the number of cpu cores, the number of cpu cores is used.
+            Defaults to 8.
+    """
+
+    def __init__(self, cocoGt=None, cocoDt=None, iouType='segm', nproc=8):
+        super().__init__(cocoGt, cocoDt, iouType)
+        assert nproc > 0, 'nproc must be at least one.'
+        self.nproc = min(nproc, mp.cpu_count())
 
     def _prepare(self):
         '''
@@ -71,6 +98,14 @@ class COCOevalMP(COCOeval):
         """Run per image evaluation on given images and store results (a list
         of dict) in self.evalImgs.
 
+        Annotations are prepared only once in the main process. Workers
+        inherit the prepared ``_gts`` and ``_dts`` via fork copy-on-write
+        (or receive them once through the pool initializer on platforms
+        without ``fork``), and consume load-balanced tasks built from the
+        per-category GT and DT counts. The order of ``self.evalImgs`` is
+        identical to :class:`COCOeval`, so ``accumulate`` and ``summarize``
+        produce the same results.
+
         :return: None
         """
         tic = time.time()
@@ -88,44 +123,103 @@ class COCOevalMP(COCOeval):
         p.maxDets = sorted(p.maxDets)
         self.params = p
 
+        self._prepare()
         # loop through images, area range, max detection number
         catIds = p.catIds if p.useCats else [-1]
 
-        nproc = 8
-        split_size = len(catIds) // nproc
-        mp_params = []
-        for i in range(nproc):
-            begin = i * split_size
-            end = (i + 1) * split_size
-            if i == nproc - 1:
-                end = len(catIds)
-            mp_params.append((catIds[begin:end], ))
-
-        MMLogger.get_current_instance().info(
-            'start multi processing evaluation ...')
-        with mp.Pool(nproc) as pool:
-            self.evalImgs = pool.starmap(self._evaluateImg, mp_params)
+        tasks = self._split_tasks(catIds)
+        nproc = min(self.nproc, len(tasks))
+        if nproc <= 1:
+            task_results = [self._evaluateTask(*task) for task in tasks]
+        else:
+            MMLogger.get_current_instance().info(
+                f'start multi processing evaluation with {nproc} processes '
+                f'and {len(tasks)} tasks ...')
+            task_results = self._run_pool(tasks, nproc)
 
-        self.evalImgs = list(itertools.chain(*self.evalImgs))
+        # restore the ``category -> area range -> image`` order of COCOeval
+        cat_tasks = defaultdict(list)
+        for task, task_result in zip(tasks, task_results):
+            cat_tasks[task[0]].append((task[1], task_result))
+        evalImgs = []
+        for catId in catIds:
+            chunks = sorted(cat_tasks[catId], key=lambda x: x[0])
+            for a_ind in range(len(p.areaRng)):
+                for _, chunk_result in chunks:
+                    evalImgs.extend(chunk_result[a_ind])
+        self.evalImgs = evalImgs
 
         self._paramsEval = copy.deepcopy(self.params)
         toc = time.time()
         print('DONE (t={:0.2f}s).'.format(toc - tic))
 
-    def _evaluateImg(self, catids_chunk):
-        self._prepare()
+    def _split_tasks(self, catIds):
+        """Split the evaluation into load-balanced ``(catId, begin, end)``
+        tasks, where ``begin`` and ``end`` index ``self.params.imgIds``.
+
+        The cost of a category is estimated by the number of its GT and DT
+        instances. Categories costing more than an even share of the total
+        are further split along images so that a few dominant categories do
+        not become the tail of the pool. Tasks are sorted by descending cost
+        so that the pool schedules the largest ones first.
+        """
+        p = self.params
+        num_imgs = len(p.imgIds)
+        cat_costs = defaultdict(int)
+        for (_, catId), anns in itertools.chain(self._gts.items(),
+                                                self._dts.items()):
+            cat_costs[catId if p.useCats else -1] += len(anns)
+
+        total_cost = sum(cat_costs[catId] for catId in catIds)
+        target_cost = max(total_cost / max(self.nproc, 1), 1)
+        tasks = []
+        for catId in catIds:
+            cost = cat_costs[catId]
+            num_splits = min(
+                max(int(np.ceil(cost / target_cost)), 1), max(num_imgs, 1))
+            bounds = np.linspace(0, num_imgs, num_splits + 1).astype(int)
+            for begin, end in zip(bounds[:-1], bounds[1:]):
+                tasks.append((catId, int(begin), int(end),
+                              cost * (end - begin) / max(num_imgs, 1)))
+        order = sorted(range(len(tasks)), key=lambda i: -tasks[i][3])
+        return [tasks[i][:3] for i in order]
+
+    def _run_pool(self, tasks, nproc):
+        """Evaluate tasks with a process pool sharing the prepared
+        annotations."""
+        global _WORKER_EVALUATOR
+        if 'fork' in mp.get_all_start_methods():
+            # children inherit the prepared annotations copy-on-write
+            ctx = mp.get_context('fork')
+            initializer, initargs = None, ()
+            _WORKER_EVALUATOR = self
+        else:
+            # the COCO apis are not needed once ``_prepare`` is done, so
+            # only the prepared annotations are sent to each worker once
+            worker_evaluator = copy.copy(self)
+            worker_evaluator.cocoGt = worker_evaluator.cocoDt = None
+            ctx = mp.get_context()
+            initializer, initargs = _init_worker, (worker_evaluator, )
+        try:
+            with ctx.Pool(
+                    nproc, initializer=initializer, initargs=initargs) as pool:
+                task_results = pool.map(_evaluate_task, tasks, chunksize=1)
+        finally:
+            _WORKER_EVALUATOR = None
+        return task_results
+
+    def _evaluateTask(self, catId, begin, end):
+        """Evaluate one category on ``self.params.imgIds[begin:end]``.
+
+        Returns:
+            list[list]: Per image evaluation results of each area range.
+        """
         p = self.params
         maxDet = max(p.maxDets)
-        all_params = []
-        for catId in catids_chunk:
-            for areaRng in p.areaRng:
-                for imgId in p.imgIds:
-                    all_params.append((catId, areaRng, imgId))
-        evalImgs = [
-            self.evaluateImg(imgId, catId, areaRng, maxDet)
-            for catId, areaRng, imgId in tqdm(all_params)
-        ]
-        return evalImgs
+        imgIds = p.imgIds[begin:end]
+        return [[
+            self.evaluateImg(imgId, catId, areaRng, maxDet) for imgId in imgIds
+        ] for areaRng in p.areaRng]
 
     def evaluateImg(self, imgId, catId, aRng, maxDet):
         p = self.params
@@ -1,13 +1,206 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import gc
 import os.path as osp
-from typing import List, Optional
+import pickle
+from functools import partial
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 from mmengine.dataset import BaseDataset
+from mmengine.dataset.base_dataset import force_full_init
 from mmengine.fileio import load
 from mmengine.utils import is_abs
 
 from ..registry import DATASETS
 
+# header of the serialized data information when ``lazy_instances=True``:
+# length of the pickled data information, number of instances (-1 if the
+# instances are pickled with the data information), length of the pickled
+# extra fields of instances and padding
+_HEADER_SIZE = 32
+
+
+class LazyInstances(Sequence):
+    """Instances of an image backed by arrays.
+
+    It behaves as the list of instance dicts in the data information, but the
+    boxes, labels and ignore flags are held by read-only arrays, which are
+    views of the serialized data shared by the dataloader workers. The dicts
+    are only materialized when the instances are accessed by index or
+    iteration, and they are kept afterwards so that modifications made by a
+    transform are visible to the following transforms. Transforms that only
+    need the arrays, e.g. :class:`LoadAnnotations`, should use
+    :attr:`bboxes`, :attr:`labels` and :attr:`ignore_flags` instead.
+
+    Args:
+        bboxes (np.ndarray): Boxes of the instances in shape (N, 4).
+        labels (np.ndarray): Labels of the instances in shape (N, ).
+        ignore_flags (np.ndarray): Ignore flags of the instances in
+            shape (N, ).
+        extras (Callable, optional): A function that returns the other fields
+            of the instances, e.g. ``mask``, as a list of dicts. Defaults to
+            None.
+    """
+
+    def __init__(self,
+                 bboxes: np.ndarray,
+                 labels: np.ndarray,
+                 ignore_flags: np.ndarray,
+                 extras: Optional[Callable[[], List[dict]]] = None) -> None:
+        self._bboxes = bboxes.view()
+        self._labels = labels.view()
+        self._ignore_flags = ignore_flags.view()
+        for array in (self._bboxes, self._labels, self._ignore_flags):
+            array.flags.writeable = False
+        self._extras = extras
+        self._instances: Optional[List[dict]] = None
+
+    @property
+    def materialized(self) -> bool:
+        """bool: Whether the instance dicts have been materialized."""
+        return self._instances is not None
+
+    def materialize(self) -> List[dict]:
+        """Get the list of instance dicts."""
+        if self._instances is None:
+            if self._extras is not None:
+                extras = self._extras()
+            else:
+                extras = [{} for _ in range(len(self._labels))]
+            instances = []
+            for bbox, label, ignore_flag, extra in zip(
+                    self._bboxes.tolist(), self._labels.tolist(),
+                    self._ignore_flags.tolist(), extras):
+                instance = dict(
+                    ignore_flag=ignore_flag, bbox=bbox, bbox_label=label)
+                instance.update(extra)
+                instances.append(instance)
+            self._instances = instances
+            self._extras = None
+        return self._instances
+
+    @property
+    def bboxes(self) -> np.ndarray:
+        """np.ndarray: Boxes of the instances in shape (N, 4)."""
+        if self._instances is None:
+            return self._bboxes
+        return np.array([instance['bbox'] for instance in self._instances],
+                        dtype=np.float64).reshape(-1, 4)
+
+    @property
+    def labels(self) -> np.ndarray:
+        """np.ndarray: Labels of the instances in shape (N, )."""
+        if self._instances is None:
+            return self._labels
+        return np.array(
+            [instance['bbox_label'] for instance in self._instances],
+            dtype=np.int64)
+
+    @property
+    def ignore_flags(self) -> np.ndarray:
+        """np.ndarray: Ignore flags of the instances in shape (N, )."""
+        if self._instances is None:
+            return self._ignore_flags
+        return np.array(
+            [instance['ignore_flag'] for instance in self._instances],
+            dtype=np.int8)
+
+    def __len__(self) -> int:
+        if self._instances is None:
+            return self._labels.shape[0]
+        return len(self._instances)
+
+    def __getitem__(self, idx):
+        return self.materialize()[idx]
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.materialize())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LazyInstances):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def __repr__(self) -> str:
+        return repr(self.materialize())
+
+    def __reduce__(self):
+        # the arrays may be views of a buffer that can not be pickled
+        return list, (self.materialize(), )
+
+
+def _instances_to_arrays(
+        instances) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Convert instance dicts to the arrays of :class:`LazyInstances`, or
+    return None if they can not be represented by the arrays."""
+    if not isinstance(instances, list):
+        return None
+    for instance in instances:
+        if not ('bbox' in instance and 'bbox_label' in instance
+                and 'ignore_flag' in instance):
+            return None
+        if len(instance['bbox']) != 4 or not isinstance(
+                instance['bbox_label'], (int, np.integer)):
+            return None
+    bboxes = np.array([instance['bbox'] for instance in instances],
+                      dtype=np.float64).reshape(-1, 4)
+    labels = np.array([instance['bbox_label'] for instance in instances],
+                      dtype=np.int64)
+    ignore_flags = np.array(
+        [instance['ignore_flag'] for instance in instances], dtype=np.int8)
+    return bboxes, labels, ignore_flags
+
+
+def _pack_data_info(data_info: dict) -> np.ndarray:
+    """Serialize a data information with the boxes, labels and ignore flags
+    of instances stored as raw arrays."""
+    arrays = _instances_to_arrays(data_info.get('instances', None))
+    if arrays is None:
+        info = pickle.dumps(data_info, protocol=4)
+        num_instances, extras, raw_arrays = -1, b'', []
+    else:
+        data_info = data_info.copy()
+        instances = data_info.pop('instances')
+        info = pickle.dumps(data_info, protocol=4)
+        num_instances = len(instances)
+        extras = [{
+            key: value
+            for key, value in instance.items()
+            if key not in ('bbox', 'bbox_label', 'ignore_flag')
+        } for instance in instances]
+        extras = pickle.dumps(extras, protocol=4) if any(extras) else b''
+        raw_arrays = [array.tobytes() for array in arrays]
+    header = np.array(
+        [len(info), num_instances, len(extras), 0], dtype=np.int64).tobytes()
+    buffer = b''.join([header, *raw_arrays, info, extras])
+    # keep the arrays of the next data information aligned
+    buffer += bytes(-len(buffer) % 8)
+    return np.frombuffer(buffer, dtype=np.uint8)
+
+
+def _unpack_data_info(buffer: np.ndarray) -> dict:
+    """Deserialize a data information packed by :func:`_pack_data_info`."""
+    info_len, num_instances, extras_len = buffer[:_HEADER_SIZE].view(
+        np.int64)[:3].tolist()
+    offset = _HEADER_SIZE
+    if num_instances < 0:
+        return pickle.loads(memoryview(buffer[offset:offset + info_len]))
+    arrays = []
+    for dtype, size in ((np.float64, 4), (np.int64, 1), (np.int8, 1)):
+        num_bytes = num_instances * size * np.dtype(dtype).itemsize
+        arrays.append(buffer[offset:offset + num_bytes].view(dtype))
+        offset += num_bytes
+    bboxes, labels, ignore_flags = arrays
+    data_info = pickle.loads(memoryview(buffer[offset:offset + info_len]))
+    offset += info_len
+    extras = None
+    if extras_len > 0:
+        extras = partial(pickle.loads,
+                         memoryview(buffer[offset:offset + extras_len]))
+    data_info['instances'] = LazyInstances(
+        bboxes.reshape(-1, 4), labels, ignore_flags, extras)
+    return data_info
+
 
 @DATASETS.register_module()
 class BaseDetDataset(BaseDataset):
@@ -23,6 +216,12 @@ class BaseDetDataset(BaseDataset):
             for open vocabulary-based algorithms. Defaults to False.
         caption_prompt (dict, optional): Prompt for captioning.
             Defaults to None.
+        lazy_instances (bool): Whether to store the boxes, labels and ignore
+            flags of instances as arrays in the serialized data, and return
+            the instances as :class:`LazyInstances`, which reduces the time
+            of deserializing data information and the memory of dataloader
+            workers. It only takes effect when ``serialize_data=True``.
+            Defaults to False.
     """
 
     def __init__(self,
@@ -33,12 +232,14 @@ class BaseDetDataset(BaseDataset):
                  backend_args: dict = None,
                  return_classes: bool = False,
                  caption_prompt: Optional[dict] = None,
+                 lazy_instances: bool = False,
                  **kwargs) -> None:
         self.seg_map_suffix = seg_map_suffix
         self.proposal_file = proposal_file
         self.backend_args = backend_args
         self.return_classes = return_classes
         self.caption_prompt = caption_prompt
+        self.lazy_instances = lazy_instances
         if self.caption_prompt is not None:
             assert self.return_classes, \
                 'return_classes must be True when using caption_prompt'
@@ -90,6 +291,50 @@ class BaseDetDataset(BaseDataset):
 
         self._fully_initialized = True
 
+    def _serialize_data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Serialize ``self.data_list`` to save memory when launching multiple
+        workers in data loading.
+
+        If ``self.lazy_instances`` is True, the boxes, labels and ignore
+        flags of instances are stored as raw arrays instead of pickled
+        dicts.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Serialized result and corresponding
+            address.
+        """
+        if not self.lazy_instances:
+            return super()._serialize_data()
+        data_list = [_pack_data_info(x) for x in self.data_list]
+        address_list = np.asarray([len(x) for x in data_list], dtype=np.int64)
+        data_address: np.ndarray = np.cumsum(address_list)
+        data_bytes = np.concatenate(data_list)
+        self.data_list.clear()
+        gc.collect()
+        return data_bytes, data_address
+
+    @force_full_init
+    def get_data_info(self, idx: int) -> dict:
+        """Get annotation by index.
+
+        Args:
+            idx (int): The index of data.
+
+        Returns:
+            dict: The idx-th annotation of the dataset, whose ``instances``
+            is a :class:`LazyInstances` if ``self.lazy_instances`` is True.
+        """
+        if not (self.serialize_data and self.lazy_instances):
+            return super().get_data_info(idx)
+        start_addr = 0 if idx == 0 else self.data_address[idx - 1].item()
+        end_addr = self.data_address[idx].item()
+        data_info = _unpack_data_info(self.data_bytes[start_addr:end_addr])
+        if idx >= 0:
+            data_info['sample_idx'] = idx
+        else:
+            data_info['sample_idx'] = len(self) + idx
+        return data_info
+
     def load_proposals(self) -> None:
         """Load proposals from proposals file.
 
@@ -128,4 +373,6 @@ class BaseDetDataset(BaseDataset):
             List[int]: All categories in the image of specified index.
         """
         instances = self.get_data_info(idx)['instances']
+        if isinstance(instances, LazyInstances):
+            return instances.labels.tolist()
         return [instance['bbox_label'] for instance in instances]
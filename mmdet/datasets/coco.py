@@ -1,13 +1,122 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import copy
 import os.path as osp
-from typing import List, Union
+from functools import partial
+from typing import List, Optional, Sequence, Union
 
+import numpy as np
+from mmengine.dist import barrier, is_main_process
 from mmengine.fileio import get_local_path
+from mmengine.utils import is_abs
 
 from mmdet.registry import DATASETS
-from .api_wrappers import COCO
-from .base_det_dataset import BaseDetDataset
+from .api_wrappers import COCO, COCOCache
+from .base_det_dataset import BaseDetDataset, LazyInstances
+
+
+class CocoCacheDataList(Sequence):
+    """A read-only data list backed by a :class:`COCOCache`.
+
+    The data information of an image is only parsed when it is accessed, and
+    it is the same as the output of :meth:`CocoDataset.parse_data_info`.
+
+    Args:
+        cache (COCOCache): The annotation cache.
+        ann_labels (np.ndarray): Label of each annotation, which is -1 if
+            the category of the annotation is not in the classes.
+        img_prefix (str): Prefix of image paths.
+        seg_prefix (str, optional): Prefix of semantic segmentation maps.
+        seg_map_suffix (str): Suffix of semantic segmentation maps.
+        text_info (dict, optional): Extra keys for open vocabulary-based
+            algorithms, i.e. ``text``, ``caption_prompt`` and
+            ``custom_entities``. Defaults to None.
+        indices (np.ndarray, optional): Indices of the images in the cache.
+            Defaults to None, which means all images.
+        lazy_instances (bool): Whether to return the instances as
+            :class:`LazyInstances` backed by the cache. Defaults to False.
+    """
+
+    def __init__(self,
+                 cache: COCOCache,
+                 ann_labels: np.ndarray,
+                 img_prefix: str,
+                 seg_prefix: Optional[str],
+                 seg_map_suffix: str,
+                 text_info: Optional[dict] = None,
+                 indices: Optional[np.ndarray] = None,
+                 lazy_instances: bool = False) -> None:
+        self.cache = cache
+        self.ann_labels = ann_labels
+        self.img_prefix = img_prefix
+        self.seg_prefix = seg_prefix
+        self.seg_map_suffix = seg_map_suffix
+        self.text_info = text_info
+        if indices is None:
+            indices = np.arange(len(cache), dtype=np.int64)
+        self.indices = indices
+        self.lazy_instances = lazy_instances
+
+    def __len__(self) -> int:
+        return self.indices.shape[0]
+
+    def subset(self, indices: Sequence[int]) -> 'CocoCacheDataList':
+        """Get a data list of the images at the given positions."""
+        return CocoCacheDataList(
+            self.cache, self.ann_labels, self.img_prefix, self.seg_prefix,
+            self.seg_map_suffix, self.text_info,
+            self.indices[np.asarray(indices,
+                                    dtype=np.int64)], self.lazy_instances)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return self.subset(np.arange(len(self))[idx])
+        return self._parse(self.indices[idx].item())
+
+    def _parse(self, img_idx: int) -> dict:
+        cache = self.cache
+        file_name = cache.get_file_name(img_idx)
+        data_info = {}
+        data_info['img_path'] = osp.join(self.img_prefix, file_name)
+        data_info['img_id'] = cache.img_ids[img_idx].item()
+        if self.seg_prefix:
+            data_info['seg_map_path'] = osp.join(
+                self.seg_prefix,
+                file_name.rsplit('.', 1)[0] + self.seg_map_suffix)
+        else:
+            data_info['seg_map_path'] = None
+        data_info['height'] = cache.heights[img_idx].item()
+        data_info['width'] = cache.widths[img_idx].item()
+        if self.text_info is not None:
+            data_info.update(self.text_info)
+
+        start, end = cache.ann_offsets[img_idx:img_idx + 2].tolist()
+        valid = cache.valid[start:end] & (self.ann_labels[start:end] >= 0)
+        keep = start + np.flatnonzero(valid)
+        if self.lazy_instances:
+            data_info['instances'] = LazyInstances(
+                cache.bboxes[keep], self.ann_labels[keep],
+                cache.iscrowd[keep].view(np.int8),
+                partial(self._get_mask_fields, keep))
+            return data_info
+        instances = []
+        for bbox, label, ignore_flag, segmentation in zip(
+                cache.bboxes[keep].tolist(), self.ann_labels[keep].tolist(),
+                cache.iscrowd[keep].tolist(), cache.get_segmentations(keep)):
+            instance = {}
+            instance['ignore_flag'] = int(ignore_flag)
+            instance['bbox'] = bbox
+            instance['bbox_label'] = label
+            if segmentation is not None:
+                instance['mask'] = segmentation
+            instances.append(instance)
+        data_info['instances'] = instances
+        return data_info
+
+    def _get_mask_fields(self, ann_inds: np.ndarray) -> List[dict]:
+        return [
+            dict(mask=segmentation) if segmentation is not None else {}
+            for segmentation in self.cache.get_segmentations(ann_inds)
+        ]
 
 
 @DATASETS.register_module()
@@ -56,12 +165,28 @@ class CocoDataset(BaseDetDataset):
     # ann_id is unique in coco dataset.
     ANN_ID_UNIQUE = True
 
+    def __init__(self,
+                 *args,
+                 ann_cache_file: Optional[str] = None,
+                 **kwargs) -> None:
+        # the cached data list is parsed in the same way as
+        # `CocoDataset.parse_data_info`, so it cannot be customized
+        if ann_cache_file is not None and \
+                type(self).parse_data_info is not CocoDataset.parse_data_info:
+            raise NotImplementedError(
+                f'`ann_cache_file` is not supported by {type(self).__name__}'
+                ', which overrides `parse_data_info`.')
+        self.ann_cache_file = ann_cache_file
+        super().__init__(*args, **kwargs)
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_file is not None:
+            return self.load_data_list_from_cache()
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
             self.coco = self.COCOAPI(local_path)
@@ -99,6 +224,106 @@ class CocoDataset(BaseDetDataset):
 
         return data_list
 
+    def load_data_list_from_cache(self) -> CocoCacheDataList:
+        """Load annotations from the binary cache ``self.ann_cache_file``.
+
+        The cache is generated from ``self.ann_file`` by :class:`COCOCache`
+        if it does not exist, and reused afterwards. It is regenerated if
+        the path of the annotation file changes, or if the size or the
+        modification time of a local annotation file changes.
+
+        Returns:
+            CocoCacheDataList: A lazily parsed data list, which is the same
+            as the list returned by :meth:`load_data_list` without cache.
+        """
+        assert self.proposal_file is None, \
+            '`proposal_file` is not supported with `ann_cache_file`'
+        cache_file = self.ann_cache_file
+        if not is_abs(cache_file) and self.data_root:
+            cache_file = osp.join(self.data_root, cache_file)
+        source = COCOCache.get_source(self.ann_file)
+        # generate the cache once on the main process, and fall back to
+        # generating it locally if the file system is not shared
+        if is_main_process() and not COCOCache.is_valid(cache_file, source):
+            self._dump_ann_cache(cache_file, source)
+        barrier()
+        if not COCOCache.is_valid(cache_file, source):
+            self._dump_ann_cache(cache_file, source)
+        cache = self._load_ann_cache(cache_file)
+        if self.ANN_ID_UNIQUE:
+            assert cache.ann_ids_unique, \
+                f"Annotation ids in '{self.ann_file}' are not unique!"
+
+        self.cat_ids = cache.get_cat_ids(cat_names=self.metainfo['classes'])
+        self.cat2label = {cat_id: i for i, cat_id in enumerate(self.cat_ids)}
+        self.cat_img_map = cache.get_cat_img_map()
+        # map category ids to labels, -1 for the categories out of classes
+        cat_ids = np.array(self.cat_ids, dtype=np.int64)
+        order = np.argsort(cat_ids)
+        pos = np.searchsorted(cat_ids[order], cache.category_ids)
+        pos = np.minimum(pos, max(len(cat_ids) - 1, 0))
+        if len(cat_ids) > 0:
+            ann_labels = np.where(cat_ids[order][pos] == cache.category_ids,
+                                  order[pos], -1)
+        else:
+            ann_labels = np.full_like(cache.category_ids, -1)
+
+        text_info = None
+        if self.return_classes:
+            text_info = dict(
+                text=self.metainfo['classes'],
+                caption_prompt=self.caption_prompt,
+                custom_entities=True)
+        # The cached data list is compact and shared by memory mapping, so
+        # there is no need to serialize it.
+        self.serialize_data = False
+        return CocoCacheDataList(
+            cache,
+            ann_labels,
+            self.data_prefix['img'],
+            self.data_prefix.get('seg', None),
+            self.seg_map_suffix,
+            text_info,
+            lazy_instances=self.lazy_instances)
+
+    def _load_ann_cache(self, cache_file: str) -> COCOCache:
+        return COCOCache(cache_file)
+
+    def _dump_ann_cache(self, cache_file: str, source: dict) -> None:
+        with get_local_path(
+                self.ann_file, backend_args=self.backend_args) as local_path:
+            coco = self.COCOAPI(local_path)
+        COCOCache.dump(coco, cache_file, source)
+
+    def get_data_info(self, idx: int) -> dict:
+        """Get annotation by index.
+
+        Args:
+            idx (int): The index of data.
+
+        Returns:
+            dict: The idx-th annotation of the dataset.
+        """
+        if self.serialize_data or not isinstance(self.data_list,
+                                                 CocoCacheDataList):
+            return super().get_data_info(idx)
+        # the data information is parsed from the cache on every access,
+        # so it does not need to be deep copied
+        data_info = self.data_list[idx]
+        if idx >= 0:
+            data_info['sample_idx'] = idx
+        else:
+            data_info['sample_idx'] = len(self) + idx
+        return data_info
+
+    def _get_unserialized_subset(self, indices: Union[Sequence[int], int]):
+        """Get subset of data information list, which keeps the data list
+        backed by the cache."""
+        if isinstance(self.data_list, CocoCacheDataList) and isinstance(
+                indices, Sequence):
+            return self.data_list.subset(indices)
+        return super()._get_unserialized_subset(indices)
+
     def parse_data_info(self, raw_data_info: dict) -> Union[dict, List[dict]]:
         """Parse raw annotation to target format.
 
@@ -178,6 +403,9 @@ class CocoDataset(BaseDetDataset):
         filter_empty_gt = self.filter_cfg.get('filter_empty_gt', False)
         min_size = self.filter_cfg.get('min_size', 0)
 
+        if isinstance(self.data_list, CocoCacheDataList):
+            return self._filter_cached_data(filter_empty_gt, min_size)
+
         # obtain images that contain annotation
         ids_with_ann = set(data_info['img_id'] for data_info in self.data_list)
         # obtain images that contain annotations of the required categories
@@ -199,3 +427,21 @@ class CocoDataset(BaseDetDataset):
                 valid_data_infos.append(data_info)
 
         return valid_data_infos
+
+    def _filter_cached_data(self, filter_empty_gt: bool,
+                            min_size: int) -> CocoCacheDataList:
+        """Vectorized :meth:`filter_data` for the data list backed by the
+        cache."""
+        data_list = self.data_list
+        cache = data_list.cache
+        indices = data_list.indices
+        # images that contain annotations of the required categories
+        in_cat = np.bincount(
+            cache.get_ann_img_inds(),
+            weights=data_list.ann_labels >= 0,
+            minlength=len(cache)) > 0
+        valid = np.minimum(cache.widths[indices],
+                           cache.heights[indices]) >= min_size
+        if filter_empty_gt:
+            valid &= in_cat[indices]
+        return data_list.subset(np.flatnonzero(valid))
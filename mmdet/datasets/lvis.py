@@ -6,6 +6,7 @@ from typing import List
 from mmengine.fileio import get_local_path
 
 from mmdet.registry import DATASETS
+from .api_wrappers import COCOCache
 from .coco import CocoDataset
 
 
@@ -270,12 +271,24 @@ class LVISV05Dataset(CocoDataset):
         None
     }
 
+    def _dump_ann_cache(self, cache_file: str, source: dict) -> None:
+        with get_local_path(
+                self.ann_file, backend_args=self.backend_args) as local_path:
+            coco = self.COCOAPI(local_path)
+        # rename the images as `load_data_list` does
+        for img_info in coco.imgs.values():
+            if img_info['file_name'].startswith('COCO'):
+                img_info['file_name'] = img_info['file_name'][-16:]
+        COCOCache.dump(coco, cache_file, source)
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_file is not None:
+            return self.load_data_list_from_cache()
         try:
             import lvis
             if getattr(lvis, '__version__', '0') >= '10.5.3':
@@ -583,12 +596,24 @@ class LVISV1Dataset(LVISDataset):
         None
     }
 
+    def _dump_ann_cache(self, cache_file: str, source: dict) -> None:
+        with get_local_path(
+                self.ann_file, backend_args=self.backend_args) as local_path:
+            coco = self.COCOAPI(local_path)
+        # rename the images as `load_data_list` does
+        for img_info in coco.imgs.values():
+            img_info['file_name'] = img_info['coco_url'].replace(
+                'http://images.cocodataset.org/', '')
+        COCOCache.dump(coco, cache_file, source)
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_file is not None:
+            return self.load_data_list_from_cache()
         try:
             import lvis
             if getattr(lvis, '__version__', '0') >= '10.5.3':
@@ -6,7 +6,7 @@ from typing import List
 from mmengine.fileio import get_local_path
 
 from mmdet.registry import DATASETS
-from .api_wrappers import COCO
+from .api_wrappers import COCO, COCOCache
 from .coco import CocoDataset
 
 # images exist in annotations but not in image folder.
@@ -98,12 +98,20 @@ class Objects365V1Dataset(CocoDataset):
     # ann_id is unique in coco dataset.
     ANN_ID_UNIQUE = True
 
+    def _load_ann_cache(self, cache_file: str) -> COCOCache:
+        cache = super()._load_ann_cache(cache_file)
+        # sort the categories as `load_data_list` does
+        cache.categories = sorted(cache.categories, key=lambda i: i['id'])
+        return cache
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_file is not None:
+            return self.load_data_list_from_cache()
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
             self.coco = self.COCOAPI(local_path)
@@ -231,12 +239,29 @@ class Objects365V2Dataset(CocoDataset):
     # ann_id is unique in coco dataset.
     ANN_ID_UNIQUE = True
 
+    def _dump_ann_cache(self, cache_file: str, source: dict) -> None:
+        with get_local_path(
+                self.ann_file, backend_args=self.backend_args) as local_path:
+            coco = self.COCOAPI(local_path)
+        # rename and ignore the images as `load_data_list` does
+        for img_id, img_info in list(coco.imgs.items()):
+            file_name = osp.join(
+                osp.split(osp.split(img_info['file_name'])[0])[-1],
+                osp.split(img_info['file_name'])[-1])
+            if file_name in objv2_ignore_list:
+                coco.imgs.pop(img_id)
+            else:
+                img_info['file_name'] = file_name
+        COCOCache.dump(coco, cache_file, source)
+
     def load_data_list(self) -> List[dict]:
         """Load annotations from an annotation file named as ``self.ann_file``
 
         Returns:
             List[dict]: A list of annotation.
         """  # noqa: E501
+        if self.ann_cache_file is not None:
+            return self.load_data_list_from_cache()
         with get_local_path(
                 self.ann_file, backend_args=self.backend_args) as local_path:
             self.coco = self.COCOAPI(local_path)
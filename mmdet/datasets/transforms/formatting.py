@@ -9,6 +9,7 @@ from mmengine.structures import InstanceData, PixelData
 from mmdet.registry import TRANSFORMS
 from mmdet.structures import DetDataSample, ReIDDataSample, TrackDataSample
 from mmdet.structures.bbox import BaseBoxes
+from mmdet.structures.mask import LazyBitmapMasks
 
 
 @TRANSFORMS.register_module()
@@ -35,6 +36,9 @@ class PackDetInputs(BaseTransform):
 
         - ``flip_direction``: the flipping direction
 
+    :obj:`LazyBitmapMasks` in ``gt_masks`` are rasterized to
+    :obj:`BitmapMasks` after the ignored instances are split out.
+
     Args:
         meta_keys (Sequence[str], optional): Meta keys to be converted to
             ``mmcv.DataContainer`` and collected in ``data[img_metas]``.
@@ -113,6 +117,10 @@ class PackDetInputs(BaseTransform):
                 else:
                     instance_data[self.mapping_table[key]] = to_tensor(
                         results[key])
+        # rasterize the masks kept as polygons through the pipeline
+        for data in (instance_data, ignore_instance_data):
+            if isinstance(data.get('masks', None), LazyBitmapMasks):
+                data.masks = data.masks.to_bitmap()
         data_sample.gt_instances = instance_data
         data_sample.ignored_instances = ignore_instance_data
 
@@ -14,7 +14,9 @@ from mmengine.structures import BaseDataElement
 from mmdet.registry import TRANSFORMS
 from mmdet.structures.bbox import get_box_type
 from mmdet.structures.bbox.box_type import autocast_box_type
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import (BitmapMasks, LazyBitmapMasks, PolygonMasks,
+                                   polygons_to_bitmaps)
+from ..base_det_dataset import LazyInstances
 
 
 @TRANSFORMS.register_module()
@@ -223,7 +225,7 @@ class LoadAnnotations(MMCV_LoadAnnotations):
 
     - gt_bboxes (BaseBoxes[torch.float32])
     - gt_bboxes_labels (np.int64)
-    - gt_masks (BitmapMasks | PolygonMasks)
+    - gt_masks (BitmapMasks | PolygonMasks | LazyBitmapMasks)
     - gt_seg_map (np.uint8)
     - gt_ignore_flags (bool)
 
@@ -250,6 +252,12 @@ class LoadAnnotations(MMCV_LoadAnnotations):
             Defaults to 'cv2'.
         backend_args (dict, optional): Arguments to instantiate the
             corresponding backend. Defaults to None.
+        lazy_poly2mask (bool): Whether to keep the polygon masks as
+            :obj:`LazyBitmapMasks` through the pipeline, which are rasterized
+            by :class:`PackDetInputs`, instead of converting them to bitmaps
+            at loading time. Valid only if ``poly2mask`` is True, and images
+            with RLE masks are still converted at loading time.
+            Defaults to False.
     """
 
     def __init__(
@@ -260,10 +268,12 @@ class LoadAnnotations(MMCV_LoadAnnotations):
             # use for semseg
             reduce_zero_label: bool = False,
             ignore_index: int = 255,
+            lazy_poly2mask: bool = False,
             **kwargs) -> None:
         super(LoadAnnotations, self).__init__(**kwargs)
         self.with_mask = with_mask
         self.poly2mask = poly2mask
+        self.lazy_poly2mask = lazy_poly2mask
         self.box_type = box_type
         self.reduce_zero_label = reduce_zero_label
         self.ignore_index = ignore_index
@@ -276,11 +286,18 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         Returns:
             dict: The dict contains loaded bounding box annotations.
         """
-        gt_bboxes = []
-        gt_ignore_flags = []
-        for instance in results.get('instances', []):
-            gt_bboxes.append(instance['bbox'])
-            gt_ignore_flags.append(instance['ignore_flag'])
+        instances = results.get('instances', [])
+        if isinstance(instances, LazyInstances):
+            # read the arrays without materializing the instance dicts, and
+            # copy the read-only boxes which may be converted to a tensor
+            gt_bboxes = instances.bboxes.astype(np.float32)
+            gt_ignore_flags = instances.ignore_flags
+        else:
+            gt_bboxes = []
+            gt_ignore_flags = []
+            for instance in instances:
+                gt_bboxes.append(instance['bbox'])
+                gt_ignore_flags.append(instance['ignore_flag'])
         if self.box_type is None:
             results['gt_bboxes'] = np.array(
                 gt_bboxes, dtype=np.float32).reshape((-1, 4))
@@ -298,9 +315,13 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         Returns:
             dict: The dict contains loaded label annotations.
         """
-        gt_bboxes_labels = []
-        for instance in results.get('instances', []):
-            gt_bboxes_labels.append(instance['bbox_label'])
+        instances = results.get('instances', [])
+        if isinstance(instances, LazyInstances):
+            gt_bboxes_labels = instances.labels
+        else:
+            gt_bboxes_labels = []
+            for instance in instances:
+                gt_bboxes_labels.append(instance['bbox_label'])
         # TODO: Inconsistent with mmcv, consider how to deal with it later.
         results['gt_bboxes_labels'] = np.array(
             gt_bboxes_labels, dtype=np.int64)
@@ -384,9 +405,23 @@ class LoadAnnotations(MMCV_LoadAnnotations):
         """
         h, w = results['ori_shape']
         gt_masks = self._process_masks(results)
-        if self.poly2mask:
-            gt_masks = BitmapMasks(
-                [self._poly2mask(mask, h, w) for mask in gt_masks], h, w)
+        if self.poly2mask and self.lazy_poly2mask and all(
+                isinstance(mask, list) for mask in gt_masks):
+            gt_masks = LazyBitmapMasks(gt_masks, h, w)
+        elif self.poly2mask:
+            # rasterize the polygons of all instances in a batch
+            polygon_inds = [
+                i for i, mask in enumerate(gt_masks) if isinstance(mask, list)
+            ]
+            bitmaps = polygons_to_bitmaps([gt_masks[i] for i in polygon_inds],
+                                          h, w)
+            masks = [
+                self._poly2mask(mask, h, w)
+                if not isinstance(mask, list) else None for mask in gt_masks
+            ]
+            for i, bitmap in zip(polygon_inds, bitmaps):
+                masks[i] = bitmap
+            gt_masks = BitmapMasks(masks, h, w)
         else:
             # fake polygon masks will be ignored in `PackDetInputs`
             gt_masks = PolygonMasks([mask for mask in gt_masks], h, w)
@@ -6,6 +6,7 @@ from .class_names import (cityscapes_classes, coco_classes,
                           imagenet_det_classes, imagenet_vid_classes,
                           objects365v1_classes, objects365v2_classes,
                           oid_challenge_classes, oid_v6_classes, voc_classes)
+from .fast_cocoeval import FastCOCOeval
 from .mean_ap import average_precision, eval_map, print_map_summary
 from .panoptic_utils import (INSTANCE_OFFSET, pq_compute_multi_core,
                              pq_compute_single_core)
@@ -22,5 +23,5 @@ __all__ = [
     'oid_v6_classes', 'oid_challenge_classes', 'INSTANCE_OFFSET',
     'pq_compute_single_core', 'pq_compute_multi_core', 'bbox_overlaps',
     'objects365v1_classes', 'objects365v2_classes', 'coco_panoptic_classes',
-    'evaluateImgLists', 'YTVIS', 'YTVISeval'
+    'evaluateImgLists', 'YTVIS', 'YTVISeval', 'FastCOCOeval'
 ]
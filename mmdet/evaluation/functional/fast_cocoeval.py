@@ -0,0 +1,527 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import copy
+import datetime
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from pycocotools import mask as maskUtils
+from pycocotools.cocoeval import Params
+
+
+def coco_bbox_ious(dt_bboxes: np.ndarray, gt_bboxes: np.ndarray,
+                   iscrowd: np.ndarray) -> np.ndarray:
+    """Compute the IoUs between ``xywh`` boxes in the same way as
+    ``pycocotools.mask.iou``, so that the results are bit-identical.
+
+    Args:
+        dt_bboxes (np.ndarray): Detected boxes of shape (D, 4).
+        gt_bboxes (np.ndarray): Ground truth boxes of shape (G, 4).
+        iscrowd (np.ndarray): Crowd flags of the ground truth, shape (G, ).
+
+    Returns:
+        np.ndarray: IoUs of shape (D, G).
+    """
+    dt_bboxes = np.asarray(dt_bboxes, dtype=np.float64).reshape(-1, 4)
+    gt_bboxes = np.asarray(gt_bboxes, dtype=np.float64).reshape(-1, 4)
+    iscrowd = np.asarray(iscrowd, dtype=bool).reshape(-1)
+    dt_areas = dt_bboxes[:, 2] * dt_bboxes[:, 3]
+    gt_areas = gt_bboxes[:, 2] * gt_bboxes[:, 3]
+    w = np.minimum((dt_bboxes[:, 2] + dt_bboxes[:, 0])[:, None],
+                   (gt_bboxes[:, 2] + gt_bboxes[:, 0])[None]) - np.maximum(
+                       dt_bboxes[:, None, 0], gt_bboxes[None, :, 0])
+    h = np.minimum((dt_bboxes[:, 3] + dt_bboxes[:, 1])[:, None],
+                   (gt_bboxes[:, 3] + gt_bboxes[:, 1])[None]) - np.maximum(
+                       dt_bboxes[:, None, 1], gt_bboxes[None, :, 1])
+    inter = w * h
+    union = np.where(iscrowd[None], dt_areas[:, None],
+                     dt_areas[:, None] + gt_areas[None] - inter)
+    valid = (w > 0) & (h > 0)
+    ious = np.zeros_like(inter)
+    np.divide(inter, union, out=ious, where=valid)
+    return ious
+
+
+def ann_to_rle(ann: dict, height: int, width: int) -> dict:
+    """Convert the segmentation of an annotation to RLE, the same as
+    ``COCO.annToRLE``."""
+    segm = ann['segmentation']
+    if isinstance(segm, list):
+        # polygon -- a single object might consist of multiple parts
+        return maskUtils.merge(maskUtils.frPyObjects(segm, height, width))
+    if isinstance(segm['counts'], list):
+        # uncompressed RLE
+        return maskUtils.frPyObjects(segm, height, width)
+    return segm
+
+
+class FastCOCOeval:
+    """In-memory, vectorized re-implementation of ``COCOeval`` for the
+    'bbox' and 'segm' IoU types.
+
+    Different from ``COCOeval``, the detections are consumed directly from
+    the arrays predicted by the detectors, which avoids dumping them to json
+    and loading them back with ``COCO.loadRes``. For each image, the greedy
+    matching of all categories, IoU thresholds and area ranges is done in one
+    batched pass, and only compact match records are kept. The results of
+    :meth:`accumulate` and :meth:`summarize` are identical to ``COCOeval``.
+
+    The usage is the same as ``COCOeval``:
+
+    .. code-block:: python
+
+        coco_eval = FastCOCOeval(coco_gt, 'bbox')
+        coco_eval.load_results(results, cat_ids)
+        coco_eval.params.catIds = cat_ids
+        coco_eval.evaluate()
+        coco_eval.accumulate()
+        coco_eval.summarize()
+
+    Args:
+        cocoGt (COCO): Ground truth COCO api.
+        iouType (str): Type of IoU, 'bbox' or 'segm'. Defaults to 'bbox'.
+    """
+
+    def __init__(self, cocoGt=None, iouType: str = 'bbox') -> None:
+        if iouType not in ('bbox', 'segm'):
+            raise NotImplementedError(
+                f'FastCOCOeval does not support iouType {iouType}.')
+        self.cocoGt = cocoGt
+        self.params = Params(iouType=iouType)
+        if cocoGt is not None:
+            self.params.imgIds = sorted(cocoGt.getImgIds())
+            self.params.catIds = sorted(cocoGt.getCatIds())
+        self._dts = defaultdict(list)
+        self._records = dict()
+        self.evalImgs = dict()
+        self.eval = dict()
+        self.stats = []
+
+    def result_to_dt(self, result: dict,
+                     cat_ids: Sequence[int]) -> Optional[dict]:
+        """Convert the predictions of an image to the detections used by
+        :meth:`evaluate_img`.
+
+        Args:
+            result (dict): Predictions of the image, which contains 'bboxes'
+                in ``xyxy`` order, 'scores', 'labels' and optionally 'masks'
+                (RLEs) and 'mask_scores'.
+            cat_ids (Sequence[int]): Category ids indexed by the labels.
+
+        Returns:
+            dict, optional: The detections, None if there is no prediction.
+        """
+        labels = np.asarray(result['labels'], dtype=np.int64)
+        if len(labels) == 0:
+            return None
+        dt = dict(category_id=np.asarray(cat_ids, dtype=np.int64)[labels])
+        if self.params.iouType == 'bbox':
+            bboxes = np.array(
+                result['bboxes'], dtype=np.float64).reshape(-1, 4)
+            bboxes[:, 2:] -= bboxes[:, :2]
+            dt['bbox'] = bboxes
+            dt['score'] = np.asarray(result['scores'], dtype=np.float64)
+            dt['area'] = bboxes[:, 2] * bboxes[:, 3]
+        else:
+            masks = list(result['masks'])
+            dt['segmentation'] = masks
+            dt['score'] = np.asarray(
+                result.get('mask_scores', result['scores']), dtype=np.float64)
+            dt['area'] = maskUtils.area(masks).astype(np.float64)
+        return dt
+
+    def load_results(self, results: Sequence[dict],
+                     cat_ids: Sequence[int]) -> int:
+        """Load the detections predicted by the model.
+
+        Args:
+            results (Sequence[dict]): Predictions of each image, see
+                :meth:`result_to_dt`. The image id is given by 'img_id'.
+            cat_ids (Sequence[int]): Category ids indexed by the labels.
+
+        Returns:
+            int: Number of loaded detections.
+        """
+        num_dets = 0
+        for idx, result in enumerate(results):
+            dt = self.result_to_dt(result, cat_ids)
+            if dt is None:
+                continue
+            self._dts[result.get('img_id', idx)].append(dt)
+            num_dets += len(dt['score'])
+        return num_dets
+
+    def load_records(self, records: Dict[int, Optional[dict]]) -> int:
+        """Load the match records computed in advance by :meth:`evaluate_img`,
+        e.g., while streaming the predictions during inference.
+
+        :meth:`evaluate` only evaluates the images without a record. The
+        records must be computed with the same parameters.
+
+        Args:
+            records (Dict[int, dict, optional]): Match records of each image.
+
+        Returns:
+            int: Number of detections in the records.
+        """
+        self._records.update(records)
+        return sum(len(r['scores']) for r in records.values() if r is not None)
+
+    def _get_gts(self, img_id) -> List[dict]:
+        return self.cocoGt.imgToAnns.get(img_id, [])
+
+    def _get_dts(self, img_id) -> Optional[dict]:
+        dts = self._dts.get(img_id, [])
+        if len(dts) == 0:
+            return None
+        if len(dts) == 1:
+            return dts[0]
+        return {
+            key: (sum([dt[key] for dt in dts], []) if key == 'segmentation'
+                  else np.concatenate([dt[key] for dt in dts]))
+            for key in dts[0]
+        }
+
+    def prepare(self) -> None:
+        """Normalize the parameters as ``COCOeval.evaluate`` does, which must
+        be called before :meth:`evaluate_img`."""
+        p = self.params
+        if p.useSegm is not None:
+            p.iouType = 'segm' if p.useSegm == 1 else 'bbox'
+        p.imgIds = list(np.unique(p.imgIds))
+        if p.useCats:
+            p.catIds = list(np.unique(p.catIds))
+        p.maxDets = sorted(p.maxDets)
+        self.params = p
+        # position of each category in ``p.catIds``, which decides the order
+        # of the instances when ``useCats`` is 0
+        self._cat_pos = {int(cat_id): i for i, cat_id in enumerate(p.catIds)}
+        self._iou_thrs = np.minimum(
+            np.asarray(p.iouThrs, dtype=np.float64), 1 - 1e-10)
+        self._area_rng = np.asarray(p.areaRng, dtype=np.float64)
+
+    def evaluate(self) -> None:
+        """Run per image evaluation on given images and store the compact
+        match records in ``self.evalImgs``."""
+        tic = time.time()
+        print('Running per image evaluation...')
+        self.prepare()
+        print('Evaluate annotation type *{}*'.format(self.params.iouType))
+        self.evalImgs = {
+            img_id: self._records[img_id] if img_id in self._records else
+            self.evaluate_img(self._get_gts(img_id), self._get_dts(img_id))
+            for img_id in self.params.imgIds
+        }
+        self._paramsEval = copy.deepcopy(self.params)
+        toc = time.time()
+        print('DONE (t={:0.2f}s).'.format(toc - tic))
+
+    def _group_gts(self,
+                   gts: List[dict],
+                   img_shape: Optional[tuple] = None) -> Optional[dict]:
+        """Keep the ground truth of evaluated categories, ordered as
+        ``COCOeval`` does, and convert them to arrays."""
+        p = self.params
+        pos = [self._cat_pos.get(int(gt['category_id']), -1) for gt in gts]
+        order = [i for i in np.argsort(pos, kind='mergesort') if pos[i] >= 0]
+        if len(order) == 0:
+            return None
+        gts = [gts[i] for i in order]
+        pos = np.asarray([pos[i] for i in order], dtype=np.int64)
+        gt = dict(
+            group=pos if p.useCats else np.zeros_like(pos),
+            area=np.asarray([g['area'] for g in gts], dtype=np.float64),
+            iscrowd=np.asarray([int(g['iscrowd']) for g in gts], dtype=bool))
+        # ``COCOeval`` ignores all crowd ground truth
+        gt['ignore'] = gt['iscrowd'].copy()
+        if p.iouType == 'bbox':
+            gt['bbox'] = np.asarray([g['bbox'] for g in gts],
+                                    dtype=np.float64).reshape(-1, 4)
+        else:
+            gt['segmentation'] = [
+                self.cocoGt.annToRLE(g) if img_shape is None else ann_to_rle(
+                    g, *img_shape) for g in gts
+            ]
+        return gt
+
+    def _group_dts(self, dt: Optional[dict]) -> Optional[dict]:
+        """Keep the top ``max(maxDets)`` detections of each category sorted
+        by score, ordered as ``COCOeval`` does."""
+        p = self.params
+        if dt is None:
+            return None
+        pos = np.asarray([
+            self._cat_pos.get(int(cat_id), -1) for cat_id in dt['category_id']
+        ],
+                         dtype=np.int64)
+        group = pos if p.useCats else np.zeros_like(pos)
+        # sort by group, then by descending score; ties are broken by the
+        # category position and the original order as in ``COCOeval``
+        order = np.lexsort((np.arange(len(pos)), pos, -dt['score'], group))
+        order = order[pos[order] >= 0]
+        if len(order) == 0:
+            return None
+        group = group[order]
+        starts = np.searchsorted(group, group, side='left')
+        rank = np.arange(len(group)) - starts
+        keep = rank < max(p.maxDets)
+        order, group, rank = order[keep], group[keep], rank[keep]
+        grouped = dict(group=group, rank=rank)
+        for key in ('score', 'area', 'bbox'):
+            if key in dt:
+                grouped[key] = dt[key][order]
+        if 'segmentation' in dt:
+            grouped['segmentation'] = [dt['segmentation'][i] for i in order]
+        return grouped
+
+    def _compute_ious(self, dt: dict, gt: dict) -> np.ndarray:
+        """Compute IoUs between all detections and ground truth of an image.
+
+        The IoU between instances of different groups is set to -1 so that
+        they can never be matched.
+        """
+        if self.params.iouType == 'bbox':
+            ious = coco_bbox_ious(dt['bbox'], gt['bbox'], gt['iscrowd'])
+            ious[dt['group'][:, None] != gt['group'][None]] = -1
+            return ious
+        ious = -np.ones((len(dt['group']), len(gt['group'])))
+        for group in np.intersect1d(dt['group'], gt['group']):
+            dt_inds = np.nonzero(dt['group'] == group)[0]
+            gt_inds = np.nonzero(gt['group'] == group)[0]
+            ious[np.ix_(dt_inds, gt_inds)] = maskUtils.iou(
+                [dt['segmentation'][i]
+                 for i in dt_inds], [gt['segmentation'][i] for i in gt_inds],
+                gt['iscrowd'][gt_inds].astype(np.uint8).tolist())
+        return ious
+
+    def evaluate_img(self,
+                     gts: List[dict],
+                     dt: Optional[dict],
+                     img_shape: Optional[tuple] = None) -> Optional[dict]:
+        """Match the detections of one image with its ground truth for all
+        categories, IoU thresholds and area ranges at once.
+
+        Args:
+            gts (List[dict]): COCO style ground truth annotations.
+            dt (dict, optional): Detections of the image, see
+                :meth:`result_to_dt`.
+            img_shape (tuple, optional): ``(height, width)`` of the image,
+                used to convert the polygons of ground truth to RLE. If not
+                specified, the image info in ``cocoGt`` is used.
+                Defaults to None.
+
+        Returns:
+            dict, optional: Compact match records, None if the image has
+            neither ground truth nor detections.
+        """
+        gt = self._group_gts(gts, img_shape)
+        dt = self._group_dts(dt)
+        if gt is None and dt is None:
+            return None
+        area_rng = self._area_rng
+        thrs = self._iou_thrs
+        T, A = len(thrs), len(area_rng)
+
+        record = dict()
+        if gt is not None:
+            # (A, G) ignore flag of each gt in each area range
+            gt_ignore = gt['ignore'][None] | (
+                gt['area'][None] < area_rng[:, 0:1]) | (
+                    gt['area'][None] > area_rng[:, 1:2])
+            groups = np.unique(gt['group'])
+            record['gt_groups'] = groups
+            record['num_pos'] = np.stack([
+                np.count_nonzero(~gt_ignore[:, gt['group'] == group], axis=1)
+                for group in groups
+            ])
+        else:
+            record['gt_groups'] = np.zeros((0, ), dtype=np.int64)
+            record['num_pos'] = np.zeros((0, A), dtype=np.int64)
+
+        if dt is None:
+            record['dt_groups'] = np.zeros((0, ), dtype=np.int64)
+            record['rank'] = np.zeros((0, ), dtype=np.int64)
+            record['scores'] = np.zeros((0, ))
+            record['matched'] = np.zeros((T, A, 0), dtype=bool)
+            record['ignored'] = np.zeros((T, A, 0), dtype=bool)
+            return record
+
+        D = len(dt['group'])
+        matched = np.zeros((T, A, D), dtype=bool)
+        ignored = np.zeros((T, A, D), dtype=bool)
+        if gt is not None:
+            ious = self._compute_ious(dt, gt)
+            G = ious.shape[1]
+            crowd = gt['iscrowd']
+            gt_matched = np.zeros((T, A, G), dtype=bool)
+            # only the detections overlapping some gt need to be matched
+            for d in np.nonzero((ious >= thrs.min()).any(axis=1))[0]:
+                # (T, 1, G) candidates above each IoU threshold
+                cand = (ious[d][None] >= thrs[:, None])[:, None]
+                cand = cand & ~(gt_matched & ~crowd)
+                iou = np.broadcast_to(ious[d], cand.shape)
+                # prefer regular gt to ignored gt, and take the last of the
+                # best ones as the sequential loop in ``COCOeval`` does
+                inds = np.full((T, A), -1, dtype=np.int64)
+                for valid in (cand & gt_ignore, cand & ~gt_ignore):
+                    best = np.where(valid, iou, -np.inf)[..., ::-1]
+                    last_best = G - 1 - np.argmax(best, axis=-1)
+                    inds = np.where(valid.any(axis=-1), last_best, inds)
+                t_inds, a_inds = np.nonzero(inds >= 0)
+                g_inds = inds[t_inds, a_inds]
+                gt_matched[t_inds, a_inds, g_inds] = True
+                matched[t_inds, a_inds, d] = True
+                ignored[t_inds, a_inds, d] = gt_ignore[a_inds, g_inds]
+        # unmatched detections outside of area range are ignored
+        out_of_range = (dt['area'][None] < area_rng[:, 0:1]) | (
+            dt['area'][None] > area_rng[:, 1:2])
+        ignored |= ~matched & out_of_range[None]
+
+        record['dt_groups'] = dt['group']
+        record['rank'] = dt['rank']
+        record['scores'] = dt['score']
+        record['matched'] = matched
+        record['ignored'] = ignored
+        return record
+
+    def accumulate(self, p: Optional[Params] = None) -> None:
+        """Accumulate per image evaluation results and store the result in
+        ``self.eval``."""
+        print('Accumulating evaluation results...')
+        tic = time.time()
+        if not self.evalImgs:
+            print('Please run evaluate() first')
+        if p is None:
+            p = self.params
+        T = len(p.iouThrs)
+        R = len(p.recThrs)
+        K = len(p.catIds) if p.useCats else 1
+        A = len(p.areaRng)
+        M = len(p.maxDets)
+        precision = -np.ones((T, R, K, A, M))
+        recall = -np.ones((T, K, A, M))
+        scores = -np.ones((T, R, K, A, M))
+
+        records = [self.evalImgs.get(img_id) for img_id in p.imgIds]
+        records = [r for r in records if r is not None]
+        present = np.zeros(K, dtype=bool)
+        num_pos = np.zeros((K, A), dtype=np.int64)
+        for r in records:
+            present[r['gt_groups']] = True
+            present[r['dt_groups']] = True
+            np.add.at(num_pos, r['gt_groups'], r['num_pos'])
+
+        if len(records):
+            # concatenated in image order, then grouped by category
+            dt_groups = np.concatenate([r['dt_groups'] for r in records])
+            order = np.argsort(dt_groups, kind='mergesort')
+            dt_groups = dt_groups[order]
+            rank = np.concatenate([r['rank'] for r in records])[order]
+            dt_scores = np.concatenate([r['scores'] for r in records])[order]
+            matched = np.concatenate([r['matched'] for r in records],
+                                     axis=-1)[..., order]
+            ignored = np.concatenate([r['ignored'] for r in records],
+                                     axis=-1)[..., order]
+            bounds = np.searchsorted(dt_groups, np.arange(K + 1))
+
+        for k in np.nonzero(present)[0]:
+            k_slice = slice(bounds[k], bounds[k + 1])
+            for m, max_det in enumerate(p.maxDets):
+                keep = rank[k_slice] < max_det
+                k_scores = dt_scores[k_slice][keep]
+                # mergesort is used to be consistent with COCOeval
+                inds = np.argsort(-k_scores, kind='mergesort')
+                k_scores = k_scores[inds]
+                nd = len(inds)
+                for a in range(A):
+                    npig = num_pos[k, a]
+                    if npig == 0:
+                        continue
+                    dtm = matched[:, a, k_slice][:, keep][:, inds]
+                    dtIg = ignored[:, a, k_slice][:, keep][:, inds]
+                    tps = np.logical_and(dtm, np.logical_not(dtIg))
+                    fps = np.logical_and(
+                        np.logical_not(dtm), np.logical_not(dtIg))
+                    tp_sum = np.cumsum(tps, axis=1).astype(dtype=float)
+                    fp_sum = np.cumsum(fps, axis=1).astype(dtype=float)
+                    rc = tp_sum / npig
+                    pr = tp_sum / (fp_sum + tp_sum + np.spacing(1))
+                    recall[:, k, a, m] = rc[:, -1] if nd else 0
+                    # make precision monotonically decreasing
+                    pr = np.maximum.accumulate(pr[:, ::-1], axis=1)[:, ::-1]
+                    for t in range(T):
+                        rec_inds = np.searchsorted(
+                            rc[t], p.recThrs, side='left')
+                        valid = rec_inds < nd
+                        q = np.zeros((R, ))
+                        ss = np.zeros((R, ))
+                        q[valid] = pr[t, rec_inds[valid]]
+                        ss[valid] = k_scores[rec_inds[valid]]
+                        precision[t, :, k, a, m] = q
+                        scores[t, :, k, a, m] = ss
+        self.eval = {
+            'params': p,
+            'counts': [T, R, K, A, M],
+            'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'precision': precision,
+            'recall': recall,
+            'scores': scores,
+        }
+        toc = time.time()
+        print('DONE (t={:0.2f}s).'.format(toc - tic))
+
+    def summarize(self) -> None:
+        """Compute and display summary metrics for evaluation results."""
+
+        def _summarize(ap=1, iouThr=None, areaRng='all', maxDets=100):
+            p = self.params
+            iStr = ' {:<18} {} @[ IoU={:<9} | area={:>6s} | maxDets={:>3d} ] = {:0.3f}'  # noqa
+            titleStr = 'Average Precision' if ap == 1 else 'Average Recall'
+            typeStr = '(AP)' if ap == 1 else '(AR)'
+            iouStr = '{:0.2f}:{:0.2f}'.format(p.iouThrs[0], p.iouThrs[-1]) \
+                if iouThr is None else '{:0.2f}'.format(iouThr)
+
+            aind = [
+                i for i, aRng in enumerate(p.areaRngLbl) if aRng == areaRng
+            ]
+            mind = [i for i, mDet in enumerate(p.maxDets) if mDet == maxDets]
+            if ap == 1:
+                # dimension of precision: [TxRxKxAxM]
+                s = self.eval['precision']
+                if iouThr is not None:
+                    t = np.where(iouThr == p.iouThrs)[0]
+                    s = s[t]
+                s = s[:, :, :, aind, mind]
+            else:
+                # dimension of recall: [TxKxAxM]
+                s = self.eval['recall']
+                if iouThr is not None:
+                    t = np.where(iouThr == p.iouThrs)[0]
+                    s = s[t]
+                s = s[:, :, aind, mind]
+            if len(s[s > -1]) == 0:
+                mean_s = -1
+            else:
+                mean_s = np.mean(s[s > -1])
+            print(
+                iStr.format(titleStr, typeStr, iouStr, areaRng, maxDets,
+                            mean_s))
+            return mean_s
+
+        if not self.eval:
+            raise Exception('Please run accumulate() first')
+        # the same as ``COCOeval._summarizeDets``
+        max_dets = self.params.maxDets
+        stats = [
+            _summarize(1),
+            _summarize(1, iouThr=.5, maxDets=max_dets[2]),
+            _summarize(1, iouThr=.75, maxDets=max_dets[2])
+        ]
+        for area_rng in ('small', 'medium', 'large'):
+            stats.append(_summarize(1, areaRng=area_rng, maxDets=max_dets[2]))
+        for max_det in max_dets[:3]:
+            stats.append(_summarize(0, maxDets=max_det))
+        for area_rng in ('small', 'medium', 'large'):
+            stats.append(_summarize(0, areaRng=area_rng, maxDets=max_dets[2]))
+        self.stats = np.array(stats)
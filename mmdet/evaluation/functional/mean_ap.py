@@ -36,8 +36,7 @@ def average_precision(recalls, precisions, mode='area'):
         ones = np.ones((num_scales, 1), dtype=recalls.dtype)
         mrec = np.hstack((zeros, recalls, ones))
         mpre = np.hstack((zeros, precisions, zeros))
-        for i in range(mpre.shape[1] - 1, 0, -1):
-            mpre[:, i - 1] = np.maximum(mpre[:, i - 1], mpre[:, i])
+        mpre = np.maximum.accumulate(mpre[:, ::-1], axis=1)[:, ::-1]
         for i in range(num_scales):
             ind = np.where(mrec[i, 1:] != mrec[i, :-1])[0]
             ap[i] = np.sum(
@@ -474,6 +473,380 @@ def tpfp_openimages(det_bboxes,
         return tp, fp, det_bboxes
 
 
+def _max_overlaps_per_image(dets,
+                            det_img_inds,
+                            gts,
+                            gt_counts,
+                            mode='iou',
+                            use_legacy_coordinate=False,
+                            eps=1e-6,
+                            max_pairs=1 << 20):
+    """Calculate the max overlap of each det bbox with the gt bboxes of the
+    image it belongs to.
+
+    The gt bboxes are padded per image so that the overlaps of all images are
+    computed in a few vectorized chunks. The arithmetic is the same as
+    :func:`bbox_overlaps`, so the results are identical to calling it image
+    by image.
+
+    Args:
+        dets (ndarray): Det bboxes of all images, of shape (m, 4+).
+        det_img_inds (ndarray): Image index of each det bbox, of shape (m, ).
+        gts (ndarray): GT bboxes of all images concatenated in image order,
+            of shape (n, 4).
+        gt_counts (ndarray): Number of gt bboxes of each image.
+        mode (str): 'iou' or 'iof'. Defaults to 'iou'.
+        use_legacy_coordinate (bool): Whether to use coordinate system in
+            mmdet v1.x. Defaults to False.
+        eps (float): Same as :func:`bbox_overlaps`. Defaults to 1e-6.
+        max_pairs (int): Max number of det-gt pairs handled in one chunk,
+            which bounds the memory footprint. Defaults to 2**20.
+
+    Returns:
+        tuple[np.ndarray]: The max overlap of each det bbox, which is -1 if
+        its image has no gt bbox, and the index of the matched gt bbox
+        within its image.
+    """
+    extra_length = 1. if use_legacy_coordinate else 0.
+    num_dets = dets.shape[0]
+    ovr_max = np.full(num_dets, -1, dtype=np.float32)
+    ovr_argmax = np.zeros(num_dets, dtype=np.int64)
+    max_gts = int(gt_counts.max()) if gt_counts.size > 0 else 0
+    if num_dets == 0 or max_gts == 0:
+        return ovr_max, ovr_argmax
+
+    num_imgs = gt_counts.shape[0]
+    gt_img_inds = np.repeat(np.arange(num_imgs), gt_counts)
+    gt_local_inds = np.arange(gts.shape[0]) - np.repeat(
+        np.cumsum(gt_counts) - gt_counts, gt_counts)
+    gts = gts[:, :4].astype(np.float32)
+    padded_gts = np.zeros((num_imgs, max_gts, 4), dtype=np.float32)
+    padded_gts[gt_img_inds, gt_local_inds] = gts
+    padded_areas = np.zeros((num_imgs, max_gts), dtype=np.float32)
+    gt_areas = (gts[:, 2] - gts[:, 0] + extra_length) * (
+        gts[:, 3] - gts[:, 1] + extra_length)
+    padded_areas[gt_img_inds, gt_local_inds] = gt_areas
+    padded_valid = np.zeros((num_imgs, max_gts), dtype=bool)
+    padded_valid[gt_img_inds, gt_local_inds] = True
+
+    dets = dets[:, :4].astype(np.float32)
+    det_areas = (dets[:, 2] - dets[:, 0] + extra_length) * (
+        dets[:, 3] - dets[:, 1] + extra_length)
+    step = max(max_pairs // max_gts, 1)
+    for start in range(0, num_dets, step):
+        end = min(start + step, num_dets)
+        img_inds = det_img_inds[start:end]
+        bboxes1 = dets[start:end, None, :]
+        bboxes2 = padded_gts[img_inds]
+        x_start = np.maximum(bboxes1[..., 0], bboxes2[..., 0])
+        y_start = np.maximum(bboxes1[..., 1], bboxes2[..., 1])
+        x_end = np.minimum(bboxes1[..., 2], bboxes2[..., 2])
+        y_end = np.minimum(bboxes1[..., 3], bboxes2[..., 3])
+        overlap = np.maximum(x_end - x_start + extra_length, 0) * np.maximum(
+            y_end - y_start + extra_length, 0)
+        if mode == 'iou':
+            union = det_areas[start:end, None] + padded_areas[img_inds] \
+                - overlap
+        else:
+            union = np.broadcast_to(det_areas[start:end, None], overlap.shape)
+        union = np.maximum(union, eps)
+        ovrs = overlap / union
+        ovrs[~padded_valid[img_inds]] = -1
+        ovr_max[start:end] = ovrs.max(axis=1)
+        ovr_argmax[start:end] = ovrs.argmax(axis=1)
+    return ovr_max, ovr_argmax
+
+
+def _stack_cls_results(cls_dets, cls_gts, cls_gts_ignore):
+    """Concatenate the det and gt bboxes of a class over all images.
+
+    Args:
+        cls_dets (list[np.ndarray]): Det bboxes of each image.
+        cls_gts (list[np.ndarray]): GT bboxes of each image.
+        cls_gts_ignore (list[np.ndarray]): Ignored gt bboxes of each image.
+
+    Returns:
+        dict: The stacked det bboxes ``dets`` with their image indices
+        ``det_img_inds`` and the rank ``det_ranks`` of each det bbox when
+        sorted by score within its image, the stacked gt bboxes ``gts``
+        (ignored gt bboxes are put after the normal ones of each image) with
+        the per-image counts ``gt_counts``, offsets ``gt_offsets`` and the
+        indicator ``gt_ignore_inds``.
+    """
+    num_imgs = len(cls_dets)
+    det_counts = np.array([det.shape[0] for det in cls_dets], dtype=np.int64)
+    det_offsets = np.cumsum(det_counts) - det_counts
+    dets = np.concatenate(cls_dets)
+    det_img_inds = np.repeat(np.arange(num_imgs), det_counts)
+    # follow the sorting in `tpfp_default` so that the ties are broken in
+    # exactly the same way
+    det_ranks = np.empty(dets.shape[0], dtype=np.int64)
+    for offset, det in zip(det_offsets, cls_dets):
+        if det.shape[0] > 0:
+            det_ranks[offset + np.argsort(-det[:, -1])] = np.arange(
+                det.shape[0])
+
+    # interleave the gt bboxes and ignored gt bboxes of each image
+    gts = [None] * (2 * num_imgs)
+    gts[0::2] = cls_gts
+    gts[1::2] = cls_gts_ignore
+    counts = np.array([gt.shape[0] for gt in gts], dtype=np.int64)
+    gt_ignore_inds = np.repeat(
+        np.tile(np.array([False, True]), num_imgs), counts)
+    gt_counts = counts[0::2] + counts[1::2]
+    return dict(
+        dets=dets,
+        det_img_inds=det_img_inds,
+        det_ranks=det_ranks,
+        gts=np.concatenate(gts),
+        gt_counts=gt_counts,
+        gt_offsets=np.cumsum(gt_counts) - gt_counts,
+        gt_ignore_inds=gt_ignore_inds)
+
+
+def _greedy_tpfp(matched, covered_inds, ignored, det_ranks, det_areas,
+                 area_ranges):
+    """Assign tp and fp to the det bboxes given their best matched gts.
+
+    For each gt, the matched det bbox ranked first within its image is a true
+    positive and the others are false positives, which is the same as the
+    sequential loop in :func:`tpfp_default`.
+
+    Args:
+        matched (ndarray): Whether each det bbox matches a gt.
+        covered_inds (ndarray): Global index of the gt matched by each det.
+        ignored (list[ndarray]): Whether the matched gt of each det bbox is
+            ignored, for each area range.
+        det_ranks (ndarray): Rank of each det bbox within its image.
+        det_areas (ndarray): Area of each det bbox.
+        area_ranges (list[tuple]): Range of bbox areas to be evaluated.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) of shape (num_scales, m).
+    """
+    num_dets = matched.shape[0]
+    tp = np.zeros((len(area_ranges), num_dets), dtype=np.float32)
+    fp = np.zeros((len(area_ranges), num_dets), dtype=np.float32)
+    for k, (min_area, max_area) in enumerate(area_ranges):
+        inds = np.flatnonzero(matched & ~ignored[k])
+        inds = inds[np.lexsort((det_ranks[inds], covered_inds[inds]))]
+        is_first = np.ones(inds.shape[0], dtype=bool)
+        is_first[1:] = covered_inds[inds[1:]] != covered_inds[inds[:-1]]
+        tp[k, inds[is_first]] = 1
+        fp[k, inds[~is_first]] = 1
+        unmatched = ~matched
+        if min_area is not None:
+            unmatched &= (det_areas >= min_area) & (det_areas < max_area)
+        fp[k, unmatched] = 1
+    return tp, fp
+
+
+def _lookup_matched(gt_flags, matched_inds, matched):
+    """Look up the flags of the matched gts, which are False for the det
+    bboxes that match no gt."""
+    flags = np.zeros(matched.shape[0], dtype=bool)
+    flags[matched] = gt_flags[matched_inds[matched]]
+    return flags
+
+
+def _gt_area_ignores(gts, area_ranges, extra_length):
+    """Whether each gt bbox is beyond each area range."""
+    ignores = []
+    for min_area, max_area in area_ranges:
+        if min_area is None:
+            ignores.append(np.zeros(gts.shape[0], dtype=bool))
+        else:
+            gt_areas = (gts[:, 2] - gts[:, 0] + extra_length) * (
+                gts[:, 3] - gts[:, 1] + extra_length)
+            ignores.append((gt_areas < min_area) | (gt_areas >= max_area))
+    return ignores
+
+
+def batched_tpfp_default(cls_dets,
+                         cls_gts,
+                         cls_gts_ignore,
+                         iou_thr=0.5,
+                         area_ranges=None,
+                         use_legacy_coordinate=False):
+    """Check if detected bboxes of all images are true positive or false
+    positive.
+
+    This is the batched version of :func:`tpfp_default`. The det bboxes of
+    all images are concatenated and matched at once, and the results are
+    identical to concatenating the results of :func:`tpfp_default` of each
+    image.
+
+    Args:
+        cls_dets (list[np.ndarray]): Detected bboxes of each image, of shape
+            (m_i, 5).
+        cls_gts (list[np.ndarray]): GT bboxes of each image, of shape
+            (n_i, 4).
+        cls_gts_ignore (list[np.ndarray]): Ignored gt bboxes of each image,
+            of shape (k_i, 4).
+        iou_thr (float): IoU threshold to be considered as matched.
+            Defaults to 0.5.
+        area_ranges (list[tuple] | None): Range of bbox areas to be
+            evaluated, in the format [(min1, max1), (min2, max2), ...].
+            Defaults to None.
+        use_legacy_coordinate (bool): Whether to use coordinate system in
+            mmdet v1.x. which means width, height should be
+            calculated as 'x2 - x1 + 1` and 'y2 - y1 + 1' respectively.
+            Defaults to False.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp) whose elements are 0 and 1. The shape of
+        each array is (num_scales, sum(m_i)).
+    """
+    extra_length = 1. if use_legacy_coordinate else 0.
+    if area_ranges is None:
+        area_ranges = [(None, None)]
+    stacked = _stack_cls_results(cls_dets, cls_gts, cls_gts_ignore)
+    dets = stacked['dets']
+    det_img_inds = stacked['det_img_inds']
+
+    ious_max, ious_argmax = _max_overlaps_per_image(
+        dets,
+        det_img_inds,
+        stacked['gts'],
+        stacked['gt_counts'],
+        use_legacy_coordinate=use_legacy_coordinate)
+    matched = ious_max >= iou_thr
+    matched_inds = stacked['gt_offsets'][det_img_inds] + ious_argmax
+    area_ignores = _gt_area_ignores(stacked['gts'], area_ranges, extra_length)
+    ignored = [
+        _lookup_matched(stacked['gt_ignore_inds'] | area_ignore, matched_inds,
+                        matched) for area_ignore in area_ignores
+    ]
+    det_areas = (dets[:, 2] - dets[:, 0] + extra_length) * (
+        dets[:, 3] - dets[:, 1] + extra_length)
+    return _greedy_tpfp(matched, matched_inds, ignored, stacked['det_ranks'],
+                        det_areas, area_ranges)
+
+
+def batched_tpfp_openimages(cls_dets,
+                            cls_gts,
+                            cls_gts_ignore,
+                            iou_thr=0.5,
+                            area_ranges=None,
+                            use_legacy_coordinate=False,
+                            gt_bboxes_group_ofs=None,
+                            use_group_of=True,
+                            ioa_thr=0.5):
+    """Check if detected bboxes of all images are true positive or false
+    positive, which is the batched version of :func:`tpfp_openimages`.
+
+    The results are identical to concatenating the results of
+    :func:`tpfp_openimages` of each image.
+
+    Args:
+        cls_dets (list[np.ndarray]): Detected bboxes of each image, of shape
+            (m_i, 5).
+        cls_gts (list[np.ndarray]): GT bboxes of each image, of shape
+            (n_i, 4).
+        cls_gts_ignore (list[np.ndarray]): Ignored gt bboxes of each image,
+            of shape (k_i, 4).
+        iou_thr (float): IoU threshold to be considered as matched.
+            Defaults to 0.5.
+        area_ranges (list[tuple] | None): Range of bbox areas to be
+            evaluated. Only None is supported when group-of boxes are used.
+            Defaults to None.
+        use_legacy_coordinate (bool): Whether to use coordinate system in
+            mmdet v1.x. Defaults to False.
+        gt_bboxes_group_ofs (list[np.ndarray] | None): GT group_of of each
+            image. Defaults to None.
+        use_group_of (bool): Whether to use group of when calculate TP and FP.
+            Defaults to True.
+        ioa_thr (float | None): IoA threshold to be considered as matched.
+            Defaults to 0.5.
+
+    Returns:
+        tuple[np.ndarray]: (tp, fp, det_bboxes), same as
+        :func:`tpfp_openimages` but concatenated over the images.
+    """
+    if gt_bboxes_group_ofs is None or not use_group_of:
+        tp, fp = batched_tpfp_default(cls_dets, cls_gts, cls_gts_ignore,
+                                      iou_thr, area_ranges,
+                                      use_legacy_coordinate)
+        return tp, fp, np.vstack(cls_dets)
+    assert area_ranges is None, \
+        'area_ranges is not supported when evaluating group-of boxes'
+
+    extra_length = 1. if use_legacy_coordinate else 0.
+    stacked = _stack_cls_results(cls_dets, cls_gts, cls_gts_ignore)
+    dets = stacked['dets']
+    det_img_inds = stacked['det_img_inds']
+    det_ranks = stacked['det_ranks']
+    gts = stacked['gts']
+    gt_counts = stacked['gt_counts']
+    gt_offsets = stacked['gt_offsets']
+    gt_ignore_inds = stacked['gt_ignore_inds']
+
+    group_ofs = []
+    for gt_count, group_of in zip(gt_counts, gt_bboxes_group_ofs):
+        if gt_count > 0:
+            assert group_of.shape[0] == gt_count
+            group_ofs.append(group_of.reshape(-1))
+    group_ofs = np.concatenate(group_ofs) if group_ofs else np.zeros(
+        0, dtype=bool)
+    gt_img_inds = np.repeat(np.arange(len(cls_dets)), gt_counts)
+    non_group_counts = np.bincount(
+        gt_img_inds[~group_ofs], minlength=len(cls_dets))
+    group_counts = gt_counts - non_group_counts
+
+    # 1. match all dets to non group-of boxes to determine true positives
+    ious_max, ious_argmax = _max_overlaps_per_image(dets, det_img_inds,
+                                                    gts[~group_ofs],
+                                                    non_group_counts)
+    matched = ious_max >= iou_thr
+    # the index of the matched non group-of gt is used to look up the
+    # ignore indicator of all gts, which follows `tpfp_openimages`
+    covered_inds = (np.cumsum(non_group_counts) -
+                    non_group_counts)[det_img_inds] + ious_argmax
+    ignored = [
+        _lookup_matched(gt_ignore_inds, gt_offsets[det_img_inds] + ious_argmax,
+                        matched)
+    ]
+    det_areas = (dets[:, 2] - dets[:, 0] + extra_length) * (
+        dets[:, 3] - dets[:, 1] + extra_length)
+    tp, fp = _greedy_tpfp(matched, covered_inds, ignored, det_ranks, det_areas,
+                          [(None, None)])
+    if group_counts.sum() == 0:
+        return tp, fp, dets
+
+    # 2. match the false positives against group-of boxes, each group-of box
+    # is represented by its highest scored det bbox
+    ioas_max, ioas_argmax = _max_overlaps_per_image(
+        dets, det_img_inds, gts[group_ofs], group_counts, mode='iof')
+    match_group_of = (tp[0] == 0) & (ioas_max >= ioa_thr)
+    match_group_of &= ~_lookup_matched(
+        gt_ignore_inds, gt_offsets[det_img_inds] + ioas_argmax, match_group_of)
+    group_inds = (np.cumsum(group_counts) -
+                  group_counts)[det_img_inds] + ioas_argmax
+    num_groups = int(group_counts.sum())
+    tp_group = np.zeros(num_groups, dtype=np.float32)
+    tp_group[group_inds[match_group_of]] = 1
+    fp_group = (tp_group <= 0).astype(float)
+    det_bboxes_group = np.zeros((num_groups, dets.shape[1]), dtype=float)
+    inds = np.flatnonzero(match_group_of)
+    inds = inds[np.lexsort((det_ranks[inds], group_inds[inds]))]
+    is_first = np.ones(inds.shape[0], dtype=bool)
+    is_first[1:] = group_inds[inds[1:]] != group_inds[inds[:-1]]
+    inds = inds[is_first]
+    inds = inds[dets[inds, -1] > 0]
+    det_bboxes_group[group_inds[inds]] = dets[inds]
+
+    # put the group-of boxes after the remaining det bboxes of each image
+    keep = ~match_group_of
+    img_inds = np.concatenate(
+        (det_img_inds[keep], np.repeat(np.arange(len(cls_dets)),
+                                       group_counts)))
+    order = np.argsort(img_inds, kind='stable')
+    tp = np.concatenate((tp[0][keep], tp_group))[order][None]
+    fp = np.concatenate((fp[0][keep], fp_group))[order][None]
+    det_bboxes = np.concatenate((dets[keep], det_bboxes_group))[order]
+    return tp, fp, det_bboxes
+
+
 def get_cls_results(det_results, annotations, class_id):
     """Get det results and gt information of a certain class.
 
@@ -566,8 +939,11 @@ def eval_map(det_results,
             unless dataset is 'det' or 'vid' (:func:`tpfp_imagenet` in this
             case). If it is given as a function, then this function is used
             to evaluate tp & fp. Default None.
-        nproc (int): Processes used for computing TP and FP.
-            Defaults to 4.
+        nproc (int): Processes used for computing TP and FP. It is only
+            used by the criteria computed image by image, i.e.
+            :func:`tpfp_imagenet` and custom ``tpfp_fn``, because
+            :func:`tpfp_default` and :func:`tpfp_openimages` are computed
+            for all images at once. Defaults to 4.
         use_legacy_coordinate (bool): Whether to use coordinate system in
             mmdet v1.x. which means width, height should be
             calculated as 'x2 - x1 + 1` and 'y2 - y1 + 1' respectively.
@@ -598,9 +974,28 @@ def eval_map(det_results,
     area_ranges = ([(rg[0]**2, rg[1]**2) for rg in scale_ranges]
                    if scale_ranges is not None else None)
 
+    # choose proper function according to datasets to compute tp and fp
+    if tpfp_fn is None:
+        if dataset in ['det', 'vid']:
+            tpfp_fn = tpfp_imagenet
+        elif dataset in ['oid_challenge', 'oid_v6'] \
+                or use_group_of is True:
+            tpfp_fn = tpfp_openimages
+        else:
+            tpfp_fn = tpfp_default
+    if not callable(tpfp_fn):
+        raise ValueError(
+            f'tpfp_fn has to be a function or None, but got {tpfp_fn}')
+
+    # The built-in criteria are computed for all images of a class at once,
+    # which is much faster than dispatching every image to a process pool.
+    batched_openimages = area_ranges is None or not use_group_of
+    use_batched = tpfp_fn is tpfp_default or (tpfp_fn is tpfp_openimages
+                                              and batched_openimages)
     # There is no need to use multi processes to process
     # when num_imgs = 1 .
-    if num_imgs > 1:
+    use_pool = num_imgs > 1 and not use_batched
+    if use_pool:
         assert nproc > 0, 'nproc must be at least one.'
         nproc = min(nproc, num_imgs)
         pool = Pool(nproc)
@@ -610,20 +1005,28 @@ def eval_map(det_results,
         # get gt and det bboxes of this class
         cls_dets, cls_gts, cls_gts_ignore = get_cls_results(
             det_results, annotations, i)
-        # choose proper function according to datasets to compute tp and fp
-        if tpfp_fn is None:
-            if dataset in ['det', 'vid']:
-                tpfp_fn = tpfp_imagenet
-            elif dataset in ['oid_challenge', 'oid_v6'] \
-                    or use_group_of is True:
-                tpfp_fn = tpfp_openimages
-            else:
-                tpfp_fn = tpfp_default
-        if not callable(tpfp_fn):
-            raise ValueError(
-                f'tpfp_fn has to be a function or None, but got {tpfp_fn}')
 
-        if num_imgs > 1:
+        if tpfp_fn is tpfp_default and use_batched:
+            tpfp = [
+                batched_tpfp_default(cls_dets, cls_gts, cls_gts_ignore,
+                                     iou_thr, area_ranges,
+                                     use_legacy_coordinate)
+            ]
+        elif use_batched:
+            tpfp = [
+                batched_tpfp_openimages(
+                    cls_dets,
+                    cls_gts,
+                    cls_gts_ignore,
+                    iou_thr,
+                    area_ranges,
+                    use_legacy_coordinate,
+                    gt_bboxes_group_ofs=(get_cls_group_ofs(annotations, i)
+                                         if use_group_of else None),
+                    use_group_of=use_group_of,
+                    ioa_thr=ioa_thr)
+            ]
+        elif use_pool:
             # compute tp and fp for each image with multiple processes
             args = []
             if use_group_of:
@@ -654,7 +1057,7 @@ def eval_map(det_results,
                 ioa_thr=ioa_thr)
             tpfp = [tpfp]
 
-        if use_group_of:
+        if use_group_of or tpfp_fn is tpfp_openimages:
             tp, fp, cls_dets = tuple(zip(*tpfp))
         else:
             tp, fp = tuple(zip(*tpfp))
@@ -696,7 +1099,7 @@ def eval_map(det_results,
             'ap': ap
         })
 
-    if num_imgs > 1:
+    if use_pool:
         pool.close()
 
     if scale_ranges is not None:
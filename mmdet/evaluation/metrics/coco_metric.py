@@ -4,6 +4,7 @@ import itertools
 import os.path as osp
 import tempfile
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Sequence, Union
 
 import numpy as np
@@ -15,8 +16,8 @@ from terminaltables import AsciiTable
 
 from mmdet.datasets.api_wrappers import COCO, COCOeval, COCOevalMP
 from mmdet.registry import METRICS
-from mmdet.structures.mask import encode_mask_results
-from ..functional import eval_recalls
+from mmdet.structures.mask import RLEMasks, encode_mask_results
+from ..functional import FastCOCOeval, eval_recalls
 
 
 @METRICS.register_module()
@@ -64,6 +65,24 @@ class CocoMetric(BaseMetric):
         sort_categories (bool): Whether sort categories in annotations. Only
             used for `Objects365V1Dataset`. Defaults to False.
         use_mp_eval (bool): Whether to use mul-processing evaluation
+        nproc (int): Number of processes for multi-processing evaluation.
+            Only used when ``use_mp_eval`` is True. When ``nproc`` exceeds
+            the number of cpu cores, the number of cpu cores is used.
+            Defaults to 8.
+        use_fast_eval (bool): Whether to evaluate 'bbox', 'segm' and
+            'proposal' with the in-memory :class:`FastCOCOeval`, which gives
+            the same results as ``COCOeval`` without dumping the predictions
+            to json files unless ``outfile_prefix`` is specified.
+            Defaults to False.
+        streaming (bool): Whether to match the predictions with the ground
+            truth in :meth:`process` as the batches arrive, so that only
+            compact per image match records are kept and the final
+            evaluation is near-instant. It is evaluated by
+            :class:`FastCOCOeval` and does not support 'proposal_fast' and
+            ``format_only``. Defaults to False.
+        num_stream_workers (int): Number of background threads used to
+            match the predictions in streaming mode. 0 means matching in the
+            main thread. Defaults to 0.
     """
     default_prefix: Optional[str] = 'coco'
 
@@ -81,7 +100,11 @@ class CocoMetric(BaseMetric):
                  collect_device: str = 'cpu',
                  prefix: Optional[str] = None,
                  sort_categories: bool = False,
-                 use_mp_eval: bool = False) -> None:
+                 use_mp_eval: bool = False,
+                 nproc: int = 8,
+                 use_fast_eval: bool = False,
+                 streaming: bool = False,
+                 num_stream_workers: int = 0) -> None:
         super().__init__(collect_device=collect_device, prefix=prefix)
         # coco evaluation metrics
         self.metrics = metric if isinstance(metric, list) else [metric]
@@ -96,6 +119,20 @@ class CocoMetric(BaseMetric):
         self.classwise = classwise
         # whether to use multi processing evaluation, default False
         self.use_mp_eval = use_mp_eval
+        self.nproc = nproc
+        # whether to use the in-memory fast evaluation, default False
+        self.use_fast_eval = use_fast_eval
+        # whether to match the predictions while processing, default False
+        self.streaming = streaming
+        if self.streaming:
+            assert 'proposal_fast' not in self.metrics, \
+                '`proposal_fast` is not supported in streaming mode'
+            assert not format_only, \
+                '`format_only` is not supported in streaming mode'
+        self.num_stream_workers = num_stream_workers
+        self._stream_evals = None
+        self._stream_executor = None
+        self._stream_futures = []
 
         # proposal_nums used to compute recall or precision.
         self.proposal_nums = list(proposal_nums)
@@ -298,32 +335,9 @@ class CocoMetric(BaseMetric):
                 height=gt_dict['height'],
                 file_name='')
             image_infos.append(image_info)
-            for ann in gt_dict['anns']:
-                label = ann['bbox_label']
-                bbox = ann['bbox']
-                coco_bbox = [
-                    bbox[0],
-                    bbox[1],
-                    bbox[2] - bbox[0],
-                    bbox[3] - bbox[1],
-                ]
-
-                annotation = dict(
-                    id=len(annotations) +
-                    1,  # coco api requires id starts with 1
-                    image_id=img_id,
-                    bbox=coco_bbox,
-                    iscrowd=ann.get('ignore_flag', 0),
-                    category_id=int(label),
-                    area=coco_bbox[2] * coco_bbox[3])
-                if ann.get('mask', None):
-                    mask = ann['mask']
-                    # area = mask_util.area(mask)
-                    if isinstance(mask, dict) and isinstance(
-                            mask['counts'], bytes):
-                        mask['counts'] = mask['counts'].decode()
-                    annotation['segmentation'] = mask
-                    # annotation['area'] = float(area)
+            for annotation in self._instances_to_coco_anns(gt_dict['anns']):
+                # coco api requires id starts with 1
+                annotation.update(id=len(annotations) + 1, image_id=img_id)
                 annotations.append(annotation)
 
         info = dict(
@@ -362,9 +376,15 @@ class CocoMetric(BaseMetric):
             result['labels'] = pred['labels'].cpu().numpy()
             # encode mask to RLE
             if 'masks' in pred:
-                result['masks'] = encode_mask_results(
-                    pred['masks'].detach().cpu().numpy()) if isinstance(
-                        pred['masks'], torch.Tensor) else pred['masks']
+                masks = pred['masks']
+                if isinstance(masks, torch.Tensor):
+                    result['masks'] = encode_mask_results(
+                        masks.detach().cpu().numpy())
+                elif isinstance(masks, RLEMasks):
+                    # the masks emitted by heads in RLE are not decoded
+                    result['masks'] = encode_mask_results(masks)
+                else:
+                    result['masks'] = masks
             # some detectors use different scores for bbox and mask
             if 'mask_scores' in pred:
                 result['mask_scores'] = pred['mask_scores'].cpu().numpy()
@@ -380,8 +400,157 @@ class CocoMetric(BaseMetric):
                     'ground truth is required for evaluation when ' \
                     '`ann_file` is not provided'
                 gt['anns'] = data_sample['instances']
-            # add converted result to the results list
-            self.results.append((gt, result))
+            if self.streaming:
+                self._stream_process(gt, result)
+            else:
+                # add converted result to the results list
+                self.results.append((gt, result))
+
+    def _stream_process(self, gt: dict, result: dict) -> None:
+        """Match the predictions of an image in streaming mode and keep the
+        compact match records in ``self.results``."""
+        if self._stream_evals is None:
+            self._init_stream_evals()
+        if self.num_stream_workers <= 0:
+            self.results.append(self._stream_match(gt, result))
+            return
+        if self._stream_executor is None:
+            self._stream_executor = ThreadPoolExecutor(
+                max_workers=self.num_stream_workers)
+        self._stream_futures.append(
+            self._stream_executor.submit(self._stream_match, gt, result))
+        # keep the order of the results, which is required when collecting
+        # results from different ranks
+        while self._stream_futures and self._stream_futures[0].done():
+            self.results.append(self._stream_futures.pop(0).result())
+
+    def _init_stream_evals(self) -> None:
+        """Build the evaluators used to match predictions in streaming
+        mode."""
+        if self._coco_api is None:
+            # the same as the categories converted by `gt_to_coco_json`
+            self.cat_ids = list(range(len(self.dataset_meta['classes'])))
+        elif self.cat_ids is None:
+            self.cat_ids = self._coco_api.get_cat_ids(
+                cat_names=self.dataset_meta['classes'])
+        self._stream_evals = dict()
+        for metric in self.metrics:
+            iou_type = 'bbox' if metric == 'proposal' else metric
+            coco_eval = FastCOCOeval(self._coco_api, iou_type)
+            coco_eval.params.catIds = self.cat_ids
+            coco_eval.params.maxDets = list(self.proposal_nums)
+            coco_eval.params.iouThrs = self.iou_thrs
+            if metric == 'proposal':
+                coco_eval.params.useCats = 0
+            coco_eval.prepare()
+            self._stream_evals[metric] = coco_eval
+
+    def _stream_match(self, gt: dict, result: dict) -> tuple:
+        """Match the predictions of an image with its ground truth.
+
+        Args:
+            gt (dict): The ground truth info of the image.
+            result (dict): The predictions of the image.
+
+        Returns:
+            tuple: The image id and the match records of each metric.
+        """
+        if self._coco_api is not None:
+            gt_anns = self._coco_api.imgToAnns.get(gt['img_id'], [])
+            img_shape = None
+        else:
+            gt_anns = self._instances_to_coco_anns(gt['anns'])
+            img_shape = (gt['height'], gt['width'])
+        records = dict()
+        for metric, coco_eval in self._stream_evals.items():
+            if coco_eval.params.iouType == 'segm' and 'masks' not in result:
+                raise KeyError(f'{metric} is not in results')
+            records[metric] = coco_eval.evaluate_img(
+                gt_anns, coco_eval.result_to_dt(result, self.cat_ids),
+                img_shape)
+        return gt['img_id'], records
+
+    @staticmethod
+    def _instances_to_coco_anns(instances: Sequence[dict]) -> List[dict]:
+        """Convert the instances of an image to coco style annotations
+        without ids, which are shared by :meth:`gt_to_coco_json` and the
+        streaming mode."""
+        anns = []
+        for ann in instances:
+            bbox = ann['bbox']
+            coco_bbox = [
+                bbox[0],
+                bbox[1],
+                bbox[2] - bbox[0],
+                bbox[3] - bbox[1],
+            ]
+            coco_ann = dict(
+                bbox=coco_bbox,
+                iscrowd=ann.get('ignore_flag', 0),
+                category_id=int(ann['bbox_label']),
+                area=coco_bbox[2] * coco_bbox[3])
+            if ann.get('mask', None):
+                mask = ann['mask']
+                if isinstance(mask, dict) and isinstance(
+                        mask['counts'], bytes):
+                    mask = dict(mask, counts=mask['counts'].decode())
+                coco_ann['segmentation'] = mask
+            anns.append(coco_ann)
+        return anns
+
+    def evaluate(self, size: int) -> dict:
+        """Evaluate the model performance of the whole dataset after
+        processing all batches.
+
+        Args:
+            size (int): Length of the entire validation dataset.
+
+        Returns:
+            dict: Evaluation metrics dict on the val dataset.
+        """
+        # wait for the background matching in streaming mode
+        for future in self._stream_futures:
+            self.results.append(future.result())
+        self._stream_futures = []
+        if self._stream_executor is not None:
+            self._stream_executor.shutdown()
+            self._stream_executor = None
+        return super().evaluate(size)
+
+    def _load_coco_eval(self, result_files: dict,
+                        metric: str) -> Optional[COCOeval]:
+        """Load the dumped results and build the pycocotools evaluator.
+
+        Args:
+            result_files (dict): Json files of the results, see
+                :meth:`results2json`.
+            metric (str): The metric to be evaluated.
+
+        Returns:
+            COCOeval, optional: The evaluator, None if the results are empty.
+        """
+        iou_type = 'bbox' if metric == 'proposal' else metric
+        if metric not in result_files:
+            raise KeyError(f'{metric} is not in results')
+        try:
+            predictions = load(result_files[metric])
+            if iou_type == 'segm':
+                # Refer to https://github.com/cocodataset/cocoapi/blob/master/PythonAPI/pycocotools/coco.py#L331  # noqa
+                # When evaluating mask AP, if the results contain bbox,
+                # cocoapi will use the box area instead of the mask area
+                # for calculating the instance area. Though the overall AP
+                # is not affected, this leads to different
+                # small/medium/large mask AP results.
+                for x in predictions:
+                    x.pop('bbox')
+            coco_dt = self._coco_api.loadRes(predictions)
+        except IndexError:
+            return None
+
+        if self.use_mp_eval:
+            return COCOevalMP(
+                self._coco_api, coco_dt, iou_type, nproc=self.nproc)
+        return COCOeval(self._coco_api, coco_dt, iou_type)
 
     def compute_metrics(self, results: list) -> Dict[str, float]:
         """Compute the metrics from processed results.
@@ -396,7 +565,12 @@ class CocoMetric(BaseMetric):
         logger: MMLogger = MMLogger.get_current_instance()
 
         # split gt and prediction list
-        gts, preds = zip(*results)
+        if self.streaming:
+            # only the compact match records are kept in streaming mode
+            gts, preds = [], []
+            stream_records = dict(results)
+        else:
+            gts, preds = zip(*results)
 
         tmp_dir = None
         if self.outfile_prefix is None:
@@ -405,7 +579,11 @@ class CocoMetric(BaseMetric):
         else:
             outfile_prefix = self.outfile_prefix
 
-        if self._coco_api is None:
+        if self.streaming and self._coco_api is None:
+            # evaluate the images seen in streaming mode
+            self.cat_ids = list(range(len(self.dataset_meta['classes'])))
+            self.img_ids = sorted(stream_records)
+        elif self._coco_api is None:
             # use converted gt json file to initialize coco api
             logger.info('Converting ground truth to coco format...')
             coco_json_path = self.gt_to_coco_json(
@@ -419,8 +597,13 @@ class CocoMetric(BaseMetric):
         if self.img_ids is None:
             self.img_ids = self._coco_api.get_img_ids()
 
-        # convert predictions to coco format and dump to json file
-        result_files = self.results2json(preds, outfile_prefix)
+        # convert predictions to coco format and dump to json file, which
+        # can be skipped by the in-memory fast evaluation
+        if self.streaming or (self.use_fast_eval
+                              and self.outfile_prefix is None):
+            result_files = None
+        else:
+            result_files = self.results2json(preds, outfile_prefix)
 
         eval_results = OrderedDict()
         if self.format_only:
@@ -446,30 +629,27 @@ class CocoMetric(BaseMetric):
 
             # evaluate proposal, bbox and segm
             iou_type = 'bbox' if metric == 'proposal' else metric
-            if metric not in result_files:
-                raise KeyError(f'{metric} is not in results')
-            try:
-                predictions = load(result_files[metric])
-                if iou_type == 'segm':
-                    # Refer to https://github.com/cocodataset/cocoapi/blob/master/PythonAPI/pycocotools/coco.py#L331  # noqa
-                    # When evaluating mask AP, if the results contain bbox,
-                    # cocoapi will use the box area instead of the mask area
-                    # for calculating the instance area. Though the overall AP
-                    # is not affected, this leads to different
-                    # small/medium/large mask AP results.
-                    for x in predictions:
-                        x.pop('bbox')
-                coco_dt = self._coco_api.loadRes(predictions)
-
-            except IndexError:
-                logger.error(
-                    'The testing results of the whole dataset is empty.')
-                break
-
-            if self.use_mp_eval:
-                coco_eval = COCOevalMP(self._coco_api, coco_dt, iou_type)
+            if self.streaming or self.use_fast_eval:
+                coco_eval = FastCOCOeval(self._coco_api, iou_type)
+                if self.streaming:
+                    num_dets = coco_eval.load_records({
+                        img_id: records[metric]
+                        for img_id, records in stream_records.items()
+                    })
+                elif iou_type == 'segm' and 'masks' not in preds[0]:
+                    raise KeyError(f'{metric} is not in results')
+                else:
+                    num_dets = coco_eval.load_results(preds, self.cat_ids)
+                if num_dets == 0:
+                    logger.error(
+                        'The testing results of the whole dataset is empty.')
+                    break
             else:
-                coco_eval = COCOeval(self._coco_api, coco_dt, iou_type)
+                coco_eval = self._load_coco_eval(result_files, metric)
+                if coco_eval is None:
+                    logger.error(
+                        'The testing results of the whole dataset is empty.')
+                    break
 
             coco_eval.params.catIds = self.cat_ids
             coco_eval.params.imgIds = self.img_ids
@@ -529,7 +709,13 @@ class CocoMetric(BaseMetric):
                         t = []
                         # area range index 0: all area ranges
                         # max dets index -1: typically 100 per image
-                        nm = self._coco_api.loadCats(cat_id)[0]
+                        if self._coco_api is not None:
+                            nm = self._coco_api.loadCats(cat_id)[0]
+                        else:
+                            # categories converted from the dataset in
+                            # streaming mode
+                            nm = dict(
+                                name=self.dataset_meta['classes'][cat_id])
                         precision = precisions[:, :, idx, 0, -1]
                         precision = precision[precision > -1]
                         if precision.size:
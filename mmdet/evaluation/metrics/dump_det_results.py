@@ -2,6 +2,7 @@
 import warnings
 from typing import Sequence
 
+import torch
 from mmengine.evaluator import DumpResults
 from mmengine.evaluator.metric import _to_cpu
 
@@ -37,7 +38,10 @@ class DumpDetResults(DumpResults):
                 pred = data_sample['pred_instances']
                 # encode mask to RLE
                 if 'masks' in pred:
-                    pred['masks'] = encode_mask_results(pred['masks'].numpy())
+                    masks = pred['masks']
+                    if isinstance(masks, torch.Tensor):
+                        masks = masks.numpy()
+                    pred['masks'] = encode_mask_results(masks)
             if 'pred_panoptic_seg' in data_sample:
                 warnings.warn(
                     'Panoptic segmentation map will not be compressed. '
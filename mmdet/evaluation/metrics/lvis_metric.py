@@ -205,8 +205,10 @@ class LVISMetric(CocoMetric):
             result['labels'] = pred['labels'].cpu().numpy()
             # encode mask to RLE
             if 'masks' in pred:
-                result['masks'] = encode_mask_results(
-                    pred['masks'].detach().cpu().numpy())
+                masks = pred['masks']
+                if isinstance(masks, torch.Tensor):
+                    masks = masks.detach().cpu().numpy()
+                result['masks'] = encode_mask_results(masks)
             # some detectors use different scores for bbox and mask
             if 'mask_scores' in pred:
                 result['mask_scores'] = pred['mask_scores'].cpu().numpy()
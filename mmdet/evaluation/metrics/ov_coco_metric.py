@@ -107,7 +107,8 @@ class OVCocoMetric(CocoMetric):
                 break
 
             if self.use_mp_eval:
-                coco_eval = COCOevalMP(self._coco_api, coco_dt, iou_type)
+                coco_eval = COCOevalMP(
+                    self._coco_api, coco_dt, iou_type, nproc=self.nproc)
             else:
                 coco_eval = COCOeval(self._coco_api, coco_dt, iou_type)
 
@@ -19,6 +19,7 @@ from mmdet.models.utils import (filter_scores_and_topk, multi_apply,
 from mmdet.registry import MODELS
 from mmdet.structures.bbox import (cat_boxes, distance2bbox, get_box_tensor,
                                    get_box_wh, scale_boxes)
+from mmdet.structures.mask import RLEMasks
 from mmdet.utils import ConfigType, InstanceList, OptInstanceList, reduce_mean
 from .rtmdet_head import RTMDetHead
 
@@ -457,7 +458,9 @@ class RTMDetInsHead(RTMDetHead):
                   (num_instances, ).
                 - bboxes (Tensor): Has a shape (num_instances, 4),
                   the last dimension 4 arrange as (x1, y1, x2, y2).
-                - masks (Tensor): Has a shape (num_instances, h, w).
+                - masks (Tensor | :obj:`RLEMasks`): Has a shape
+                  (num_instances, h, w). The masks are encoded to
+                  :obj:`RLEMasks` if ``rle_masks`` is True in ``cfg``.
         """
         stride = self.prior_generator.strides[0][0]
         if rescale:
@@ -515,6 +518,10 @@ class RTMDetInsHead(RTMDetHead):
                 size=(results.bboxes.shape[0], h, w),
                 dtype=torch.bool,
                 device=results.bboxes.device)
+        if cfg.get('rle_masks', False):
+            # encode the masks on the device so that only the RLEs rather
+            # than the full-resolution masks are transferred to CPU
+            results.masks = RLEMasks.from_bitmaps(results.masks)
 
         return results
 
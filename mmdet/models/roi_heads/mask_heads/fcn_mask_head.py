@@ -16,7 +16,7 @@ from torch.nn.modules.utils import _pair
 from mmdet.models.task_modules.samplers import SamplingResult
 from mmdet.models.utils import empty_instances
 from mmdet.registry import MODELS
-from mmdet.structures.mask import mask_target
+from mmdet.structures.mask import RLEMasks, mask_target
 from mmdet.utils import ConfigType, InstanceList, OptConfigType, OptMultiConfig
 
 BYTES_PER_FLOAT = 4
@@ -248,7 +248,10 @@ class FCNMaskHead(BaseModule):
                   (num_instances, ).
                 - bboxes (Tensor): Has a shape (num_instances, 4),
                   the last dimension 4 arrange as (x1, y1, x2, y2).
-                - masks (Tensor): Has a shape (num_instances, H, W).
+                - masks (Tensor | :obj:`RLEMasks`): Has a shape
+                  (num_instances, H, W). The masks are encoded to
+                  :obj:`RLEMasks` if ``rle_masks`` is True in
+                  ``rcnn_test_cfg``.
         """
         assert len(mask_preds) == len(results_list) == len(batch_img_metas)
 
@@ -273,6 +276,11 @@ class FCNMaskHead(BaseModule):
                     rescale=rescale,
                     activate_map=activate_map)
                 results.masks = im_mask
+            if rcnn_test_cfg.get('rle_masks', False):
+                # encode the masks on the device so that only the RLEs rather
+                # than the full-resolution masks are transferred to CPU
+                results_list[img_id].masks = RLEMasks.from_bitmaps(
+                    results_list[img_id].masks)
         return results_list
 
     def _predict_by_feat_single(self,
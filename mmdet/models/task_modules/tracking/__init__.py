@@ -1,5 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from .aflink import AppearanceFreeLink
+from .assignment import linear_assignment
 from .camera_motion_compensation import CameraMotionCompensation
 from .interpolation import InterpolateTracklets
 from .kalman_filter import KalmanFilter
@@ -7,5 +8,5 @@ from .similarity import embed_similarity
 
 __all__ = [
     'KalmanFilter', 'InterpolateTracklets', 'embed_similarity',
-    'AppearanceFreeLink', 'CameraMotionCompensation'
+    'AppearanceFreeLink', 'CameraMotionCompensation', 'linear_assignment'
 ]
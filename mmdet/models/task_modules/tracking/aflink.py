@@ -1,17 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from collections import defaultdict
 from typing import Tuple
 
 import numpy as np
 import torch
 from mmengine.model import BaseModule
 from mmengine.runner.checkpoint import load_checkpoint
-from scipy.optimize import linear_sum_assignment
 from torch import Tensor, nn
 
 from mmdet.registry import TASK_UTILS
-
-INFINITY = 1e5
+from .assignment import linear_assignment
 
 
 class TemporalBlock(BaseModule):
@@ -115,6 +112,8 @@ class AFLinkModel(BaseModule):
         self.classifier = Classifier(*classifier_channels)
 
     def forward(self, x1: Tensor, x2: Tensor) -> Tensor:
+        """Compute the confidences that the (B, 1, 30, C) tracks in ``x1``
+        and ``x2`` are linked, which are with shape (B, )."""
         assert not self.training, 'Only testing is supported for AFLink.'
         x1 = x1[:, :, :, :3]
         x2 = x2[:, :, :, :3]
@@ -125,7 +124,7 @@ class AFLinkModel(BaseModule):
         x1 = self.pooling(x1).squeeze(-1).squeeze(-1)
         x2 = self.pooling(x2).squeeze(-1).squeeze(-1)
         y = self.classifier(x1, x2)
-        y = torch.softmax(y, dim=1)[0, 1]
+        y = torch.softmax(y, dim=1)[:, 1]
         return y
 
 
@@ -145,17 +144,21 @@ class AppearanceFreeLink(BaseModule):
             tracklets association. Defaults to 75.
         confidence_threshold (float, optional): The minimum confidence
             threshold for tracklets association. Defaults to 0.95.
+        batch_size (int, optional): The maximum number of track pairs scored
+            by the model at once. Defaults to 1024.
     """
 
     def __init__(self,
                  checkpoint: str,
                  temporal_threshold: tuple = (0, 30),
                  spatial_threshold: int = 75,
-                 confidence_threshold: float = 0.95):
+                 confidence_threshold: float = 0.95,
+                 batch_size: int = 1024):
         super(AppearanceFreeLink, self).__init__()
         self.temporal_threshold = temporal_threshold
         self.spatial_threshold = spatial_threshold
         self.confidence_threshold = confidence_threshold
+        self.batch_size = batch_size
 
         self.model = AFLinkModel()
         if checkpoint:
@@ -167,6 +170,19 @@ class AppearanceFreeLink(BaseModule):
         self.device = next(self.model.parameters()).device
         self.fn_l2 = lambda x, y: np.sqrt(x**2 + y**2)
 
+    def _normalize(self, track1: np.ndarray,
+                   track2: np.ndarray) -> Tuple[np.ndarray]:
+        """Min-max normalize the motion embeddings of the (..., L, C) tracks
+        by the range of each pair of tracks."""
+        tracks = np.concatenate((track1, track2), axis=-2)
+        min_ = tracks.min(axis=-2, keepdims=True)
+        max_ = tracks.max(axis=-2, keepdims=True)
+        subtractor = (max_ + min_) / 2
+        divisor = (max_ - min_) / 2 + 1e-5
+        track1 = (track1 - subtractor) / divisor
+        track2 = (track2 - subtractor) / divisor
+        return track1, track2
+
     def data_transform(self,
                        track1: np.ndarray,
                        track2: np.ndarray,
@@ -193,15 +209,40 @@ class AppearanceFreeLink(BaseModule):
         track2 = track2[:length] if length_2 >= length else \
             np.pad(track2, ((0, length - length_2), (0, 0)))
 
-        # min-max normalization
-        min_ = np.concatenate((track1, track2), axis=0).min(axis=0)
-        max_ = np.concatenate((track1, track2), axis=0).max(axis=0)
-        subtractor = (max_ + min_) / 2
-        divisor = (max_ - min_) / 2 + 1e-5
-        track1 = (track1 - subtractor) / divisor
-        track2 = (track2 - subtractor) / divisor
+        return self._normalize(track1, track2)
 
-        return track1, track2
+    def _candidate_pairs(self, first_frames: np.ndarray,
+                         last_frames: np.ndarray, first_boxes: np.ndarray,
+                         last_boxes: np.ndarray) -> Tuple[np.ndarray]:
+        """Find the pairs of tracks satisfying the temporal and spatial
+        constraints, where track j starts after track i ends.
+
+        The tracks are sorted by their first frames, so that the tracks
+        starting in the temporal window after a track ends are found by
+        binary search, instead of checking all pairs of tracks.
+
+        Returns:
+            Tuple[ndarray]: The indices of the tracks i and j of the pairs.
+        """
+        order = np.argsort(first_frames, kind='stable')
+        lows = np.searchsorted(
+            first_frames[order],
+            last_frames + self.temporal_threshold[0],
+            side='left')
+        highs = np.searchsorted(
+            first_frames[order],
+            last_frames + self.temporal_threshold[1],
+            side='right')
+        num_candidates = np.maximum(highs - lows, 0)
+        offsets = np.cumsum(num_candidates) - num_candidates
+        inds_i = np.repeat(np.arange(len(first_frames)), num_candidates)
+        inds_j = order[np.arange(len(inds_i)) -
+                       np.repeat(offsets - lows, num_candidates)]
+
+        # spatial constraint
+        dists = self.fn_l2(*(last_boxes[inds_i] - first_boxes[inds_j]).T)
+        valid = (inds_i != inds_j) & (dists <= self.spatial_threshold)
+        return inds_i[valid], inds_j[valid]
 
     def forward(self, pred_tracks: np.ndarray) -> np.ndarray:
         """Forward function.
@@ -214,66 +255,72 @@ class AppearanceFreeLink(BaseModule):
                 (frame_id, track_id, x1, y1, x2, y2, score)
         """
         # sort tracks by the frame id
-        pred_tracks = pred_tracks[np.argsort(pred_tracks[:, 0])]
-
-        # gather tracks information
-        id2info = defaultdict(list)
-        for row in pred_tracks:
-            frame_id, track_id, x1, y1, x2, y2 = row[:6]
-            id2info[track_id].append([frame_id, x1, y1, x2 - x1, y2 - y1])
-        id2info = {k: np.array(v) for k, v in id2info.items()}
-        num_track = len(id2info)
-        track_ids = np.array(list(id2info))
-        cost_matrix = np.full((num_track, num_track), INFINITY)
-
-        # compute the cost matrix
-        for i, id_i in enumerate(track_ids):
-            for j, id_j in enumerate(track_ids):
-                if id_i == id_j:
-                    continue
-                info_i, info_j = id2info[id_i], id2info[id_j]
-                frame_i, box_i = info_i[-1][0], info_i[-1][1:3]
-                frame_j, box_j = info_j[0][0], info_j[0][1:3]
-                # temporal constraint
-                if not self.temporal_threshold[0] <= \
-                        frame_j - frame_i <= self.temporal_threshold[1]:
-                    continue
-                # spatial constraint
-                if self.fn_l2(box_i[0] - box_j[0], box_i[1] - box_j[1]) \
-                        > self.spatial_threshold:
-                    continue
-                # confidence constraint
-                track_i, track_j = self.data_transform(info_i, info_j)
-
-                # numpy to torch
-                track_i = torch.tensor(
-                    track_i, dtype=torch.float).to(self.device)
-                track_j = torch.tensor(
-                    track_j, dtype=torch.float).to(self.device)
-                track_i = track_i.unsqueeze(0).unsqueeze(0)
-                track_j = track_j.unsqueeze(0).unsqueeze(0)
-
+        pred_tracks = pred_tracks[np.argsort(pred_tracks[:, 0], kind='stable')]
+
+        # gather tracks information, where the tracks are ordered by their
+        # first appearances, and the rows of each track are contiguous
+        track_ids, first_rows, track_inds = np.unique(
+            pred_tracks[:, 1], return_index=True, return_inverse=True)
+        ranks = np.empty(len(track_ids), dtype=np.int64)
+        ranks[np.argsort(first_rows)] = np.arange(len(track_ids))
+        track_ids = track_ids[np.argsort(first_rows)]
+        track_inds = ranks[track_inds]
+        rows = np.argsort(track_inds, kind='stable')
+        infos = np.concatenate(
+            (pred_tracks[rows, :1], pred_tracks[rows, 2:4],
+             pred_tracks[rows, 4:6] - pred_tracks[rows, 2:4]),
+            axis=1)
+        num_track = len(track_ids)
+        lengths = np.bincount(track_inds, minlength=num_track)
+        starts = np.cumsum(lengths) - lengths
+        ends = starts + lengths - 1
+
+        # fill or cut each track to 30 frames, the last frames as the first
+        # track of a pair and the first frames as the second track
+        length = 30
+        steps = np.arange(length)
+        tail_inds = (lengths - length)[:, None] + steps
+        tails = infos[starts[:, None] + np.maximum(tail_inds, 0)]
+        tails[tail_inds < 0] = 0
+        heads = infos[np.minimum(starts[:, None] + steps, ends[:, None])]
+        heads[steps >= lengths[:, None]] = 0
+
+        inds_i, inds_j = self._candidate_pairs(infos[starts, 0], infos[ends,
+                                                                       0],
+                                               infos[starts, 1:3], infos[ends,
+                                                                         1:3])
+
+        # confidence constraint
+        cost_matrix = np.full((num_track, num_track), np.inf)
+        for k in range(0, len(inds_i), self.batch_size):
+            batch_i = inds_i[k:k + self.batch_size]
+            batch_j = inds_j[k:k + self.batch_size]
+            track_i, track_j = self._normalize(tails[batch_i], heads[batch_j])
+
+            # numpy to torch
+            track_i = torch.tensor(
+                track_i, dtype=torch.float).to(self.device).unsqueeze(1)
+            track_j = torch.tensor(
+                track_j, dtype=torch.float).to(self.device).unsqueeze(1)
+
+            with torch.no_grad():
                 confidence = self.model(track_i,
                                         track_j).detach().cpu().numpy()
-                if confidence >= self.confidence_threshold:
-                    cost_matrix[i, j] = 1 - confidence
+            valid = confidence >= self.confidence_threshold
+            cost_matrix[batch_i[valid], batch_j[valid]] = 1 - confidence[valid]
 
         # linear assignment
-        indices = linear_sum_assignment(cost_matrix)
-        _id2id = dict()  # the temporary assignment results
-        id2id = dict()  # the final assignment results
-        for i, j in zip(indices[0], indices[1]):
-            if cost_matrix[i, j] < INFINITY:
-                _id2id[i] = j
-        for k, v in _id2id.items():
-            if k in id2id:
-                id2id[v] = id2id[k]
-            else:
-                id2id[v] = k
+        row_inds, _ = linear_assignment(cost_matrix)
+        id2id = dict()  # the assignment results
+        for i in np.nonzero(row_inds > -1)[0].tolist():
+            j = row_inds[i]
+            id2id[j] = id2id.get(i, i)
 
         # link
-        for k, v in id2id.items():
-            pred_tracks[pred_tracks[:, 1] == k, 1] = v
+        links = np.arange(num_track)
+        for j, i in id2id.items():
+            links[links == j] = i
+        pred_tracks[:, 1] = track_ids[links[track_inds]]
 
         # deduplicate
         _, index = np.unique(pred_tracks[:, :2], return_index=True, axis=0)
@@ -0,0 +1,187 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from typing import Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+try:
+    import lap
+except ImportError:
+    lap = None
+
+ASSIGNMENT_BACKENDS = ('auto', 'lapjv', 'scipy', 'greedy')
+
+
+def _get_backend(backend: str, sparse: bool) -> str:
+    """Check the backend and resolve ``'auto'``."""
+    if backend not in ASSIGNMENT_BACKENDS:
+        raise ValueError(f'backend should be one of {ASSIGNMENT_BACKENDS}, '
+                         f'but got {backend}')
+    if backend == 'auto':
+        # scipy has less overhead on the small blocks
+        return 'lapjv' if lap is not None and not sparse else 'scipy'
+    if backend == 'lapjv' and lap is None:
+        raise RuntimeError('lap is not installed,\
+             please install it by: pip install lap')
+    return backend
+
+
+def _fill(row_inds: np.ndarray, col_inds: np.ndarray, rows: np.ndarray,
+          cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Record the matched pairs of rows and columns."""
+    row_inds[rows] = cols
+    col_inds[cols] = rows
+    return row_inds, col_inds
+
+
+def _greedy_assignment(cost_matrix: np.ndarray,
+                       feasible: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Match the feasible pairs in ascending order of their costs."""
+    rows, cols = np.nonzero(feasible)
+    order = np.argsort(cost_matrix[rows, cols], kind='stable')
+    row_used = np.zeros(cost_matrix.shape[0], dtype=bool)
+    col_used = np.zeros(cost_matrix.shape[1], dtype=bool)
+    matched_rows, matched_cols = [], []
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row_used[row] or col_used[col]:
+            continue
+        row_used[row] = col_used[col] = True
+        matched_rows.append(row)
+        matched_cols.append(col)
+    matched_rows = np.array(matched_rows, dtype=np.int64)
+    matched_cols = np.array(matched_cols, dtype=np.int64)
+    return matched_rows, matched_cols
+
+
+def _optimal_assignment(cost_matrix: np.ndarray, feasible: np.ndarray,
+                        cost_limit: float,
+                        backend: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve the assignment where leaving a row or a column unmatched costs
+    half of ``cost_limit``.
+
+    Clipping the costs to ``cost_limit`` and solving the rectangular problem
+    gives the same optimum as extending the matrix with the costs of the
+    unmatched rows and columns, as ``lap.lapjv`` does.
+    """
+    if not np.isfinite(cost_limit):
+        # large enough to prefer matching one more pair to any lower cost
+        costs = cost_matrix[feasible]
+        cost_limit = costs.max() + (costs.max() - costs.min() + 1) * min(
+            cost_matrix.shape)
+    clipped = np.where(feasible, cost_matrix, cost_limit)
+    if backend == 'lapjv':
+        _, x, _ = lap.lapjv(clipped, extend_cost=True)
+        rows = np.nonzero(x >= 0)[0]
+        cols = x[rows]
+    else:
+        rows, cols = linear_sum_assignment(clipped)
+    keep = feasible[rows, cols]
+    return rows[keep], cols[keep]
+
+
+def _connected_blocks(rows: np.ndarray, cols: np.ndarray, num_rows: int,
+                      num_cols: int) -> np.ndarray:
+    """Label the rows and columns by the blocks connected by the feasible
+    pairs of ``rows`` and ``cols``.
+
+    Returns:
+        ndarray: The (N + M, ) block labels of the rows and then the columns.
+    """
+    graph = coo_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols + num_rows)),
+        shape=(num_rows + num_cols, num_rows + num_cols))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def linear_assignment(cost_matrix: np.ndarray,
+                      cost_limit: float = np.inf,
+                      backend: str = 'auto',
+                      sparse: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Match the rows (e.g. tracks) and columns (e.g. detections) of a cost
+    matrix with the minimum total cost.
+
+    The pairs whose costs exceed ``cost_limit`` or are not finite (e.g. the
+    gated pairs or the pairs of different categories) are never matched, so
+    the problem splits into the independent blocks of rows and columns
+    connected by the feasible pairs. With ``sparse=True``, each block is
+    solved on its own, and the blocks of a single row or column are solved
+    by picking the cheapest pair, which is much faster in crowded scenes
+    than solving the whole matrix.
+
+    Args:
+        cost_matrix (ndarray): The (N, M) costs of matching each row to each
+            column.
+        cost_limit (float): The maximum cost of a matched pair. Defaults to
+            np.inf, which matches as many rows and columns as possible.
+        backend (str): The solver of each block, options are 'lapjv' (the
+            Jonker-Volgenant algorithm in ``lap``), 'scipy'
+            (``scipy.optimize.linear_sum_assignment``), 'greedy' (matching
+            the cheapest pairs first, which is not optimal) and 'auto'
+            ('scipy' for the sparse blocks, and 'lapjv' for the whole matrix
+            if ``lap`` is installed). Defaults to 'auto'.
+        sparse (bool): Whether to solve the connected blocks independently.
+            Defaults to True.
+
+    Returns:
+        tuple(ndarray, ndarray): The (N, ) index of the column matched to
+        each row and the (M, ) index of the row matched to each column,
+        where -1 means unmatched, the same as ``lap.lapjv``.
+    """
+    backend = _get_backend(backend, sparse)
+    cost_matrix = np.asarray(cost_matrix, dtype=np.float64)
+    num_rows, num_cols = cost_matrix.shape
+    row_inds = np.full(num_rows, -1, dtype=np.int64)
+    col_inds = np.full(num_cols, -1, dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        feasible = cost_matrix <= cost_limit
+    if not np.isfinite(cost_limit):
+        feasible &= np.isfinite(cost_matrix)
+    rows, cols = np.nonzero(feasible)
+    if len(rows) == 0:
+        return row_inds, col_inds
+
+    if not sparse:
+        if backend == 'greedy':
+            return _fill(row_inds, col_inds,
+                         *_greedy_assignment(cost_matrix, feasible))
+        return _fill(
+            row_inds, col_inds,
+            *_optimal_assignment(cost_matrix, feasible, cost_limit, backend))
+
+    labels = _connected_blocks(rows, cols, num_rows, num_cols)
+    row_labels, col_labels = labels[:num_rows], labels[num_rows:]
+    num_blocks = labels.max() + 1
+    block_sizes = np.minimum(
+        np.bincount(row_labels, minlength=num_blocks),
+        np.bincount(col_labels, minlength=num_blocks))
+    # only one pair can be matched in a block of a single row or column,
+    # where the cheapest pair is optimal
+    edge_labels = row_labels[rows]
+    is_single = block_sizes[edge_labels] == 1
+    rows, cols = rows[is_single], cols[is_single]
+    edge_labels = edge_labels[is_single]
+    order = np.lexsort((cost_matrix[rows, cols], edge_labels))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = edge_labels[order[1:]] != edge_labels[order[:-1]]
+    _fill(row_inds, col_inds, rows[order[first]], cols[order[first]])
+
+    # the rows and then the columns of each block
+    nodes = np.argsort(labels, kind='stable')
+    ends = np.cumsum(np.bincount(labels, minlength=num_blocks))
+    for label in np.nonzero(block_sizes > 1)[0]:
+        block_nodes = nodes[ends[label - 1] if label > 0 else 0:ends[label]]
+        is_row = block_nodes < num_rows
+        rows, cols = block_nodes[is_row], block_nodes[~is_row] - num_rows
+        block_costs = cost_matrix[np.ix_(rows, cols)]
+        block_feasible = feasible[np.ix_(rows, cols)]
+        if backend == 'greedy':
+            matched_rows, matched_cols = _greedy_assignment(
+                block_costs, block_feasible)
+        else:
+            matched_rows, matched_cols = _optimal_assignment(
+                block_costs, block_feasible, cost_limit, backend)
+        _fill(row_inds, col_inds, rows[matched_rows], cols[matched_cols])
+    return row_inds, col_inds
@@ -1,16 +1,33 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-import numpy as np
+from multiprocessing import Pool
 
-try:
-    from sklearn.gaussian_process import GaussianProcessRegressor as GPR
-    from sklearn.gaussian_process.kernels import RBF
-    HAS_SKIKIT_LEARN = True
-except ImportError:
-    HAS_SKIKIT_LEARN = False
+import numpy as np
+from scipy.linalg import cho_solve, cholesky
 
 from mmdet.registry import TASK_UTILS
 
 
+def _gaussian_smooth(track: np.ndarray, smooth_tau: int = 10) -> np.ndarray:
+    """Smooth the bboxes of a track by the Gaussian process regression with
+    a fixed RBF kernel, the same as ``GaussianProcessRegressor`` in
+    scikit-learn with the default ``alpha=1e-10``.
+
+    All coordinates share the kernel matrix of the frame ids, so the matrix
+    is factorized only once. The function is defined at the module level to
+    be used by the worker processes.
+    """
+    len_scale = np.clip(smooth_tau * np.log(smooth_tau**3 / len(track)),
+                        smooth_tau**-1, smooth_tau**2)
+    t = track[:, 0] / len_scale
+    kernel = np.exp(-0.5 * (t[:, None] - t[None])**2)
+    lower = cholesky(
+        kernel + 1e-10 * np.eye(len(t)), lower=True, check_finite=False)
+    weights = cho_solve((lower, True), track[:, 2:6], check_finite=False)
+    gsi_track = track.copy()
+    gsi_track[:, 2:6] = kernel @ weights
+    return gsi_track
+
+
 @TASK_UTILS.register_module()
 class InterpolateTracklets:
     """Interpolate tracks to make tracks more complete.
@@ -23,71 +40,66 @@ class InterpolateTracklets:
         use_gsi (bool, optional): Whether to use the GSI (Gaussian-smoothed
             interpolation) method. Defaults to False.
         smooth_tau (int, optional): smoothing parameter in GSI. Defaults to 10.
+        nproc (int, optional): Processes used for smoothing the tracks in
+            GSI. Defaults to 1.
     """
 
     def __init__(self,
                  min_num_frames: int = 5,
                  max_num_frames: int = 20,
                  use_gsi: bool = False,
-                 smooth_tau: int = 10):
-        if not HAS_SKIKIT_LEARN:
-            raise RuntimeError('sscikit-learn is not installed,\
-                 please install it by: pip install scikit-learn')
+                 smooth_tau: int = 10,
+                 nproc: int = 1):
+        assert nproc > 0, 'nproc must be at least one.'
         self.min_num_frames = min_num_frames
         self.max_num_frames = max_num_frames
         self.use_gsi = use_gsi
         self.smooth_tau = smooth_tau
+        self.nproc = nproc
 
-    def _interpolate_track(self,
-                           track: np.ndarray,
-                           track_id: int,
-                           max_num_frames: int = 20) -> np.ndarray:
-        """Interpolate a track linearly to make the track more complete.
+    def _interpolate_tracks(self,
+                            tracks: np.ndarray,
+                            max_num_frames: int = 20) -> np.ndarray:
+        """Interpolate tracks linearly to make the tracks more complete.
 
         This function is proposed in
         "ByteTrack: Multi-Object Tracking by Associating Every Detection Box."
         `ByteTrack<https://arxiv.org/abs/2110.06864>`_.
 
         Args:
-            track (ndarray): With shape (N, 7). Each row denotes
+            tracks (ndarray): With shape (N, 7), sorted by the track id and
+                then the frame id. Each row denotes
                 (frame_id, track_id, x1, y1, x2, y2, score).
             max_num_frames (int, optional): The maximum disconnected length in
-                the track. Defaults to 20.
+                a track. Defaults to 20.
 
         Returns:
-            ndarray: The interpolated track with shape (N, 7). Each row denotes
-                (frame_id, track_id, x1, y1, x2, y2, score)
+            ndarray: The interpolated rows with shape (M, 7), whose scores
+            are 1. Each row denotes (frame_id, track_id, x1, y1, x2, y2,
+            score).
         """
-        assert (track[:, 1] == track_id).all(), \
-            'The track id should not changed when interpolate a track.'
-
-        frame_ids = track[:, 0]
-        interpolated_track = np.zeros((0, 7))
-        # perform interpolation for the disconnected frames in the track.
-        for i in np.where(np.diff(frame_ids) > 1)[0]:
-            left_frame_id = frame_ids[i]
-            right_frame_id = frame_ids[i + 1]
-            num_disconnected_frames = int(right_frame_id - left_frame_id)
-
-            if 1 < num_disconnected_frames < max_num_frames:
-                left_bbox = track[i, 2:6]
-                right_bbox = track[i + 1, 2:6]
-
-                # perform interpolation for two adjacent tracklets.
-                for j in range(1, num_disconnected_frames):
-                    cur_bbox = j / (num_disconnected_frames) * (
-                        right_bbox - left_bbox) + left_bbox
-                    cur_result = np.ones((7, ))
-                    cur_result[0] = j + left_frame_id
-                    cur_result[1] = track_id
-                    cur_result[2:6] = cur_bbox
-
-                    interpolated_track = np.concatenate(
-                        (interpolated_track, cur_result[None]), axis=0)
-
-        interpolated_track = np.concatenate((track, interpolated_track),
-                                            axis=0)
-        return interpolated_track
+        # the disconnected frames between the adjacent rows of a track
+        num_disconnected_frames = np.diff(tracks[:, 0]).astype(np.int64)
+        lefts = np.nonzero((tracks[1:, 1] == tracks[:-1, 1])
+                           & (num_disconnected_frames > 1)
+                           & (num_disconnected_frames < max_num_frames))[0]
+        num_disconnected_frames = num_disconnected_frames[lefts]
+
+        # expand each disconnection to the frames j = 1, ..., n - 1
+        num_inserted = num_disconnected_frames - 1
+        offsets = np.cumsum(num_inserted) - num_inserted
+        lefts = np.repeat(lefts, num_inserted)
+        j = np.arange(len(lefts)) - np.repeat(offsets, num_inserted) + 1
+        ratios = j / np.repeat(num_disconnected_frames, num_inserted)
+
+        left_bboxes = tracks[lefts, 2:6]
+        right_bboxes = tracks[lefts + 1, 2:6]
+        interpolated_tracks = np.ones((len(lefts), 7))
+        interpolated_tracks[:, 0] = tracks[lefts, 0] + j
+        interpolated_tracks[:, 1] = tracks[lefts, 1]
+        interpolated_tracks[:, 2:6] = ratios[:, None] * (
+            right_bboxes - left_bboxes) + left_bboxes
+        return interpolated_tracks
 
     def gaussian_smoothed_interpolation(self,
                                         track: np.ndarray,
@@ -108,27 +120,7 @@ class InterpolateTracklets:
             ndarray: The interpolated tracks with shape (N, 7). Each row
                 denotes (frame_id, track_id, x1, y1, x2, y2, score)
         """
-        len_scale = np.clip(smooth_tau * np.log(smooth_tau**3 / len(track)),
-                            smooth_tau**-1, smooth_tau**2)
-        gpr = GPR(RBF(len_scale, 'fixed'))
-        t = track[:, 0].reshape(-1, 1)
-        x1 = track[:, 2].reshape(-1, 1)
-        y1 = track[:, 3].reshape(-1, 1)
-        x2 = track[:, 4].reshape(-1, 1)
-        y2 = track[:, 5].reshape(-1, 1)
-        gpr.fit(t, x1)
-        x1_gpr = gpr.predict(t)
-        gpr.fit(t, y1)
-        y1_gpr = gpr.predict(t)
-        gpr.fit(t, x2)
-        x2_gpr = gpr.predict(t)
-        gpr.fit(t, y2)
-        y2_gpr = gpr.predict(t)
-        gsi_track = [[
-            t[i, 0], track[i, 1], x1_gpr[i], y1_gpr[i], x2_gpr[i], y2_gpr[i],
-            track[i, 6]
-        ] for i in range(len(t))]
-        return np.array(gsi_track)
+        return _gaussian_smooth(track, smooth_tau)
 
     def forward(self, pred_tracks: np.ndarray) -> np.ndarray:
         """Forward function.
@@ -140,29 +132,34 @@ class InterpolateTracklets:
             ndarray: The interpolated tracks with shape (N, 7). Each row
             denotes (frame_id, track_id, x1, y1, x2, y2, score).
         """
-        max_track_id = int(np.max(pred_tracks[:, 1]))
-        min_track_id = int(np.min(pred_tracks[:, 1]))
-
-        # perform interpolation for each track
-        interpolated_tracks = []
-        for track_id in range(min_track_id, max_track_id + 1):
-            inds = pred_tracks[:, 1] == track_id
-            track = pred_tracks[inds]
-            num_frames = len(track)
-            if num_frames <= 2:
-                continue
-
-            if num_frames > self.min_num_frames:
-                interpolated_track = self._interpolate_track(
-                    track, track_id, self.max_num_frames)
+        # sort by the track id and then the frame id, so that the rows of
+        # each track are contiguous
+        pred_tracks = pred_tracks[np.lexsort(
+            (pred_tracks[:, 0], pred_tracks[:, 1]))]
+        _, num_frames = np.unique(pred_tracks[:, 1], return_counts=True)
+        tracks = pred_tracks[np.repeat(num_frames > 2, num_frames)]
+        num_frames = num_frames[num_frames > 2]
+
+        # perform interpolation for the tracks longer than min_num_frames
+        is_long = np.repeat(num_frames > self.min_num_frames, num_frames)
+        interpolated_tracks = self._interpolate_tracks(tracks[is_long],
+                                                       self.max_num_frames)
+        tracks = np.concatenate((tracks, interpolated_tracks))
+        tracks = tracks[np.lexsort((tracks[:, 0], tracks[:, 1]))]
+
+        if self.use_gsi and len(tracks) > 0:
+            _, starts = np.unique(tracks[:, 1], return_index=True)
+            track_list = np.split(tracks, starts[1:])
+            if self.nproc > 1 and len(track_list) > 1:
+                with Pool(min(self.nproc, len(track_list))) as pool:
+                    track_list = pool.starmap(_gaussian_smooth,
+                                              [(track, self.smooth_tau)
+                                               for track in track_list])
             else:
-                interpolated_track = track
-
-            if self.use_gsi:
-                interpolated_track = self.gaussian_smoothed_interpolation(
-                    interpolated_track, self.smooth_tau)
-
-            interpolated_tracks.append(interpolated_track)
+                track_list = [
+                    _gaussian_smooth(track, self.smooth_tau)
+                    for track in track_list
+                ]
+            tracks = np.concatenate(track_list)
 
-        interpolated_tracks = np.concatenate(interpolated_tracks)
-        return interpolated_tracks[interpolated_tracks[:, 0].argsort()]
+        return tracks[np.lexsort((tracks[:, 1], tracks[:, 0]))]
@@ -1,5 +1,5 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import torch
@@ -18,6 +18,10 @@ class KalmanFilter:
     """A simple Kalman filter for tracking bounding boxes in image space.
 
     The implementation is referred to https://github.com/nwojke/deep_sort.
+    Besides the methods for a single track, the ``batch_*`` methods run on
+    the stacked states of T tracks, i.e. (T, 8) means and (T, 8, 8)
+    covariances, and ``predict_tracks`` and ``update_tracks`` run them on
+    the states kept in the tracks of a tracker.
 
     Args:
         center_only (bool): If True, distance computation is done with
@@ -241,6 +245,205 @@ class KalmanFilter:
         squared_maha = np.sum(z * z, axis=0)
         return squared_maha
 
+    def batch_initiate(
+            self, measurements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Create tracks from unassociated measurements in a batch.
+
+        Args:
+            measurements (ndarray): The (T, 4) bounding box coordinates
+                (x, y, a, h) with center position (x, y), aspect ratio a, and
+                height h.
+
+        Returns:
+            (ndarray, ndarray): Returns the (T, 8) mean vectors and (T, 8, 8)
+            covariance matrices of the new tracks.
+        """
+        num = len(measurements)
+        means = np.concatenate((measurements, np.zeros_like(measurements)),
+                               axis=1)
+        pos = 2 * self._std_weight_position
+        vel = 10 * self._std_weight_velocity
+        std = measurements[:, 3:4] * np.array(
+            [pos, pos, 0, pos, vel, vel, 0, vel])
+        std[:, 2], std[:, 6] = 1e-2, 1e-5
+        covariances = np.zeros((num, 8, 8))
+        covariances[:, np.arange(8), np.arange(8)] = np.square(std)
+        return means, covariances
+
+    def batch_predict(
+            self, means: np.ndarray,
+            covariances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Run Kalman filter prediction step in a batch.
+
+        Args:
+            means (ndarray): The (T, 8) mean vectors of the object states at
+                the previous time step.
+            covariances (ndarray): The (T, 8, 8) covariance matrices of the
+                object states at the previous time step.
+
+        Returns:
+            (ndarray, ndarray): Returns the mean vectors and covariance
+            matrices of the predicted states.
+        """
+        pos, vel = self._std_weight_position, self._std_weight_velocity
+        std = means[:, 3:4] * np.array([pos, pos, 0, pos, vel, vel, 0, vel])
+        std[:, 2], std[:, 6] = 1e-2, 1e-5
+
+        means = means @ self._motion_mat.T
+        covariances = self._motion_mat @ covariances @ self._motion_mat.T
+        covariances[:, np.arange(8), np.arange(8)] += np.square(std)
+        return means, covariances
+
+    def batch_project(
+        self,
+        means: np.ndarray,
+        covariances: np.ndarray,
+        bbox_scores: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Project state distributions to measurement space in a batch.
+
+        Args:
+            means (ndarray): The (T, 8) mean vectors of the states.
+            covariances (ndarray): The (T, 8, 8) covariance matrices of the
+                states.
+            bbox_scores (ndarray, optional): The (T, ) confidence scores of
+                the bboxes. None means 0. Defaults to None.
+
+        Returns:
+            (ndarray, ndarray): Returns the (T, 4) projected means and
+            (T, 4, 4) covariance matrices of the given state estimates.
+        """
+        pos = self._std_weight_position
+        std = means[:, 3:4] * np.array([pos, pos, 0, pos])
+        std[:, 2] = 1e-1
+        if self.use_nsa and bbox_scores is not None:
+            std = (1 - bbox_scores[:, None]) * std
+
+        means = means @ self._update_mat.T
+        covariances = self._update_mat @ covariances @ self._update_mat.T
+        covariances[:, np.arange(4), np.arange(4)] += np.square(std)
+        return means, covariances
+
+    def batch_update(
+        self,
+        means: np.ndarray,
+        covariances: np.ndarray,
+        measurements: np.ndarray,
+        bbox_scores: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Run Kalman filter correction step in a batch.
+
+        Args:
+            means (ndarray): The (T, 8) mean vectors of the predicted states.
+            covariances (ndarray): The (T, 8, 8) covariance matrices of the
+                states.
+            measurements (ndarray): The (T, 4) measurement vectors
+                (x, y, a, h), where (x, y) is the center position, a the
+                aspect ratio, and h the height of the bounding box.
+            bbox_scores (ndarray, optional): The (T, ) confidence scores of
+                the bboxes. None means 0. Defaults to None.
+
+        Returns:
+            (ndarray, ndarray): Returns the measurement-corrected state
+            distributions.
+        """
+        projected_means, projected_covs = self.batch_project(
+            means, covariances, bbox_scores)
+        # solve K S = P H^T, where S is symmetric
+        kalman_gains = np.linalg.solve(
+            projected_covs, (covariances @ self._update_mat.T).transpose(
+                0, 2, 1)).transpose(0, 2, 1)
+        innovations = measurements - projected_means
+
+        new_means = means + np.einsum('tij,tj->ti', kalman_gains, innovations)
+        new_covariances = covariances - kalman_gains @ projected_covs @ \
+            kalman_gains.transpose(0, 2, 1)
+        return new_means, new_covariances
+
+    def batch_gating_distance(self,
+                              means: np.ndarray,
+                              covariances: np.ndarray,
+                              measurements: np.ndarray,
+                              only_position: bool = False) -> np.ndarray:
+        """Compute gating distances between state distributions and
+        measurements in a batch.
+
+        Args:
+            means (ndarray): The (T, 8) mean vectors of the states.
+            covariances (ndarray): The (T, 8, 8) covariance matrices of the
+                states.
+            measurements (ndarray): An Nx4 dimensional matrix of N
+                measurements, each in format (x, y, a, h).
+            only_position (bool, optional): If True, distance computation is
+                done with respect to the bounding box center position only.
+                Defaults to False.
+
+        Returns:
+            ndarray: Returns a (T, N) array, where the (i, j)-th element
+            contains the squared Mahalanobis distance between the i-th state
+            and `measurements[j]`.
+        """
+        means, covariances = self.batch_project(means, covariances)
+        if only_position:
+            means, covariances = means[:, :2], covariances[:, :2, :2]
+            measurements = measurements[:, :2]
+
+        cholesky_factors = np.linalg.cholesky(covariances)
+        d = (measurements[None] - means[:, None]).transpose(0, 2, 1)
+        z = np.linalg.solve(cholesky_factors, d)
+        return np.sum(z * z, axis=1)
+
+    def predict_tracks(self, tracks: dict, ids: List[int]) -> None:
+        """Run Kalman filter prediction step for some tracks in a batch.
+
+        Args:
+            tracks (dict[int:dict]): Track buffer, where each track has
+                ``mean`` and ``covariance``.
+            ids (list[int]): Ids of the tracks to predict.
+        """
+        if len(ids) == 0:
+            return
+        means, covariances = self.batch_predict(
+            np.stack([tracks[id].mean for id in ids]),
+            np.stack([tracks[id].covariance for id in ids]))
+        for id, mean, covariance in zip(ids, means, covariances):
+            tracks[id].mean, tracks[id].covariance = mean, covariance
+
+    def update_tracks(self,
+                      tracks: dict,
+                      ids: List[int],
+                      measurements: np.ndarray,
+                      bbox_scores: Optional[np.ndarray] = None) -> None:
+        """Correct the states of some tracks in a batch, where the tracks
+        without ``mean`` are initiated by the measurements.
+
+        Args:
+            tracks (dict[int:dict]): Track buffer.
+            ids (list[int]): Ids of the tracks to update.
+            measurements (ndarray): The (T, 4) measurement vectors
+                (x, y, a, h) of the tracks.
+            bbox_scores (ndarray, optional): The (T, ) confidence scores of
+                the bboxes. None means 0. Defaults to None.
+        """
+        is_new = np.array(['mean' not in tracks[id] for id in ids], dtype=bool)
+        new_ids = [id for id, new in zip(ids, is_new) if new]
+        if len(new_ids) > 0:
+            means, covariances = self.batch_initiate(measurements[is_new])
+            for id, mean, covariance in zip(new_ids, means, covariances):
+                tracks[id].mean, tracks[id].covariance = mean, covariance
+
+        ids = [id for id, new in zip(ids, is_new) if not new]
+        if len(ids) == 0:
+            return
+        if bbox_scores is not None:
+            bbox_scores = bbox_scores[~is_new]
+        means, covariances = self.batch_update(
+            np.stack([tracks[id].mean for id in ids]),
+            np.stack([tracks[id].covariance for id in ids]),
+            measurements[~is_new], bbox_scores)
+        for id, mean, covariance in zip(ids, means, covariances):
+            tracks[id].mean, tracks[id].covariance = mean, covariance
+
     def track(self, tracks: dict,
               bboxes: torch.Tensor) -> Tuple[dict, np.array]:
         """Track forward.
@@ -252,16 +455,11 @@ class KalmanFilter:
         Returns:
             (dict[int:dict], ndarray): Updated tracks and bboxes.
         """
-        costs = []
-        for id, track in tracks.items():
-            track.mean, track.covariance = self.predict(
-                track.mean, track.covariance)
-            gating_distance = self.gating_distance(track.mean,
-                                                   track.covariance,
-                                                   bboxes.cpu().numpy(),
-                                                   self.center_only)
-            costs.append(gating_distance)
-
-        costs = np.stack(costs, 0)
+        ids = list(tracks.keys())
+        self.predict_tracks(tracks, ids)
+        costs = self.batch_gating_distance(
+            np.stack([tracks[id].mean for id in ids]),
+            np.stack([tracks[id].covariance for id in ids]),
+            bboxes.cpu().numpy(), self.center_only)
         costs[costs > self.gating_threshold] = np.nan
         return tracks, costs
@@ -1,5 +1,8 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import List, Tuple
+import copy
+import time
+from collections import defaultdict
+from typing import List, Tuple, Union
 
 import torch
 from mmcv.ops import batched_nms
@@ -10,6 +13,7 @@ from torch import Tensor
 
 from mmdet.structures import DetDataSample
 from mmdet.structures.bbox import bbox_flip
+from ..utils import batched_weighted_boxes_fusion
 
 
 @MODELS.register_module()
@@ -17,6 +21,14 @@ class DetTTAModel(BaseTTAModel):
     """Merge augmented detection results, only bboxes corresponding score under
     flipping and multi-scale resizing can be processed now.
 
+    Besides ``nms`` and ``max_per_img``, ``tta_cfg`` accepts:
+
+    - ``batch_views`` (bool): Whether to forward the views of the same image
+      shapes as one batch, see :meth:`test_step`. Defaults to False.
+    - ``wbf`` (dict, optional): If given, the views are merged by
+      :func:`batched_weighted_boxes_fusion` with these arguments instead of
+      nms, e.g. ``dict(iou_thr=0.55, conf_type='avg')``.
+
     Examples:
         >>> tta_model = dict(
         >>>     type='DetTTAModel',
@@ -49,6 +61,7 @@ class DetTTAModel(BaseTTAModel):
     def __init__(self, tta_cfg=None, **kwargs):
         super().__init__(**kwargs)
         self.tta_cfg = tta_cfg
+        self.view_latencies: List[float] = []
 
     def merge_aug_bboxes(self, aug_bboxes: List[Tensor],
                          aug_scores: List[Tensor],
@@ -81,9 +94,84 @@ class DetTTAModel(BaseTTAModel):
             scores = torch.cat(aug_scores, dim=0)
             return bboxes, scores
 
+    def test_step(self, data: Union[dict, tuple, list]) -> List[DetDataSample]:
+        """Get the predictions of the augmented views and merge them.
+
+        If ``tta_cfg.batch_views`` is True, the views whose images have the
+        same shapes, e.g. the flipped and the original images of a scale,
+        are forwarded as one batch, so that the padded shapes and results
+        are the same as forwarding them separately. The forward time of
+        each view is saved in :attr:`view_latencies`, which is the time of
+        its batch divided by the number of views in the batch.
+
+        Args:
+            data (dict or tuple or list): Augmented data batch sampled from
+                the dataloader.
+
+        Returns:
+            List[DetDataSample]: Merged predictions.
+        """
+        if isinstance(data, dict):
+            num_augs = len(data[next(iter(data))])
+            data_list = [{key: value[idx]
+                          for key, value in data.items()}
+                         for idx in range(num_augs)]
+        elif isinstance(data, (tuple, list)):
+            num_augs = len(data[0])
+            data_list = [[_data[idx] for _data in data]
+                         for idx in range(num_augs)]
+        else:
+            raise TypeError('data given by dataLoader should be a dict, '
+                            f'tuple or a list, but got {type(data)}')
+
+        if self.tta_cfg.get('batch_views', False) and isinstance(data, dict):
+            view_groups = defaultdict(list)
+            for idx, view in enumerate(data_list):
+                view_groups[self._get_view_key(view, idx)].append(idx)
+            view_groups = list(view_groups.values())
+        else:
+            view_groups = [[idx] for idx in range(num_augs)]
+
+        predictions: List[list] = [[] for _ in range(num_augs)]
+        self.view_latencies = [0.] * num_augs
+        for view_inds in view_groups:
+            if len(view_inds) == 1:
+                batch = data_list[view_inds[0]]
+            else:
+                batch = {
+                    key: [
+                        item for idx in view_inds
+                        for item in data_list[idx][key]
+                    ]
+                    for key in data
+                }
+            start = time.perf_counter()
+            results = self.module.test_step(batch)
+            if torch.cuda.is_available():
+                torch.cuda.synchronize()
+            latency = (time.perf_counter() - start) / len(view_inds)
+            batch_size = len(results) // len(view_inds)
+            for i, idx in enumerate(view_inds):
+                predictions[idx] = results[i * batch_size:(i + 1) * batch_size]
+                self.view_latencies[idx] = latency
+        return self.merge_preds(list(zip(*predictions)))
+
+    @staticmethod
+    def _get_view_key(view: dict, idx: int) -> tuple:
+        """The views with the same key can be forwarded as one batch."""
+        inputs = view.get('inputs', None)
+        if not isinstance(inputs, (list, tuple)) or not all(
+                isinstance(img, Tensor) for img in inputs):
+            return (idx, )
+        return tuple(tuple(img.shape) for img in inputs)
+
     def merge_preds(self, data_samples_list: List[List[DetDataSample]]):
         """Merge batch predictions of enhanced data.
 
+        The boxes of all images are merged by one call of nms, or weighted
+        boxes fusion if ``tta_cfg.wbf`` is given, in which the views are
+        regarded as the models.
+
         Args:
             data_samples_list (List[List[DetDataSample]]): List of predictions
                 of all enhanced data. The outer list indicates images, and the
@@ -92,11 +180,81 @@ class DetTTAModel(BaseTTAModel):
         Returns:
             List[DetDataSample]: Merged batch prediction.
         """
-        merged_data_samples = []
+        aug_bboxes = []
+        aug_scores = []
+        aug_labels = []
         for data_samples in data_samples_list:
-            merged_data_samples.append(self._merge_single_sample(data_samples))
+            # TODO: support instance segmentation TTA
+            assert data_samples[0].pred_instances.get('masks', None) is None, \
+                'TTA of instance segmentation does not support now.'
+            # recover the flipped boxes
+            aug_bboxes.append(
+                self.merge_aug_bboxes(
+                    [ds.pred_instances.bboxes for ds in data_samples], None,
+                    [ds.metainfo for ds in data_samples]).split(
+                        [len(ds.pred_instances) for ds in data_samples]))
+            aug_scores.append(
+                [ds.pred_instances.scores for ds in data_samples])
+            aug_labels.append(
+                [ds.pred_instances.labels for ds in data_samples])
+
+        if self.tta_cfg.get('wbf', None) is not None:
+            merged_results = batched_weighted_boxes_fusion(
+                aug_bboxes, aug_scores, aug_labels, **self.tta_cfg.wbf)
+            merged_results = [(bboxes, scores, labels.long())
+                              for bboxes, scores, labels in merged_results]
+        else:
+            merged_results = self._merge_by_nms(aug_bboxes, aug_scores,
+                                                aug_labels)
+
+        merged_data_samples = []
+        for data_samples, (bboxes, scores,
+                           labels) in zip(data_samples_list, merged_results):
+            det_results = data_samples[0]
+            if sum(len(ds.pred_instances) for ds in data_samples) == 0:
+                merged_data_samples.append(det_results)
+                continue
+            results = InstanceData()
+            results.bboxes = bboxes[:self.tta_cfg.max_per_img]
+            results.scores = scores[:self.tta_cfg.max_per_img]
+            results.labels = labels[:self.tta_cfg.max_per_img]
+            det_results.pred_instances = results
+            merged_data_samples.append(det_results)
         return merged_data_samples
 
+    def _merge_by_nms(
+            self, aug_bboxes: List[List[Tensor]],
+            aug_scores: List[List[Tensor]], aug_labels: List[List[Tensor]]
+    ) -> List[Tuple[Tensor, Tensor, Tensor]]:
+        """Merge the boxes of the views of all images by one call of nms,
+        in which the images are separated like the classes."""
+        num_boxes = [sum(len(b) for b in bboxes) for bboxes in aug_bboxes]
+        bboxes = torch.cat([torch.cat(b) for b in aug_bboxes])
+        scores = torch.cat([torch.cat(s) for s in aug_scores])
+        labels = torch.cat([torch.cat(lb) for lb in aug_labels])
+        img_inds = torch.arange(
+            len(num_boxes), device=labels.device).repeat_interleave(
+                torch.tensor(num_boxes, device=labels.device))
+
+        nms_cfg = copy.deepcopy(self.tta_cfg.nms)
+        if nms_cfg.pop('class_agnostic', False):
+            idxs = img_inds
+        else:
+            num_classes = int(labels.max()) + 1 if len(labels) > 0 else 1
+            idxs = img_inds * num_classes + labels
+        det_bboxes, keep_idxs = batched_nms(bboxes, scores, idxs, nms_cfg)
+
+        # group the kept boxes by images in the descending order of scores
+        keep_img_inds = img_inds[keep_idxs]
+        order = keep_img_inds.sort(stable=True)[1]
+        det_bboxes, keep_idxs = det_bboxes[order], keep_idxs[order]
+        num_keeps = torch.bincount(
+            keep_img_inds, minlength=len(num_boxes)).tolist()
+        return list(
+            zip(det_bboxes[:, :-1].split(num_keeps),
+                det_bboxes[:, -1].split(num_keeps),
+                labels[keep_idxs].split(num_keeps)))
+
     def _merge_single_sample(
             self, data_samples: List[DetDataSample]) -> DetDataSample:
         """Merge predictions which come form the different views of one image
@@ -108,37 +266,4 @@ class DetTTAModel(BaseTTAModel):
         Returns:
             List[DetDataSample]: Merged prediction.
         """
-        aug_bboxes = []
-        aug_scores = []
-        aug_labels = []
-        img_metas = []
-        # TODO: support instance segmentation TTA
-        assert data_samples[0].pred_instances.get('masks', None) is None, \
-            'TTA of instance segmentation does not support now.'
-        for data_sample in data_samples:
-            aug_bboxes.append(data_sample.pred_instances.bboxes)
-            aug_scores.append(data_sample.pred_instances.scores)
-            aug_labels.append(data_sample.pred_instances.labels)
-            img_metas.append(data_sample.metainfo)
-
-        merged_bboxes, merged_scores = self.merge_aug_bboxes(
-            aug_bboxes, aug_scores, img_metas)
-        merged_labels = torch.cat(aug_labels, dim=0)
-
-        if merged_bboxes.numel() == 0:
-            return data_samples[0]
-
-        det_bboxes, keep_idxs = batched_nms(merged_bboxes, merged_scores,
-                                            merged_labels, self.tta_cfg.nms)
-
-        det_bboxes = det_bboxes[:self.tta_cfg.max_per_img]
-        det_labels = merged_labels[keep_idxs][:self.tta_cfg.max_per_img]
-
-        results = InstanceData()
-        _det_bboxes = det_bboxes.clone()
-        results.bboxes = _det_bboxes[:, :-1]
-        results.scores = _det_bboxes[:, -1]
-        results.labels = det_labels
-        det_results = data_samples[0]
-        det_results.pred_instances = results
-        return det_results
+        return self.merge_preds([data_samples])[0]
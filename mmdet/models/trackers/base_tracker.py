@@ -1,15 +1,26 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from abc import ABCMeta, abstractmethod
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 import torch.nn.functional as F
 from addict import Dict
+from torch import Tensor
+
+from .track_store import TrackInfo, TrackStore
 
 
 class BaseTracker(metaclass=ABCMeta):
     """Base tracker model.
 
+    The memo items of the tracks are kept in a :class:`TrackStore`, where
+    each item of all tracks is one preallocated tensor, so that the tracks
+    are updated, queried and popped with tensor operations. ``self.tracks``
+    maps the ids to :class:`TrackInfo`, which reads the memo items from the
+    store and keeps the other attributes of a track, e.g. the states of the
+    motion model.
+
     Args:
         momentums (dict[str:float], optional): Momentums to update the buffers.
             The `str` indicates the name of the buffer while the `float`
@@ -17,16 +28,30 @@ class BaseTracker(metaclass=ABCMeta):
         num_frames_retain (int, optional). If a track is disappeared more than
             `num_frames_retain` frames, it will be deleted in the memo.
              Defaults to 10.
+        memo_len (int): Number of the latest values of each buffer without
+            momentum that are kept for a track. Defaults to 30.
+        memo_lens (dict[str:int], optional): Number of the latest values
+            that are kept for some buffers, which overrides `memo_len`. The
+            buffers whose history is never read can keep only one value to
+            save memory. Defaults to None.
     """
 
     def __init__(self,
                  momentums: Optional[dict] = None,
-                 num_frames_retain: int = 10) -> None:
+                 num_frames_retain: int = 10,
+                 memo_len: int = 30,
+                 memo_lens: Optional[dict] = None) -> None:
         super().__init__()
         if momentums is not None:
             assert isinstance(momentums, dict), 'momentums must be a dict'
         self.momentums = momentums
         self.num_frames_retain = num_frames_retain
+        self.memo_len = memo_len
+        self.memo_lens = memo_lens
+        # the per-track hooks are only called when they are overridden
+        self._with_track_hooks = (
+            type(self).init_track is not BaseTracker.init_track
+            or type(self).update_track is not BaseTracker.update_track)
 
         self.reset()
 
@@ -34,6 +59,8 @@ class BaseTracker(metaclass=ABCMeta):
         """Reset the buffer of the tracker."""
         self.num_tracks = 0
         self.tracks = dict()
+        self.store = TrackStore(
+            self.momentums, self.memo_len, memo_lens=self.memo_lens)
 
     @property
     def empty(self) -> bool:
@@ -69,7 +96,6 @@ class BaseTracker(metaclass=ABCMeta):
 
         assert 'ids' in memo_items
         num_objs = len(kwargs['ids'])
-        id_indice = memo_items.index('ids')
         assert 'frame_ids' in memo_items
         frame_id = int(kwargs['frame_ids'])
         if isinstance(kwargs['frame_ids'], int):
@@ -80,63 +106,57 @@ class BaseTracker(metaclass=ABCMeta):
             if len(v) != num_objs:
                 raise ValueError('kwargs value must both equal')
 
-        for obj in zip(*kwargs.values()):
-            id = int(obj[id_indice])
-            if id in self.tracks:
-                self.update_track(id, obj)
-            else:
-                self.init_track(id, obj)
+        is_new = self.store.update(kwargs['ids'], kwargs).tolist()
+        ids = kwargs['ids'].tolist()
+        if self._with_track_hooks:
+            for id, new, obj in zip(ids, is_new, zip(*kwargs.values())):
+                if new:
+                    self.init_track(int(id), obj)
+                else:
+                    self.update_track(int(id), obj)
+        else:
+            for id, new in zip(ids, is_new):
+                if new:
+                    self.tracks[int(id)] = TrackInfo(self.store, int(id))
 
         self.pop_invalid_tracks(frame_id)
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            if frame_id - v['frame_ids'][-1] >= self.num_frames_retain:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.store.last('frame_ids')
+        self.pop_tracks(frame_id - last_frame_ids >= self.num_frames_retain)
+
+    def pop_tracks(self, mask: Union[Tensor, np.ndarray]) -> None:
+        """Pop out the tracks by a mask in the order of ``self.ids``."""
+        if isinstance(mask, Tensor):
+            mask = mask.cpu().numpy()
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            return
+        for id in self.store.ids[mask].tolist():
+            self.tracks.pop(id)
+        self.store.remove(mask)
 
     def update_track(self, id: int, obj: Tuple[torch.Tensor]):
-        """Update a track."""
-        for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                m = self.momentums[k]
-                self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
-            else:
-                self.tracks[id][k].append(v)
+        """Update a track.
+
+        The memo items of the track have been updated in the store, so this
+        hook is for the other attributes of the track.
+        """
+        pass
 
     def init_track(self, id: int, obj: Tuple[torch.Tensor]):
         """Initialize a track."""
-        self.tracks[id] = Dict()
-        for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                self.tracks[id][k] = v
-            else:
-                self.tracks[id][k] = [v]
+        self.tracks[id] = TrackInfo(self.store, id)
 
     @property
     def memo(self) -> dict:
         """Return all buffers in the tracker."""
         outs = Dict()
         for k in self.memo_items:
-            outs[k] = []
-
-        for id, objs in self.tracks.items():
-            for k, v in objs.items():
-                if k not in outs:
-                    continue
-                if self.momentums is not None and k in self.momentums:
-                    v = v
-                else:
-                    v = v[-1]
-                outs[k].append(v)
-
-        for k, v in outs.items():
-            outs[k] = torch.cat(v, dim=0)
+            outs[k] = self.store.last(k)
         return outs
 
     def get(self,
@@ -150,33 +170,27 @@ class BaseTracker(metaclass=ABCMeta):
             item (str): The demanded item.
             ids (list[int], optional): The demanded ids. Defaults to None.
             num_samples (int, optional): Number of samples to calculate the
-                results. Defaults to None.
+                results. It should not be larger than ``memo_len``. Defaults
+                to None.
             behavior (str, optional): Behavior to calculate the results.
                 Options are `mean` | None. Defaults to None.
 
         Returns:
             Tensor: The results of the demanded item.
         """
-        if ids is None:
-            ids = self.ids
-
-        outs = []
-        for id in ids:
-            out = self.tracks[id][item]
-            if isinstance(out, list):
-                if num_samples is not None:
-                    out = out[-num_samples:]
-                    out = torch.cat(out, dim=0)
-                    if behavior == 'mean':
-                        out = out.mean(dim=0, keepdim=True)
-                    elif behavior is None:
-                        out = out[None]
-                    else:
-                        raise NotImplementedError()
-                else:
-                    out = out[-1]
-            outs.append(out)
-        return torch.cat(outs, dim=0)
+        if num_samples is None or item in self.store.momentums:
+            return self.store.last(item, ids)
+        if behavior not in ['mean', None]:
+            raise NotImplementedError()
+
+        values, valid = self.store.history(item, num_samples, ids)
+        if behavior == 'mean':
+            valid = valid.to(values).view(valid.shape + (1, ) *
+                                          (values.dim() - 2))
+            return (values * valid).sum(dim=1) / valid.sum(dim=1)
+        # the samples of all tracks are truncated to the same length
+        num_valid = int(valid.sum(dim=1).min()) if len(valid) else 0
+        return values[:, num_samples - num_valid:]
 
     @abstractmethod
     def track(self, *args, **kwargs):
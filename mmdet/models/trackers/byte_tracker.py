@@ -1,10 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from typing import List, Optional, Tuple
 
-try:
-    import lap
-except ImportError:
-    lap = None
 import numpy as np
 import torch
 from mmengine.structures import InstanceData
@@ -13,6 +9,7 @@ from mmdet.registry import MODELS, TASK_UTILS
 from mmdet.structures import DetDataSample
 from mmdet.structures.bbox import (bbox_cxcyah_to_xyxy, bbox_overlaps,
                                    bbox_xyxy_to_cxcyah)
+from ..task_modules.tracking import linear_assignment
 from .base_tracker import BaseTracker
 
 
@@ -37,6 +34,8 @@ class ByteTracker(BaseTracker):
                 tracklets. Defaults to 0.3.
         num_tentatives (int, optional): Number of continuous frames to confirm
             a track. Defaults to 3.
+        assign_backend (str): Backend of the linear assignment, options are
+            'auto', 'lapjv', 'scipy' and 'greedy'. Defaults to 'auto'.
     """
 
     def __init__(self,
@@ -46,12 +45,10 @@ class ByteTracker(BaseTracker):
                  weight_iou_with_det_scores: bool = True,
                  match_iou_thrs: dict = dict(high=0.1, low=0.5, tentative=0.3),
                  num_tentatives: int = 3,
+                 assign_backend: str = 'auto',
                  **kwargs):
         super().__init__(**kwargs)
 
-        if lap is None:
-            raise RuntimeError('lap is not installed,\
-                 please install it by: pip install lap')
         if motion is not None:
             self.motion = TASK_UTILS.build(motion)
 
@@ -62,6 +59,7 @@ class ByteTracker(BaseTracker):
         self.match_iou_thrs = match_iou_thrs
 
         self.num_tentatives = num_tentatives
+        self.assign_backend = assign_backend
 
     @property
     def confirmed_ids(self) -> List:
@@ -82,40 +80,34 @@ class ByteTracker(BaseTracker):
             self.tracks[id].tentative = False
         else:
             self.tracks[id].tentative = True
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.initiate(
-            bbox)
 
     def update_track(self, id: int, obj: Tuple[torch.Tensor]) -> None:
         """Update a track."""
         super().update_track(id, obj)
         if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+            if self.store.num_updates([id])[0] >= self.num_tentatives:
                 self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        track_label = self.tracks[id]['labels'][-1]
-        label_idx = self.memo_items.index('labels')
-        obj_label = obj[label_idx]
-        assert obj_label == track_label
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+
+    def update(self, **kwargs) -> None:
+        """Update the tracker, where the Kalman filter states of the new
+        tracks are initiated and the others are corrected in a batch."""
+        super().update(**kwargs)
+        self.kf.update_tracks(
+            self.tracks, kwargs['ids'].tolist(),
+            bbox_xyxy_to_cxcyah(kwargs['bboxes']).cpu().numpy())
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.store.last('frame_ids').cpu()
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        tentative = torch.tensor([v.tentative for v in self.tracks.values()],
+                                 dtype=torch.bool)
+        case2 = tentative & (last_frame_ids != frame_id)
+        self.pop_tracks(case1 | case2)
 
     def assign_ids(
             self,
@@ -143,10 +135,9 @@ class ByteTracker(BaseTracker):
             tuple(np.ndarray, np.ndarray): The assigning ids.
         """
         # get track_bboxes
-        track_bboxes = np.zeros((0, 4))
-        for id in ids:
-            track_bboxes = np.concatenate(
-                (track_bboxes, self.tracks[id].mean[:4][None]), axis=0)
+        track_bboxes = np.zeros((len(ids), 4))
+        for i, id in enumerate(ids):
+            track_bboxes[i] = self.tracks[id].mean[:4]
         track_bboxes = torch.from_numpy(track_bboxes).to(det_bboxes)
         track_bboxes = bbox_cxcyah_to_xyxy(track_bboxes)
 
@@ -155,9 +146,7 @@ class ByteTracker(BaseTracker):
         if weight_iou_with_det_scores:
             ious *= det_scores
         # support multi-class association
-        track_labels = torch.tensor([
-            self.tracks[id]['labels'][-1] for id in ids
-        ]).to(det_bboxes.device)
+        track_labels = self.get('labels', ids).to(det_bboxes.device)
 
         cate_match = det_labels[None, :] == track_labels[:, None]
         # to avoid det and track of different categories are matched
@@ -166,12 +155,8 @@ class ByteTracker(BaseTracker):
         dists = (1 - ious + cate_cost).cpu().numpy()
 
         # bipartite match
-        if dists.size > 0:
-            cost, row, col = lap.lapjv(
-                dists, extend_cost=True, cost_limit=1 - match_iou_thr)
-        else:
-            row = np.zeros(len(ids)).astype(np.int32) - 1
-            col = np.zeros(len(det_bboxes)).astype(np.int32) - 1
+        row, col = linear_assignment(
+            dists, cost_limit=1 - match_iou_thr, backend=self.assign_backend)
         return row, col
 
     def track(self, data_sample: DetDataSample, **kwargs) -> InstanceData:
@@ -230,13 +215,12 @@ class ByteTracker(BaseTracker):
             second_det_ids = ids[second_det_inds]
 
             # 1. use Kalman Filter to predict current location
-            for id in self.confirmed_ids:
+            last_frame_ids = self.get('frame_ids', self.confirmed_ids).tolist()
+            for id, last_frame_id in zip(self.confirmed_ids, last_frame_ids):
                 # track is lost in previous frame
-                if self.tracks[id].frame_ids[-1] != frame_id - 1:
+                if last_frame_id != frame_id - 1:
                     self.tracks[id].mean[7] = 0
-                (self.tracks[id].mean,
-                 self.tracks[id].covariance) = self.kf.predict(
-                     self.tracks[id].mean, self.tracks[id].covariance)
+            self.kf.predict_tracks(self.tracks, self.confirmed_ids)
 
             # 2. first match
             first_match_track_inds, first_match_det_inds = self.assign_ids(
@@ -279,7 +263,7 @@ class ByteTracker(BaseTracker):
                 # tracklet is not matched in the first match
                 case_1 = first_match_track_inds[i] == -1
                 # tracklet is not lost in the previous frame
-                case_2 = self.tracks[id].frame_ids[-1] == frame_id - 1
+                case_2 = last_frame_ids[i] == frame_id - 1
                 if case_1 and case_2:
                     first_unmatch_track_ids.append(id)
 
@@ -25,13 +25,18 @@ class MaskTrackRCNNTracker(BaseTracker):
                 score.
             - det_label (float): The coefficient of `label_deltas` when
                 computing match score.
+        memo_lens (dict[str:int]): Number of the latest values that are
+            kept for some buffers. Only the latest masks and RoI features
+            are used in matching, so one value of them is kept for a track.
+            Defaults to dict(masks=1, roi_feats=1).
     """
 
     def __init__(self,
                  match_weights: dict = dict(
                      det_score=1.0, iou=2.0, det_label=10.0),
+                 memo_lens: dict = dict(masks=1, roi_feats=1),
                  **kwargs):
-        super().__init__(**kwargs)
+        super().__init__(memo_lens=memo_lens, **kwargs)
         self.match_weights = match_weights
 
     def get_match_score(self, bboxes: Tensor, labels: Tensor, scores: Tensor,
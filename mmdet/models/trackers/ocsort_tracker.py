@@ -1,10 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 from typing import List, Optional, Tuple
 
-try:
-    import lap
-except ImportError:
-    lap = None
 import numpy as np
 import torch
 from addict import Dict
@@ -14,6 +10,7 @@ from mmdet.registry import MODELS
 from mmdet.structures import DetDataSample
 from mmdet.structures.bbox import (bbox_cxcyah_to_xyxy, bbox_overlaps,
                                    bbox_xyxy_to_cxcyah)
+from ..task_modules.tracking import linear_assignment
 from .sort_tracker import SORTTracker
 
 
@@ -51,9 +48,6 @@ class OCSORTTracker(SORTTracker):
                  vel_consist_weight: float = 0.2,
                  vel_delta_t: int = 3,
                  **kwargs):
-        if lap is None:
-            raise RuntimeError('lap is not installed,\
-                 please install it by: pip install lap')
         super().__init__(motion=motion, **kwargs)
         self.obj_score_thr = obj_score_thr
         self.init_track_thr = init_track_thr
@@ -78,11 +72,6 @@ class OCSORTTracker(SORTTracker):
             self.tracks[id].tentative = False
         else:
             self.tracks[id].tentative = True
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.initiate(
-            bbox)
         # track.obs maintains the history associated detections to this track
         self.tracks[id].obs = []
         bbox_id = self.memo_items.index('bboxes')
@@ -98,13 +87,8 @@ class OCSORTTracker(SORTTracker):
         """Update a track."""
         super().update_track(id, obj)
         if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+            if self.store.num_updates([id])[0] >= self.num_tentatives:
                 self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
         self.tracks[id].tracked = True
         bbox_id = self.memo_items.index('bboxes')
         self.tracks[id].obs.append(obj[bbox_id])
@@ -184,10 +168,9 @@ class OCSORTTracker(SORTTracker):
         OC-SORT uses velocity consistency besides IoU for association
         """
         # get track_bboxes
-        track_bboxes = np.zeros((0, 4))
-        for id in ids:
-            track_bboxes = np.concatenate(
-                (track_bboxes, self.tracks[id].mean[:4][None]), axis=0)
+        track_bboxes = np.zeros((len(ids), 4))
+        for i, id in enumerate(ids):
+            track_bboxes[i] = self.tracks[id].mean[:4]
         track_bboxes = torch.from_numpy(track_bboxes).to(det_bboxes)
         track_bboxes = bbox_cxcyah_to_xyxy(track_bboxes)
 
@@ -197,9 +180,7 @@ class OCSORTTracker(SORTTracker):
             ious *= det_scores
 
         # support multi-class association
-        track_labels = torch.tensor([
-            self.tracks[id]['labels'][-1] for id in ids
-        ]).to(det_bboxes.device)
+        track_labels = self.get('labels', ids).to(det_bboxes.device)
         cate_match = det_labels[None, :] == track_labels[:, None]
         # to avoid det and track of different categories are matched
         cate_cost = (1 - cate_match.int()) * 1e6
@@ -234,12 +215,8 @@ class OCSORTTracker(SORTTracker):
             dists += valid_norm_angle.cpu().numpy() * self.vel_consist_weight
 
         # bipartite match
-        if dists.size > 0:
-            cost, row, col = lap.lapjv(
-                dists, extend_cost=True, cost_limit=1 - match_iou_thr)
-        else:
-            row = np.zeros(len(ids)).astype(np.int32) - 1
-            col = np.zeros(len(det_bboxes)).astype(np.int32) - 1
+        row, col = linear_assignment(
+            dists, cost_limit=1 - match_iou_thr, backend=self.assign_backend)
         return row, col
 
     def last_obs(self, track: Dict):
@@ -289,12 +266,8 @@ class OCSORTTracker(SORTTracker):
         dists = (1 - ious + cate_cost).cpu().numpy()
 
         # bipartite match
-        if dists.size > 0:
-            cost, row, col = lap.lapjv(
-                dists, extend_cost=True, cost_limit=1 - match_iou_thr)
-        else:
-            row = np.zeros(len(track_obs)).astype(np.int32) - 1
-            col = np.zeros(len(det_bboxes)).astype(np.int32) - 1
+        row, col = linear_assignment(
+            dists, cost_limit=1 - match_iou_thr, backend=self.assign_backend)
         return row, col
 
     def online_smooth(self, track: Dict, obj: torch.Tensor):
@@ -373,17 +346,16 @@ class OCSORTTracker(SORTTracker):
             det_ids = ids[det_inds]
 
             # 1. predict by Kalman Filter
-            for id in self.confirmed_ids:
+            last_frame_ids = self.get('frame_ids', self.confirmed_ids).tolist()
+            for id, last_frame_id in zip(self.confirmed_ids, last_frame_ids):
                 # track is lost in previous frame
-                if self.tracks[id].frame_ids[-1] != frame_id - 1:
+                if last_frame_id != frame_id - 1:
                     self.tracks[id].mean[7] = 0
                 if self.tracks[id].tracked:
                     self.tracks[id].saved_attr.mean = self.tracks[id].mean
                     self.tracks[id].saved_attr.covariance = self.tracks[
                         id].covariance
-                (self.tracks[id].mean,
-                 self.tracks[id].covariance) = self.kf.predict(
-                     self.tracks[id].mean, self.tracks[id].covariance)
+            self.kf.predict_tracks(self.tracks, self.confirmed_ids)
 
             # 2. match detections and tracks' predicted locations
             match_track_inds, raw_match_det_inds = self.ocm_assign_ids(
@@ -446,10 +418,8 @@ class OCSORTTracker(SORTTracker):
                     last_box = self.last_obs(self.tracks[id.item()])
                     last_observations.append(last_box)
                 last_observations = torch.stack(last_observations)
-                last_track_labels = torch.tensor([
-                    self.tracks[id.item()]['labels'][-1]
-                    for id in unmatched_track_inds
-                ]).to(det_bboxes.device)
+                last_track_labels = self.get(
+                    'labels', unmatched_track_inds).to(det_bboxes.device)
 
                 remain_det_ids = torch.full((unmatch_det_bboxes.size(0), ),
                                             -1,
@@ -4,18 +4,13 @@ from typing import List, Optional, Tuple
 import numpy as np
 import torch
 from mmengine.structures import InstanceData
-
-try:
-    import motmetrics
-    from motmetrics.lap import linear_sum_assignment
-except ImportError:
-    motmetrics = None
 from torch import Tensor
 
 from mmdet.registry import MODELS, TASK_UTILS
 from mmdet.structures import DetDataSample
 from mmdet.structures.bbox import bbox_overlaps, bbox_xyxy_to_cxcyah
 from mmdet.utils import OptConfigType
+from ..task_modules.tracking import linear_assignment
 from ..utils import imrenormalize
 from .base_tracker import BaseTracker
 
@@ -41,6 +36,8 @@ class SORTTracker(BaseTracker):
             Defaults to 0.7.
         num_tentatives (int, optional): Number of continuous frames to confirm
             a track. Defaults to 3.
+        assign_backend (str): Backend of the linear assignment, options are
+            'auto', 'lapjv', 'scipy' and 'greedy'. Defaults to 'auto'.
     """
 
     def __init__(self,
@@ -53,10 +50,8 @@ class SORTTracker(BaseTracker):
                      match_score_thr=2.0),
                  match_iou_thr: float = 0.7,
                  num_tentatives: int = 3,
+                 assign_backend: str = 'auto',
                  **kwargs):
-        if motmetrics is None:
-            raise RuntimeError('motmetrics is not installed,\
-                 please install it by: pip install motmetrics')
         super().__init__(**kwargs)
         if motion is not None:
             self.motion = TASK_UTILS.build(motion)
@@ -65,6 +60,7 @@ class SORTTracker(BaseTracker):
         self.reid = reid
         self.match_iou_thr = match_iou_thr
         self.num_tentatives = num_tentatives
+        self.assign_backend = assign_backend
 
     @property
     def confirmed_ids(self) -> List:
@@ -76,36 +72,34 @@ class SORTTracker(BaseTracker):
         """Initialize a track."""
         super().init_track(id, obj)
         self.tracks[id].tentative = True
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.initiate(
-            bbox)
 
     def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
         """Update a track."""
         super().update_track(id, obj)
         if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
+            if self.store.num_updates([id])[0] >= self.num_tentatives:
                 self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox)
+
+    def update(self, **kwargs) -> None:
+        """Update the tracker, where the Kalman filter states of the new
+        tracks are initiated and the others are corrected in a batch."""
+        super().update(**kwargs)
+        self.kf.update_tracks(
+            self.tracks, kwargs['ids'].tolist(),
+            bbox_xyxy_to_cxcyah(kwargs['bboxes']).cpu().numpy())
 
     def pop_invalid_tracks(self, frame_id: int) -> None:
         """Pop out invalid tracks."""
-        invalid_ids = []
-        for k, v in self.tracks.items():
-            # case1: disappeared frames >= self.num_frames_retrain
-            case1 = frame_id - v['frame_ids'][-1] >= self.num_frames_retain
-            # case2: tentative tracks but not matched in this frame
-            case2 = v.tentative and v['frame_ids'][-1] != frame_id
-            if case1 or case2:
-                invalid_ids.append(k)
-        for invalid_id in invalid_ids:
-            self.tracks.pop(invalid_id)
+        if self.empty:
+            return
+        last_frame_ids = self.store.last('frame_ids').cpu()
+        # case1: disappeared frames >= self.num_frames_retrain
+        case1 = frame_id - last_frame_ids >= self.num_frames_retain
+        # case2: tentative tracks but not matched in this frame
+        tentative = torch.tensor([v.tentative for v in self.tracks.values()],
+                                 dtype=torch.bool)
+        case2 = tentative & (last_frame_ids != frame_id)
+        self.pop_tracks(case1 | case2)
 
     def track(self,
               model: torch.nn.Module,
@@ -201,9 +195,8 @@ class SORTTracker(BaseTracker):
                     reid_dists = torch.cdist(track_embeds, embeds)
 
                     # support multi-class association
-                    track_labels = torch.tensor([
-                        self.tracks[id]['labels'][-1] for id in active_ids
-                    ]).to(bboxes.device)
+                    track_labels = self.get('labels',
+                                            active_ids).to(bboxes.device)
                     cate_match = labels[None, :] == track_labels[:, None]
                     cate_cost = (1 - cate_match.int()) * 1e6
                     reid_dists = (reid_dists + cate_cost).cpu().numpy()
@@ -211,17 +204,18 @@ class SORTTracker(BaseTracker):
                     valid_inds = [list(self.ids).index(_) for _ in active_ids]
                     reid_dists[~np.isfinite(costs[valid_inds, :])] = np.nan
 
-                    row, col = linear_sum_assignment(reid_dists)
-                    for r, c in zip(row, col):
-                        dist = reid_dists[r, c]
-                        if not np.isfinite(dist):
-                            continue
-                        if dist <= self.reid['match_score_thr']:
-                            ids[c] = active_ids[r]
+                    _, col = linear_assignment(
+                        reid_dists,
+                        cost_limit=self.reid['match_score_thr'],
+                        backend=self.assign_backend)
+                    valid = col > -1
+                    ids[valid] = torch.tensor(active_ids)[col[valid]].to(ids)
 
+            matched_ids = set(ids.tolist())
+            last_frame_ids = self.get('frame_ids').tolist()
             active_ids = [
-                id for id in self.ids if id not in ids
-                and self.tracks[id].frame_ids[-1] == frame_id - 1
+                id for id, last_frame_id in zip(self.ids, last_frame_ids)
+                if id not in matched_ids and last_frame_id == frame_id - 1
             ]
             if len(active_ids) > 0:
                 active_dets = torch.nonzero(ids == -1).squeeze(1)
@@ -229,19 +223,19 @@ class SORTTracker(BaseTracker):
                 ious = bbox_overlaps(track_bboxes, bboxes[active_dets])
 
                 # support multi-class association
-                track_labels = torch.tensor([
-                    self.tracks[id]['labels'][-1] for id in active_ids
-                ]).to(bboxes.device)
+                track_labels = self.get('labels', active_ids).to(bboxes.device)
                 cate_match = labels[None, active_dets] == track_labels[:, None]
                 cate_cost = (1 - cate_match.int()) * 1e6
 
                 dists = (1 - ious + cate_cost).cpu().numpy()
 
-                row, col = linear_sum_assignment(dists)
-                for r, c in zip(row, col):
-                    dist = dists[r, c]
-                    if dist < 1 - self.match_iou_thr:
-                        ids[active_dets[c]] = active_ids[r]
+                _, col = linear_assignment(
+                    dists,
+                    cost_limit=1 - self.match_iou_thr,
+                    backend=self.assign_backend)
+                valid = col > -1
+                ids[active_dets[valid]] = torch.tensor(active_ids)[
+                    col[valid]].to(ids)
 
             new_track_inds = ids == -1
             ids[new_track_inds] = torch.arange(
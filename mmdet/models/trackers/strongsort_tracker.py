@@ -1,15 +1,9 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Optional, Tuple
+from typing import Optional
 
 import numpy as np
 import torch
 from mmengine.structures import InstanceData
-
-try:
-    import motmetrics
-    from motmetrics.lap import linear_sum_assignment
-except ImportError:
-    motmetrics = None
 from torch import Tensor
 
 from mmdet.models.utils import imrenormalize
@@ -17,6 +11,7 @@ from mmdet.registry import MODELS
 from mmdet.structures import TrackDataSample
 from mmdet.structures.bbox import bbox_overlaps, bbox_xyxy_to_cxcyah
 from mmdet.utils import OptConfigType
+from ..task_modules.tracking import linear_assignment
 from .sort_tracker import SORTTracker
 
 
@@ -75,31 +70,18 @@ class StrongSORTTracker(SORTTracker):
                  match_iou_thr: float = 0.7,
                  num_tentatives: int = 2,
                  **kwargs):
-        if motmetrics is None:
-            raise RuntimeError('motmetrics is not installed,\
-                 please install it by: pip install motmetrics')
         super().__init__(motion, obj_score_thr, reid, match_iou_thr,
                          num_tentatives, **kwargs)
 
-    def update_track(self, id: int, obj: Tuple[Tensor]) -> None:
-        """Update a track."""
-        for k, v in zip(self.memo_items, obj):
-            v = v[None]
-            if self.momentums is not None and k in self.momentums:
-                m = self.momentums[k]
-                self.tracks[id][k] = (1 - m) * self.tracks[id][k] + m * v
-            else:
-                self.tracks[id][k].append(v)
-
-        if self.tracks[id].tentative:
-            if len(self.tracks[id]['bboxes']) >= self.num_tentatives:
-                self.tracks[id].tentative = False
-        bbox = bbox_xyxy_to_cxcyah(self.tracks[id].bboxes[-1])  # size = (1, 4)
-        assert bbox.ndim == 2 and bbox.shape[0] == 1
-        bbox = bbox.squeeze(0).cpu().numpy()
-        score = float(self.tracks[id].scores[-1].cpu())
-        self.tracks[id].mean, self.tracks[id].covariance = self.kf.update(
-            self.tracks[id].mean, self.tracks[id].covariance, bbox, score)
+    def update(self, **kwargs) -> None:
+        """Update the tracker, where the Kalman filter states of the new
+        tracks are initiated and the others are corrected with the scores of
+        the detections in a batch."""
+        super(SORTTracker, self).update(**kwargs)
+        self.kf.update_tracks(
+            self.tracks, kwargs['ids'].tolist(),
+            bbox_xyxy_to_cxcyah(kwargs['bboxes']).cpu().numpy(),
+            kwargs['scores'].cpu().numpy())
 
     def track(self,
               model: torch.nn.Module,
@@ -208,24 +190,24 @@ class StrongSORTTracker(SORTTracker):
                         weight_motion * motion_dists[valid_inds]
 
                     # support multi-class association
-                    track_labels = torch.tensor([
-                        self.tracks[id]['labels'][-1] for id in active_ids
-                    ]).to(bboxes.device)
+                    track_labels = self.get('labels',
+                                            active_ids).to(bboxes.device)
                     cate_match = labels[None, :] == track_labels[:, None]
                     cate_cost = ((1 - cate_match.int()) * 1e6).cpu().numpy()
                     match_dists = match_dists + cate_cost
 
-                    row, col = linear_sum_assignment(match_dists)
-                    for r, c in zip(row, col):
-                        dist = match_dists[r, c]
-                        if not np.isfinite(dist):
-                            continue
-                        if dist <= self.reid['match_score_thr']:
-                            ids[c] = active_ids[r]
+                    _, col = linear_assignment(
+                        match_dists,
+                        cost_limit=self.reid['match_score_thr'],
+                        backend=self.assign_backend)
+                    valid = col > -1
+                    ids[valid] = torch.tensor(active_ids)[col[valid]].to(ids)
 
+            matched_ids = set(ids.tolist())
+            last_frame_ids = self.get('frame_ids').tolist()
             active_ids = [
-                id for id in self.ids if id not in ids
-                and self.tracks[id].frame_ids[-1] == frame_id - 1
+                id for id, last_frame_id in zip(self.ids, last_frame_ids)
+                if id not in matched_ids and last_frame_id == frame_id - 1
             ]
             if len(active_ids) > 0:
                 active_dets = torch.nonzero(ids == -1).squeeze(1)
@@ -233,19 +215,19 @@ class StrongSORTTracker(SORTTracker):
                 ious = bbox_overlaps(track_bboxes, bboxes[active_dets])
 
                 # support multi-class association
-                track_labels = torch.tensor([
-                    self.tracks[id]['labels'][-1] for id in active_ids
-                ]).to(bboxes.device)
+                track_labels = self.get('labels', active_ids).to(bboxes.device)
                 cate_match = labels[None, active_dets] == track_labels[:, None]
                 cate_cost = (1 - cate_match.int()) * 1e6
 
                 dists = (1 - ious + cate_cost).cpu().numpy()
 
-                row, col = linear_sum_assignment(dists)
-                for r, c in zip(row, col):
-                    dist = dists[r, c]
-                    if dist < 1 - self.match_iou_thr:
-                        ids[active_dets[c]] = active_ids[r]
+                _, col = linear_assignment(
+                    dists,
+                    cost_limit=1 - self.match_iou_thr,
+                    backend=self.assign_backend)
+                valid = col > -1
+                ids[active_dets[valid]] = torch.tensor(active_ids)[
+                    col[valid]].to(ids)
 
             new_track_inds = ids == -1
             ids[new_track_inds] = torch.arange(
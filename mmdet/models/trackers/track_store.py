@@ -0,0 +1,392 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from collections import deque
+from typing import Dict as TypingDict
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from addict import Dict
+from torch import Tensor
+
+
+class TrackStore:
+    """Columnar store of the memo items of tracks.
+
+    Each memo item of all tracks is kept in one preallocated tensor, whose
+    first dimension is indexed by the slots of the tracks. The items without
+    momentum keep the last ``memo_len`` values of each track in a ring
+    buffer, and the items with momentum keep the running average. The items
+    whose history is never read, e.g. large masks or features, can keep fewer
+    values by ``memo_lens`` to save memory. The slots
+    are compact and follow the order in which the tracks are added, so the
+    items of all tracks are read and written with indexing rather than
+    concatenating per-track tensors. The items that are not tensors, e.g.
+    :obj:`BitmapMasks`, are kept in a list of the slots, each of which is a
+    deque of the values of a track.
+
+    Args:
+        momentums (dict[str, float], optional): Momentums of the items that
+            are updated by running average. Defaults to None.
+        memo_len (int): Number of the latest values kept for each item
+            without momentum. Defaults to 30.
+        capacity (int): Initial number of slots, which is doubled when the
+            slots are used up. Defaults to 64.
+        memo_lens (dict[str, int], optional): Number of the latest values
+            kept for some items without momentum, which overrides
+            ``memo_len``. Defaults to None.
+    """
+
+    def __init__(self,
+                 momentums: Optional[dict] = None,
+                 memo_len: int = 30,
+                 capacity: int = 64,
+                 memo_lens: Optional[dict] = None) -> None:
+        self.momentums = momentums if momentums is not None else dict()
+        self.memo_len = memo_len
+        self.memo_lens = memo_lens if memo_lens is not None else dict()
+        assert min([memo_len, *self.memo_lens.values()]) > 0, \
+            'memo_len must be positive.'
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self) -> None:
+        """Remove all tracks."""
+        self.num = 0
+        self.buffers: TypingDict[str, Tensor] = dict()
+        self.objects: TypingDict[str, List[deque]] = dict()
+        # the bookkeeping is in numpy, which is cheaper to read per track
+        self._ids = np.zeros(self.capacity, dtype=np.int64)
+        # number of the updates of each track
+        self._counts = np.zeros(self.capacity, dtype=np.int64)
+        self._slots: TypingDict[int, int] = dict()
+
+    def __len__(self) -> int:
+        return self.num
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._slots
+
+    @property
+    def items(self) -> List[str]:
+        """Names of the memo items."""
+        return list(self.buffers.keys()) + list(self.objects.keys())
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Ids of the tracks in the order of slots."""
+        return self._ids[:self.num]
+
+    def index(
+        self,
+        ids: Optional[Union[Sequence[int], np.ndarray, Tensor]] = None
+    ) -> np.ndarray:
+        """Get the slots of the tracks.
+
+        Args:
+            ids (Sequence[int] | ndarray | Tensor, optional): Ids of the
+                tracks. None means all tracks.
+
+        Returns:
+            ndarray: The slots of the tracks.
+        """
+        if ids is None:
+            return np.arange(self.num)
+        if isinstance(ids, (Tensor, np.ndarray)):
+            ids = ids.tolist()
+        return np.array([self._slots[int(id)] for id in ids], dtype=np.int64)
+
+    def item_len(self, name: str) -> int:
+        """Number of the latest values kept for an item without momentum."""
+        return self.memo_lens.get(name, self.memo_len)
+
+    def num_updates(
+        self,
+        ids: Optional[Union[Sequence[int], np.ndarray, Tensor]] = None
+    ) -> np.ndarray:
+        """Number of the updates of the tracks."""
+        return self._counts[self.index(ids)]
+
+    def _grow(self, num: int) -> None:
+        """Make sure that there are ``num`` slots."""
+        if num <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < num:
+            capacity *= 2
+        for name, buffer in self.buffers.items():
+            new_buffer = buffer.new_zeros((capacity, ) + buffer.shape[1:])
+            new_buffer[:self.num] = buffer[:self.num]
+            self.buffers[name] = new_buffer
+        self._ids = np.resize(self._ids, capacity)
+        self._counts = np.resize(self._counts, capacity)
+        self.capacity = capacity
+
+    def update(self, ids: Tensor, items: TypingDict[str, Tensor]) -> Tensor:
+        """Add the values of the items of the tracks in a frame.
+
+        Args:
+            ids (Tensor): Distinct ids of the tracks with shape (n, ).
+            items (dict[str, Tensor]): Values of the items, whose first
+                dimension is n.
+
+        Returns:
+            ndarray: Whether each track is a new one.
+        """
+        id_list = [int(id) for id in ids.tolist()]
+        is_new = np.array([id not in self._slots for id in id_list],
+                          dtype=bool)
+        new_ids = [id for id, new in zip(id_list, is_new) if new]
+        num_new = len(new_ids)
+        self._grow(self.num + num_new)
+        for i, id in enumerate(new_ids):
+            self._slots[id] = self.num + i
+        self._ids[self.num:self.num + num_new] = new_ids
+        self._counts[self.num:self.num + num_new] = 0
+        self.num += num_new
+        slots = self.index(id_list)
+
+        counts = self._counts[slots]
+        _slots = torch.from_numpy(slots)
+        _is_new = torch.from_numpy(is_new)
+        for name, value in items.items():
+            if not isinstance(value, Tensor):
+                self._update_objects(name, slots, value)
+                continue
+            if name not in self.buffers:
+                shape = (self.capacity, ) if name in self.momentums else (
+                    self.capacity, self.item_len(name))
+                self.buffers[name] = value.new_zeros(shape + value.shape[1:])
+            buffer = self.buffers[name]
+            value = value.to(buffer.device, buffer.dtype)
+            if name in self.momentums:
+                m = self.momentums[name]
+                new = _is_new.to(buffer.device).view((-1, ) + (1, ) *
+                                                     (value.dim() - 1))
+                inds = _slots.to(buffer.device)
+                buffer[inds] = torch.where(new, value,
+                                           (1 - m) * buffer[inds] + m * value)
+            else:
+                positions = torch.from_numpy(counts % self.item_len(name))
+                buffer[_slots.to(buffer.device),
+                       positions.to(buffer.device)] = value
+        self._counts[slots] += 1
+        return is_new
+
+    def _update_objects(self, name: str, slots: np.ndarray, values) -> None:
+        """Add the values of an item that is not a tensor."""
+        if name in self.momentums:
+            raise TypeError(f'{name} with momentum should be a tensor.')
+        column = self.objects.setdefault(name, [])
+        column.extend(
+            deque(maxlen=self.item_len(name))
+            for _ in range(self.num - len(column)))
+        for slot, value in zip(slots.tolist(), values):
+            column[slot].append(value[None])
+
+    def remove(self, mask: Union[np.ndarray, Tensor]) -> None:
+        """Remove the tracks by a mask in the order of slots."""
+        if isinstance(mask, Tensor):
+            mask = mask.cpu().numpy()
+        keep = ~np.asarray(mask, dtype=bool)
+        num = int(keep.sum())
+        if num == self.num:
+            return
+        _keep = torch.from_numpy(keep)
+        for name, buffer in self.buffers.items():
+            buffer[:num] = buffer[:self.num][_keep.to(buffer.device)]
+        for name, column in self.objects.items():
+            self.objects[name] = [
+                values for values, k in zip(column, keep.tolist()) if k
+            ]
+        self._ids[:num] = self._ids[:self.num][keep]
+        self._counts[:num] = self._counts[:self.num][keep]
+        self.num = num
+        self._slots = {id: i for i, id in enumerate(self.ids.tolist())}
+
+    def last(
+        self,
+        name: str,
+        ids: Optional[Union[Sequence[int], np.ndarray, Tensor]] = None
+    ) -> Union[Tensor, list]:
+        """Get the latest values of an item of the tracks.
+
+        Args:
+            name (str): Name of the item.
+            ids (Sequence[int] | ndarray | Tensor, optional): Ids of the
+                tracks. None means all tracks.
+
+        Returns:
+            Tensor | list: The values with shape (n, ...), or a list of the
+            values if the item is not a tensor.
+        """
+        slots = self.index(ids)
+        if name in self.objects:
+            return [self.objects[name][slot][-1] for slot in slots.tolist()]
+        buffer = self.buffers[name]
+        _slots = torch.from_numpy(slots).to(buffer.device)
+        if name in self.momentums:
+            return buffer[_slots]
+        positions = (self._counts[slots] - 1) % self.item_len(name)
+        return buffer[_slots, torch.from_numpy(positions).to(buffer.device)]
+
+    def history(
+        self,
+        name: str,
+        num_samples: int,
+        ids: Optional[Union[Sequence[int], np.ndarray, Tensor]] = None
+    ) -> Tuple[Tensor, Tensor]:
+        """Get the latest values of an item of the tracks in time order.
+
+        Args:
+            name (str): Name of the item without momentum.
+            num_samples (int): Number of the latest values.
+            ids (Sequence[int] | ndarray | Tensor, optional): Ids of the
+                tracks. None means all tracks.
+
+        Returns:
+            tuple[Tensor, Tensor]: The values with shape
+            (n, num_samples, ...) and whether the values are valid with shape
+            (n, num_samples), which is False if a track has less values.
+        """
+        if name not in self.buffers or name in self.momentums:
+            raise TypeError(f'The history of {name} is not kept as a tensor.')
+        memo_len = self.item_len(name)
+        if num_samples > memo_len:
+            raise ValueError(f'Only the last {memo_len} values of '
+                             f'{name} are kept, but {num_samples} are '
+                             'demanded.')
+        buffer = self.buffers[name]
+        slots = self.index(ids)
+        steps = self._counts[slots][:, None] - num_samples + np.arange(
+            num_samples)
+        positions = torch.from_numpy(steps % memo_len)
+        values = buffer[torch.from_numpy(slots).to(buffer.device)[:, None],
+                        positions.to(buffer.device)]
+        return values, torch.from_numpy(steps >= 0).to(buffer.device)
+
+    def num_kept(self, name: str, id: int) -> int:
+        """Number of the values kept for an item without momentum of a
+        track."""
+        return min(int(self._counts[self._slots[id]]), self.item_len(name))
+
+    def _position(self, name: str, id: int, index: int) -> Tuple[int, int]:
+        """Slot and position in the ring buffer of the ``index``-th kept
+        value of a track."""
+        slot = self._slots[id]
+        count = int(self._counts[slot])
+        memo_len = self.item_len(name)
+        num = min(count, memo_len)
+        if not -num <= index < num:
+            raise IndexError(f'Index {index} is out of the {num} values of '
+                             f'{name} that are kept.')
+        return slot, (count - num + index % num) % memo_len
+
+    def get_value(self, name: str, id: int, index: int = -1) -> Tensor:
+        """Get a value of an item of a track with shape (1, ...).
+
+        Args:
+            name (str): Name of the item.
+            id (int): Id of the track.
+            index (int): Index of the value among the kept values of an item
+                without momentum. Defaults to -1.
+
+        Returns:
+            Tensor: A view of the value in the buffer.
+        """
+        if name in self.momentums:
+            slot = self._slots[id]
+            return self.buffers[name][slot:slot + 1]
+        if name in self.objects:
+            return self.objects[name][self._slots[id]][index]
+        slot, position = self._position(name, id, index)
+        return self.buffers[name][slot, position:position + 1]
+
+    def set_value(self,
+                  name: str,
+                  id: int,
+                  value: Tensor,
+                  index: int = -1) -> None:
+        """Set a value of an item of a track in place."""
+        if name in self.objects:
+            self.objects[name][self._slots[id]][index] = value
+            return
+        buffer = self.buffers[name]
+        if name in self.momentums:
+            buffer[self._slots[id]] = value.reshape(buffer.shape[1:])
+        else:
+            slot, position = self._position(name, id, index)
+            buffer[slot, position] = value.reshape(buffer.shape[2:])
+
+
+class MemoView:
+    """List-like view of the kept values of an item of a track in a
+    :class:`TrackStore`, whose elements are tensors with shape (1, ...).
+
+    Only the last ``memo_len`` values of the item are kept, so ``len`` of the
+    view is at most ``memo_len``. Use :meth:`TrackStore.num_updates` for the
+    number of the updates of a track.
+    """
+
+    def __init__(self, store: TrackStore, name: str, id: int) -> None:
+        self.store = store
+        self.name = name
+        self.id = id
+
+    def __len__(self) -> int:
+        return self.store.num_kept(self.name, self.id)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [
+                self.store.get_value(self.name, self.id, i)
+                for i in range(*index.indices(len(self)))
+            ]
+        return self.store.get_value(self.name, self.id, index)
+
+    def __setitem__(self, index: Union[int, slice], value) -> None:
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self)))
+            if len(indices) != len(value):
+                raise ValueError(f'Cannot assign {len(value)} values to '
+                                 f'{len(indices)} values of {self.name}.')
+            for i, v in zip(indices, value):
+                self.store.set_value(self.name, self.id, v, i)
+        else:
+            self.store.set_value(self.name, self.id, value, index)
+
+    def __iter__(self) -> Iterator[Tensor]:
+        return iter(self[:])
+
+
+class TrackInfo(Dict):
+    """Attributes of a track, whose memo items are read from a
+    :class:`TrackStore`.
+
+    The memo items without momentum are :class:`MemoView`, and the ones with
+    momentum are tensors with shape (1, ...). The other attributes, e.g. the
+    states of motion models, are stored in the dict as usual.
+    """
+
+    def __init__(self, store: TrackStore, id: int) -> None:
+        super().__init__()
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_id', id)
+
+    def __getitem__(self, name):
+        store = object.__getattribute__(self, '_store')
+        if name in store.buffers or name in store.objects:
+            track_id = object.__getattribute__(self, '_id')
+            if name in store.momentums:
+                return store.get_value(name, track_id)
+            return MemoView(store, name, track_id)
+        return super().__getitem__(name)
+
+    def __setitem__(self, name, value) -> None:
+        store = object.__getattribute__(self, '_store')
+        if name in store.buffers or name in store.objects:
+            if name not in store.momentums:
+                raise AttributeError(
+                    f'Memo item {name} should be modified by index.')
+            store.set_value(name, object.__getattribute__(self, '_id'), value)
+            return
+        super().__setitem__(name, value)
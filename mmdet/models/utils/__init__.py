@@ -19,7 +19,7 @@ from .panoptic_gt_processing import preprocess_panoptic_gt
 from .point_sample import (get_uncertain_point_coords_with_randomness,
                            get_uncertainty)
 from .vlfuse_helper import BertEncoderLayer, VLFuse, permute_and_flatten
-from .wbf import weighted_boxes_fusion
+from .wbf import batched_weighted_boxes_fusion, weighted_boxes_fusion
 
 __all__ = [
     'gaussian_radius', 'gen_gaussian_target', 'make_divisible',
@@ -33,5 +33,6 @@ __all__ = [
     'samplelist_boxtype2tensor', 'filter_gt_instances', 'rename_loss_dict',
     'reweight_loss_dict', 'relative_coordinate_maps', 'aligned_bilinear',
     'unfold_wo_center', 'imrenormalize', 'VLFuse', 'permute_and_flatten',
-    'BertEncoderLayer', 'align_tensor', 'weighted_boxes_fusion'
+    'BertEncoderLayer', 'align_tensor', 'weighted_boxes_fusion',
+    'batched_weighted_boxes_fusion'
 ]
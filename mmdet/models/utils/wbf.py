@@ -1,12 +1,14 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 
 import warnings
-from typing import Tuple
+from typing import List, Sequence, Tuple, Union
 
 import numpy as np
 import torch
 from torch import Tensor
 
+CONF_TYPES = ('avg', 'max', 'box_and_model_avg', 'absent_model_aware_avg')
+
 
 # References: https://github.com/ZFTurbo/Weighted-Boxes-Fusion
 def weighted_boxes_fusion(
@@ -45,206 +47,284 @@ def weighted_boxes_fusion(
         scores(Tensor): confidence scores
         labels(Tensor): boxes labels
     """
+    return batched_weighted_boxes_fusion([bboxes_list], [scores_list],
+                                         [labels_list], weights, iou_thr,
+                                         skip_box_thr, conf_type,
+                                         allows_overflow)[0]
 
-    if weights is None:
-        weights = np.ones(len(bboxes_list))
-    if len(weights) != len(bboxes_list):
-        print('Warning: incorrect number of weights {}. Must be: '
-              '{}. Set weights equal to 1.'.format(
-                  len(weights), len(bboxes_list)))
-        weights = np.ones(len(bboxes_list))
-    weights = np.array(weights)
-
-    if conf_type not in [
-            'avg', 'max', 'box_and_model_avg', 'absent_model_aware_avg'
-    ]:
-        print('Unknown conf_type: {}. Must be "avg", '
-              '"max" or "box_and_model_avg", '
-              'or "absent_model_aware_avg"'.format(conf_type))
-        exit()
-
-    filtered_boxes = prefilter_boxes(bboxes_list, scores_list, labels_list,
-                                     weights, skip_box_thr)
-    if len(filtered_boxes) == 0:
-        return torch.Tensor(), torch.Tensor(), torch.Tensor()
-
-    overall_boxes = []
-
-    for label in filtered_boxes:
-        boxes = filtered_boxes[label]
-        new_boxes = []
-        weighted_boxes = np.empty((0, 8))
-
-        # Clusterize boxes
-        for j in range(0, len(boxes)):
-            index, best_iou = find_matching_box_fast(weighted_boxes, boxes[j],
-                                                     iou_thr)
-
-            if index != -1:
-                new_boxes[index].append(boxes[j])
-                weighted_boxes[index] = get_weighted_box(
-                    new_boxes[index], conf_type)
-            else:
-                new_boxes.append([boxes[j].copy()])
-                weighted_boxes = np.vstack((weighted_boxes, boxes[j].copy()))
-
-        # Rescale confidence based on number of models and boxes
-        for i in range(len(new_boxes)):
-            clustered_boxes = new_boxes[i]
-            if conf_type == 'box_and_model_avg':
-                clustered_boxes = np.array(clustered_boxes)
-                # weighted average for boxes
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * len(
-                    clustered_boxes) / weighted_boxes[i, 2]
-                # identify unique model index by model index column
-                _, idx = np.unique(clustered_boxes[:, 3], return_index=True)
-                # rescale by unique model weights
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * clustered_boxes[
-                    idx, 2].sum() / weights.sum()
-            elif conf_type == 'absent_model_aware_avg':
-                clustered_boxes = np.array(clustered_boxes)
-                # get unique model index in the cluster
-                models = np.unique(clustered_boxes[:, 3]).astype(int)
-                # create a mask to get unused model weights
-                mask = np.ones(len(weights), dtype=bool)
-                mask[models] = False
-                # absent model aware weighted average
-                weighted_boxes[
-                    i, 1] = weighted_boxes[i, 1] * len(clustered_boxes) / (
-                        weighted_boxes[i, 2] + weights[mask].sum())
-            elif conf_type == 'max':
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] / weights.max()
-            elif not allows_overflow:
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * min(
-                    len(weights), len(clustered_boxes)) / weights.sum()
-            else:
-                weighted_boxes[i, 1] = weighted_boxes[i, 1] * len(
-                    clustered_boxes) / weights.sum()
-        overall_boxes.append(weighted_boxes)
-    overall_boxes = np.concatenate(overall_boxes, axis=0)
-    overall_boxes = overall_boxes[overall_boxes[:, 1].argsort()[::-1]]
-
-    bboxes = torch.Tensor(overall_boxes[:, 4:])
-    scores = torch.Tensor(overall_boxes[:, 1])
-    labels = torch.Tensor(overall_boxes[:, 0]).int()
-
-    return bboxes, scores, labels
-
-
-def prefilter_boxes(boxes, scores, labels, weights, thr):
-
-    new_boxes = dict()
-
-    for t in range(len(boxes)):
-
-        if len(boxes[t]) != len(scores[t]):
-            print('Error. Length of boxes arrays not equal to '
-                  'length of scores array: {} != {}'.format(
-                      len(boxes[t]), len(scores[t])))
-            exit()
-
-        if len(boxes[t]) != len(labels[t]):
-            print('Error. Length of boxes arrays not equal to '
-                  'length of labels array: {} != {}'.format(
-                      len(boxes[t]), len(labels[t])))
-            exit()
-
-        for j in range(len(boxes[t])):
-            score = scores[t][j]
-            if score < thr:
-                continue
-            label = int(labels[t][j])
-            box_part = boxes[t][j]
-            x1 = float(box_part[0])
-            y1 = float(box_part[1])
-            x2 = float(box_part[2])
-            y2 = float(box_part[3])
-
-            # Box data checks
-            if x2 < x1:
-                warnings.warn('X2 < X1 value in box. Swap them.')
-                x1, x2 = x2, x1
-            if y2 < y1:
-                warnings.warn('Y2 < Y1 value in box. Swap them.')
-                y1, y2 = y2, y1
-            if (x2 - x1) * (y2 - y1) == 0.0:
-                warnings.warn('Zero area box skipped: {}.'.format(box_part))
-                continue
-
-            # [label, score, weight, model index, x1, y1, x2, y2]
-            b = [
-                int(label),
-                float(score) * weights[t], weights[t], t, x1, y1, x2, y2
-            ]
-
-            if label not in new_boxes:
-                new_boxes[label] = []
-            new_boxes[label].append(b)
-
-    # Sort each list in dict by score and transform it to numpy array
-    for k in new_boxes:
-        current_boxes = np.array(new_boxes[k])
-        new_boxes[k] = current_boxes[current_boxes[:, 1].argsort()[::-1]]
-
-    return new_boxes
-
-
-def get_weighted_box(boxes, conf_type='avg'):
-
-    box = np.zeros(8, dtype=np.float32)
-    conf = 0
-    conf_list = []
-    w = 0
-    for b in boxes:
-        box[4:] += (b[1] * b[4:])
-        conf += b[1]
-        conf_list.append(b[1])
-        w += b[2]
-    box[0] = boxes[0][0]
-    if conf_type in ('avg', 'box_and_model_avg', 'absent_model_aware_avg'):
-        box[1] = conf / len(boxes)
-    elif conf_type == 'max':
-        box[1] = np.array(conf_list).max()
-    box[2] = w
-    box[3] = -1
-    box[4:] /= conf
-
-    return box
-
-
-def find_matching_box_fast(boxes_list, new_box, match_iou):
-
-    def bb_iou_array(boxes, new_box):
-        # bb intersection over union
-        xA = np.maximum(boxes[:, 0], new_box[0])
-        yA = np.maximum(boxes[:, 1], new_box[1])
-        xB = np.minimum(boxes[:, 2], new_box[2])
-        yB = np.minimum(boxes[:, 3], new_box[3])
 
-        interArea = np.maximum(xB - xA, 0) * np.maximum(yB - yA, 0)
+def batched_weighted_boxes_fusion(
+        batch_bboxes_list: Sequence[list],
+        batch_scores_list: Sequence[list],
+        batch_labels_list: Sequence[list],
+        weights: list = None,
+        iou_thr: float = 0.55,
+        skip_box_thr: float = 0.0,
+        conf_type: str = 'avg',
+        allows_overflow: bool = False) -> List[Tuple[Tensor, Tensor, Tensor]]:
+    """Weighted boxes fusion of a batch of images.
+
+    The boxes are clustered in the same greedy way as the reference
+    implementation, i.e. the boxes of a label are visited in the descending
+    order of scores, and each box joins the fused box of the same label with
+    the largest IoU if the IoU is larger than ``iou_thr``, otherwise it
+    starts a new cluster. The i-th boxes of all labels of all images are
+    visited at the same time with tensor operations, so the number of steps
+    is the largest number of boxes of a label in an image.
 
-        # compute the area of both the prediction and ground-truth rectangles
-        boxAArea = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
-        boxBArea = (new_box[2] - new_box[0]) * (new_box[3] - new_box[1])
+    Args:
+        batch_bboxes_list (Sequence[list]): ``bboxes_list`` of each image,
+            see :func:`weighted_boxes_fusion`. The boxes can be arrays or
+            tensors.
+        batch_scores_list (Sequence[list]): ``scores_list`` of each image.
+        batch_labels_list (Sequence[list]): ``labels_list`` of each image.
+        weights (list, optional): Weights of the models. Defaults to None,
+            which means the weights are all 1.
+        iou_thr (float): IoU threshold for boxes to be a match.
+            Defaults to 0.55.
+        skip_box_thr (float): Boxes with scores lower than it are excluded.
+            Defaults to 0.0.
+        conf_type (str): How to calculate the scores of fused boxes, see
+            :func:`weighted_boxes_fusion`. Defaults to 'avg'.
+        allows_overflow (bool): Whether the scores can exceed 1.0.
+            Defaults to False.
 
-        iou = interArea / (boxAArea + boxBArea - interArea)
+    Returns:
+        List[Tuple[Tensor, Tensor, Tensor]]: The fused boxes in
+        (x1, y1, x2, y2) format, scores and labels of each image, which are
+        sorted by scores. They are on the device of the first input tensor
+        if any, otherwise on cpu.
+    """
+    if conf_type not in CONF_TYPES:
+        raise ValueError(f'Unknown conf_type: {conf_type}. Must be one of '
+                         f'{CONF_TYPES}.')
+    num_imgs = len(batch_bboxes_list)
+    if len(batch_scores_list) != num_imgs or len(
+            batch_labels_list) != num_imgs:
+        raise ValueError('The numbers of images of boxes, scores and labels '
+                         'should be equal.')
+    num_models = len(batch_bboxes_list[0]) if num_imgs > 0 else 0
+    if weights is None:
+        weights = np.ones(num_models)
+    if len(weights) != num_models:
+        warnings.warn(f'Incorrect number of weights {len(weights)}. Must be: '
+                      f'{num_models}. Set weights equal to 1.')
+        weights = np.ones(num_models)
+
+    device = _find_device(batch_bboxes_list)
+    weights = torch.as_tensor(
+        np.asarray(weights, dtype=np.float32), device=device)
+
+    bboxes, scores, labels, model_inds, img_inds = _flatten_boxes(
+        batch_bboxes_list, batch_scores_list, batch_labels_list, num_models,
+        device)
+    keep = scores >= skip_box_thr
+    bboxes, scores, labels = bboxes[keep], scores[keep], labels[keep]
+    model_inds, img_inds = model_inds[keep], img_inds[keep]
+
+    # Box data checks
+    if (bboxes[:, 2] < bboxes[:, 0]).any():
+        warnings.warn('X2 < X1 value in box. Swap them.')
+    if (bboxes[:, 3] < bboxes[:, 1]).any():
+        warnings.warn('Y2 < Y1 value in box. Swap them.')
+    bboxes = torch.cat([
+        torch.min(bboxes[:, :2], bboxes[:, 2:]),
+        torch.max(bboxes[:, :2], bboxes[:, 2:])
+    ],
+                       dim=1)
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    if (areas == 0).any():
+        warnings.warn(f'{int((areas == 0).sum())} zero area boxes skipped.')
+        keep = areas != 0
+        bboxes, scores, labels = bboxes[keep], scores[keep], labels[keep]
+        model_inds, img_inds = model_inds[keep], img_inds[keep]
+
+    weighted_scores = scores * weights[model_inds]
+    assign = _cluster_boxes(bboxes, weighted_scores, labels, img_inds, iou_thr)
+
+    # fuse the boxes of each cluster, the cluster is indexed by the box
+    # starting it
+    cluster_inds, assign = torch.unique(assign, return_inverse=True)
+    num_clusters = len(cluster_inds)
+    conf = weighted_scores.new_zeros(num_clusters).index_add_(
+        0, assign, weighted_scores)
+    fused_bboxes = bboxes.new_zeros((num_clusters, 4)).index_add_(
+        0, assign, bboxes * weighted_scores[:, None]) / conf[:, None]
+    counts = assign.new_zeros(num_clusters).index_add_(
+        0, assign, torch.ones_like(assign)).to(conf.dtype)
+    weight_sums = conf.new_zeros(num_clusters).index_add_(
+        0, assign, weights[model_inds])
+
+    if conf_type == 'max':
+        # the box starting a cluster has the max score of the cluster
+        fused_scores = weighted_scores[cluster_inds] / weights.max()
+    else:
+        fused_scores = conf / counts
+    if conf_type in ('box_and_model_avg', 'absent_model_aware_avg'):
+        # the sum of weights of the models in each cluster
+        cluster_models = torch.unique(assign * num_models + model_inds)
+        model_weight_sums = conf.new_zeros(num_clusters).index_add_(
+            0, cluster_models // num_models,
+            weights[cluster_models % num_models])
+        if conf_type == 'box_and_model_avg':
+            fused_scores = fused_scores * counts / weight_sums
+            fused_scores = fused_scores * model_weight_sums / weights.sum()
+        else:
+            fused_scores = fused_scores * counts / (
+                weight_sums + weights.sum() - model_weight_sums)
+    elif conf_type == 'avg':
+        if not allows_overflow:
+            counts = counts.clamp(max=num_models)
+        fused_scores = fused_scores * counts / weights.sum()
+
+    fused_labels = labels[cluster_inds].int()
+    fused_img_inds = img_inds[cluster_inds]
+    # sort the fused boxes by images and then by descending scores
+    order = fused_scores.argsort(descending=True)
+    order = order[fused_img_inds[order].sort(stable=True)[1]]
+    num_fused = torch.bincount(fused_img_inds, minlength=num_imgs).tolist()
+    return list(
+        zip(fused_bboxes[order].split(num_fused),
+            fused_scores[order].split(num_fused),
+            fused_labels[order].split(num_fused)))
+
+
+def _find_device(batch_bboxes_list: Sequence[list]) -> torch.device:
+    """Find the device of the first tensor of boxes."""
+    for bboxes_list in batch_bboxes_list:
+        for bboxes in bboxes_list:
+            if isinstance(bboxes, Tensor):
+                return bboxes.device
+    return torch.device('cpu')
+
+
+def _to_tensor(data: Union[Tensor, np.ndarray, list], dtype: torch.dtype,
+               device: torch.device) -> Tensor:
+    if isinstance(data, Tensor):
+        return data.to(device=device, dtype=dtype)
+    return torch.as_tensor(np.asarray(data), dtype=dtype, device=device)
+
+
+def _flatten_boxes(
+        batch_bboxes_list: Sequence[list], batch_scores_list: Sequence[list],
+        batch_labels_list: Sequence[list], num_models: int,
+        device: torch.device) -> Tuple[Tensor, Tensor, Tensor, Tensor, Tensor]:
+    """Concatenate the boxes of all models and images."""
+    bboxes, scores, labels, model_inds, img_inds = [], [], [], [], []
+    for img_idx, (bboxes_list, scores_list, labels_list) in enumerate(
+            zip(batch_bboxes_list, batch_scores_list, batch_labels_list)):
+        if len(bboxes_list) != num_models or len(
+                scores_list) != num_models or len(labels_list) != num_models:
+            raise ValueError('The numbers of models of all images should be '
+                             f'{num_models}.')
+        for model_idx in range(num_models):
+            model_bboxes = _to_tensor(bboxes_list[model_idx], torch.float32,
+                                      device).view(-1, 4)
+            model_scores = _to_tensor(scores_list[model_idx], torch.float32,
+                                      device).view(-1)
+            model_labels = _to_tensor(labels_list[model_idx], torch.long,
+                                      device).view(-1)
+            if len(model_bboxes) != len(model_scores):
+                raise ValueError(
+                    'Length of boxes arrays not equal to length of scores '
+                    f'array: {len(model_bboxes)} != {len(model_scores)}')
+            if len(model_bboxes) != len(model_labels):
+                raise ValueError(
+                    'Length of boxes arrays not equal to length of labels '
+                    f'array: {len(model_bboxes)} != {len(model_labels)}')
+            bboxes.append(model_bboxes)
+            scores.append(model_scores)
+            labels.append(model_labels)
+            model_inds.append(
+                model_labels.new_full((len(model_labels), ), model_idx))
+            img_inds.append(
+                model_labels.new_full((len(model_labels), ), img_idx))
+    if len(bboxes) == 0:
+        return (torch.zeros((0, 4),
+                            device=device), torch.zeros((0, ), device=device),
+                *[torch.zeros((0, ), dtype=torch.long, device=device)] * 3)
+    return (torch.cat(bboxes), torch.cat(scores), torch.cat(labels),
+            torch.cat(model_inds), torch.cat(img_inds))
+
+
+def _cluster_boxes(bboxes: Tensor, scores: Tensor, labels: Tensor,
+                   img_inds: Tensor, iou_thr: float) -> Tensor:
+    """Cluster the boxes of each label of each image greedily.
 
-        return iou
+    Args:
+        bboxes (Tensor): Boxes in (x1, y1, x2, y2) format with shape (n, 4).
+        scores (Tensor): Weighted scores of the boxes with shape (n, ).
+        labels (Tensor): Labels of the boxes with shape (n, ).
+        img_inds (Tensor): Indices of the images of the boxes with shape
+            (n, ).
+        iou_thr (float): IoU threshold for boxes to be a match.
 
-    if boxes_list.shape[0] == 0:
-        return -1, match_iou
-
-    boxes = boxes_list
-
-    ious = bb_iou_array(boxes[:, 4:], new_box[4:])
-
-    ious[boxes[:, 0] != new_box[0]] = -1
-
-    best_idx = np.argmax(ious)
-    best_iou = ious[best_idx]
-
-    if best_iou <= match_iou:
-        best_iou = match_iou
-        best_idx = -1
-
-    return best_idx, best_iou
+    Returns:
+        Tensor: Index of the box starting the cluster of each box.
+    """
+    num_boxes = len(bboxes)
+    if num_boxes == 0:
+        return labels.new_zeros((0, ))
+    # sort the boxes by (image, label) and then by descending scores, the
+    # boxes with equal scores are visited in the reversed order as the
+    # reference implementation
+    order = scores.sort(stable=True)[1]
+    _, segments = torch.unique(
+        torch.stack([img_inds[order], labels[order]], dim=1),
+        dim=0,
+        return_inverse=True)
+    order = order[segments.sort(stable=True)[1]].flip(0)
+    bboxes, scores = bboxes[order], scores[order]
+
+    _, segments, lengths = torch.unique_consecutive(
+        torch.stack([img_inds[order], labels[order]], dim=1),
+        dim=0,
+        return_inverse=True,
+        return_counts=True)
+    starts = lengths.cumsum(0) - lengths
+    # the segments with the i-th boxes are the first ones
+    lengths, segment_order = lengths.sort(descending=True, stable=True)
+    starts = starts[segment_order]
+    num_active = len(lengths) - torch.searchsorted(
+        lengths.flip(0),
+        torch.arange(int(lengths[0]), device=lengths.device),
+        right=True)
+
+    assign = torch.arange(num_boxes, device=bboxes.device)
+    founded = torch.zeros(num_boxes, dtype=torch.bool, device=bboxes.device)
+    box_sums = torch.zeros_like(bboxes)
+    conf_sums = torch.zeros_like(scores)
+    fused_bboxes = torch.zeros_like(bboxes)
+    for step, num in enumerate(num_active.tolist()):
+        inds = starts[:num] + step
+        clusters = inds
+        if step > 0:
+            candidates = starts[:num, None] + torch.arange(
+                step, device=bboxes.device)
+            ious = _bbox_ious(fused_bboxes[candidates], bboxes[inds, None])
+            ious = ious.masked_fill(~founded[candidates], -1)
+            best_ious, best_inds = ious.max(dim=1)
+            clusters = torch.where(
+                best_ious > iou_thr,
+                candidates.gather(1, best_inds[:, None])[:, 0], inds)
+        founded[inds] = clusters == inds
+        assign[inds] = clusters
+        box_sums[clusters] += bboxes[inds] * scores[inds, None]
+        conf_sums[clusters] += scores[inds]
+        fused_bboxes[clusters] = box_sums[clusters] / conf_sums[clusters, None]
+    # map the indices back to the unsorted boxes
+    result = torch.empty_like(assign)
+    result[order] = order[assign]
+    return result
+
+
+def _bbox_ious(bboxes1: Tensor, bboxes2: Tensor) -> Tensor:
+    """IoUs of the boxes in the last dimension with broadcasting."""
+    lt = torch.max(bboxes1[..., :2], bboxes2[..., :2])
+    rb = torch.min(bboxes1[..., 2:], bboxes2[..., 2:])
+    overlap = (rb - lt).clamp(min=0).prod(dim=-1)
+    area1 = (bboxes1[..., 2] - bboxes1[..., 0]) * (
+        bboxes1[..., 3] - bboxes1[..., 1])
+    area2 = (bboxes2[..., 2] - bboxes2[..., 0]) * (
+        bboxes2[..., 3] - bboxes2[..., 1])
+    return overlap / (area1 + area2 - overlap)
@@ -3,17 +3,19 @@ from typing import Optional, Tuple, TypeVar, Union
 
 import cv2
 import numpy as np
+import pycocotools.mask as maskUtils
 import torch
 from torch import BoolTensor, Tensor
 
-from mmdet.structures.mask.structures import BitmapMasks, PolygonMasks
+from mmdet.structures.mask.structures import (BitmapMasks, PolygonMasks,
+                                              RLEMasks)
 from .base_boxes import BaseBoxes
 from .bbox_overlaps import bbox_overlaps
 from .box_type import register_box
 
 T = TypeVar('T')
 DeviceType = Union[str, torch.device]
-MaskType = Union[BitmapMasks, PolygonMasks]
+MaskType = Union[BitmapMasks, PolygonMasks, RLEMasks]
 
 
 @register_box(name='hbox')
@@ -393,8 +395,8 @@ class HorizontalBoxes(BaseBoxes):
         """Create horizontal boxes from instance masks.
 
         Args:
-            masks (:obj:`BitmapMasks` or :obj:`PolygonMasks`): BitmapMasks or
-                PolygonMasks instance with length of n.
+            masks (:obj:`BitmapMasks`, :obj:`PolygonMasks` or
+                :obj:`RLEMasks`): Instance masks with length of n.
 
         Returns:
             :obj:`HorizontalBoxes`: Converted boxes with shape of (n, 4).
@@ -425,8 +427,13 @@ class HorizontalBoxes(BaseBoxes):
                     xy_max = np.maximum(xy_max, np.max(xy, axis=0))
                 boxes[idx, :2] = xy_min
                 boxes[idx, 2:] = xy_max
+        elif isinstance(masks, RLEMasks):
+            if num_masks > 0:
+                # boxes of RLEs are in (x, y, w, h) format
+                boxes[:] = maskUtils.toBbox(masks.masks)
+                boxes[:, 2:] += boxes[:, :2]
         else:
             raise TypeError(
-                '`masks` must be `BitmapMasks`  or `PolygonMasks`, '
+                '`masks` must be `BitmapMasks`, `PolygonMasks` or `RLEMasks`, '
                 f'but got {type(masks)}.')
         return HorizontalBoxes(boxes)
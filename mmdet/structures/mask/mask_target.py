@@ -3,6 +3,8 @@ import numpy as np
 import torch
 from torch.nn.modules.utils import _pair
 
+from .structures import BitmapMasks, PolygonMasks, RLEMasks
+
 
 def mask_target(pos_proposals_list, pos_assigned_gt_inds_list, gt_masks_list,
                 cfg):
@@ -55,6 +57,10 @@ def mask_target(pos_proposals_list, pos_assigned_gt_inds_list, gt_masks_list,
         >>>     gt_masks_list, cfg)
         >>> assert mask_targets.shape == (5,) + cfg['mask_size']
     """
+    if len(pos_proposals_list) > 1 and _can_batch(gt_masks_list):
+        return batched_mask_target(pos_proposals_list,
+                                   pos_assigned_gt_inds_list, gt_masks_list,
+                                   cfg)
     cfg_list = [cfg for _ in range(len(pos_proposals_list))]
     mask_targets = map(mask_target_single, pos_proposals_list,
                        pos_assigned_gt_inds_list, gt_masks_list, cfg_list)
@@ -64,6 +70,74 @@ def mask_target(pos_proposals_list, pos_assigned_gt_inds_list, gt_masks_list,
     return mask_targets
 
 
+def _can_batch(gt_masks_list):
+    """Whether the masks of multiple images can be concatenated, i.e. they
+    are of the same type, and of the same size if they are bitmaps or
+    RLEs."""
+    mask_types = set(type(gt_masks) for gt_masks in gt_masks_list)
+    if len(mask_types) != 1:
+        return False
+    mask_type = mask_types.pop()
+    if issubclass(mask_type, PolygonMasks):
+        return True
+    if issubclass(mask_type, (BitmapMasks, RLEMasks)):
+        return len(
+            set((gt_masks.height, gt_masks.width)
+                for gt_masks in gt_masks_list)) == 1
+    return False
+
+
+def batched_mask_target(pos_proposals_list, pos_assigned_gt_inds_list,
+                        gt_masks_list, cfg):
+    """Compute mask target for positive proposals in multiple images at once.
+
+    The masks of all images are concatenated, and the targets of all
+    positive proposals are computed by a single ``crop_and_resize``, i.e. a
+    single RoIAlign for bitmap masks or a vectorized transform of all
+    polygons. The result is the same as :func:`mask_target`.
+
+    Args:
+        pos_proposals_list (list[Tensor]): Positive proposals in multiple
+            images, each has shape (num_pos, 4).
+        pos_assigned_gt_inds_list (list[Tensor]): Assigned GT indices for each
+            positive proposals, each has shape (num_pos,).
+        gt_masks_list (list[:obj:`BaseInstanceMasks`]): Ground truth masks of
+            each image, which should be of the same type, and of the same
+            size if they are :obj:`BitmapMasks`.
+        cfg (dict): Config dict that specifies the mask size.
+
+    Returns:
+        Tensor: Mask target of each image, has shape (num_pos, w, h).
+    """
+    device = pos_proposals_list[0].device
+    mask_size = _pair(cfg.mask_size)
+    binarize = not cfg.get('soft_mask_target', False)
+    proposals_np = torch.cat(pos_proposals_list).cpu().numpy()
+    if proposals_np.shape[0] == 0:
+        return pos_proposals_list[0].new_zeros((0, ) + mask_size)
+
+    num_pos = [len(pos_proposals) for pos_proposals in pos_proposals_list]
+    maxh = np.repeat([gt_masks.height for gt_masks in gt_masks_list], num_pos)
+    maxw = np.repeat([gt_masks.width for gt_masks in gt_masks_list], num_pos)
+    proposals_np[:, [0, 2]] = np.clip(proposals_np[:, [0, 2]], 0, maxw[:,
+                                                                       None])
+    proposals_np[:, [1, 3]] = np.clip(proposals_np[:, [1, 3]], 0, maxh[:,
+                                                                       None])
+    # offset the assigned indices by the number of masks in previous images
+    num_gts = [len(gt_masks) for gt_masks in gt_masks_list]
+    gt_offsets = np.repeat(np.cumsum(num_gts) - num_gts, num_pos)
+    pos_assigned_gt_inds = torch.cat(pos_assigned_gt_inds_list).cpu().numpy()
+    gt_masks = type(gt_masks_list[0]).cat(gt_masks_list)
+
+    mask_targets = gt_masks.crop_and_resize(
+        proposals_np,
+        mask_size,
+        device=device,
+        inds=pos_assigned_gt_inds + gt_offsets,
+        binarize=binarize).to_ndarray()
+    return torch.from_numpy(mask_targets).float().to(device)
+
+
 def mask_target_single(pos_proposals, pos_assigned_gt_inds, gt_masks, cfg):
     """Compute mask target for each positive proposal in the image.
 
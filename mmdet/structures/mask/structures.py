@@ -382,13 +382,23 @@ class BitmapMasks(BaseInstanceMasks):
             inds = torch.from_numpy(inds).to(device=device)
 
         num_bbox = bboxes.shape[0]
-        fake_inds = torch.arange(
-            num_bbox, device=device).to(dtype=bboxes.dtype)[:, None]
-        rois = torch.cat([fake_inds, bboxes], dim=1)  # Nx5
-        rois = rois.to(device=device)
         if num_bbox > 0:
-            gt_masks_th = torch.from_numpy(self.masks).to(device).index_select(
-                0, inds).to(dtype=rois.dtype)
+            # use the masks as a batch of feature maps and the assigned mask
+            # of each bbox as its batch index, so that the masks are neither
+            # duplicated for each bbox nor transferred if not assigned
+            mask_inds, batch_inds = torch.unique(
+                inds.cpu(), return_inverse=True)
+            # masks decoded from RLEs are usually not C-contiguous, which is
+            # required by roi_align
+            gt_masks_th = torch.from_numpy(
+                np.ascontiguousarray(
+                    self.masks[mask_inds.numpy()])).to(device).to(
+                        dtype=bboxes.dtype)
+            rois = torch.cat([
+                batch_inds.to(device=device, dtype=bboxes.dtype)[:, None],
+                bboxes.to(device=device)
+            ],
+                             dim=1)  # Nx5
             targets = roi_align(gt_masks_th[:, None, :, :], rois, out_shape,
                                 1.0, 0, 'avg', True).squeeze(1)
             if binarize:
@@ -670,7 +680,7 @@ class PolygonMasks(BaseInstanceMasks):
                     f'Unsupported input of type {type(index)} for indexing!')
         if len(masks) and isinstance(masks[0], np.ndarray):
             masks = [masks]  # ensure a list of three levels
-        return PolygonMasks(masks, self.height, self.width)
+        return type(self)(masks, self.height, self.width)
 
     def __iter__(self):
         return iter(self.masks)
@@ -690,7 +700,7 @@ class PolygonMasks(BaseInstanceMasks):
         """see :func:`BaseInstanceMasks.rescale`"""
         new_w, new_h = mmcv.rescale_size((self.width, self.height), scale)
         if len(self.masks) == 0:
-            rescaled_masks = PolygonMasks([], new_h, new_w)
+            rescaled_masks = type(self)([], new_h, new_w)
         else:
             rescaled_masks = self.resize((new_h, new_w))
         return rescaled_masks
@@ -698,7 +708,7 @@ class PolygonMasks(BaseInstanceMasks):
     def resize(self, out_shape, interpolation=None):
         """see :func:`BaseInstanceMasks.resize`"""
         if len(self.masks) == 0:
-            resized_masks = PolygonMasks([], *out_shape)
+            resized_masks = type(self)([], *out_shape)
         else:
             h_scale = out_shape[0] / self.height
             w_scale = out_shape[1] / self.width
@@ -711,14 +721,14 @@ class PolygonMasks(BaseInstanceMasks):
                     p[1::2] = p[1::2] * h_scale
                     resized_poly.append(p)
                 resized_masks.append(resized_poly)
-            resized_masks = PolygonMasks(resized_masks, *out_shape)
+            resized_masks = type(self)(resized_masks, *out_shape)
         return resized_masks
 
     def flip(self, flip_direction='horizontal'):
         """see :func:`BaseInstanceMasks.flip`"""
         assert flip_direction in ('horizontal', 'vertical', 'diagonal')
         if len(self.masks) == 0:
-            flipped_masks = PolygonMasks([], self.height, self.width)
+            flipped_masks = type(self)([], self.height, self.width)
         else:
             flipped_masks = []
             for poly_per_obj in self.masks:
@@ -734,8 +744,7 @@ class PolygonMasks(BaseInstanceMasks):
                         p[1::2] = self.height - p[1::2]
                     flipped_poly_per_obj.append(p)
                 flipped_masks.append(flipped_poly_per_obj)
-            flipped_masks = PolygonMasks(flipped_masks, self.height,
-                                         self.width)
+            flipped_masks = type(self)(flipped_masks, self.height, self.width)
         return flipped_masks
 
     def crop(self, bbox):
@@ -752,7 +761,7 @@ class PolygonMasks(BaseInstanceMasks):
         h = np.maximum(y2 - y1, 1)
 
         if len(self.masks) == 0:
-            cropped_masks = PolygonMasks([], h, w)
+            cropped_masks = type(self)([], h, w)
         else:
             # reference: https://github.com/facebookresearch/fvcore/blob/main/fvcore/transforms/transform.py  # noqa
             crop_box = geometry.box(x1, y1, x2, y2).buffer(0.0)
@@ -794,12 +803,12 @@ class PolygonMasks(BaseInstanceMasks):
                     cropped_poly_per_obj = [np.array([0, 0, 0, 0, 0, 0])]
                 cropped_masks.append(cropped_poly_per_obj)
             np.seterr(**initial_settings)
-            cropped_masks = PolygonMasks(cropped_masks, h, w)
+            cropped_masks = type(self)(cropped_masks, h, w)
         return cropped_masks
 
     def pad(self, out_shape, pad_val=0):
         """padding has no effect on polygons`"""
-        return PolygonMasks(self.masks, *out_shape)
+        return type(self)(self.masks, *out_shape)
 
     def expand(self, *args, **kwargs):
         """TODO: Add expand for polygon"""
@@ -815,36 +824,49 @@ class PolygonMasks(BaseInstanceMasks):
         """see :func:`BaseInstanceMasks.crop_and_resize`"""
         out_h, out_w = out_shape
         if len(self.masks) == 0:
-            return PolygonMasks([], out_h, out_w)
+            return type(self)([], out_h, out_w)
 
         if not binarize:
             raise ValueError('Polygons are always binary, '
                              'setting binarize=False is unsupported')
 
-        resized_masks = []
-        for i in range(len(bboxes)):
-            mask = self.masks[inds[i]]
-            bbox = bboxes[i, :]
-            x1, y1, x2, y2 = bbox
-            w = np.maximum(x2 - x1, 1)
-            h = np.maximum(y2 - y1, 1)
-            h_scale = out_h / max(h, 0.1)  # avoid too large scale
-            w_scale = out_w / max(w, 0.1)
-
-            resized_mask = []
-            for p in mask:
-                p = p.copy()
-                # crop
-                # pycocotools will clip the boundary
-                p[0::2] = p[0::2] - bbox[0]
-                p[1::2] = p[1::2] - bbox[1]
-
-                # resize
-                p[0::2] = p[0::2] * w_scale
-                p[1::2] = p[1::2] * h_scale
-                resized_mask.append(p)
-            resized_masks.append(resized_mask)
-        return PolygonMasks(resized_masks, *out_shape)
+        if len(bboxes) == 0:
+            return type(self)([], out_h, out_w)
+        bboxes = np.asarray(bboxes)
+        inds = np.asarray(inds)
+        # flatten the polygons of the assigned masks, and transform the
+        # coordinates of all polygons at once
+        num_parts = np.array([len(mask) for mask in self.masks])[inds]
+        parts = [p for i in inds.tolist() for p in self.masks[i]]
+        part_lens = np.array([len(p) for p in parts], dtype=np.int64)
+        coords = np.concatenate(parts)
+        part_starts = np.cumsum(part_lens) - part_lens
+        coord_bbox_inds = np.repeat(
+            np.repeat(np.arange(len(bboxes)), num_parts), part_lens)
+        # 0 for x and 1 for y
+        coord_axes = (np.arange(len(coords)) -
+                      np.repeat(part_starts, part_lens)) % 2
+
+        w = np.maximum(bboxes[:, 2] - bboxes[:, 0], 1).astype(np.float64)
+        h = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1).astype(np.float64)
+        # avoid too large scale
+        scales = np.stack(
+            [out_w / np.maximum(w, 0.1), out_h / np.maximum(h, 0.1)], axis=1)
+        scales = scales[coord_bbox_inds, coord_axes]
+        if np.issubdtype(coords.dtype, np.floating):
+            scales = scales.astype(coords.dtype)
+        # crop and resize, pycocotools will clip the boundary
+        offsets = bboxes[coord_bbox_inds, coord_axes]
+        coords = (coords - offsets).astype(coords.dtype, copy=False)
+        coords = (coords * scales).astype(coords.dtype, copy=False)
+
+        parts = np.split(coords, part_starts[1:])
+        part_ends = np.cumsum(num_parts).tolist()
+        resized_masks = [
+            parts[end - num:end]
+            for end, num in zip(part_ends, num_parts.tolist())
+        ]
+        return type(self)(resized_masks, *out_shape)
 
     def translate(self,
                   out_shape,
@@ -865,7 +887,7 @@ class PolygonMasks(BaseInstanceMasks):
             'Here border_value is not '\
             f'used, and defaultly should be None or 0. got {border_value}.'
         if len(self.masks) == 0:
-            translated_masks = PolygonMasks([], *out_shape)
+            translated_masks = type(self)([], *out_shape)
         else:
             translated_masks = []
             for poly_per_obj in self.masks:
@@ -878,7 +900,7 @@ class PolygonMasks(BaseInstanceMasks):
                         p[1::2] = np.clip(p[1::2] + offset, 0, out_shape[0])
                     translated_poly_per_obj.append(p)
                 translated_masks.append(translated_poly_per_obj)
-            translated_masks = PolygonMasks(translated_masks, *out_shape)
+            translated_masks = type(self)(translated_masks, *out_shape)
         return translated_masks
 
     def shear(self,
@@ -889,7 +911,7 @@ class PolygonMasks(BaseInstanceMasks):
               interpolation='bilinear'):
         """See :func:`BaseInstanceMasks.shear`."""
         if len(self.masks) == 0:
-            sheared_masks = PolygonMasks([], *out_shape)
+            sheared_masks = type(self)([], *out_shape)
         else:
             sheared_masks = []
             if direction == 'horizontal':
@@ -910,7 +932,7 @@ class PolygonMasks(BaseInstanceMasks):
                     sheared_poly.append(
                         new_coords.transpose((1, 0)).reshape(-1))
                 sheared_masks.append(sheared_poly)
-            sheared_masks = PolygonMasks(sheared_masks, *out_shape)
+            sheared_masks = type(self)(sheared_masks, *out_shape)
         return sheared_masks
 
     def rotate(self,
@@ -922,7 +944,7 @@ class PolygonMasks(BaseInstanceMasks):
                interpolation='bilinear'):
         """See :func:`BaseInstanceMasks.rotate`."""
         if len(self.masks) == 0:
-            rotated_masks = PolygonMasks([], *out_shape)
+            rotated_masks = type(self)([], *out_shape)
         else:
             rotated_masks = []
             rotate_matrix = cv2.getRotationMatrix2D(center, -angle, scale)
@@ -945,7 +967,7 @@ class PolygonMasks(BaseInstanceMasks):
                                                    out_shape[0])
                     rotated_poly.append(rotated_coords.reshape(-1))
                 rotated_masks.append(rotated_poly)
-            rotated_masks = PolygonMasks(rotated_masks, *out_shape)
+            rotated_masks = type(self)(rotated_masks, *out_shape)
         return rotated_masks
 
     def to_bitmap(self):
@@ -992,11 +1014,8 @@ class PolygonMasks(BaseInstanceMasks):
         """Convert masks to the format of ndarray."""
         if len(self.masks) == 0:
             return np.empty((0, self.height, self.width), dtype=np.uint8)
-        bitmap_masks = []
-        for poly_per_obj in self.masks:
-            bitmap_masks.append(
-                polygon_to_bitmap(poly_per_obj, self.height, self.width))
-        return np.stack(bitmap_masks)
+        bitmap_masks = polygons_to_bitmaps(self.masks, self.height, self.width)
+        return bitmap_masks.astype(bool, order='C')
 
     def to_tensor(self, dtype, device):
         """See :func:`BaseInstanceMasks.to_tensor`."""
@@ -1146,6 +1165,341 @@ class PolygonMasks(BaseInstanceMasks):
         return cls(mask_list, masks[0].height, masks[0].width)
 
 
+class LazyBitmapMasks(PolygonMasks):
+    """Bitmap masks that are kept as polygons until they are rasterized.
+
+    Geometric transforms of :obj:`BitmapMasks`, e.g. resizing, flipping,
+    cropping and padding, process arrays of shape (N, H, W) one after
+    another. This class keeps the polygons instead, so that these transforms
+    only update the coordinates, and the polygons are rasterized only once by
+    :meth:`to_bitmap` in :class:`PackDetInputs`. Note that rasterizing the
+    transformed polygons can be slightly different from transforming the
+    rasterized bitmaps, e.g. resizing with nearest interpolation.
+
+    Args:
+        masks (list[list[ndarray]]): The first level of the list
+            corresponds to objects, the second level to the polys that
+            compose the object, the third level to the poly coordinates
+        height (int): height of masks
+        width (int): width of masks
+    """
+
+    def to_bitmap(self):
+        """Rasterize the masks to :obj:`BitmapMasks` of uint8, which is the
+        same as the masks loaded from polygons."""
+        return BitmapMasks(
+            polygons_to_bitmaps(self.masks, self.height, self.width),
+            self.height, self.width)
+
+
+class RLEMasks(BaseInstanceMasks):
+    """This class represents masks in the form of compressed RLEs.
+
+    The masks are stored as the RLEs of pycocotools, which are much smaller
+    than bitmaps and can be evaluated by :class:`COCOeval` directly. Flipping,
+    cropping, padding, expanding and translating by integer offsets are
+    performed on the runs of all masks at once without decoding them, while
+    the other transforms fall back to :class:`BitmapMasks`.
+
+    Args:
+        masks (list[dict]): Compressed RLEs of masks, each has the keys
+            ``size`` and ``counts``.
+        height (int): height of masks
+        width (int): width of masks
+
+    Example:
+        >>> from mmdet.structures.mask import RLEMasks
+        >>> masks = torch.rand(3, 32, 32) > 0.5
+        >>> self = RLEMasks.from_bitmaps(masks)
+        >>> flipped = self.flip('horizontal')
+        >>> assert (flipped.to_ndarray() == masks.numpy()[:, :, ::-1]).all()
+    """
+
+    def __init__(self, masks, height, width):
+        assert isinstance(masks, list)
+        if len(masks) > 0:
+            assert isinstance(masks[0], dict)
+            assert list(masks[0]['size']) == [height, width]
+
+        self.height = height
+        self.width = width
+        self.masks = masks
+
+    @classmethod
+    def from_bitmaps(cls, bitmaps):
+        """Encode bitmaps to RLEs.
+
+        The bitmaps on GPU are encoded by :func:`_tensor_to_rles`, so that
+        only the transitions rather than the whole bitmaps are transferred
+        to CPU.
+
+        Args:
+            bitmaps (Tensor | ndarray): Bitmaps in shape (N, H, W).
+
+        Returns:
+            :obj:`RLEMasks`: The encoded masks.
+        """
+        num_masks, height, width = bitmaps.shape
+        if isinstance(bitmaps, torch.Tensor) and bitmaps.is_cuda:
+            rles = _tensor_to_rles(bitmaps)
+        elif num_masks == 0:
+            rles = []
+        else:
+            if isinstance(bitmaps, torch.Tensor):
+                bitmaps = bitmaps.numpy()
+            rles = maskUtils.encode(
+                np.asfortranarray(bitmaps.transpose(1, 2, 0), dtype=np.uint8))
+        return cls(rles, height, width)
+
+    def __getitem__(self, index):
+        """Index the RLE masks.
+
+        Args:
+            index (int | slice | ndarray | List): The indices.
+
+        Returns:
+            :obj:`RLEMasks`: The indexed RLE masks.
+        """
+        if isinstance(index, np.ndarray):
+            if index.dtype == bool:
+                index = np.where(index)[0].tolist()
+            else:
+                index = index.tolist()
+        if isinstance(index, list):
+            masks = [self.masks[i] for i in index]
+        elif isinstance(index, slice):
+            masks = self.masks[index]
+        else:
+            try:
+                masks = [self.masks[index]]
+            except Exception:
+                raise ValueError(
+                    f'Unsupported input of type {type(index)} for indexing!')
+        return type(self)(masks, self.height, self.width)
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __repr__(self):
+        s = self.__class__.__name__ + '('
+        s += f'num_masks={len(self.masks)}, '
+        s += f'height={self.height}, '
+        s += f'width={self.width})'
+        return s
+
+    def __len__(self):
+        """Number of masks."""
+        return len(self.masks)
+
+    def _transform_runs(self, transform, height, width):
+        """Transform the vertical foreground runs of masks.
+
+        Args:
+            transform (callable): Function that takes the column, the first
+                row and the end row of the runs and returns the transformed
+                ones.
+            height (int): height of transformed masks
+            width (int): width of transformed masks
+
+        Returns:
+            :obj:`RLEMasks`: The transformed masks, where the runs out of
+            the masks are clipped.
+        """
+        mask_inds, cols, top, bottom = _rles_to_runs(self.masks, self.height)
+        cols, top, bottom = transform(cols, top, bottom)
+        rles = _runs_to_rles(
+            len(self), mask_inds, cols, top, bottom, height, width)
+        return type(self)(rles, height, width)
+
+    def _apply_to_bitmaps(self, func, *args, **kwargs):
+        """Apply a transform of :obj:`BitmapMasks` and encode the results."""
+        bitmaps = getattr(self.to_bitmap(), func)(*args, **kwargs)
+        return type(self).from_bitmaps(bitmaps.masks)
+
+    def rescale(self, scale, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.rescale`."""
+        return self._apply_to_bitmaps('rescale', scale, interpolation)
+
+    def resize(self, out_shape, interpolation='nearest'):
+        """See :func:`BaseInstanceMasks.resize`."""
+        return self._apply_to_bitmaps('resize', out_shape, interpolation)
+
+    def flip(self, flip_direction='horizontal'):
+        """See :func:`BaseInstanceMasks.flip`."""
+        assert flip_direction in ('horizontal', 'vertical', 'diagonal')
+
+        def _flip(cols, top, bottom):
+            if flip_direction != 'vertical':
+                cols = self.width - 1 - cols
+            if flip_direction != 'horizontal':
+                top, bottom = self.height - bottom, self.height - top
+            return cols, top, bottom
+
+        return self._transform_runs(_flip, self.height, self.width)
+
+    def pad(self, out_shape, pad_val=0):
+        """See :func:`BaseInstanceMasks.pad`."""
+        if pad_val != 0:
+            return self._apply_to_bitmaps('pad', out_shape, pad_val)
+        return self._transform_runs(lambda *runs: runs, *out_shape)
+
+    def crop(self, bbox):
+        """See :func:`BaseInstanceMasks.crop`."""
+        assert isinstance(bbox, np.ndarray)
+        assert bbox.ndim == 1
+
+        # clip the boundary
+        bbox = bbox.copy()
+        bbox[0::2] = np.clip(bbox[0::2], 0, self.width)
+        bbox[1::2] = np.clip(bbox[1::2], 0, self.height)
+        x1, y1, x2, y2 = bbox.tolist()
+        w = max(x2 - x1, 1)
+        h = max(y2 - y1, 1)
+        return self._transform_runs(
+            lambda cols, top, bottom: (cols - x1, top - y1, bottom - y1), h, w)
+
+    def crop_and_resize(self,
+                        bboxes,
+                        out_shape,
+                        inds,
+                        device='cpu',
+                        interpolation='bilinear',
+                        binarize=True):
+        """See :func:`BaseInstanceMasks.crop_and_resize`.
+
+        Only the assigned masks are decoded, and the results are
+        :obj:`BitmapMasks`.
+        """
+        if isinstance(inds, torch.Tensor):
+            inds = inds.cpu().numpy()
+        mask_inds, inds = np.unique(inds, return_inverse=True)
+        return self[mask_inds].to_bitmap().crop_and_resize(
+            bboxes, out_shape, inds, device, interpolation, binarize)
+
+    def expand(self, expanded_h, expanded_w, top, left):
+        """See :func:`BaseInstanceMasks.expand`."""
+        return self._transform_runs(
+            lambda cols, y1, y2: (cols + left, y1 + top, y2 + top), expanded_h,
+            expanded_w)
+
+    def translate(self,
+                  out_shape,
+                  offset,
+                  direction='horizontal',
+                  border_value=0,
+                  interpolation='bilinear'):
+        """See :func:`BitmapMasks.translate`.
+
+        The masks are translated without decoding if the offset is an
+        integer and the border value is 0.
+        """
+        if offset != int(offset) or border_value != 0:
+            return self._apply_to_bitmaps('translate', out_shape, offset,
+                                          direction, border_value,
+                                          interpolation)
+        offset = int(offset)
+
+        def _translate(cols, top, bottom):
+            # the runs out of ``out_shape`` are emptied before translation
+            bottom = np.where(cols < out_shape[1],
+                              np.minimum(bottom, out_shape[0]), top)
+            if direction == 'horizontal':
+                return cols + offset, top, bottom
+            return cols, top + offset, bottom + offset
+
+        return self._transform_runs(_translate, *out_shape)
+
+    def shear(self,
+              out_shape,
+              magnitude,
+              direction='horizontal',
+              border_value=0,
+              interpolation='bilinear'):
+        """See :func:`BitmapMasks.shear`."""
+        return self._apply_to_bitmaps('shear', out_shape, magnitude, direction,
+                                      border_value, interpolation)
+
+    def rotate(self,
+               out_shape,
+               angle,
+               center=None,
+               scale=1.0,
+               border_value=0,
+               interpolation='bilinear'):
+        """See :func:`BitmapMasks.rotate`."""
+        return self._apply_to_bitmaps('rotate', out_shape, angle, center,
+                                      scale, border_value, interpolation)
+
+    @property
+    def areas(self):
+        """See :py:attr:`BaseInstanceMasks.areas`."""
+        if len(self.masks) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return maskUtils.area(self.masks).astype(np.int64)
+
+    def overlaps(self, other):
+        """Compute the IoUs between two sets of masks on RLEs.
+
+        Args:
+            other (:obj:`RLEMasks`): Masks of the same size.
+
+        Returns:
+            ndarray: IoUs in shape (N, M).
+        """
+        assert (self.height, self.width) == (other.height, other.width)
+        if len(self) == 0 or len(other) == 0:
+            return np.zeros((len(self), len(other)), dtype=np.float64)
+        return maskUtils.iou(self.masks, other.masks, [0] * len(other))
+
+    def to_bitmap(self):
+        """Convert masks to :obj:`BitmapMasks` of uint8."""
+        return BitmapMasks(self.to_ndarray(), self.height, self.width)
+
+    def to_ndarray(self):
+        """See :func:`BaseInstanceMasks.to_ndarray`."""
+        return _decode_rles(self.masks, self.height, self.width)
+
+    def to_tensor(self, dtype, device):
+        """See :func:`BaseInstanceMasks.to_tensor`."""
+        return torch.tensor(self.to_ndarray(), dtype=dtype, device=device)
+
+    @classmethod
+    def random(cls,
+               num_masks=3,
+               height=32,
+               width=32,
+               dtype=np.uint8,
+               rng=None):
+        """Generate random RLE masks for demo / testing purposes.
+
+        Example:
+            >>> from mmdet.structures.mask import RLEMasks
+            >>> self = RLEMasks.random()
+            >>> print('self = {}'.format(self))
+            self = RLEMasks(num_masks=3, height=32, width=32)
+        """
+        return cls.from_bitmaps(
+            BitmapMasks.random(num_masks, height, width, dtype, rng).masks)
+
+    @classmethod
+    def cat(cls: Type[T], masks: Sequence[T]) -> T:
+        """Concatenate a sequence of masks into one single mask instance.
+
+        Args:
+            masks (Sequence[RLEMasks]): A sequence of mask instances.
+
+        Returns:
+            RLEMasks: Concatenated mask instance.
+        """
+        assert isinstance(masks, Sequence)
+        if len(masks) == 0:
+            raise ValueError('masks should not be an empty list.')
+        assert all(isinstance(m, cls) for m in masks)
+
+        mask_list = list(itertools.chain(*[m.masks for m in masks]))
+        return cls(mask_list, masks[0].height, masks[0].width)
+
+
 def polygon_to_bitmap(polygons, height, width):
     """Convert masks from the form of polygons to bitmaps.
 
@@ -1163,6 +1517,255 @@ def polygon_to_bitmap(polygons, height, width):
     return bitmap_mask
 
 
+def polygons_to_bitmaps(polygons, height, width):
+    """Convert multiple masks from the form of polygons to bitmaps.
+
+    It is equivalent to calling :func:`polygon_to_bitmap` on each mask, but
+    the polygons of all masks are converted to RLEs and decoded in a batch.
+
+    Args:
+        polygons (list[list[ndarray]]): masks in polygon representation
+        height (int): mask height
+        width (int): mask width
+
+    Return:
+        ndarray: the converted masks in bitmap representation of uint8 with
+        shape (N, H, W), which is a view of a Fortran-ordered array
+    """
+    if len(polygons) == 0:
+        return np.empty((0, height, width), dtype=np.uint8)
+    rles = [None] * len(polygons)
+    parts, part_ranges = [], []
+    for i, poly_per_obj in enumerate(polygons):
+        # `frPyObjects` takes a list whose first item has 4 elements as
+        # boxes, so only the masks with valid polygons are batched
+        if len(poly_per_obj) > 0 and all(len(p) >= 6 for p in poly_per_obj):
+            part_ranges.append((i, len(parts), len(parts) + len(poly_per_obj)))
+            parts.extend(poly_per_obj)
+        else:
+            rles[i] = maskUtils.merge(
+                maskUtils.frPyObjects(poly_per_obj, height, width))
+    if len(parts) > 0:
+        part_rles = maskUtils.frPyObjects(parts, height, width)
+        for i, start, end in part_ranges:
+            if end - start == 1:
+                rles[i] = part_rles[start]
+            else:
+                rles[i] = maskUtils.merge(part_rles[start:end])
+    return _decode_rles(rles, height, width)
+
+
+def _segment_cumsum(values, is_start):
+    """Cumulative sum of values in each segment, where the first value of a
+    segment is marked by ``is_start``."""
+    cumsum = np.cumsum(values)
+    starts = np.flatnonzero(is_start)
+    base = (cumsum - values)[starts]
+    return cumsum - np.repeat(base, np.diff(np.append(starts, len(values))))
+
+
+def _decode_rle_counts(rles):
+    """Decode the run lengths of compressed RLEs in a batch, which is the
+    same as ``rleFrString`` in pycocotools.
+
+    Args:
+        rles (list[dict]): Compressed RLEs.
+
+    Return:
+        tuple[ndarray, ndarray]: The run lengths of all RLEs and the number
+        of runs of each RLE.
+    """
+    strings = [rle['counts'] for rle in rles]
+    strings = [s.encode() if isinstance(s, str) else s for s in strings]
+    chars = np.frombuffer(
+        b''.join(strings), dtype=np.uint8).astype(np.int64) - 48
+    # a run length is encoded by 5-bit chunks from the lowest bits, and the
+    # last chunk has no continuation bit 0x20 but a sign bit 0x10
+    ends = np.flatnonzero((chars & 0x20) == 0)
+    if len(ends) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(len(rles), dtype=np.int64)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    shifts = 5 * (np.arange(len(chars)) - np.repeat(starts, lengths))
+    counts = np.add.reduceat((chars & 0x1f) << shifts, starts)
+    negative = (chars[ends] & 0x10) != 0
+    counts[negative] -= np.left_shift(1, 5 * lengths[negative])
+
+    num_runs = np.searchsorted(
+        ends, np.cumsum([len(s) for s in strings]) - 1, side='right')
+    num_runs = np.diff(num_runs, prepend=0)
+    pos = np.arange(len(counts)) - np.repeat(
+        np.cumsum(num_runs) - num_runs, num_runs)
+    # the run lengths after the third one are stored as the differences to
+    # the run lengths two positions before
+    odd = pos % 2 == 1
+    counts[odd] = _segment_cumsum(counts[odd], pos[odd] == 1)
+    even = ~odd
+    counts[even] = _segment_cumsum(counts[even], pos[even] <= 2)
+    return counts, num_runs
+
+
+def _decode_rles(rles, height, width):
+    """Decode compressed RLEs of the same size to bitmaps.
+
+    It gives the same result as ``pycocotools.mask.decode``, but only the
+    foreground pixels are written, which is much faster for the sparse
+    masks of instances.
+
+    Args:
+        rles (list[dict]): Compressed RLEs.
+        height (int): mask height
+        width (int): mask width
+
+    Return:
+        ndarray: uint8 bitmaps with shape (N, H, W), which is a view of an
+        array in shape (N, W, H) since RLEs are in column-major order.
+    """
+    bitmaps = np.zeros((len(rles), width, height), dtype=np.uint8)
+    counts, num_runs = _decode_rle_counts(rles)
+    pos = np.arange(len(counts)) - np.repeat(
+        np.cumsum(num_runs) - num_runs, num_runs)
+    run_ends = _segment_cumsum(counts, pos == 0) + np.repeat(
+        np.arange(len(rles)) * (height * width), num_runs)
+    # runs at odd positions are foreground
+    fg = (pos % 2 == 1) & (counts > 0)
+    flat_bitmaps = bitmaps.reshape(-1)
+    for start, end in zip((run_ends - counts)[fg].tolist(),
+                          run_ends[fg].tolist()):
+        flat_bitmaps[start:end] = 1
+    return bitmaps.transpose(0, 2, 1)
+
+
+def _tensor_to_rles(bitmaps):
+    """Encode bitmaps to compressed RLEs, where the transitions of bitmaps
+    are found on the device of bitmaps.
+
+    Args:
+        bitmaps (Tensor): Bitmaps in shape (N, H, W).
+
+    Return:
+        list[dict]: Compressed RLEs, which are the same as the ones encoded
+        by ``pycocotools.mask.encode``.
+    """
+    num_masks, height, width = bitmaps.shape
+    num_pixels = height * width
+    if num_masks == 0 or num_pixels == 0:
+        return _intervals_to_rles(num_masks, *np.zeros((3, 0), np.int64),
+                                  height, width)
+    # RLEs are in column-major order
+    flat = bitmaps.transpose(1, 2).reshape(num_masks, -1).bool()
+    changes = torch.nonzero(flat[:, 1:] != flat[:, :-1]).cpu().numpy()
+    first_fg = np.flatnonzero(flat[:, 0].cpu().numpy())
+    last_fg = np.flatnonzero(flat[:, -1].cpu().numpy())
+    # the boundaries of each mask alternate between the starts and the ends
+    # of foreground intervals after sorting
+    mask_inds = np.concatenate([changes[:, 0], first_fg, last_fg])
+    boundaries = np.concatenate([
+        changes[:, 1] + 1,
+        np.zeros_like(first_fg),
+        np.full_like(last_fg, num_pixels)
+    ])
+    order = np.lexsort((boundaries, mask_inds))
+    mask_inds, boundaries = mask_inds[order], boundaries[order]
+    return _intervals_to_rles(num_masks, mask_inds[0::2], boundaries[0::2],
+                              boundaries[1::2], height, width)
+
+
+def _rles_to_runs(rles, height):
+    """Split the foreground of compressed RLEs into vertical runs, i.e. the
+    foreground pixels in ``[top, bottom)`` of a column.
+
+    Args:
+        rles (list[dict]): Compressed RLEs.
+        height (int): mask height
+
+    Return:
+        tuple[ndarray]: The mask index, the column, the first row and the
+        end row of the runs, which are sorted by masks and columns.
+    """
+    counts, num_runs = _decode_rle_counts(rles)
+    pos = np.arange(len(counts)) - np.repeat(
+        np.cumsum(num_runs) - num_runs, num_runs)
+    ends = _segment_cumsum(counts, pos == 0)
+    # runs at odd positions are foreground
+    fg = (pos % 2 == 1) & (counts > 0)
+    mask_inds = np.repeat(np.arange(len(rles)), num_runs)[fg]
+    starts, ends = (ends - counts)[fg], ends[fg]
+    if len(starts) == 0:
+        return mask_inds, starts, starts, starts
+    # an interval of the column-major order covers several columns
+    first_cols = starts // height
+    num_cols = (ends - 1) // height - first_cols + 1
+    cum_cols = np.cumsum(num_cols)
+    cols = np.arange(cum_cols[-1]) - np.repeat(cum_cols - num_cols, num_cols)
+    cols += np.repeat(first_cols, num_cols)
+    top = np.maximum(np.repeat(starts, num_cols) - cols * height, 0)
+    bottom = np.minimum(np.repeat(ends, num_cols) - cols * height, height)
+    return np.repeat(mask_inds, num_cols), cols, top, bottom
+
+
+def _runs_to_rles(num_masks, mask_inds, cols, top, bottom, height, width):
+    """Encode vertical foreground runs to compressed RLEs, which is the
+    inverse of :func:`_rles_to_runs`. The runs out of the masks are
+    clipped and the runs can be in any order."""
+    top = np.maximum(top, 0)
+    bottom = np.minimum(bottom, height)
+    valid = (cols >= 0) & (cols < width) & (bottom > top)
+    mask_inds, cols, top, bottom = (mask_inds[valid], cols[valid], top[valid],
+                                    bottom[valid])
+    order = np.lexsort((top, cols, mask_inds))
+    starts = (cols * height + top)[order]
+    ends = (cols * height + bottom)[order]
+    return _intervals_to_rles(num_masks, mask_inds[order], starts, ends,
+                              height, width)
+
+
+def _intervals_to_rles(num_masks, mask_inds, starts, ends, height, width):
+    """Encode sorted and disjoint foreground intervals in the column-major
+    order to compressed RLEs.
+
+    Args:
+        num_masks (int): Number of masks.
+        mask_inds (ndarray): The mask index of the intervals.
+        starts (ndarray): The starts of the intervals.
+        ends (ndarray): The ends of the intervals.
+        height (int): mask height
+        width (int): mask width
+
+    Return:
+        list[dict]: Compressed RLEs, which are the same as the ones encoded
+        by ``pycocotools.mask.encode``.
+    """
+    if num_masks == 0:
+        return []
+    # merge the adjacent intervals so that no run is empty
+    merged = np.zeros(len(starts), dtype=bool)
+    merged[1:] = (starts[1:] == ends[:-1]) & (mask_inds[1:] == mask_inds[:-1])
+    last = np.ones(len(starts), dtype=bool)
+    last[:-1] = ~merged[1:]
+    mask_inds, starts, ends = mask_inds[~merged], starts[~merged], ends[last]
+    prev_ends = np.zeros_like(ends)
+    prev_ends[1:] = ends[:-1]
+    prev_ends[1:][mask_inds[1:] != mask_inds[:-1]] = 0
+    # interleave the background and foreground runs
+    runs = np.stack([starts - prev_ends, ends - starts], axis=1).reshape(-1)
+    num_intervals = np.bincount(mask_inds, minlength=num_masks)
+    run_offsets = np.append(0, np.cumsum(num_intervals * 2)).tolist()
+    ends = ends.tolist()
+    num_pixels = height * width
+    uncompressed_rles = []
+    for i in range(num_masks):
+        counts = runs[run_offsets[i]:run_offsets[i + 1]]
+        tail = ends[run_offsets[i + 1] // 2 - 1] if len(counts) else 0
+        # the last background run is omitted if it is empty
+        if tail < num_pixels or len(counts) == 0:
+            counts = np.append(counts, num_pixels - tail)
+        uncompressed_rles.append(dict(counts=counts, size=[height, width]))
+    return maskUtils.frPyObjects(uncompressed_rles, height, width)
+
+
 def bitmap_to_polygon(bitmap):
     """Convert masks from the form of bitmaps to polygons.
 
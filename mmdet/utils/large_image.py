@@ -1,11 +1,22 @@
 # Copyright (c) OpenMMLab. All rights reserved.
-from typing import Sequence, Tuple
+from typing import Optional, Sequence, Tuple, Union
 
+import mmcv
+import numpy as np
 import torch
+import torch.nn as nn
 from mmcv.ops import batched_nms
 from mmengine.structures import InstanceData
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
 
+from mmdet.apis import inference_detector
+from mmdet.models.utils import batched_weighted_boxes_fusion
 from mmdet.structures import DetDataSample, SampleList
+from mmdet.structures.mask import BaseInstanceMasks, RLEMasks
+
+# maximum number of instances merged by one call of nms
+_MERGE_CHUNK_SIZE = 1024
 
 
 def shift_rbboxes(bboxes: torch.Tensor, offset: Sequence[int]):
@@ -24,9 +35,36 @@ def shift_rbboxes(bboxes: torch.Tensor, offset: Sequence[int]):
     return shifted_bboxes
 
 
+def shift_masks(masks: Union[torch.Tensor, np.ndarray,
+                             BaseInstanceMasks], offset: Sequence[int],
+                src_image_shape: Tuple[int, int]) -> RLEMasks:
+    """Shift masks of a patch to the original image.
+
+    The masks are shifted as RLEs, so that the masks of the large image are
+    never decoded.
+
+    Args:
+        masks (Tensor | np.ndarray | :obj:`BaseInstanceMasks`): Masks of a
+            patch, the bitmaps are in shape (n, h, w).
+        offset (Sequence[int]): The (x, y) position of the left top point of
+            the patch.
+        src_image_shape (Tuple[int, int]): A (height, width) tuple of the large
+            image's width and height.
+    Returns:
+        :obj:`RLEMasks`: Shifted masks.
+    """
+    if isinstance(masks,
+                  BaseInstanceMasks) and not isinstance(masks, RLEMasks):
+        masks = masks.to_ndarray()
+    if not isinstance(masks, RLEMasks):
+        masks = RLEMasks.from_bitmaps(masks)
+    return masks.expand(src_image_shape[0], src_image_shape[1], offset[1],
+                        offset[0])
+
+
 def shift_predictions(det_data_samples: SampleList,
                       offsets: Sequence[Tuple[int, int]],
-                      src_image_shape: Tuple[int, int]) -> SampleList:
+                      src_image_shape: Tuple[int, int]) -> InstanceData:
     """Shift predictions to the original image.
 
     Args:
@@ -36,14 +74,9 @@ def shift_predictions(det_data_samples: SampleList,
         src_image_shape (Tuple[int, int]): A (height, width) tuple of the large
             image's width and height.
     Returns:
-        (List[:obj:`DetDataSample`]): shifted results.
+        :obj:`InstanceData`: shifted results. The masks, if any, are
+        :obj:`RLEMasks`.
     """
-    try:
-        from sahi.slicing import shift_bboxes, shift_masks
-    except ImportError:
-        raise ImportError('Please run "pip install -U sahi" '
-                          'to install sahi first for large image inference.')
-
     assert len(det_data_samples) == len(
         offsets), 'The `results` should has the ' 'same length with `offsets`.'
     shifted_predictions = []
@@ -53,7 +86,8 @@ def shift_predictions(det_data_samples: SampleList,
         # Check bbox type
         if pred_inst.bboxes.size(-1) == 4:
             # Horizontal bboxes
-            shifted_bboxes = shift_bboxes(pred_inst.bboxes, offset)
+            shifted_bboxes = pred_inst.bboxes + pred_inst.bboxes.new_tensor(
+                [offset[0], offset[1], offset[0], offset[1]])
         elif pred_inst.bboxes.size(-1) == 5:
             # Rotated bboxes
             shifted_bboxes = shift_rbboxes(pred_inst.bboxes, offset)
@@ -62,11 +96,11 @@ def shift_predictions(det_data_samples: SampleList,
 
         # shift bboxes and masks
         pred_inst.bboxes = shifted_bboxes
-        if 'masks' in det_data_sample:
+        if 'masks' in pred_inst:
             pred_inst.masks = shift_masks(pred_inst.masks, offset,
                                           src_image_shape)
 
-        shifted_predictions.append(pred_inst.clone())
+        shifted_predictions.append(pred_inst)
 
     shifted_predictions = InstanceData.cat(shifted_predictions)
 
@@ -79,6 +113,11 @@ def merge_results_by_nms(results: SampleList, offsets: Sequence[Tuple[int,
                          nms_cfg: dict) -> DetDataSample:
     """Merge patch results by nms.
 
+    If the shapes of the patches are known from the ``ori_shape`` of the
+    results, each instance is only merged with the instances of the
+    neighbor patches as :func:`merge_tile_results` does. Otherwise, all
+    instances are merged by nms at once.
+
     Args:
         results (List[:obj:`DetDataSample`]): A list of patch results.
         offsets (Sequence[Tuple[int, int]]): Positions of the left top points
@@ -90,6 +129,17 @@ def merge_results_by_nms(results: SampleList, offsets: Sequence[Tuple[int,
     Returns:
         :obj:`DetDataSample`: merged results.
     """
+    merged_result = results[0].clone()
+    if all('ori_shape' in result for result in results):
+        tiles = np.array(
+            [(x, y, x + result.ori_shape[1], y + result.ori_shape[0])
+             for (x, y), result in zip(offsets, results)],
+            dtype=np.int64).reshape(-1, 4)
+        if len(np.unique(tiles, axis=0)) == len(tiles):
+            merged_result.pred_instances = _merge_tiles(
+                results, tiles, src_image_shape, nms_cfg)
+            return merged_result
+
     shifted_instances = shift_predictions(results, offsets, src_image_shape)
 
     _, keeps = batched_nms(
@@ -97,8 +147,398 @@ def merge_results_by_nms(results: SampleList, offsets: Sequence[Tuple[int,
         scores=shifted_instances.scores,
         idxs=shifted_instances.labels,
         nms_cfg=nms_cfg)
-    merged_instances = shifted_instances[keeps]
+    merged_result.pred_instances = shifted_instances[keeps]
+    return merged_result
 
-    merged_result = results[0].clone()
-    merged_result.pred_instances = merged_instances
+
+def _get_tile_intervals(length: int, tile_size: int,
+                        overlap_ratio: float) -> np.ndarray:
+    """Get the intervals of the tiles along an axis.
+
+    The tiles are placed every ``tile_size - int(tile_size * overlap_ratio)``
+    pixels, and the last tile is aligned with the end, which is the same as
+    ``sahi.slicing.get_slice_bboxes``.
+    """
+    if length <= tile_size:
+        return np.array([[0, length]], dtype=np.int64)
+    step = max(tile_size - int(tile_size * overlap_ratio), 1)
+    starts = np.append(
+        np.arange(0, length - tile_size, step), length - tile_size)
+    return np.stack([starts, starts + tile_size], axis=1)
+
+
+def get_tile_grid(
+        image_shape: Tuple[int, int],
+        tile_size: int,
+        overlap_ratio: float = 0.25) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the grid of overlapping tiles of a large image.
+
+    Args:
+        image_shape (Tuple[int, int]): A (height, width) tuple of the large
+            image.
+        tile_size (int): Size of the square tiles.
+        overlap_ratio (float): Ratio of overlap between two adjacent tiles.
+            Defaults to 0.25.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (x1, x2) intervals of the columns
+        and the (y1, y2) intervals of the rows. The tile at row ``i`` and
+        column ``j`` is the ``i * len(x_intervals) + j``-th tile of
+        :func:`get_tiles`.
+    """
+    height, width = image_shape
+    return (_get_tile_intervals(width, tile_size, overlap_ratio),
+            _get_tile_intervals(height, tile_size, overlap_ratio))
+
+
+def get_tiles(image_shape: Tuple[int, int],
+              tile_size: int,
+              overlap_ratio: float = 0.25) -> np.ndarray:
+    """Get the overlapping tiles of a large image.
+
+    Args:
+        image_shape (Tuple[int, int]): A (height, width) tuple of the large
+            image.
+        tile_size (int): Size of the square tiles.
+        overlap_ratio (float): Ratio of overlap between two adjacent tiles.
+            Defaults to 0.25.
+
+    Returns:
+        np.ndarray: The tiles in (x1, y1, x2, y2) format with shape (n, 4),
+        in row-major order.
+    """
+    x_intervals, y_intervals = get_tile_grid(image_shape, tile_size,
+                                             overlap_ratio)
+    xs = np.tile(x_intervals, (len(y_intervals), 1))
+    ys = np.repeat(y_intervals, len(x_intervals), axis=0)
+    return np.stack([xs[:, 0], ys[:, 0], xs[:, 1], ys[:, 1]], axis=1)
+
+
+def _get_axis_neighbors(intervals: np.ndarray) -> np.ndarray:
+    """Get the indices of the intervals overlapping each interval, which
+    are padded with -1."""
+    overlap = (intervals[:, None, 0] < intervals[None, :, 1]) & (
+        intervals[None, :, 0] < intervals[:, None, 1])
+    num_neighbors = int(overlap.sum(axis=1).max())
+    order = np.argsort(~overlap, axis=1, kind='stable')[:, :num_neighbors]
+    return np.where(np.take_along_axis(overlap, order, axis=1), order, -1)
+
+
+def _get_tile_neighbors(tiles: np.ndarray) -> np.ndarray:
+    """Get the indices of the tiles overlapping each tile.
+
+    The tiles are arranged in the grid of their unique x and y intervals,
+    so that the neighbors are found by the overlaps of the intervals along
+    the two axes rather than by comparing all pairs of tiles.
+
+    Args:
+        tiles (np.ndarray): Distinct tiles in (x1, y1, x2, y2) format with
+            shape (n, 4).
+
+    Returns:
+        np.ndarray: Indices of the neighbors of each tile with shape (n, k),
+        which are padded with -1.
+    """
+    x_intervals, cols = np.unique(tiles[:, 0::2], axis=0, return_inverse=True)
+    y_intervals, rows = np.unique(tiles[:, 1::2], axis=0, return_inverse=True)
+    cols, rows = cols.reshape(-1), rows.reshape(-1)
+    num_cols, num_tiles = len(x_intervals), len(tiles)
+    grid = np.full(len(y_intervals) * num_cols, -1, dtype=np.int64)
+    grid[rows * num_cols + cols] = np.arange(num_tiles)
+    assert (grid >= 0).sum() == num_tiles, 'The tiles should be distinct.'
+
+    row_neighbors = _get_axis_neighbors(y_intervals)[rows][:, :, None]
+    col_neighbors = _get_axis_neighbors(x_intervals)[cols][:, None, :]
+    valid = (row_neighbors >= 0) & (col_neighbors >= 0)
+    neighbors = np.where(
+        valid, grid[(row_neighbors * num_cols + col_neighbors).clip(min=0)],
+        -1).reshape(num_tiles, -1)
+    neighbors[neighbors == np.arange(num_tiles)[:, None]] = -1
+    return neighbors
+
+
+def _connected_tiles(tile_inds: np.ndarray, neighbor_inds: np.ndarray,
+                     num_tiles: int) -> np.ndarray:
+    """Label the tiles by the groups connected by the pairs of
+    ``tile_inds`` and ``neighbor_inds``."""
+    graph = coo_matrix(
+        (np.ones(len(tile_inds), dtype=bool), (tile_inds, neighbor_inds)),
+        shape=(num_tiles, num_tiles))
+    _, labels = connected_components(graph, directed=False)
+    return labels
+
+
+def _merge_tiles(results: SampleList, tiles: np.ndarray,
+                 image_shape: Tuple[int,
+                                    int], merge_cfg: dict) -> InstanceData:
+    """Merge the results of overlapping tiles.
+
+    See :func:`merge_tile_results` for details.
+
+    Args:
+        results (List[:obj:`DetDataSample`]): Results of the tiles.
+        tiles (np.ndarray): Distinct tiles of the results in
+            (x1, y1, x2, y2) format with shape (n, 4).
+        image_shape (Tuple[int, int]): A (height, width) tuple of the large
+            image.
+        merge_cfg (dict): Config of the merge strategy.
+
+    Returns:
+        :obj:`InstanceData`: Merged instances sorted by scores.
+    """
+    merge_cfg = merge_cfg.copy()
+    merge_type = merge_cfg.get('type', 'nms')
+    tile_instances = [result.pred_instances for result in results]
+    num_instances = [len(instances) for instances in tile_instances]
+    with_masks = len(tile_instances) > 0 and 'masks' in tile_instances[0]
+    # the masks are shifted after merging, only for the kept instances
+    instances = InstanceData.cat([
+        InstanceData(**{k: v
+                        for k, v in instances.items() if k != 'masks'})
+        for instances in tile_instances
+    ]) if len(tile_instances) > 0 else InstanceData()
+    if sum(num_instances) == 0:
+        instances.bboxes = torch.zeros((0, 4))
+        instances.scores = torch.zeros((0, ))
+        instances.labels = torch.zeros((0, ), dtype=torch.long)
+        if with_masks:
+            instances.masks = RLEMasks([], *image_shape)
+        return instances
+
+    bboxes = instances.bboxes
+    device = bboxes.device
+    inst_tile_inds = torch.from_numpy(
+        np.repeat(np.arange(len(tiles)), num_instances)).to(device)
+    tiles_tensor = bboxes.new_tensor(tiles)
+    offsets = tiles_tensor[inst_tile_inds, :2]
+    if bboxes.size(-1) == 4:
+        bboxes = bboxes + offsets.repeat(1, 2)
+        hbboxes = bboxes
+    elif bboxes.size(-1) == 5:
+        bboxes = torch.cat([bboxes[:, :2] + offsets, bboxes[:, 2:]], dim=1)
+        # the enclosing horizontal boxes of the rotated boxes
+        half = (bboxes[:, 2:4].abs() + bboxes[:, 3:1:-1].abs()) / 2
+        hbboxes = torch.cat([bboxes[:, :2] - half, bboxes[:, :2] + half],
+                            dim=1)
+    else:
+        raise NotImplementedError
+    instances.bboxes = bboxes
+    scores, labels = instances.scores, instances.labels
+
+    # an instance can only be a duplicate of the instances of the tiles it
+    # overlaps, so the tiles connected by the instances overlapping them are
+    # merged together, e.g. the 4 tiles of a corner overlap
+    neighbors = torch.from_numpy(_get_tile_neighbors(tiles)).to(device)
+    neighbors = neighbors[inst_tile_inds]
+    neighbor_tiles = tiles_tensor[neighbors.clamp(min=0)]
+    inter_wh = (
+        torch.min(hbboxes[:, None, 2:], neighbor_tiles[..., 2:]) -
+        torch.max(hbboxes[:, None, :2], neighbor_tiles[..., :2])).clamp(min=0)
+    overlaps = (inter_wh.prod(dim=-1) > 0) & (neighbors >= 0)
+    inst_inds, neighbor_inds = overlaps.nonzero(as_tuple=True)
+    tile_groups = torch.from_numpy(
+        _connected_tiles(inst_tile_inds[inst_inds].cpu().numpy(),
+                         neighbors[inst_inds, neighbor_inds].cpu().numpy(),
+                         len(tiles))).to(device)
+    groups = tile_groups[inst_tile_inds]
+
+    border = overlaps.any(dim=1)
+    inside_inds = (~border).nonzero().view(-1)
+    border_inds = border.nonzero().view(-1)
+    _, order = groups[border_inds].sort(stable=True)
+    border_inds = border_inds[order]
+    _, group_ids, counts = torch.unique_consecutive(
+        groups[border_inds], return_inverse=True, return_counts=True)
+    counts = counts.tolist()
+
+    if merge_type == 'wbf':
+        if with_masks or bboxes.size(-1) != 4:
+            raise ValueError('Weighted boxes fusion only supports the '
+                             'horizontal bboxes without masks.')
+        merge_cfg.pop('type')
+        iou_thr = merge_cfg.pop('iou_threshold', 0.55)
+        # the groups are fused at once as a batch
+        group_inds = border_inds.split(counts)
+        fused = batched_weighted_boxes_fusion([[bboxes[inds]]
+                                               for inds in group_inds],
+                                              [[scores[inds]]
+                                               for inds in group_inds],
+                                              [[labels[inds]]
+                                               for inds in group_inds],
+                                              iou_thr=iou_thr,
+                                              **merge_cfg)
+        fused = [(bboxes[inside_inds], scores[inside_inds],
+                  labels[inside_inds].int())] + fused
+        bboxes, scores, labels = (torch.cat(items) for items in zip(*fused))
+        order = scores.argsort(descending=True)
+        merged = InstanceData()
+        merged.bboxes = bboxes[order]
+        merged.scores = scores[order]
+        merged.labels = labels[order].long()
+        return merged
+
+    keep_inds = [inside_inds]
+    if len(border_inds) > 0:
+        # the adjacent groups are merged by one call of nms, in which the
+        # groups are separated like the classes in :func:`batched_nms`
+        group_starts = np.cumsum([0] + counts[:-1])
+        chunk_sizes = np.bincount(
+            group_starts // _MERGE_CHUNK_SIZE, weights=counts).astype(int)
+        idxs = group_ids * (int(labels.max()) + 1) + labels[border_inds]
+        for inds, chunk_idxs in zip(
+                border_inds.split(chunk_sizes.tolist()),
+                idxs.split(chunk_sizes.tolist())):
+            if len(inds) == 0:
+                continue
+            _, keeps = batched_nms(bboxes[inds], scores[inds], chunk_idxs,
+                                   merge_cfg)
+            keep_inds.append(inds[keeps])
+    keep_inds = torch.cat(keep_inds)
+    keep_inds = keep_inds[scores[keep_inds].argsort(descending=True)]
+    merged = instances[keep_inds]
+
+    if with_masks:
+        # shift the masks of the kept instances tile by tile
+        sorted_inds, order = keep_inds.sort()
+        kept_tile_inds = inst_tile_inds[sorted_inds]
+        starts = np.cumsum([0] + num_instances)
+        masks = []
+        tile_ids, counts = kept_tile_inds.unique_consecutive(
+            return_counts=True)
+        for tile_idx, inds in zip(tile_ids.tolist(),
+                                  sorted_inds.split(counts.tolist())):
+            tile_masks = tile_instances[tile_idx].masks
+            local_inds = inds - int(starts[tile_idx])
+            if not isinstance(tile_masks, torch.Tensor):
+                local_inds = local_inds.cpu().numpy()
+            masks.append(
+                shift_masks(tile_masks[local_inds], tiles[tile_idx, :2],
+                            image_shape))
+        masks = RLEMasks.cat(masks) if len(masks) > 0 else RLEMasks(
+            [], *image_shape)
+        merged.masks = masks[order.argsort().cpu().numpy()]
+    return merged
+
+
+def merge_tile_results(
+        results: SampleList,
+        image_shape: Tuple[int, int],
+        tile_size: int,
+        overlap_ratio: float = 0.25,
+        merge_cfg: dict = dict(type='nms', iou_threshold=0.25),
+        tile_inds: Optional[Sequence[int]] = None) -> DetDataSample:
+    """Merge the results of the tiles of :func:`get_tiles`.
+
+    Different from applying nms to all instances at once, an instance is
+    only merged with the instances of its neighbor tiles. The instances
+    that overlap no other tile are kept as they are. The tiles are grouped
+    by the instances overlapping the neighbor tiles, i.e. two tiles are in
+    the same group if an instance of one tile overlaps the other, and the
+    instances of each group are merged separately. As a duplicate always
+    overlaps the tile of the instance it duplicates, the duplicates are
+    merged together, while the tiles far apart are merged independently.
+
+    The instances are merged by nms (``type`` is ``'nms'`` or
+    ``'soft_nms'``) or weighted boxes fusion (``type`` is ``'wbf'``). The
+    other items of ``merge_cfg`` are passed to :func:`batched_nms` or
+    :func:`batched_weighted_boxes_fusion`. Weighted boxes fusion does not
+    support masks and rotated boxes.
+
+    The masks of the tiles are shifted to the large image as RLEs after
+    merging, only for the kept instances, so the masks of the large image
+    are never decoded.
+
+    Args:
+        results (List[:obj:`DetDataSample`]): Results of the tiles.
+        image_shape (Tuple[int, int]): A (height, width) tuple of the large
+            image.
+        tile_size (int): Size of the square tiles.
+        overlap_ratio (float): Ratio of overlap between two adjacent tiles.
+            Defaults to 0.25.
+        merge_cfg (dict): Config of the merge strategy. Defaults to
+            ``dict(type='nms', iou_threshold=0.25)``.
+        tile_inds (Sequence[int], optional): Indices of the tiles of the
+            results if the results of some tiles are skipped. Defaults to
+            None, which means the results of all tiles are given.
+
+    Returns:
+        :obj:`DetDataSample`: Merged results. The masks, if any, are
+        :obj:`RLEMasks`.
+    """
+    tiles = get_tiles(image_shape, tile_size, overlap_ratio)
+    if tile_inds is not None:
+        tiles = tiles[np.asarray(tile_inds, dtype=np.int64)]
+    assert len(results) == len(tiles)
+
+    merged_result = DetDataSample(
+        metainfo=dict(
+            ori_shape=tuple(image_shape), img_shape=tuple(image_shape)))
+    merged_result.pred_instances = _merge_tiles(results, tiles, image_shape,
+                                                merge_cfg)
     return merged_result
+
+
+def _is_empty_tile(tile: np.ndarray, std_thr: float) -> bool:
+    """Whether a tile is nearly uniform, estimated on a subsampled tile."""
+    step = max(min(tile.shape[:2]) // 64, 1)
+    return float(tile[::step, ::step].std()) <= std_thr
+
+
+def inference_large_image(
+        model: nn.Module,
+        img: Union[str, np.ndarray],
+        tile_size: int = 640,
+        overlap_ratio: float = 0.25,
+        batch_size: int = 8,
+        num_workers: int = 0,
+        merge_cfg: dict = dict(type='nms', iou_threshold=0.25),
+        empty_std_thr: Optional[float] = None) -> DetDataSample:
+    """Inference a large image by overlapping tiles.
+
+    The tiles are views of the image rather than copies, and they are
+    forwarded in batches. If the image is a memory-mapped array, e.g.
+    loaded by ``np.load(..., mmap_mode='r')``, only the pixels of the tiles
+    in the current batch are read. The results of the tiles are merged by
+    :func:`merge_tile_results`.
+
+    Args:
+        model (nn.Module): The loaded detector.
+        img (str or ndarray): Either an image file or a loaded image.
+        tile_size (int): Size of the square tiles. Defaults to 640.
+        overlap_ratio (float): Ratio of overlap between two adjacent tiles.
+            Defaults to 0.25.
+        batch_size (int): Number of tiles forwarded at once. Defaults to 8.
+        num_workers (int): Number of threads running the test pipeline.
+            Defaults to 0.
+        merge_cfg (dict): Config of the merge strategy, see
+            :func:`merge_tile_results`. Defaults to
+            ``dict(type='nms', iou_threshold=0.25)``.
+        empty_std_thr (float, optional): The tiles whose standard deviation
+            of pixel values, estimated on subsampled pixels, is not larger
+            than it are regarded as empty and skipped, e.g. the no-data
+            areas of aerial images. Defaults to None, which means no tile is
+            skipped.
+
+    Returns:
+        :obj:`DetDataSample`: The detection results of the large image.
+    """
+    if isinstance(img, str):
+        img = mmcv.imread(img)
+    image_shape = img.shape[:2]
+    tiles = get_tiles(image_shape, tile_size, overlap_ratio)
+
+    tile_imgs, tile_inds = [], []
+    for i, (x1, y1, x2, y2) in enumerate(tiles.tolist()):
+        tile_img = img[y1:y2, x1:x2]
+        if empty_std_thr is not None and _is_empty_tile(
+                tile_img, empty_std_thr):
+            continue
+        tile_imgs.append(tile_img)
+        tile_inds.append(i)
+
+    results = []
+    if len(tile_imgs) > 0:
+        results = inference_detector(
+            model, tile_imgs, batch_size=batch_size, num_workers=num_workers)
+    return merge_tile_results(results, image_shape, tile_size, overlap_ratio,
+                              merge_cfg, tile_inds)
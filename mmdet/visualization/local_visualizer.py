@@ -17,7 +17,7 @@ from mmengine.visualization import Visualizer
 from ..evaluation import INSTANCE_OFFSET
 from ..registry import VISUALIZERS
 from ..structures import DetDataSample
-from ..structures.mask import BitmapMasks, PolygonMasks, bitmap_to_polygon
+from ..structures.mask import BaseInstanceMasks, bitmap_to_polygon
 from .palette import _get_adaptive_scales, get_palette, jitter_color
 
 
@@ -173,7 +173,7 @@ class DetLocalVisualizer(Visualizer):
             masks = instances.masks
             if isinstance(masks, torch.Tensor):
                 masks = masks.numpy()
-            elif isinstance(masks, (PolygonMasks, BitmapMasks)):
+            elif isinstance(masks, BaseInstanceMasks):
                 masks = masks.to_ndarray()
 
             masks = masks.astype(bool)
@@ -144,6 +144,156 @@ class TestDetInferencer(TestCase):
                 osp.join(tmp_dir, 'preds', 'color.json'))
             self.assertEqual(res['predictions'][0], dumped_res)
 
+        # filter the instances by scores
+        res = inferencer(img_path)['predictions'][0]
+        if 'scores' in res:
+            scores = np.array(res['scores'])
+            score_thr = float(np.median(scores))
+            res_thr = inferencer(
+                img_path, score_thr=score_thr)['predictions'][0]
+            keep = scores >= score_thr
+            self.assertEqual(res_thr['scores'], scores[keep].tolist())
+            self.assertEqual(res_thr['labels'],
+                             np.array(res['labels'])[keep].tolist())
+
+        # save the predictions in npz shards
+        img_paths = [img_path, 'tests/data/gray.jpg', img_path]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            res = inferencer(
+                img_paths,
+                out_dir=tmp_dir,
+                no_save_pred=False,
+                pred_out_format='npz',
+                pred_shard_size=2)
+            self.assertFalse(
+                osp.exists(osp.join(tmp_dir, 'preds', 'color.json')))
+            shards = [
+                np.load(osp.join(tmp_dir, 'preds', f'shard_{i:05d}.npz'))
+                for i in range(2)
+            ]
+            self.assertEqual(shards[0]['img_names'].tolist(),
+                             ['color', 'gray'])
+            self.assertEqual(shards[1]['img_names'].tolist(), ['color'])
+            preds = res['predictions']
+            shard = shards[0]
+            offsets = shard['offsets']
+            for i, pred in enumerate(preds[:2]):
+                start, end = offsets[i], offsets[i + 1]
+                self.assertEqual(shard['labels'][start:end].tolist(),
+                                 pred.get('labels', []))
+                np.testing.assert_allclose(shard['scores'][start:end],
+                                           pred.get('scores', []))
+                if 'bboxes' in pred:
+                    np.testing.assert_allclose(
+                        shard['bboxes'][start:end],
+                        np.array(pred['bboxes']).reshape(-1, 4),
+                        rtol=1e-6)
+                if 'masks' in pred:
+                    counts_offsets = shard['mask_counts_offsets']
+                    for j, rle in zip(range(start, end), pred['masks']):
+                        counts = shard['mask_counts'][
+                            counts_offsets[j]:counts_offsets[j + 1]]
+                        self.assertEqual(counts.tobytes().decode(),
+                                         rle['counts'])
+                        self.assertEqual(shard['mask_sizes'][j].tolist(),
+                                         rle['size'])
+
+    @mock.patch('mmengine.infer.infer._load_checkpoint', return_value=None)
+    def test_stream(self, mock):
+        inferencer = DetInferencer('rtmdet-t')
+        img_dir = 'tests/data/VOCdevkit/VOC2007/JPEGImages/'
+        img_paths = [
+            'tests/data/color.jpg', 'tests/data/gray.jpg',
+            osp.join(img_dir, '000001.jpg')
+        ]
+        res = inferencer(img_paths)
+
+        # the results are yielded image by image
+        stream = inferencer.stream(img_paths, batch_size=2, num_workers=2)
+        self.assertNotIsInstance(stream, (list, dict))
+        res_stream = list(stream)
+        self.assertEqual(len(res_stream), len(img_paths))
+        self.assert_predictions_equal(res['predictions'],
+                                      [r['predictions'] for r in res_stream])
+        self.assertIsNone(res_stream[0]['visualization'])
+
+        # img dir and glob pattern
+        res_dir = list(inferencer.stream(img_dir, num_workers=0))
+        res_glob = list(inferencer.stream(osp.join(img_dir, '*.jpg')))
+        self.assertEqual(len(res_dir), len(res_glob))
+
+        # video
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            frame_dir = osp.join(tmp_dir, 'frames')
+            for i, img_path in enumerate(img_paths):
+                img = mmcv.imresize(mmcv.imread(img_path), (320, 240))
+                mmcv.imwrite(img, osp.join(frame_dir, f'{i:06d}.jpg'))
+            video_file = osp.join(tmp_dir, 'video.mp4')
+            mmcv.frames2video(frame_dir, video_file, fourcc='mp4v')
+            res_video = list(
+                inferencer.stream(video_file, batch_size=2, out_dir=tmp_dir))
+            self.assertEqual(len(res_video), len(img_paths))
+            self.assertIsInstance(res_video[0]['visualization'], np.ndarray)
+            self.assertTrue(
+                osp.exists(osp.join(tmp_dir, 'vis', '00000000.jpg')))
+
+        # save the predictions of ndarray inputs, which are named by the
+        # number of the predicted images in both formats
+        img = mmcv.imread(img_paths[0])
+        for pred_out_format in ['npz', 'json']:
+            inferencer.num_predicted_imgs = 0
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                res_stream = list(
+                    inferencer.stream(
+                        iter([img, img, img]),
+                        batch_size=2,
+                        out_dir=tmp_dir,
+                        no_save_pred=False,
+                        no_save_vis=True,
+                        pred_out_format=pred_out_format))
+                self.assertEqual(len(res_stream), 3)
+                if pred_out_format == 'npz':
+                    shard = np.load(
+                        osp.join(tmp_dir, 'preds', 'shard_00000.npz'))
+                    self.assertEqual(shard['img_names'].tolist(),
+                                     ['0', '1', '2'])
+                else:
+                    for i in range(3):
+                        self.assertTrue(
+                            osp.exists(
+                                osp.join(tmp_dir, 'preds', f'{i}.json')))
+
+    @mock.patch('mmengine.infer.infer._load_checkpoint', return_value=None)
+    def test_preprocess(self, mock):
+        inferencer = DetInferencer('rtmdet-t')
+        img_paths = ['tests/data/color.jpg', 'tests/data/gray.jpg'] * 3
+        img = mmcv.imread(img_paths[0])
+        inputs = img_paths + [img, dict(img_path=img_paths[1])]
+        expected = list(inferencer.preprocess(inputs, batch_size=3))
+        for worker_type in ['thread', 'process']:
+            chunks = list(
+                inferencer.preprocess(
+                    inputs,
+                    batch_size=3,
+                    num_workers=2,
+                    worker_type=worker_type,
+                    prefetch_chunks=1))
+            self.assertEqual(len(chunks), len(expected))
+            for (ori_inputs, data), (ori_target,
+                                     target) in zip(chunks, expected):
+                self.assertEqual(len(ori_inputs), len(ori_target))
+                for input_, target_ in zip(ori_inputs, ori_target):
+                    self.assertIs(input_, target_)
+                for x, y in zip(data['inputs'], target['inputs']):
+                    self.assertTrue(torch.equal(x, y))
+        # the dict input is not modified by the pipeline
+        self.assertEqual(inputs[-1], dict(img_path=img_paths[1]))
+
+        with self.assertRaises(ValueError):
+            list(
+                inferencer.preprocess(
+                    inputs, num_workers=2, worker_type='coroutine'))
+
     @mock.patch('mmengine.infer.infer._load_checkpoint', return_value=None)
     def test_pred2dict(self, mock):
         data_sample = DetDataSample()
@@ -1,3 +1,5 @@
+import asyncio
+import copy
 import os
 from pathlib import Path
 
@@ -5,7 +7,9 @@ import numpy as np
 import pytest
 import torch
 
-from mmdet.apis import inference_detector, init_detector
+from mmdet.apis import (AsyncDetector, MultiStreamRunner,
+                        async_inference_detector, inference_detector,
+                        init_detector, init_track_model)
 from mmdet.structures import DetDataSample
 from mmdet.utils import register_all_modules
 
@@ -74,3 +78,138 @@ def test_inference_detector(config, devices):
         assert isinstance(result, DetDataSample)
         result = inference_detector(model, [img1, img2])
         assert isinstance(result, list) and len(result) == 2
+
+        # test batched inference, where the results are in the input order
+        imgs = [img1, img2, img1]
+        results = inference_detector(model, imgs, batch_size=2, num_workers=2)
+        assert isinstance(results, list) and len(results) == 3
+        for img, result in zip(imgs, results):
+            expected = inference_detector(model, img).pred_instances
+            assert torch.allclose(result.pred_instances.bboxes,
+                                  expected.bboxes)
+            assert torch.allclose(result.pred_instances.scores,
+                                  expected.scores)
+
+
+def test_async_detector():
+    project_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    config_file = os.path.join(
+        project_dir, '..', 'configs/retinanet/retinanet_r18_fpn_1x_coco.py')
+    model = init_detector(config_file, device='cpu')
+    rng = np.random.RandomState(0)
+    imgs = [rng.randint(0, 255, (32, 32, 3), dtype=np.uint8) for _ in range(3)]
+
+    batch_sizes = []
+    test_step = model.test_step
+
+    def record_test_step(data):
+        batch_sizes.append(len(data['inputs']))
+        return test_step(data)
+
+    model.test_step = record_test_step
+
+    async def main():
+        async with AsyncDetector(
+                model, max_batch_size=2, max_latency=1) as detector:
+            return await asyncio.gather(
+                *[detector.submit(img) for img in imgs])
+
+    # the concurrent requests are forwarded in batches
+    results = asyncio.run(main())
+    assert batch_sizes == [2, 1]
+    for img, result in zip(imgs, results):
+        expected = inference_detector(model, img).pred_instances
+        assert torch.allclose(result.pred_instances.bboxes, expected.bboxes)
+        assert torch.allclose(result.pred_instances.scores, expected.scores)
+
+    result = asyncio.run(async_inference_detector(model, imgs[0]))
+    assert isinstance(result, DetDataSample)
+    results = asyncio.run(async_inference_detector(model, imgs))
+    assert isinstance(results, list) and len(results) == 3
+
+    # the pipeline of the model config is not changed
+    img_path = os.path.join(project_dir, '..', 'demo/demo.jpg')
+    result = inference_detector(model, img_path)
+    assert isinstance(result, DetDataSample)
+    assert model.cfg.test_dataloader.dataset.pipeline[0].type == \
+        'LoadImageFromFile'
+
+
+def test_multi_stream_runner():
+    project_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+    config_file = os.path.join(
+        project_dir, '..', 'configs/bytetrack/bytetrack_yolox_x_8xb4-80e_'
+        'crowdhuman-mot17halftrain_test-mot17halfval.py')
+    # a tiny detector on small images
+    cfg_options = {
+        'model.detector.backbone.deepen_factor': 0.33,
+        'model.detector.backbone.widen_factor': 0.125,
+        'model.detector.neck.in_channels': [32, 64, 128],
+        'model.detector.neck.out_channels': 32,
+        'model.detector.neck.num_csp_blocks': 1,
+        'model.detector.bbox_head.in_channels': 32,
+        'model.detector.bbox_head.feat_channels': 32,
+        'model.detector.test_cfg.score_thr': 0.,
+        'model.detector.init_cfg': None,
+        'model.tracker.obj_score_thrs': dict(high=0., low=0.),
+        'model.tracker.init_track_thr': 0.,
+        'test_dataloader.dataset.pipeline.0.transforms.1.scale': (128, 96)
+    }
+    model = init_track_model(
+        config_file, device='cpu', cfg_options=cfg_options)
+    model.detector.init_weights()
+    rng = np.random.RandomState(0)
+    videos = {
+        stream_id:
+        [rng.randint(0, 255, (60, 80, 3), dtype=np.uint8) for _ in range(3)]
+        for stream_id in ['cam0', 'cam1', 'cam2']
+    }
+
+    batch_sizes = []
+    detector_predict = model.detector.predict
+
+    def record_predict(imgs, data_samples):
+        batch_sizes.append(len(imgs))
+        return detector_predict(imgs, data_samples)
+
+    model.detector.predict = record_predict
+    runner = MultiStreamRunner(model, max_batch_size=2)
+    runner.add_stream('cam0')
+    runner.add_stream('cam1')
+    results = [
+        runner.step({
+            'cam0': videos['cam0'][0],
+            'cam1': videos['cam1'][0]
+        })
+    ]
+    # streams are added at runtime
+    runner.add_stream('cam2')
+    for frame_id in range(1, 3):
+        results.append(
+            runner.step({
+                stream_id: video[frame_id - int(stream_id == 'cam2')]
+                for stream_id, video in videos.items()
+            }))
+    assert batch_sizes == [2, 2, 1, 2, 1]
+    assert runner.get_stats('cam2')['num_frames'] == 2
+    stats = runner.remove_stream('cam0')
+    assert stats['num_frames'] == 3 and stats['fps'] > 0
+    assert runner.stream_ids == ['cam1', 'cam2']
+    with pytest.raises(KeyError):
+        runner.step({'cam0': videos['cam0'][0]})
+    with pytest.raises(ValueError):
+        runner.add_stream('cam1')
+
+    # each stream is associated by its own tracker
+    for stream_id in videos:
+        tracker = copy.deepcopy(model.tracker)
+        for result in results:
+            if stream_id not in result:
+                continue
+            img_data_sample = result[stream_id][0]
+            expected = tracker.track(data_sample=img_data_sample)
+            track_instances = img_data_sample.pred_track_instances
+            assert len(track_instances) > 0
+            assert torch.equal(track_instances.instances_id,
+                               expected.instances_id)
+            assert torch.equal(track_instances.bboxes, expected.bboxes)
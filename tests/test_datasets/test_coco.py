@@ -1,7 +1,15 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import pickle
+import tempfile
 import unittest
 
-from mmdet.datasets import CocoDataset
+import numpy as np
+from mmengine.fileio import dump
+
+from mmdet.datasets import CocoDataset, LazyInstances
+from mmdet.datasets.api_wrappers import COCOCache
+from mmdet.datasets.coco import CocoCacheDataList
 
 
 class TestCocoDataset(unittest.TestCase):
@@ -37,6 +45,48 @@ class TestCocoDataset(unittest.TestCase):
             pipeline=[])
         self.assertEqual(len(dataset), 4)
 
+    def test_coco_dataset_with_lazy_instances(self):
+        kwargs = dict(
+            data_prefix=dict(img='imgs'),
+            ann_file='tests/data/coco_sample.json',
+            metainfo=dict(classes=('bus', 'car')),
+            pipeline=[])
+        dataset = CocoDataset(**kwargs)
+        lazy_dataset = CocoDataset(lazy_instances=True, **kwargs)
+        self.assertEqual(len(lazy_dataset), len(dataset))
+        for i in range(len(dataset)):
+            data_info = lazy_dataset.get_data_info(i)
+            instances = data_info['instances']
+            self.assertIsInstance(instances, LazyInstances)
+            self.assertFalse(instances.materialized)
+            self.assertEqual(instances.bboxes.tolist(),
+                             [instance['bbox'] for instance in instances])
+            self.assertEqual(data_info, dataset.get_data_info(i))
+            self.assertEqual(
+                lazy_dataset.get_cat_ids(i), dataset.get_cat_ids(i))
+            # pickling gives the plain list of instances
+            self.assertEqual(
+                pickle.loads(pickle.dumps(instances)),
+                dataset.get_data_info(i)['instances'])
+
+        # the arrays are read-only views of the serialized data
+        instances = lazy_dataset.get_data_info(0)['instances']
+        with self.assertRaises(ValueError):
+            instances.bboxes[0, 0] = 0
+        # modifications to the materialized instances are kept
+        instances[0]['ignore_flag'] = 1
+        self.assertTrue(instances.materialized)
+        self.assertEqual(instances.ignore_flags[0], 1)
+        self.assertEqual(
+            lazy_dataset.get_data_info(0)['instances'][0],
+            dataset.get_data_info(0)['instances'][0])
+
+        subset = lazy_dataset.get_subset([2, 0])
+        for key in ['img_id', 'instances']:
+            self.assertEqual(
+                subset.get_data_info(1)[key],
+                dataset.get_data_info(0)[key])
+
     def test_coco_annotation_ids_unique(self):
         # test annotation ids not unique error
         metainfo = dict(classes=('car', ), task_name='new_task')
@@ -46,3 +96,104 @@ class TestCocoDataset(unittest.TestCase):
                 ann_file='tests/data/coco_wrong_format_sample.json',
                 metainfo=metainfo,
                 pipeline=[])
+
+    def test_coco_dataset_with_ann_cache(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        ann_file = osp.join(tmp_dir.name, 'ann.json')
+        rng = np.random.default_rng(0)
+        images, annotations = [], []
+        for img_id in range(1, 21):
+            images.append(
+                dict(
+                    id=img_id,
+                    file_name=f'{img_id:06d}.jpg',
+                    height=int(rng.integers(20, 100)),
+                    width=int(rng.integers(20, 100))))
+            for _ in range(rng.integers(0, 5)):
+                x1, y1, w, h = rng.uniform(-10, 80, 4).round(2).tolist()
+                ann = dict(
+                    id=len(annotations) + 1,
+                    image_id=img_id,
+                    category_id=int(rng.integers(1, 4)),
+                    bbox=[x1, y1, w, h],
+                    area=w * h,
+                    iscrowd=int(rng.random() < 0.2))
+                if rng.random() < 0.1:
+                    ann['ignore'] = 1
+                if rng.random() < 0.5:
+                    ann['segmentation'] = [[x1, y1, x1 + w, y1, x1, y1 + h]]
+                elif rng.random() < 0.5:
+                    ann['segmentation'] = dict(size=[10, 10], counts='PPYo1')
+                annotations.append(ann)
+        categories = [
+            dict(id=1, name='bus'),
+            dict(id=2, name='car'),
+            dict(id=3, name='truck')
+        ]
+        dump(
+            dict(
+                images=images, annotations=annotations, categories=categories),
+            ann_file)
+
+        metainfo = dict(classes=('car', 'bus'))
+        for filter_cfg in [None, dict(filter_empty_gt=True, min_size=32)]:
+            kwargs = dict(
+                data_prefix=dict(img='imgs'),
+                ann_file=ann_file,
+                metainfo=metainfo,
+                filter_cfg=filter_cfg,
+                pipeline=[])
+            dataset = CocoDataset(**kwargs)
+            # the cache is generated at the first time and reused
+            for lazy_instances in [False, True]:
+                cached_dataset = CocoDataset(
+                    ann_cache_file=osp.join(tmp_dir.name, 'ann.cache'),
+                    lazy_instances=lazy_instances,
+                    **kwargs)
+                self.assertEqual(len(cached_dataset), len(dataset))
+                self.assertEqual(cached_dataset.cat_ids, dataset.cat_ids)
+                for i in range(len(dataset)):
+                    self.assertEqual(
+                        cached_dataset.get_data_info(i),
+                        dataset.get_data_info(i))
+
+        # the data list is still backed by the cache after slicing and
+        # pickling
+        subset = cached_dataset.get_subset([2, 0])
+        self.assertIsInstance(subset.data_list, CocoCacheDataList)
+        self.assertEqual(
+            subset.get_data_info(0)['img_id'],
+            dataset.get_data_info(2)['img_id'])
+        subset = pickle.loads(pickle.dumps(subset))
+        self.assertEqual(
+            subset.get_data_info(1)['img_id'],
+            dataset.get_data_info(0)['img_id'])
+
+        # the cache is regenerated after the annotation file changes
+        dump(
+            dict(
+                images=images[:10],
+                annotations=[
+                    ann for ann in annotations if ann['image_id'] <= 10
+                ],
+                categories=categories), ann_file)
+        kwargs['filter_cfg'] = None
+        cached_dataset = CocoDataset(
+            ann_cache_file=osp.join(tmp_dir.name, 'ann.cache'), **kwargs)
+        self.assertEqual(len(cached_dataset), 10)
+        self.assertEqual(cached_dataset.data_list.cache.source,
+                         COCOCache.get_source(ann_file))
+        tmp_dir.cleanup()
+
+    def test_ann_cache_with_custom_parse_data_info(self):
+
+        class _CustomCocoDataset(CocoDataset):
+
+            def parse_data_info(self, raw_data_info):
+                return super().parse_data_info(raw_data_info)
+
+        with self.assertRaises(NotImplementedError):
+            _CustomCocoDataset(
+                ann_file='tests/data/coco_sample.json',
+                ann_cache_file='ann.cache',
+                pipeline=[])
@@ -1,10 +1,13 @@
+import copy
 import os.path as osp
 import tempfile
 import unittest
 
+import numpy as np
 from mmengine.fileio import dump
 
-from mmdet.datasets.api_wrappers import COCOPanoptic
+from mmdet.datasets.api_wrappers import (COCO, COCOeval, COCOevalMP,
+                                         COCOPanoptic)
 
 
 class TestCOCOPanoptic(unittest.TestCase):
@@ -65,3 +68,81 @@ class TestCOCOPanoptic(unittest.TestCase):
         api.load_anns(1)
 
         self.assertIsNone(api.load_anns(0.1))
+
+
+class TestCOCOevalMP(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _create_dummy_data(self, num_imgs=6, num_cats=5):
+        rng = np.random.RandomState(0)
+        images = [
+            dict(id=i, width=640, height=640, file_name=f'{i}.jpg')
+            for i in range(num_imgs)
+        ]
+        categories = [dict(id=i, name=f'cat{i}') for i in range(num_cats)]
+        annotations, predictions = [], []
+        for img_id in range(num_imgs):
+            for _ in range(rng.randint(0, 12)):
+                x, y = rng.uniform(0, 400, size=2)
+                w, h = rng.uniform(4, 200, size=2)
+                cat_id = int(rng.randint(0, num_cats))
+                annotations.append(
+                    dict(
+                        id=len(annotations) + 1,
+                        image_id=img_id,
+                        category_id=cat_id,
+                        bbox=[x, y, w, h],
+                        area=w * h,
+                        iscrowd=int(rng.rand() < 0.1)))
+                for _ in range(rng.randint(0, 3)):
+                    dx, dy, dw, dh = rng.normal(0, 10, size=4)
+                    predictions.append(
+                        dict(
+                            image_id=img_id,
+                            category_id=cat_id,
+                            bbox=[
+                                x + dx, y + dy,
+                                max(w + dw, 1),
+                                max(h + dh, 1)
+                            ],
+                            score=float(rng.rand())))
+        ann_file = osp.join(self.tmp_dir.name, 'gt.json')
+        dump(
+            dict(
+                images=images, annotations=annotations, categories=categories),
+            ann_file)
+        return ann_file, predictions
+
+    def _evaluate(self,
+                  evaluator_cls,
+                  ann_file,
+                  predictions,
+                  use_cats=1,
+                  **kwargs):
+        coco_gt = COCO(ann_file)
+        coco_dt = coco_gt.loadRes(copy.deepcopy(predictions))
+        coco_eval = evaluator_cls(coco_gt, coco_dt, 'bbox', **kwargs)
+        coco_eval.params.useCats = use_cats
+        coco_eval.evaluate()
+        coco_eval.accumulate()
+        coco_eval.summarize()
+        return coco_eval
+
+    def test_parity_with_cocoeval(self):
+        ann_file, predictions = self._create_dummy_data()
+        for use_cats in (1, 0):
+            ref = self._evaluate(COCOeval, ann_file, predictions, use_cats)
+            for nproc in (1, 2, 3):
+                mp_eval = self._evaluate(
+                    COCOevalMP, ann_file, predictions, use_cats, nproc=nproc)
+                self.assertEqual(len(mp_eval.evalImgs), len(ref.evalImgs))
+                np.testing.assert_array_equal(mp_eval.stats, ref.stats)
+                np.testing.assert_array_equal(mp_eval.eval['precision'],
+                                              ref.eval['precision'])
+                np.testing.assert_array_equal(mp_eval.eval['recall'],
+                                              ref.eval['recall'])
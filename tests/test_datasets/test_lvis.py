@@ -1,5 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import os
+import os.path as osp
+import tempfile
 import unittest
 
 from mmengine.fileio import dump
@@ -146,6 +148,32 @@ class TestLVISDataset(unittest.TestCase):
     def tearDown(self):
         os.remove(self.json_name)
 
+    def test_lvis_dataset_with_ann_cache(self):
+        # the cache is loaded without the lvis api
+        tmp_dir = tempfile.TemporaryDirectory()
+        for dataset_type, img_path in [
+            (LVISV05Dataset, osp.join('imgs', '0.jpg')),
+            (LVISV1Dataset, osp.join('imgs', 'train2017/0.jpg'))
+        ]:
+            dataset = dataset_type(
+                ann_file=self.json_name,
+                ann_cache_file=osp.join(tmp_dir.name,
+                                        f'{dataset_type.__name__}.cache'),
+                data_prefix=dict(img='imgs'),
+                metainfo=self.metainfo,
+                filter_cfg=dict(filter_empty_gt=True, min_size=32),
+                pipeline=[])
+            self.assertEqual(dataset.cat_ids, [1, 2, 3])
+            # filter images of small size and images
+            # with all illegal annotations
+            self.assertEqual(len(dataset), 2)
+            data_info = dataset.get_data_info(0)
+            self.assertEqual(data_info['img_path'], img_path)
+            self.assertEqual([
+                instance['bbox_label'] for instance in data_info['instances']
+            ], [0, 0])
+        tmp_dir.cleanup()
+
     @unittest.skipIf(lvis is None, 'lvis is not installed.')
     def test_lvis05_dataset(self):
         dataset = LVISV05Dataset(
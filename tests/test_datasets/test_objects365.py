@@ -1,4 +1,6 @@
 # Copyright (c) OpenMMLab. All rights reserved.
+import os.path as osp
+import tempfile
 import unittest
 
 from mmdet.datasets import Objects365V1Dataset, Objects365V2Dataset
@@ -39,6 +41,25 @@ class TestObjects365V1Dataset(unittest.TestCase):
         self.assertListEqual(dataset.get_cat_ids(0), [0, 1])
         self.assertEqual(dataset.cat_ids, [1, 2])
 
+    def test_obj365v1_with_ann_cache(self):
+        # the categories in the cache are sorted as well
+        tmp_dir = tempfile.TemporaryDirectory()
+        kwargs = dict(
+            data_prefix=dict(img='imgs'),
+            ann_file='tests/data/Objects365/unsorted_obj365_sample.json',
+            metainfo=dict(classes=('bus', 'car')),
+            filter_cfg=dict(filter_empty_gt=True, min_size=32),
+            pipeline=[])
+        dataset = Objects365V1Dataset(**kwargs)
+        cached_dataset = Objects365V1Dataset(
+            ann_cache_file=osp.join(tmp_dir.name, 'ann.cache'), **kwargs)
+        self.assertEqual(cached_dataset.cat_ids, [1, 2])
+        self.assertEqual(len(cached_dataset), len(dataset))
+        for i in range(len(dataset)):
+            self.assertEqual(
+                cached_dataset.get_data_info(i), dataset.get_data_info(i))
+        tmp_dir.cleanup()
+
     def test_obj365v1_annotation_ids_unique(self):
         # test annotation ids not unique error
         metainfo = dict(classes=('car', ), task_name='new_task')
@@ -68,6 +89,24 @@ class TestObjects365V2Dataset(unittest.TestCase):
         self.assertListEqual(dataset.get_cat_ids(0), [0, 1])
         self.assertEqual(dataset.cat_ids, [1, 2])
 
+    def test_obj365v2_with_ann_cache(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        kwargs = dict(
+            data_prefix=dict(img='imgs'),
+            ann_file='tests/data/coco_sample.json',
+            metainfo=dict(classes=('bus', 'car')),
+            filter_cfg=dict(filter_empty_gt=True, min_size=32),
+            pipeline=[])
+        dataset = Objects365V2Dataset(**kwargs)
+        cached_dataset = Objects365V2Dataset(
+            ann_cache_file=osp.join(tmp_dir.name, 'ann.cache'), **kwargs)
+        self.assertEqual(cached_dataset.cat_ids, dataset.cat_ids)
+        self.assertEqual(len(cached_dataset), len(dataset))
+        for i in range(len(dataset)):
+            self.assertEqual(
+                cached_dataset.get_data_info(i), dataset.get_data_info(i))
+        tmp_dir.cleanup()
+
     def test_obj365v1_annotation_ids_unique(self):
         # test annotation ids not unique error
         metainfo = dict(classes=('car', ), task_name='new_task')
@@ -10,7 +10,7 @@ from mmengine.structures import InstanceData, LabelData, PixelData
 from mmdet.datasets.transforms import (PackDetInputs, PackReIDInputs,
                                        PackTrackInputs)
 from mmdet.structures import DetDataSample, ReIDDataSample
-from mmdet.structures.mask import BitmapMasks
+from mmdet.structures.mask import BitmapMasks, LazyBitmapMasks
 
 
 class TestPackDetInputs(unittest.TestCase):
@@ -96,6 +96,24 @@ class TestPackDetInputs(unittest.TestCase):
         self.assertIsInstance(results['data_samples'].proposals.scores,
                               torch.Tensor)
 
+    def test_transform_with_lazy_masks(self):
+        polygons = [[np.array([0., 0., 100., 0., 100., 50.])],
+                    [np.array([10., 10., 200., 10., 200., 300., 10., 300.])],
+                    [np.array([50., 50., 60., 50., 60., 80.])]]
+        results = copy.deepcopy(self.results1)
+        results['gt_masks'] = LazyBitmapMasks(polygons, 300, 400)
+        transform = PackDetInputs(meta_keys=self.meta_keys)
+        results = transform(results)
+        gt_masks = results['data_samples'].gt_instances.masks
+        ignored_masks = results['data_samples'].ignored_instances.masks
+        self.assertIsInstance(gt_masks, BitmapMasks)
+        self.assertIsInstance(ignored_masks, BitmapMasks)
+        self.assertEqual(gt_masks.masks.dtype, np.uint8)
+        np.testing.assert_array_equal(
+            gt_masks.masks,
+            LazyBitmapMasks(polygons[:2], 300, 400).to_ndarray())
+        self.assertEqual(len(ignored_masks), 1)
+
     def test_repr(self):
         transform = PackDetInputs(meta_keys=self.meta_keys)
         self.assertEqual(
@@ -9,13 +9,14 @@ from unittest.mock import MagicMock, Mock, patch
 import mmcv
 import numpy as np
 
+from mmdet.datasets import LazyInstances
 from mmdet.datasets.transforms import (FilterAnnotations, LoadAnnotations,
                                        LoadEmptyAnnotations,
                                        LoadImageFromNDArray,
                                        LoadMultiChannelImageFromFiles,
                                        LoadProposals, LoadTrackAnnotations)
 from mmdet.evaluation import INSTANCE_OFFSET
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import BitmapMasks, LazyBitmapMasks, PolygonMasks
 
 try:
     import panopticapi
@@ -73,6 +74,41 @@ class TestLoadAnnotations(unittest.TestCase):
                                                                  1])).all())
         self.assertEqual(results['gt_ignore_flags'].dtype, bool)
 
+    def test_load_lazy_instances(self):
+        instances = self.results['instances']
+        lazy_instances = LazyInstances(
+            np.array([instance['bbox'] for instance in instances],
+                     dtype=np.float64),
+            np.array([instance['bbox_label'] for instance in instances]),
+            np.array([instance['ignore_flag'] for instance in instances],
+                     dtype=np.int8),
+            lambda: [dict(mask=instance['mask']) for instance in instances])
+        for box_type in [None, 'hbox']:
+            transform = LoadAnnotations(
+                with_bbox=True, with_label=True, box_type=box_type)
+            results = transform(copy.deepcopy(self.results))
+            lazy_results = copy.deepcopy(self.results)
+            lazy_results['instances'] = lazy_instances
+            lazy_results = transform(lazy_results)
+            self.assertFalse(lazy_instances.materialized)
+            if box_type is not None:
+                for res in (results, lazy_results):
+                    res['gt_bboxes'] = res['gt_bboxes'].numpy()
+            for key in ['gt_bboxes', 'gt_bboxes_labels', 'gt_ignore_flags']:
+                self.assertEqual(lazy_results[key].dtype, results[key].dtype)
+                self.assertTrue((lazy_results[key] == results[key]).all())
+
+        # masks are loaded from the materialized instances
+        transform = LoadAnnotations(
+            with_bbox=True, with_mask=True, box_type=None)
+        results = transform(copy.deepcopy(self.results))
+        lazy_results = copy.deepcopy(self.results)
+        lazy_results['instances'] = lazy_instances
+        lazy_results = transform(lazy_results)
+        self.assertTrue(lazy_instances.materialized)
+        np.testing.assert_array_equal(lazy_results['gt_masks'].masks,
+                                      results['gt_masks'].masks)
+
     def test_load_labels(self):
         transform = LoadAnnotations(
             with_bbox=False,
@@ -110,6 +146,44 @@ class TestLoadAnnotations(unittest.TestCase):
         self.assertEqual(len(results['gt_masks']), 3)
         self.assertIsInstance(results['gt_masks'], BitmapMasks)
 
+        # the polygons are rasterized in a batch, mixed with RLEs and
+        # invalid polygons
+        data = copy.deepcopy(self.results)
+        data['instances'][0]['mask'].append([5, 5, 30, 5, 30, 40])
+        data['instances'][1]['mask'] = dict(
+            size=[300, 400], counts=[300 * 10, 300 * 5, 300 * 385])
+        data['instances'][2]['mask'] = [[0, 0, 1, 1]]
+        results = transform(copy.deepcopy(data))
+        masks = results['gt_masks'].masks
+        self.assertEqual(masks.dtype, np.uint8)
+        self.assertEqual(masks.shape, (3, 300, 400))
+        expected = [
+            transform._poly2mask(mask, 300, 400)
+            for mask in transform._process_masks(copy.deepcopy(data))
+        ]
+        np.testing.assert_array_equal(masks, np.stack(expected))
+
+    def test_load_mask_lazy_poly2mask(self):
+        transform = LoadAnnotations(
+            with_bbox=False,
+            with_label=False,
+            with_mask=True,
+            lazy_poly2mask=True)
+        results = transform(copy.deepcopy(self.results))
+        self.assertIsInstance(results['gt_masks'], LazyBitmapMasks)
+        expected = LoadAnnotations(
+            with_bbox=False, with_label=False,
+            with_mask=True)(copy.deepcopy(self.results))['gt_masks']
+        np.testing.assert_array_equal(results['gt_masks'].to_bitmap().masks,
+                                      expected.masks)
+
+        # images with RLE masks are converted at loading time
+        data = copy.deepcopy(self.results)
+        data['instances'][1]['mask'] = dict(
+            size=[300, 400], counts=[300 * 10, 300 * 5, 300 * 385])
+        results = transform(data)
+        self.assertIsInstance(results['gt_masks'], BitmapMasks)
+
     def test_load_semseg(self):
         transform = LoadAnnotations(
             with_bbox=False, with_label=False, with_seg=True, with_mask=False)
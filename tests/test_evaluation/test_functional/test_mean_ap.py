@@ -0,0 +1,118 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+
+from mmdet.evaluation.functional import eval_map
+from mmdet.evaluation.functional.mean_ap import (batched_tpfp_default,
+                                                 batched_tpfp_openimages,
+                                                 tpfp_default, tpfp_openimages)
+
+
+def per_image_tpfp_default(*args, **kwargs):
+    return tpfp_default(*args, **kwargs)
+
+
+def _random_cls_results(rng, num_imgs, with_ignore=False, with_group=False):
+    cls_dets, cls_gts, cls_gts_ignore, cls_group_ofs = [], [], [], []
+    for _ in range(num_imgs):
+        num_gts = rng.integers(0, 6)
+        xy = rng.uniform(0, 100, (num_gts, 2))
+        gts = np.hstack((xy, xy + rng.uniform(5, 50, (num_gts, 2))))
+        num_ignore = rng.integers(0, 3) if with_ignore else 0
+        xy = rng.uniform(0, 100, (num_ignore, 2))
+        gts_ignore = np.hstack((xy, xy + 30))
+        num_dets = rng.integers(0, 20)
+        if num_gts > 0:
+            bboxes = gts[rng.integers(0, num_gts, num_dets)]
+        else:
+            bboxes = np.tile([[10., 10., 50., 50.]], (num_dets, 1))
+        bboxes = bboxes + rng.normal(0, 4, (num_dets, 4))
+        # round the scores to produce ties
+        scores = np.round(rng.random((num_dets, 1)), 1)
+        cls_dets.append(np.hstack((bboxes, scores)).astype(np.float32))
+        cls_gts.append(gts.astype(np.float32))
+        cls_gts_ignore.append(gts_ignore.astype(np.float32))
+        cls_group_ofs.append(rng.random(num_gts) < 0.3)
+    return cls_dets, cls_gts, cls_gts_ignore, cls_group_ofs
+
+
+class TestBatchedTPFP(TestCase):
+
+    def test_batched_tpfp_default(self):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            cls_dets, cls_gts, cls_gts_ignore, _ = _random_cls_results(
+                rng, rng.integers(1, 20), with_ignore=True)
+            for area_ranges in [None, [(0, 400), (400, 1600), (1600, 1e5)]]:
+                for use_legacy_coordinate in [False, True]:
+                    results = [
+                        tpfp_default(*inputs, 0.5, area_ranges,
+                                     use_legacy_coordinate)
+                        for inputs in zip(cls_dets, cls_gts, cls_gts_ignore)
+                    ]
+                    tp, fp = batched_tpfp_default(cls_dets, cls_gts,
+                                                  cls_gts_ignore, 0.5,
+                                                  area_ranges,
+                                                  use_legacy_coordinate)
+                    np.testing.assert_array_equal(
+                        tp, np.hstack([res[0] for res in results]))
+                    np.testing.assert_array_equal(
+                        fp, np.hstack([res[1] for res in results]))
+
+    def test_batched_tpfp_openimages(self):
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            cls_dets, cls_gts, cls_gts_ignore, cls_group_ofs = \
+                _random_cls_results(rng, rng.integers(1, 20), with_group=True)
+            results = [
+                tpfp_openimages(
+                    det,
+                    gt,
+                    gt_ignore,
+                    gt_bboxes_group_of=group_of,
+                    use_group_of=True,
+                    ioa_thr=0.5) for det, gt, gt_ignore, group_of in zip(
+                        cls_dets, cls_gts, cls_gts_ignore, cls_group_ofs)
+            ]
+            tp, fp, det_bboxes = batched_tpfp_openimages(
+                cls_dets,
+                cls_gts,
+                cls_gts_ignore,
+                gt_bboxes_group_ofs=cls_group_ofs,
+                use_group_of=True,
+                ioa_thr=0.5)
+            tps, fps, dets = zip(*results)
+            expected = (np.hstack(tps), np.hstack(fps), np.vstack(dets))
+            for actual, target in zip((tp, fp, det_bboxes), expected):
+                self.assertEqual(actual.dtype, target.dtype)
+                np.testing.assert_array_equal(actual, target)
+
+    def test_eval_map(self):
+        rng = np.random.default_rng(0)
+        det_results, annotations = [], []
+        for _ in range(20):
+            cls_dets, cls_gts, _, _ = _random_cls_results(rng, 3)
+            det_results.append(cls_dets)
+            annotations.append(
+                dict(
+                    bboxes=np.vstack(cls_gts),
+                    labels=np.repeat(
+                        np.arange(3), [gt.shape[0] for gt in cls_gts])))
+        for scale_ranges in [None, [(0, 20), (20, 40), (40, 1e5)]]:
+            mean_ap, results = eval_map(
+                det_results,
+                annotations,
+                scale_ranges=scale_ranges,
+                logger='silent')
+            per_image_mean_ap, per_image_results = eval_map(
+                det_results,
+                annotations,
+                scale_ranges=scale_ranges,
+                logger='silent',
+                tpfp_fn=per_image_tpfp_default,
+                nproc=2)
+            self.assertEqual(mean_ap, per_image_mean_ap)
+            for res, per_image_res in zip(results, per_image_results):
+                for key in ['num_gts', 'num_dets', 'recall', 'precision']:
+                    np.testing.assert_array_equal(res[key], per_image_res[key])
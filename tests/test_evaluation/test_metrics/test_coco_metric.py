@@ -8,6 +8,7 @@ import torch
 from mmengine.fileio import dump
 
 from mmdet.evaluation import CocoMetric
+from mmdet.structures.mask import RLEMasks
 
 
 class TestCocoMetric(TestCase):
@@ -195,6 +196,30 @@ class TestCocoMetric(TestCase):
         }
         self.assertDictEqual(eval_results, target)
 
+    def test_evaluate_rle_masks(self):
+        # create dummy data
+        fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
+        self._create_dummy_coco_json(fake_json_file)
+        dummy_pred = self._create_dummy_results()
+        rle_pred = dict(
+            dummy_pred, masks=RLEMasks.from_bitmaps(dummy_pred['masks']))
+
+        eval_results = []
+        for pred in [dummy_pred, rle_pred]:
+            coco_metric = CocoMetric(
+                ann_file=fake_json_file, metric=['bbox', 'segm'])
+            coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+            coco_metric.process(
+                {},
+                [dict(pred_instances=pred, img_id=0, ori_shape=(640, 640))])
+            self.assertEqual(
+                coco_metric.results[0][1]['masks'],
+                mask_util.encode(
+                    np.asfortranarray(dummy_pred['masks'].numpy().transpose(
+                        1, 2, 0))))
+            eval_results.append(coco_metric.evaluate(size=1))
+        self.assertDictEqual(eval_results[0], eval_results[1])
+
     def test_classwise_evaluate(self):
         # create dummy data
         fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
@@ -287,6 +312,102 @@ class TestCocoMetric(TestCase):
         }
         self.assertDictEqual(eval_results, target)
 
+    def _create_dummy_random_results(self):
+        rng = np.random.RandomState(0)
+        dummy_pred = self._create_dummy_results()
+        bboxes = dummy_pred['bboxes'].numpy().repeat(5, axis=0)
+        bboxes = bboxes + rng.randint(-8, 8, size=bboxes.shape)
+        dummy_mask = np.zeros((20, 10, 10), dtype=np.uint8)
+        for i in range(20):
+            dummy_mask[i, :rng.randint(1, 10), :rng.randint(1, 10)] = 1
+        return dict(
+            bboxes=torch.from_numpy(bboxes).float(),
+            scores=torch.from_numpy(rng.rand(20).round(1)).float(),
+            labels=torch.from_numpy(rng.randint(0, 2, size=20)),
+            masks=torch.from_numpy(dummy_mask))
+
+    def test_fast_evaluate(self):
+        # create dummy data
+        fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
+        self._create_dummy_coco_json(fake_json_file)
+        dummy_pred = self._create_dummy_random_results()
+
+        eval_results = []
+        for use_fast_eval in (False, True):
+            coco_metric = CocoMetric(
+                ann_file=fake_json_file,
+                metric=['bbox', 'segm', 'proposal'],
+                classwise=True,
+                use_fast_eval=use_fast_eval)
+            coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+            coco_metric.process({}, [
+                dict(
+                    pred_instances=dummy_pred, img_id=0, ori_shape=(640, 640))
+            ])
+            eval_results.append(coco_metric.evaluate(size=1))
+        self.assertDictEqual(eval_results[0], eval_results[1])
+
+    def test_streaming_evaluate(self):
+        # create dummy data
+        fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
+        self._create_dummy_coco_json(fake_json_file)
+        dummy_pred = self._create_dummy_random_results()
+        data_samples = [
+            dict(pred_instances=dummy_pred, img_id=0, ori_shape=(640, 640))
+        ]
+
+        coco_metric = CocoMetric(
+            ann_file=fake_json_file,
+            metric=['bbox', 'segm', 'proposal'],
+            classwise=True)
+        coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+        coco_metric.process({}, data_samples)
+        target = coco_metric.evaluate(size=1)
+
+        for num_stream_workers in (0, 2):
+            coco_metric = CocoMetric(
+                ann_file=fake_json_file,
+                metric=['bbox', 'segm', 'proposal'],
+                classwise=True,
+                streaming=True,
+                num_stream_workers=num_stream_workers)
+            coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+            coco_metric.process({}, data_samples)
+            # only the compact match records are kept
+            records = coco_metric.results + [
+                future.result() for future in coco_metric._stream_futures
+            ]
+            self.assertNotIn('masks', records[0][1]['segm'])
+            self.assertDictEqual(coco_metric.evaluate(size=1), target)
+            # the worker threads are released after evaluation
+            self.assertIsNone(coco_metric._stream_executor)
+
+        # test streaming evaluation without json
+        dummy_mask = np.zeros((10, 10), order='F', dtype=np.uint8)
+        dummy_mask[:5, :5] = 1
+        rle_mask = mask_util.encode(dummy_mask)
+        instances = [
+            dict(bbox_label=0, bbox=[50, 60, 70, 80], mask=rle_mask),
+            dict(bbox_label=1, bbox=[150, 160, 190, 200], mask=rle_mask),
+            dict(
+                bbox_label=0,
+                bbox=[250, 260, 350, 360],
+                ignore_flag=1,
+                mask=rle_mask)
+        ]
+        data_samples[0]['instances'] = instances
+        eval_results = []
+        for streaming in (False, True):
+            coco_metric = CocoMetric(
+                metric=['bbox', 'segm'], classwise=True, streaming=streaming)
+            coco_metric.dataset_meta = dict(classes=['car', 'bicycle'])
+            coco_metric.process({}, data_samples)
+            eval_results.append(coco_metric.evaluate(size=1))
+        self.assertDictEqual(eval_results[0], eval_results[1])
+
+        with self.assertRaisesRegex(AssertionError, 'streaming mode'):
+            CocoMetric(metric='proposal_fast', streaming=True)
+
     def test_empty_results(self):
         # create dummy data
         fake_json_file = osp.join(self.tmp_dir.name, 'fake_data.json')
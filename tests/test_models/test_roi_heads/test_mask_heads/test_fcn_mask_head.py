@@ -8,6 +8,7 @@ from mmengine.structures import InstanceData
 from parameterized import parameterized
 
 from mmdet.models.roi_heads.mask_heads import FCNMaskHead
+from mmdet.structures.mask import RLEMasks
 
 
 class TestFCNMaskHead(TestCase):
@@ -86,3 +87,29 @@ class TestFCNMaskHead(TestCase):
         self.assertIsInstance(result_list[0], InstanceData)
         self.assertEqual(len(result_list[0]), num_samples)
         self.assertEqual(result_list[0].masks.shape, (num_samples, s, s))
+
+        # test with rle_masks
+        num_samples = 2
+        result = InstanceData(metainfo=img_metas)
+        mask_pred = [torch.rand((num_samples, num_classes, 14, 14)).to(device)]
+        result.bboxes = torch.tensor([[10., 20., 60., 90.],
+                                      [30., 5., 120., 70.]]).to(device)
+        result.labels = torch.randint(
+            num_classes, (num_samples, ), dtype=torch.long).to(device)
+        result_list = mask_head.predict_by_feat(
+            mask_preds=tuple(mask_pred),
+            results_list=[result.clone()],
+            batch_img_metas=[img_metas],
+            rcnn_test_cfg=rcnn_test_cfg)
+        rle_result_list = mask_head.predict_by_feat(
+            mask_preds=tuple(mask_pred),
+            results_list=[result.clone()],
+            batch_img_metas=[img_metas],
+            rcnn_test_cfg=ConfigDict(rcnn_test_cfg, rle_masks=True))
+
+        masks = rle_result_list[0].masks
+        self.assertIsInstance(masks, RLEMasks)
+        self.assertEqual((len(masks), masks.height, masks.width),
+                         (num_samples, s, s))
+        self.assertTrue(
+            (masks.to_ndarray() == result_list[0].masks.cpu().numpy()).all())
@@ -2,6 +2,7 @@
 from unittest import TestCase
 
 import numpy as np
+import torch
 from mmengine.registry import init_default_scope
 from torch import nn
 
@@ -34,3 +35,37 @@ class TestAppearanceFreeLink(TestCase):
         linked_track = aflink.forward(pred_track)
         assert isinstance(linked_track, np.ndarray)
         assert linked_track.shape == (10, 7)
+
+    def test_batched_model(self):
+        aflink = TASK_UTILS.build(self.cfg)
+        track1, track2 = torch.rand(2, 5, 1, 30, 5)
+        confidence = aflink.model(track1, track2)
+        self.assertEqual(confidence.shape, (5, ))
+        for i in range(5):
+            self.assertAlmostEqual(
+                aflink.model(track1[i:i + 1], track2[i:i + 1]).item(),
+                confidence[i].item(),
+                places=5)
+
+    def test_link(self):
+        frame_ids = np.arange(40, dtype=float)
+        # tracks 3, 5 and 8 are chained, while track 1 is too far away
+        pred_track = np.concatenate([
+            np.stack([
+                frame_ids[start:end],
+                np.full(end - start, track_id), frame_ids[start:end] + x,
+                frame_ids[start:end], frame_ids[start:end] + x + 20,
+                frame_ids[start:end] + 50,
+                np.ones(end - start)
+            ], 1)
+            for track_id, start, end, x in [(3, 0, 10,
+                                             0), (5, 12, 20,
+                                                  0), (8, 21, 40,
+                                                       0), (1, 12, 15, 100)]
+        ])
+        aflink = TASK_UTILS.build(
+            dict(self.cfg, temporal_threshold=(0, 5), confidence_threshold=0))
+        linked_track = aflink.forward(pred_track[np.argsort(pred_track[:, 0])])
+        self.assertEqual(len(linked_track), len(pred_track))
+        self.assertEqual(np.unique(linked_track[:, 1]).tolist(), [1, 3])
+        self.assertEqual((linked_track[:, 1] == 1).sum(), 3)
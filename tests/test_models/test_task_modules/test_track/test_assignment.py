@@ -0,0 +1,86 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import pytest
+
+from mmdet.models.task_modules import linear_assignment
+
+try:
+    import lap
+except ImportError:
+    lap = None
+
+
+def _random_costs(rng, num_rows, num_cols):
+    """IoU-like costs where most of the pairs are far from each other."""
+    costs = rng.uniform(0.5, 1, (num_rows, num_cols))
+    near = rng.random((num_rows, num_cols)) < 3. / max(num_cols, 1)
+    costs[near] = rng.uniform(0, 0.7, near.sum())
+    # pairs of different categories
+    costs[rng.random((num_rows, num_cols)) < 0.1] = 1e6
+    return costs
+
+
+def _matched_cost(costs, row, col):
+    matched = np.nonzero(row > -1)[0]
+    np.testing.assert_array_equal(col[row[matched]], matched)
+    assert (col > -1).sum() == len(matched)
+    return costs[matched, row[matched]].sum(), len(matched)
+
+
+class TestLinearAssignment(TestCase):
+
+    @pytest.mark.skipif(lap is None, reason='lap is not installed')
+    def test_optimal_backends(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            num_rows, num_cols = rng.integers(0, 40, 2)
+            costs = _random_costs(rng, num_rows, num_cols)
+            if costs.size > 0:
+                _, target_row, target_col = lap.lapjv(
+                    costs, extend_cost=True, cost_limit=0.6)
+            else:
+                target_row = np.full(num_rows, -1)
+                target_col = np.full(num_cols, -1)
+            target_cost, target_num = _matched_cost(costs, target_row,
+                                                    target_col)
+            for backend in ['lapjv', 'scipy']:
+                for sparse in [True, False]:
+                    row, col = linear_assignment(
+                        costs, cost_limit=0.6, backend=backend, sparse=sparse)
+                    cost, num = _matched_cost(costs, row, col)
+                    self.assertEqual(num, target_num)
+                    self.assertAlmostEqual(cost, target_cost)
+                    self.assertTrue(
+                        (costs[row > -1, row[row > -1]] <= 0.6).all())
+
+    def test_greedy(self):
+        rng = np.random.default_rng(1)
+        costs = _random_costs(rng, 30, 20)
+        row, col = linear_assignment(costs, cost_limit=0.6, backend='greedy')
+        _matched_cost(costs, row, col)
+        self.assertTrue((costs[row > -1, row[row > -1]] <= 0.6).all())
+
+        # a block of a single row takes the cheapest column
+        costs = np.array([[0.3, 0.1, np.nan], [np.inf, 0.9, 0.2]])
+        row, col = linear_assignment(costs, cost_limit=0.5)
+        self.assertEqual(row.tolist(), [1, 2])
+        self.assertEqual(col.tolist(), [-1, 0, 1])
+
+    def test_no_cost_limit(self):
+        # matching one more pair is preferred to a lower total cost
+        costs = np.array([[1., 2.], [1., np.nan]])
+        for backend in ['scipy', 'auto']:
+            row, col = linear_assignment(costs, backend=backend)
+            self.assertEqual(row.tolist(), [1, 0])
+            self.assertEqual(col.tolist(), [1, 0])
+
+    def test_invalid_inputs(self):
+        row, col = linear_assignment(np.zeros((0, 3)), cost_limit=0.5)
+        self.assertEqual(row.shape, (0, ))
+        self.assertEqual(col.tolist(), [-1, -1, -1])
+        row, col = linear_assignment(np.ones((2, 2)), cost_limit=0.5)
+        self.assertEqual(row.tolist(), [-1, -1])
+        with self.assertRaises(ValueError):
+            linear_assignment(np.ones((2, 2)), backend='hungarian')
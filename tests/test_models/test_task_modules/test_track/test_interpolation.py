@@ -4,8 +4,15 @@ from unittest import TestCase
 import numpy as np
 from mmengine.registry import init_default_scope
 
+from mmdet.models.task_modules import InterpolateTracklets
 from mmdet.registry import TASK_UTILS
 
+try:
+    from sklearn.gaussian_process import GaussianProcessRegressor as GPR
+    from sklearn.gaussian_process.kernels import RBF
+except ImportError:
+    GPR = None
+
 
 class TestInterpolateTracklets(TestCase):
 
@@ -37,3 +44,47 @@ class TestInterpolateTracklets(TestCase):
         linked_track = interpolation.forward(pred_track)
         assert isinstance(linked_track, np.ndarray)
         assert linked_track.shape == (5, 7)
+
+    def test_interpolate_tracks(self):
+        pred_track = np.random.rand(12, 7)
+        # the first track is interpolated, the second track is too short
+        # and the third track is dropped
+        pred_track[:, 0] = [1, 2, 5, 6, 7, 9, 30, 1, 4, 5, 6, 3]
+        pred_track[:, 1] = [2, 2, 2, 2, 2, 2, 2, 0, 0, 0, 0, 1]
+        pred_track = pred_track[np.argsort(pred_track[:, 0])]
+
+        interpolation = InterpolateTracklets(min_num_frames=5)
+        linked_track = interpolation.forward(pred_track)
+        self.assertEqual(linked_track[:, 0].tolist(),
+                         sorted(linked_track[:, 0].tolist()))
+        track = linked_track[linked_track[:, 1] == 2]
+        self.assertEqual(track[:, 0].tolist(), [1, 2, 3, 4, 5, 6, 7, 8, 9, 30])
+        left, right = pred_track[pred_track[:, 1] == 2][[1, 2]]
+        np.testing.assert_allclose(track[2, 2:6],
+                                   (right[2:6] - left[2:6]) / 3 + left[2:6])
+        self.assertEqual(track[[2, 3, 7], 6].tolist(), [1, 1, 1])
+        self.assertEqual(len(linked_track[linked_track[:, 1] == 0]), 4)
+        self.assertFalse((linked_track[:, 1] == 1).any())
+
+    def test_gaussian_smoothed_interpolation(self):
+        rng = np.random.default_rng(0)
+        track = np.zeros((40, 7))
+        track[:, 0] = np.sort(rng.choice(60, 40, replace=False))
+        track[:, 2:6] = rng.uniform(0, 100, (40, 4))
+        interpolation = TASK_UTILS.build(self.cfg)
+        gsi_track = interpolation.gaussian_smoothed_interpolation(track)
+        if GPR is not None:
+            gpr = GPR(RBF(10 * np.log(1000 / 40), 'fixed'))
+            for i in range(2, 6):
+                gpr.fit(track[:, :1], track[:, i:i + 1])
+                np.testing.assert_allclose(
+                    gsi_track[:, i],
+                    gpr.predict(track[:, :1]).ravel(),
+                    atol=1e-2)
+
+        # smoothing the tracks in multiple processes
+        pred_track = np.concatenate((track, track + [0, 1, 0, 0, 0, 0, 0]))
+        linked_track = InterpolateTracklets(
+            use_gsi=True, nproc=2).forward(pred_track)
+        np.testing.assert_allclose(linked_track,
+                                   interpolation.forward(pred_track))
@@ -1,6 +1,8 @@
 from unittest import TestCase
 
 import numpy as np
+import torch
+from addict import Dict
 from mmengine.registry import init_default_scope
 
 from mmdet.registry import TASK_UTILS
@@ -35,3 +37,82 @@ class TestKalmanFilter(TestCase):
         mean, covariance = self.kf.update(mean, covariance, measurement, score)
         assert len(mean) == 8
         assert covariance.shape == (8, 8)
+
+    def _random_states(self, rng, num):
+        measurements = np.concatenate(
+            (rng.uniform(0, 500, (num, 2)), rng.uniform(
+                0.3, 0.6, (num, 1)), rng.uniform(20, 200, (num, 1))),
+            axis=1)
+        means, covariances = self.kf.batch_initiate(measurements)
+        # run a few steps to get correlated states
+        for _ in range(3):
+            means, covariances = self.kf.batch_predict(means, covariances)
+            means, covariances = self.kf.batch_update(
+                means, covariances,
+                measurements + rng.normal(0, 2, measurements.shape))
+        return means, covariances, measurements
+
+    def test_batch_parity(self):
+        rng = np.random.default_rng(0)
+        for use_nsa in [False, True]:
+            kf = TASK_UTILS.build(dict(type='KalmanFilter', use_nsa=use_nsa))
+            means, covariances, measurements = self._random_states(rng, 20)
+            scores = rng.uniform(0.1, 0.9, 20)
+
+            batch_results = [
+                kf.batch_initiate(measurements),
+                kf.batch_predict(means, covariances),
+                kf.batch_project(means, covariances, scores),
+                kf.batch_update(means, covariances, measurements, scores),
+            ]
+            for i in range(20):
+                results = [
+                    kf.initiate(measurements[i]),
+                    kf.predict(means[i], covariances[i]),
+                    kf.project(means[i], covariances[i], scores[i]),
+                    kf.update(means[i], covariances[i], measurements[i],
+                              scores[i]),
+                ]
+                for (batch_mean,
+                     batch_cov), (mean, cov) in zip(batch_results, results):
+                    np.testing.assert_allclose(batch_mean[i], mean, rtol=1e-9)
+                    np.testing.assert_allclose(
+                        batch_cov[i], cov, rtol=1e-7, atol=1e-9)
+
+            for only_position in [False, True]:
+                dists = kf.batch_gating_distance(means, covariances,
+                                                 measurements[:7],
+                                                 only_position)
+                self.assertEqual(dists.shape, (20, 7))
+                for i in range(20):
+                    np.testing.assert_allclose(
+                        dists[i],
+                        kf.gating_distance(means[i], covariances[i],
+                                           measurements[:7], only_position),
+                        rtol=1e-7)
+
+    def test_track(self):
+        rng = np.random.default_rng(1)
+        means, covariances, measurements = self._random_states(rng, 5)
+        tracks = {
+            id: Dict(mean=mean, covariance=covariance)
+            for id, (mean, covariance) in enumerate(zip(means, covariances))
+        }
+        bboxes = torch.from_numpy(measurements[:3])
+        tracks, costs = self.kf.track(tracks, bboxes)
+        self.assertEqual(costs.shape, (5, 3))
+        for id, track in tracks.items():
+            mean, covariance = self.kf.predict(means[id], covariances[id])
+            np.testing.assert_allclose(track.mean, mean)
+            dists = self.kf.gating_distance(mean, covariance, measurements[:3])
+            dists[dists > self.kf.gating_threshold] = np.nan
+            np.testing.assert_allclose(costs[id], dists, rtol=1e-7)
+
+        # the tracks without states are initiated
+        tracks[5] = Dict()
+        self.kf.update_tracks(tracks, [1, 5], measurements[:2])
+        mean, _ = self.kf.initiate(measurements[1])
+        np.testing.assert_allclose(tracks[5].mean, mean)
+        mean, _ = self.kf.update(*self.kf.predict(means[1], covariances[1]),
+                                 measurements[0])
+        np.testing.assert_allclose(tracks[1].mean, mean)
@@ -40,6 +40,28 @@ class TestByteTracker(TestCase):
             'ids', 'bboxes', 'scores', 'labels', 'frame_ids'
         ]
 
+    def test_tentative(self):
+        # the tracks are confirmed by the number of the updates, which may
+        # exceed the values kept in the memo
+        tracker = MODELS.build(
+            dict(
+                type='ByteTracker',
+                motion=dict(type='KalmanFilter'),
+                num_tentatives=3,
+                memo_len=2))
+        tracker.kf = TASK_UTILS.build(dict(type='KalmanFilter'))
+        bboxes = random_boxes(2, 512)
+        for frame_id in range(1, 4):
+            tracker.update(
+                ids=torch.arange(2),
+                bboxes=bboxes,
+                scores=torch.ones(2),
+                labels=torch.zeros(2),
+                frame_ids=frame_id)
+            if frame_id < 3:
+                assert tracker.confirmed_ids == []
+        assert tracker.confirmed_ids == [0, 1]
+
     def test_track(self):
 
         with torch.no_grad():
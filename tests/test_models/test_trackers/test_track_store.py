@@ -0,0 +1,119 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import torch
+
+from mmdet.models.trackers import BaseTracker, TrackStore
+from mmdet.structures.mask import BitmapMasks
+
+
+class _Tracker(BaseTracker):
+
+    def track(self, *args, **kwargs):
+        pass
+
+
+class TestTrackStore(TestCase):
+
+    def test_update(self):
+        store = TrackStore(momentums=dict(embeds=0.5), memo_len=3, capacity=2)
+        for frame_id in range(5):
+            ids = torch.tensor([0, 1, 2]) + frame_id // 2
+            is_new = store.update(
+                ids,
+                dict(
+                    bboxes=torch.full((3, 4), float(frame_id)),
+                    embeds=torch.full((3, 2), float(frame_id))))
+        self.assertEqual(is_new.tolist(), [False, False, True])
+        self.assertEqual(store.ids.tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(store.num_updates().tolist(), [2, 4, 5, 3, 1])
+
+        # only the last values are kept in the ring buffer
+        values, valid = store.history('bboxes', 3, [2, 4])
+        self.assertEqual(values[:, :, 0][valid].tolist(), [2., 3., 4., 4.])
+        self.assertEqual(valid.tolist(),
+                         [[True, True, True], [False, False, True]])
+        self.assertEqual(
+            store.last('bboxes')[:, 0].tolist(), [1., 3., 4., 4., 4.])
+        with self.assertRaises(ValueError):
+            store.history('bboxes', 4)
+
+        # the running average of the items with momentum
+        self.assertEqual(
+            store.last('embeds', [1, 4])[:, 0].tolist(), [2.125, 4.])
+
+        store.remove(np.array([True, False, True, False, False]))
+        self.assertEqual(store.ids.tolist(), [1, 3, 4])
+        self.assertEqual(store.last('bboxes')[:, 0].tolist(), [3., 4., 4.])
+        # a new track takes a slot that is freed
+        store.update(torch.tensor([5]), dict(bboxes=torch.ones(1, 4)))
+        self.assertEqual(store.num_updates([5]).tolist(), [1])
+
+    def test_base_tracker(self):
+        tracker = _Tracker(momentums=dict(embeds=0.5), memo_len=4)
+        masks = BitmapMasks(np.zeros((2, 8, 8), dtype=np.uint8), 8, 8)
+        for frame_id in range(6):
+            tracker.update(
+                ids=torch.tensor([0, frame_id + 1]),
+                bboxes=torch.rand(2, 4),
+                embeds=torch.rand(2, 2),
+                masks=masks,
+                frame_ids=frame_id)
+        self.assertEqual(tracker.ids, [0, 1, 2, 3, 4, 5, 6])
+
+        track = tracker.tracks[0]
+        self.assertEqual(len(track.bboxes), 4)
+        self.assertEqual(track.bboxes[-1].shape, (1, 4))
+        self.assertEqual(track.masks[-1].shape, (1, 8, 8))
+        self.assertEqual(track.embeds.shape, (1, 2))
+        # the history is modified in place
+        track.bboxes[-2:] = [torch.zeros(1, 4), torch.ones(1, 4)]
+        self.assertTrue((tracker.get('bboxes', [0]) == 1).all())
+        mean = tracker.get('bboxes', [0, 6], num_samples=2, behavior='mean')
+        self.assertTrue(torch.allclose(mean[0], torch.full((4, ), 0.5)))
+        self.assertTrue(torch.allclose(mean[1], tracker.get('bboxes', [6])))
+
+        memo = tracker.memo
+        self.assertEqual(memo.bboxes.shape, (7, 4))
+        self.assertEqual(memo.ids.tolist(), tracker.ids)
+
+        # the tracks that disappear are popped
+        tracker.num_frames_retain = 2
+        tracker.update(
+            ids=torch.tensor([0]),
+            bboxes=torch.rand(1, 4),
+            embeds=torch.rand(1, 2),
+            masks=masks[:1],
+            frame_ids=6)
+        self.assertEqual(tracker.ids, [0, 6])
+        self.assertEqual(tracker.store.ids.tolist(), [0, 6])
+
+    def test_memo_lens(self):
+        # the large items whose history is never read keep one value
+        tracker = _Tracker(memo_len=30, memo_lens=dict(masks=1, roi_feats=1))
+        for frame_id in range(40):
+            tracker.update(
+                ids=torch.arange(100),
+                bboxes=torch.rand(100, 4),
+                masks=torch.zeros(100, 64, 64, dtype=torch.bool),
+                roi_feats=torch.rand(100, 256, 7, 7),
+                frame_ids=frame_id)
+        buffers = tracker.store.buffers
+        capacity = tracker.store.capacity
+        self.assertLess(capacity, 2 * 100)
+        self.assertEqual(buffers['masks'].shape, (capacity, 1, 64, 64))
+        self.assertEqual(buffers['roi_feats'].shape, (capacity, 1, 256, 7, 7))
+        self.assertEqual(buffers['bboxes'].shape, (capacity, 30, 4))
+        self.assertLessEqual(buffers['roi_feats'].numel(),
+                             capacity * 256 * 7 * 7)
+
+        track = tracker.tracks[0]
+        self.assertEqual(len(track.bboxes), 30)
+        self.assertEqual(len(track.masks), 1)
+        self.assertEqual(tracker.store.num_updates([0]).tolist(), [40])
+        self.assertTrue(
+            torch.equal(track.roi_feats[-1][0],
+                        tracker.get('roi_feats', [0])[0]))
+        with self.assertRaises(ValueError):
+            tracker.get('roi_feats', [0], num_samples=2)
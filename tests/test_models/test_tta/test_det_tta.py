@@ -46,3 +46,85 @@ class TestDetTTAModel(TestCase):
             ])
 
         model.test_step(dict(inputs=imgs, data_samples=data_samples))
+
+    def _build_tta_model(self, **tta_cfg):
+        detector_cfg = get_detector_cfg(
+            'retinanet/retinanet_r18_fpn_1x_coco.py')
+        detector_cfg.test_cfg.score_thr = 0.
+        cfg = ConfigDict(
+            type='DetTTAModel',
+            module=detector_cfg,
+            tta_cfg=dict(
+                nms=dict(type='nms', iou_threshold=0.5),
+                max_per_img=50,
+                **tta_cfg))
+        model = MODELS.build(cfg)
+        model.eval()
+        return model
+
+    def _get_tta_data(self):
+        torch.manual_seed(0)
+        inputs, data_samples = [], []
+        # two scales with and without flipping of two images
+        for size in [64, 96]:
+            for flip in [False, True]:
+                inputs.append([
+                    torch.randint(0, 255, (3, size, size), dtype=torch.uint8)
+                    for _ in range(2)
+                ])
+                data_samples.append([
+                    DetDataSample(
+                        metainfo=dict(
+                            ori_shape=(64, 64),
+                            img_shape=(size, size),
+                            scale_factor=(size / 64, size / 64),
+                            flip=flip,
+                            flip_direction='horizontal')) for _ in range(2)
+                ])
+        return dict(inputs=inputs, data_samples=data_samples)
+
+    def test_batch_views(self):
+        model = self._build_tta_model()
+        with torch.no_grad():
+            expected = model.test_step(self._get_tta_data())
+            model.tta_cfg.batch_views = True
+            results = model.test_step(self._get_tta_data())
+        self.assertEqual(len(model.view_latencies), 4)
+        self.assertEqual(len(results), 2)
+        for result, target in zip(results, expected):
+            pred, target = result.pred_instances, target.pred_instances
+            self.assertEqual(len(pred), 50)
+            self.assertTrue(torch.allclose(pred.bboxes, target.bboxes))
+            self.assertTrue(torch.allclose(pred.scores, target.scores))
+            self.assertTrue(torch.equal(pred.labels, target.labels))
+
+    def test_merge_preds(self):
+        model = self._build_tta_model()
+        with torch.no_grad():
+            data = self._get_tta_data()
+            data_samples_list = [
+                model.module.test_step(
+                    dict(inputs=inputs, data_samples=data_samples)) for inputs,
+                data_samples in zip(data['inputs'], data['data_samples'])
+            ]
+        data_samples_list = list(zip(*data_samples_list))
+        # the images are merged by one call of nms
+        expected = [
+            model.merge_preds([[ds.clone() for ds in data_samples]])[0]
+            for data_samples in data_samples_list
+        ]
+        results = model.merge_preds([[ds.clone() for ds in data_samples]
+                                     for data_samples in data_samples_list])
+        for result, target in zip(results, expected):
+            pred, target = result.pred_instances, target.pred_instances
+            self.assertTrue(torch.equal(pred.bboxes, target.bboxes))
+            self.assertTrue(torch.equal(pred.labels, target.labels))
+
+        model.tta_cfg.wbf = dict(iou_thr=0.55)
+        results = model.merge_preds([[ds.clone() for ds in data_samples]
+                                     for data_samples in data_samples_list])
+        for result in results:
+            pred = result.pred_instances
+            self.assertLessEqual(len(pred), 50)
+            self.assertEqual(pred.labels.dtype, torch.long)
+            self.assertTrue((pred.scores[:-1] >= pred.scores[1:]).all())
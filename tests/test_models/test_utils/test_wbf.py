@@ -0,0 +1,174 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import torch
+
+from mmdet.models.utils import (batched_weighted_boxes_fusion,
+                                weighted_boxes_fusion)
+
+
+def _reference_wbf(bboxes_list,
+                   scores_list,
+                   labels_list,
+                   weights=None,
+                   iou_thr=0.55,
+                   skip_box_thr=0.0,
+                   conf_type='avg',
+                   allows_overflow=False):
+    """The per-box implementation of https://github.com/ZFTurbo/Weighted-
+    Boxes-Fusion."""
+    weights = np.ones(len(bboxes_list)) if weights is None else np.array(
+        weights, dtype=np.float64)
+    label_boxes = dict()
+    for t, (bboxes, scores,
+            labels) in enumerate(zip(bboxes_list, scores_list, labels_list)):
+        for bbox, score, label in zip(bboxes, scores, labels):
+            if score < skip_box_thr:
+                continue
+            x1, x2 = sorted([float(bbox[0]), float(bbox[2])])
+            y1, y2 = sorted([float(bbox[1]), float(bbox[3])])
+            if (x2 - x1) * (y2 - y1) == 0.0:
+                continue
+            # [label, score, weight, model index, x1, y1, x2, y2]
+            label_boxes.setdefault(int(label), []).append([
+                int(label),
+                float(score) * weights[t], weights[t], t, x1, y1, x2, y2
+            ])
+
+    def fuse(cluster):
+        cluster = np.array(cluster)
+        box = np.zeros(8)
+        box[0] = cluster[0, 0]
+        if conf_type == 'max':
+            box[1] = cluster[:, 1].max()
+        else:
+            box[1] = cluster[:, 1].mean()
+        box[2] = cluster[:, 2].sum()
+        box[4:] = (cluster[:, 1:2] *
+                   cluster[:, 4:]).sum(axis=0) / cluster[:, 1].sum()
+        return box
+
+    overall_boxes = []
+    for boxes in label_boxes.values():
+        boxes = np.array(boxes)
+        boxes = boxes[boxes[:, 1].argsort(kind='stable')[::-1]]
+        clusters, fused = [], np.empty((0, 8))
+        for box in boxes:
+            best_idx = -1
+            if len(fused) > 0:
+                lt = np.maximum(fused[:, 4:6], box[4:6])
+                rb = np.minimum(fused[:, 6:8], box[6:8])
+                overlap = np.prod(np.maximum(rb - lt, 0), axis=1)
+                areas = np.prod(fused[:, 6:8] - fused[:, 4:6], axis=1)
+                ious = overlap / (
+                    areas + np.prod(box[6:8] - box[4:6]) - overlap)
+                if ious.max() > iou_thr:
+                    best_idx = ious.argmax()
+            if best_idx == -1:
+                clusters.append([box])
+                fused = np.vstack((fused, box))
+            else:
+                clusters[best_idx].append(box)
+                fused[best_idx] = fuse(clusters[best_idx])
+        for i, cluster in enumerate(clusters):
+            cluster = np.array(cluster)
+            model_weights = weights[np.unique(cluster[:, 3]).astype(int)]
+            if conf_type == 'box_and_model_avg':
+                fused[i, 1] = fused[i, 1] * len(cluster) / fused[
+                    i, 2] * model_weights.sum() / weights.sum()
+            elif conf_type == 'absent_model_aware_avg':
+                fused[i, 1] = fused[i, 1] * len(cluster) / (
+                    fused[i, 2] + weights.sum() - model_weights.sum())
+            elif conf_type == 'max':
+                fused[i, 1] = fused[i, 1] / weights.max()
+            elif not allows_overflow:
+                fused[i, 1] = fused[i, 1] * min(len(weights),
+                                                len(cluster)) / weights.sum()
+            else:
+                fused[i, 1] = fused[i, 1] * len(cluster) / weights.sum()
+        overall_boxes.append(fused)
+    overall_boxes = np.concatenate(overall_boxes or [np.empty((0, 8))])
+    overall_boxes = overall_boxes[overall_boxes[:, 1].argsort()[::-1]]
+    return overall_boxes[:, 4:], overall_boxes[:, 1], overall_boxes[:, 0]
+
+
+def _random_predictions(rng, num_models, num_classes=3):
+    centers = rng.uniform(0, 200, (10, 2))
+    bboxes_list, scores_list, labels_list = [], [], []
+    for _ in range(num_models):
+        num_boxes = rng.integers(0, 30)
+        inds = rng.integers(0, len(centers), num_boxes)
+        xy = centers[inds] + rng.normal(0, 3, (num_boxes, 2))
+        wh = rng.uniform(10, 30, (num_boxes, 2))
+        bboxes_list.append(np.hstack((xy, xy + wh)))
+        scores_list.append(rng.random(num_boxes))
+        labels_list.append(rng.integers(0, num_classes, num_boxes))
+    return bboxes_list, scores_list, labels_list
+
+
+class TestWeightedBoxesFusion(TestCase):
+
+    def _assert_equal(self, results, expected):
+        bboxes, scores, labels = results
+        target_bboxes, target_scores, target_labels = expected
+        self.assertEqual(labels.dtype, torch.int32)
+        np.testing.assert_allclose(
+            scores.numpy(), target_scores, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(
+            bboxes.numpy(), target_bboxes.reshape(-1, 4), rtol=1e-4)
+        np.testing.assert_array_equal(labels.numpy(), target_labels)
+
+    def test_weighted_boxes_fusion(self):
+        rng = np.random.default_rng(0)
+        for conf_type in [
+                'avg', 'max', 'box_and_model_avg', 'absent_model_aware_avg'
+        ]:
+            for allows_overflow in [False, True]:
+                for _ in range(10):
+                    num_models = int(rng.integers(1, 4))
+                    inputs = _random_predictions(rng, num_models)
+                    kwargs = dict(
+                        weights=rng.uniform(0.5, 2, num_models).tolist(),
+                        iou_thr=0.5,
+                        skip_box_thr=0.1,
+                        conf_type=conf_type,
+                        allows_overflow=allows_overflow)
+                    self._assert_equal(
+                        weighted_boxes_fusion(*inputs, **kwargs),
+                        _reference_wbf(*inputs, **kwargs))
+
+    def test_batched_weighted_boxes_fusion(self):
+        rng = np.random.default_rng(1)
+        batch_inputs = [_random_predictions(rng, 2) for _ in range(5)]
+        # tensor inputs
+        batch_inputs[0] = [[torch.from_numpy(x) for x in inputs]
+                           for inputs in batch_inputs[0]]
+        results = batched_weighted_boxes_fusion(*zip(*batch_inputs))
+        self.assertEqual(len(results), 5)
+        for result, inputs in zip(results, batch_inputs):
+            inputs = [[np.asarray(x) for x in data] for data in inputs]
+            self._assert_equal(result, _reference_wbf(*inputs))
+
+    def test_invalid_inputs(self):
+        bboxes_list = [[[0., 0., 10., 10.]], []]
+        scores_list = [[0.9], []]
+        labels_list = [[0], []]
+        # the empty predictions of a model
+        bboxes, scores, labels = weighted_boxes_fusion(bboxes_list,
+                                                       scores_list,
+                                                       labels_list)
+        self.assertEqual(bboxes.shape, (1, 4))
+        self.assertTrue(torch.allclose(scores, torch.tensor([0.45])))
+        bboxes, scores, labels = weighted_boxes_fusion([[]], [[]], [[]])
+        self.assertEqual(bboxes.shape, (0, 4))
+        self.assertEqual(scores.shape, (0, ))
+
+        with self.assertRaises(ValueError):
+            weighted_boxes_fusion(
+                bboxes_list, scores_list, labels_list, conf_type='min')
+        with self.assertRaises(ValueError):
+            weighted_boxes_fusion(bboxes_list, [[0.9, 0.8], []], labels_list)
+        with self.assertWarns(UserWarning):
+            weighted_boxes_fusion(
+                bboxes_list, scores_list, labels_list, weights=[1])
@@ -1,9 +1,16 @@
 from unittest import TestCase
 
 import numpy as np
+import pycocotools.mask as maskUtils
+import torch
+from mmengine.config import ConfigDict
 from mmengine.testing import assert_allclose
 
-from mmdet.structures.mask import BitmapMasks, PolygonMasks
+from mmdet.structures.mask import (BitmapMasks, LazyBitmapMasks, PolygonMasks,
+                                   RLEMasks, mask_target, polygon_to_bitmap,
+                                   polygons_to_bitmaps)
+from mmdet.structures.mask.mask_target import mask_target_single
+from mmdet.structures.mask.structures import _tensor_to_rles
 
 
 class TestMaskStructures(TestCase):
@@ -71,3 +78,168 @@ class TestMaskStructures(TestCase):
         assert len(cat_mask) == 3 * 5
         for i, m in enumerate(masks):
             assert_allclose(m.masks, cat_mask.masks[i * 3:(i + 1) * 3])
+
+    def test_polygons_to_bitmaps(self):
+        rng = np.random.default_rng(0)
+        polygons = []
+        for _ in range(20):
+            num_parts = rng.integers(1, 4)
+            polygons.append([
+                rng.uniform(-5, 40,
+                            rng.integers(3, 8) * 2) for _ in range(num_parts)
+            ])
+        # a mask with an invalid part, which is taken as a box by
+        # pycocotools if it is the first polygon in a batch
+        polygons.insert(0, [
+            np.array([5., 5., 20., 5., 20., 20.]),
+            np.array([0., 0., 10., 10.])
+        ])
+        # a mask covering the whole image
+        polygons.append([np.array([-5., -5., 50., -5., 50., 50., -5., 50.])])
+        bitmaps = polygons_to_bitmaps(polygons, 30, 35)
+        self.assertEqual(bitmaps.shape, (22, 30, 35))
+        self.assertTrue(bitmaps[-1].all())
+        self.assertEqual(bitmaps.dtype, np.uint8)
+        for polygon, bitmap in zip(polygons, bitmaps):
+            assert_allclose(bitmap, polygon_to_bitmap(polygon, 30, 35))
+        self.assertEqual(polygons_to_bitmaps([], 30, 35).shape, (0, 30, 35))
+
+        masks = PolygonMasks(polygons, 30, 35).to_ndarray()
+        self.assertEqual(masks.dtype, bool)
+        self.assertTrue(masks.flags.c_contiguous)
+        assert_allclose(masks, bitmaps.astype(bool))
+
+    def test_lazy_bitmap_masks(self):
+        polygons = PolygonMasks.random(num_masks=4, height=60, width=80)
+        masks = LazyBitmapMasks(polygons.masks, 60, 80)
+        # geometric transforms keep the masks lazy
+        masks = masks.resize(
+            (120, 160)).flip().crop(np.array([10, 20, 150, 100]))
+        masks = masks.pad((96, 160))[[0, 2, 3]]
+        self.assertIsInstance(masks, LazyBitmapMasks)
+        self.assertEqual((masks.height, masks.width), (96, 160))
+        self.assertIsInstance(
+            LazyBitmapMasks.cat([masks, masks]), LazyBitmapMasks)
+
+        bitmaps = masks.to_bitmap()
+        self.assertIsInstance(bitmaps, BitmapMasks)
+        self.assertEqual(bitmaps.masks.shape, (3, 96, 160))
+        self.assertEqual(bitmaps.masks.dtype, np.uint8)
+        expected = PolygonMasks(masks.masks, 96, 160).to_ndarray()
+        assert_allclose(bitmaps.masks, expected.astype(np.uint8))
+
+    def test_bitmap_crop_and_resize(self):
+        polygons = PolygonMasks.random(num_masks=3, height=40, width=50)
+        # bitmaps decoded from RLEs are not C-contiguous
+        bitmaps = BitmapMasks(
+            polygons_to_bitmaps(polygons.masks, 40, 50), 40, 50)
+        self.assertFalse(bitmaps.masks.flags.c_contiguous)
+        bboxes = np.array([[2., 3., 30., 20.], [0., 0., 50., 40.]])
+        inds = np.array([2, 0])
+        resized = bitmaps.crop_and_resize(bboxes, (7, 9), inds)
+        expected = BitmapMasks(np.ascontiguousarray(bitmaps.masks), 40,
+                               50).crop_and_resize(bboxes, (7, 9), inds)
+        assert_allclose(resized.masks, expected.masks)
+
+    def test_rle_masks(self):
+
+        def _assert_same(rle_masks, bitmap_masks):
+            self.assertIsInstance(rle_masks, RLEMasks)
+            self.assertEqual((rle_masks.height, rle_masks.width),
+                             (bitmap_masks.height, bitmap_masks.width))
+            # the results are the same as encoding the transformed bitmaps
+            self.assertEqual(
+                rle_masks.masks,
+                maskUtils.encode(
+                    np.asfortranarray(bitmap_masks.masks.transpose(1, 2, 0))))
+
+        bitmaps = BitmapMasks.random(num_masks=4, height=30, width=35)
+        bitmaps.masks[:, :, :8] = 0
+        bitmaps.masks[0] = 0
+        bitmaps.masks[1] = 1
+        masks = RLEMasks.from_bitmaps(torch.from_numpy(bitmaps.masks))
+        _assert_same(masks, bitmaps)
+        # the bitmaps on GPU are encoded by torch
+        self.assertEqual(
+            _tensor_to_rles(torch.from_numpy(bitmaps.masks)), masks.masks)
+        self.assertEqual(_tensor_to_rles(torch.zeros((0, 30, 35))), [])
+        assert_allclose(masks.to_ndarray(), bitmaps.masks)
+        assert_allclose(masks.areas, bitmaps.areas)
+        assert_allclose(
+            masks.get_bboxes('hbox').tensor,
+            bitmaps.get_bboxes('hbox').tensor)
+        assert_allclose(
+            masks.overlaps(masks[2:]),
+            maskUtils.iou(masks.masks, masks.masks[2:], [0, 0]))
+        self.assertEqual(masks.overlaps(masks[[]]).shape, (4, 0))
+
+        for direction in ['horizontal', 'vertical', 'diagonal']:
+            _assert_same(masks.flip(direction), bitmaps.flip(direction))
+        bbox = np.array([5, 3, 20, 40])
+        _assert_same(masks.crop(bbox), bitmaps.crop(bbox))
+        _assert_same(masks.pad((40, 50)), bitmaps.pad((40, 50)))
+        _assert_same(masks.expand(50, 60, 5, 7), bitmaps.expand(50, 60, 5, 7))
+        for out_shape in [(30, 35), (20, 40)]:
+            for offset, direction in [(6, 'horizontal'), (-4, 'vertical')]:
+                _assert_same(
+                    masks.translate(out_shape, offset, direction),
+                    bitmaps.translate(out_shape, offset, direction))
+        _assert_same(masks.resize((60, 70)), bitmaps.resize((60, 70)))
+        _assert_same(masks.rotate((30, 35), 30), bitmaps.rotate((30, 35), 30))
+
+        bboxes = np.array([[2., 3., 30., 20.], [0., 0., 35., 30.]])
+        inds = np.array([3, 1])
+        assert_allclose(
+            masks.crop_and_resize(bboxes, (7, 9), inds).masks,
+            bitmaps.crop_and_resize(bboxes, (7, 9), inds).masks)
+
+        self.assertEqual(len(masks[1]), 1)
+        assert_allclose(masks[np.array([3, 1])].to_ndarray(),
+                        bitmaps.masks[[3, 1]])
+        self.assertEqual(len(RLEMasks.cat([masks, masks[:2]])), 6)
+        empty_masks = RLEMasks.from_bitmaps(torch.zeros((0, 30, 35)))
+        self.assertEqual(len(empty_masks), 0)
+        self.assertEqual(empty_masks.flip().to_ndarray().shape, (0, 30, 35))
+        self.assertEqual(empty_masks.areas.shape, (0, ))
+
+    def test_polygon_crop_and_resize(self):
+        rng = np.random.default_rng(0)
+        masks = PolygonMasks.random(num_masks=3, height=40, width=50)
+        bboxes = np.array(
+            [[2., 3., 30., 20.], [10., 10., 10.5, 40.], [0., 0., 50., 40.]],
+            dtype=np.float32)
+        inds = rng.integers(0, 3, len(bboxes))
+        resized = masks.crop_and_resize(bboxes, (7, 9), inds)
+        self.assertEqual(len(resized), 3)
+        for bbox, ind, mask in zip(bboxes, inds, resized.masks):
+            x1, y1, x2, y2 = bbox.tolist()
+            w_scale = 9 / max(x2 - x1, 1)
+            h_scale = 7 / max(y2 - y1, 1)
+            for p, target in zip(masks.masks[ind], mask):
+                assert_allclose(target[0::2], (p[0::2] - x1) * w_scale)
+                assert_allclose(target[1::2], (p[1::2] - y1) * h_scale)
+        self.assertEqual(
+            len(masks.crop_and_resize(np.zeros((0, 4)), (7, 9), [])), 0)
+
+    def test_batched_mask_target(self):
+        rng = np.random.default_rng(0)
+        cfg = ConfigDict(mask_size=(7, 9))
+        for mask_type in [BitmapMasks, PolygonMasks, RLEMasks]:
+            proposals_list, inds_list, gt_masks_list = [], [], []
+            for num_pos in [3, 0, 5]:
+                proposals = rng.uniform(0, 30, (num_pos, 4))
+                proposals[:, 2:] += proposals[:, :2]
+                proposals_list.append(
+                    torch.from_numpy(proposals.astype(np.float32)))
+                inds_list.append(torch.from_numpy(rng.integers(0, 4, num_pos)))
+                gt_masks_list.append(
+                    mask_type.random(num_masks=4, height=40, width=50))
+            mask_targets = mask_target(proposals_list, inds_list,
+                                       gt_masks_list, cfg)
+            expected = torch.cat([
+                mask_target_single(proposals, inds, gt_masks, cfg)
+                for proposals, inds, gt_masks in zip(proposals_list, inds_list,
+                                                     gt_masks_list)
+            ])
+            self.assertEqual(mask_targets.shape, (8, 7, 9))
+            self.assertTrue(torch.equal(mask_targets, expected))
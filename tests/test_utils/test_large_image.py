@@ -0,0 +1,202 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+from unittest import TestCase
+
+import numpy as np
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.apis import init_detector
+from mmdet.structures import DetDataSample
+from mmdet.structures.mask import RLEMasks
+from mmdet.utils import register_all_modules
+from mmdet.utils.large_image import (get_tiles, inference_large_image,
+                                     merge_results_by_nms, merge_tile_results,
+                                     shift_predictions)
+
+
+def _tile_result(bboxes, scores, labels, masks=None):
+    instances = InstanceData()
+    instances.bboxes = torch.tensor(bboxes, dtype=torch.float32).view(-1, 4)
+    instances.scores = torch.tensor(scores, dtype=torch.float32)
+    instances.labels = torch.tensor(labels, dtype=torch.long)
+    if masks is not None:
+        instances.masks = masks
+    return DetDataSample(pred_instances=instances)
+
+
+class TestLargeImage(TestCase):
+
+    def test_get_tiles(self):
+        # the last tile is aligned with the end of the image
+        tiles = get_tiles((1000, 1120), 640, 0.25)
+        np.testing.assert_array_equal(
+            tiles, [[0, 0, 640, 640], [480, 0, 1120, 640], [0, 360, 640, 1000],
+                    [480, 360, 1120, 1000]])
+        # the image is smaller than a tile
+        tiles = get_tiles((100, 200), 640, 0.25)
+        np.testing.assert_array_equal(tiles, [[0, 0, 200, 100]])
+
+    def test_shift_predictions(self):
+        masks = torch.zeros((1, 10, 10), dtype=torch.bool)
+        masks[0, 2:4, 3:6] = True
+        results = [
+            _tile_result([[3, 2, 6, 4]], [0.9], [0], masks),
+            _tile_result([[0, 0, 1, 1]], [0.8], [1], masks)
+        ]
+        instances = shift_predictions(results, [(0, 0), (5, 10)], (20, 15))
+        self.assertTrue(
+            torch.equal(instances.bboxes,
+                        torch.tensor([[3., 2., 6., 4.], [5., 10., 6., 11.]])))
+        self.assertIsInstance(instances.masks, RLEMasks)
+        bitmaps = instances.masks.to_ndarray()
+        self.assertEqual(bitmaps.shape, (2, 20, 15))
+        self.assertTrue(bitmaps[1, 12:14, 8:11].all())
+        self.assertEqual(bitmaps[1].sum(), 6)
+
+    def test_merge_tile_results(self):
+        image_shape = (1000, 1120)
+        tiles = get_tiles(image_shape, 640, 0.25)
+        rng = np.random.default_rng(0)
+        results = []
+        for x1, y1, x2, y2 in tiles.tolist():
+            # boxes inside the tile in the image coordinates, half of them
+            # are duplicated by the other tiles in the overlaps
+            xy = rng.uniform(0, 560, (20, 2))
+            bboxes = np.hstack((xy, xy + rng.uniform(10, 80, (20, 2))))
+            bboxes[:10] = np.array([470, 350, 500, 380]) + rng.normal(
+                0, 1, (10, 4))
+            bboxes[:, 0::2] = bboxes[:, 0::2].clip(x1, x2)
+            bboxes[:, 1::2] = bboxes[:, 1::2].clip(y1, y2)
+            results.append(
+                _tile_result(bboxes - [x1, y1, x1, y1], rng.random(20),
+                             rng.integers(0, 3, 20)))
+        nms_cfg = dict(type='nms', iou_threshold=0.5)
+        merged = merge_tile_results(results, image_shape, 640, 0.25, nms_cfg)
+        expected = merge_results_by_nms(results, tiles[:, :2].tolist(),
+                                        image_shape, nms_cfg)
+        pred, target = merged.pred_instances, expected.pred_instances
+        self.assertLess(len(pred), sum(len(r.pred_instances) for r in results))
+        # no duplicates are left, the same as merging all instances by nms
+        self.assertEqual(len(pred), len(target))
+        self.assertTrue(torch.equal(pred.bboxes, target.bboxes))
+        self.assertTrue(torch.equal(pred.scores, target.scores))
+        self.assertTrue((pred.scores[:-1] >= pred.scores[1:]).all())
+        self.assertEqual(merged.ori_shape, image_shape)
+
+        # the results of the skipped tiles
+        merged = merge_tile_results(results[1:], image_shape, 640, 0.25,
+                                    nms_cfg, [1, 2, 3])
+        self.assertLess(len(merged.pred_instances), len(pred))
+        merged = merge_tile_results([], image_shape, 640, 0.25, nms_cfg, [])
+        self.assertEqual(len(merged.pred_instances), 0)
+
+    def test_merge_tile_results_duplicates(self):
+        image_shape = (100, 160)
+        # tiles [0, 100] and [60, 160] in x
+        results = [
+            _tile_result([[10, 10, 30, 30], [70, 10, 90, 30]], [0.9, 0.8],
+                         [0, 0]),
+            _tile_result([[10, 10, 30, 30], [30, 50, 60, 70]], [0.7, 0.6],
+                         [0, 0]),
+        ]
+        merged = merge_tile_results(results, image_shape, 100, 0.4,
+                                    dict(type='nms',
+                                         iou_threshold=0.5)).pred_instances
+        # the duplicate in the overlap is removed
+        self.assertTrue(
+            torch.equal(
+                merged.bboxes,
+                torch.tensor([[10., 10., 30., 30.], [70., 10., 90., 30.],
+                              [90., 50., 120., 70.]])))
+        self.assertTrue(
+            torch.allclose(merged.scores, torch.tensor([0.9, 0.8, 0.6])))
+
+        # the masks are shifted only for the kept instances
+        masks = torch.zeros((2, 100, 100), dtype=torch.bool)
+        masks[0, 10:30, 10:30] = True
+        masks[1, 50:70, 30:60] = True
+        for result in results:
+            result.pred_instances.masks = masks
+        merged = merge_tile_results(results, image_shape, 100, 0.4,
+                                    dict(type='nms',
+                                         iou_threshold=0.5)).pred_instances
+        self.assertIsInstance(merged.masks, RLEMasks)
+        bitmaps = merged.masks.to_ndarray()
+        self.assertEqual(bitmaps.shape, (3, 100, 160))
+        self.assertEqual(bitmaps[0].sum(), 400)
+        self.assertTrue(bitmaps[0, 10:30, 10:30].all())
+        self.assertTrue(bitmaps[1, 50:70, 30:60].all())
+        self.assertTrue(bitmaps[2, 50:70, 90:120].all())
+
+        # the results of the patches with known shapes are merged in the
+        # same way
+        for result in results:
+            result.set_metainfo(dict(ori_shape=(100, 100)))
+        merged_by_nms = merge_results_by_nms(
+            results, [(0, 0), (60, 0)], image_shape,
+            dict(type='nms', iou_threshold=0.5)).pred_instances
+        self.assertTrue(torch.equal(merged_by_nms.bboxes, merged.bboxes))
+
+    def test_merge_tile_results_corner(self):
+        # the same instance in the corner overlap of 4 tiles
+        image_shape = (1000, 1000)
+        tiles = get_tiles(image_shape, 640, 0.25)
+        self.assertEqual(len(tiles), 4)
+        results = [
+            _tile_result([[400 - x1, 400 - y1, 500 - x1, 500 - y1]], [0.9],
+                         [0]) for x1, y1, _, _ in tiles.tolist()
+        ]
+        nms_cfg = dict(type='nms', iou_threshold=0.5)
+        merged = merge_tile_results(results, image_shape, 640, 0.25,
+                                    nms_cfg).pred_instances
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged.bboxes.tolist(), [[400., 400., 500., 500.]])
+
+        for result in results:
+            result.set_metainfo(dict(ori_shape=(640, 640)))
+        merged = merge_results_by_nms(results, tiles[:, :2].tolist(),
+                                      image_shape, nms_cfg).pred_instances
+        self.assertEqual(len(merged), 1)
+
+    def test_merge_tile_results_wbf(self):
+        image_shape = (100, 160)
+        results = [
+            _tile_result([[10, 10, 30, 30], [70, 10, 90, 30]], [0.9, 0.8],
+                         [0, 0]),
+            _tile_result([[12, 10, 32, 30], [30, 50, 60, 70]], [0.8, 0.6],
+                         [0, 0]),
+        ]
+        merged = merge_tile_results(results, image_shape, 100, 0.4,
+                                    dict(type='wbf',
+                                         iou_threshold=0.5)).pred_instances
+        # the duplicates in the overlap are fused
+        self.assertTrue(
+            torch.allclose(
+                merged.bboxes,
+                torch.tensor([[10., 10., 30., 30.], [71., 10., 91., 30.],
+                              [90., 50., 120., 70.]]),
+                atol=1e-4))
+        self.assertTrue(
+            torch.allclose(merged.scores, torch.tensor([0.9, 0.8, 0.6])))
+        self.assertEqual(merged.labels.dtype, torch.long)
+
+        results[0].pred_instances.masks = torch.zeros((2, 100, 100))
+        results[1].pred_instances.masks = torch.zeros((2, 100, 100))
+        with self.assertRaises(ValueError):
+            merge_tile_results(results, image_shape, 100, 0.4,
+                               dict(type='wbf'))
+
+    def test_inference_large_image(self):
+        register_all_modules()
+        model = init_detector(
+            'configs/yolox/yolox_tiny_8xb8-300e_coco.py', device='cpu')
+        img = np.random.randint(0, 255, (200, 300, 3), dtype=np.uint8)
+        # the left half is empty
+        img[:, :150] = 0
+        result = inference_large_image(model, img, tile_size=128, batch_size=4)
+        self.assertIsInstance(result, DetDataSample)
+        self.assertEqual(result.ori_shape, (200, 300))
+        result_skip = inference_large_image(
+            model, img, tile_size=128, batch_size=4, empty_std_thr=0)
+        self.assertLessEqual(
+            len(result_skip.pred_instances), len(result.pred_instances))
@@ -0,0 +1,86 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+from mmengine.fileio import load
+
+from mmdet.datasets.api_wrappers import COCO, COCOeval, COCOevalMP
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the wall time of COCO evaluation backends')
+    parser.add_argument('ann_file', help='COCO format annotation file')
+    parser.add_argument(
+        'result_file', help='COCO format result json, e.g. xxx.bbox.json')
+    parser.add_argument(
+        '--iou-type',
+        choices=['bbox', 'segm'],
+        default='bbox',
+        help='IoU type to be evaluated')
+    parser.add_argument(
+        '--nproc',
+        type=int,
+        nargs='+',
+        default=[1, 4, 8],
+        help='numbers of processes used by COCOevalMP')
+    parser.add_argument(
+        '--repeat-num',
+        type=int,
+        default=1,
+        help='number of repeat times of measurement for averaging the results')
+    args = parser.parse_args()
+    return args
+
+
+def run_eval(coco_gt, predictions, iou_type, nproc=None):
+    """Run evaluation and return the wall time and the stats."""
+    coco_dt = coco_gt.loadRes(predictions)
+    if nproc is None:
+        coco_eval = COCOeval(coco_gt, coco_dt, iou_type)
+    else:
+        coco_eval = COCOevalMP(coco_gt, coco_dt, iou_type, nproc=nproc)
+    start = time.perf_counter()
+    # keep the benchmark log readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        coco_eval.evaluate()
+        coco_eval.accumulate()
+        coco_eval.summarize()
+    return time.perf_counter() - start, coco_eval.stats
+
+
+def main():
+    args = parse_args()
+    coco_gt = COCO(args.ann_file)
+    predictions = load(args.result_file)
+    if args.iou_type == 'segm':
+        # use the mask area as CocoMetric does
+        for x in predictions:
+            x.pop('bbox', None)
+
+    backends = [('COCOeval', None)]
+    backends += [(f'COCOevalMP(nproc={n})', n) for n in args.nproc]
+
+    ref_stats = None
+    ref_time = None
+    for name, nproc in backends:
+        times = []
+        for _ in range(args.repeat_num):
+            # loadRes modifies the predictions in place
+            cost, stats = run_eval(coco_gt, [dict(x) for x in predictions],
+                                   args.iou_type, nproc)
+            times.append(cost)
+        cost = float(np.mean(times))
+        if ref_stats is None:
+            ref_stats, ref_time = stats, cost
+        identical = np.array_equal(stats, ref_stats)
+        print(f'{name:<24} time: {cost:8.2f}s  '
+              f'speedup: {ref_time / cost:6.2f}x  '
+              f'identical to COCOeval: {identical}')
+
+
+if __name__ == '__main__':
+    main()
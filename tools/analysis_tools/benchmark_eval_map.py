@@ -0,0 +1,103 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import time
+
+import numpy as np
+
+from mmdet.evaluation.functional import eval_map
+from mmdet.evaluation.functional.mean_ap import tpfp_default, tpfp_openimages
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the wall time of eval_map on synthetic data')
+    parser.add_argument(
+        '--num-imgs', type=int, default=5000, help='number of images')
+    parser.add_argument(
+        '--num-classes', type=int, default=20, help='number of classes')
+    parser.add_argument(
+        '--num-dets',
+        type=int,
+        default=100,
+        help='number of detected bboxes per image')
+    parser.add_argument(
+        '--use-group-of',
+        action='store_true',
+        help='benchmark the Open Images criterion with group-of boxes')
+    parser.add_argument(
+        '--nproc',
+        type=int,
+        default=4,
+        help='number of processes used by the per-image path')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def per_image_tpfp_default(*args, **kwargs):
+    """Force ``eval_map`` to compute tp and fp image by image."""
+    return tpfp_default(*args, **kwargs)
+
+
+def per_image_tpfp_openimages(*args, **kwargs):
+    """Force ``eval_map`` to compute tp and fp image by image."""
+    return tpfp_openimages(*args, **kwargs)
+
+
+def random_results(num_imgs, num_classes, num_dets, seed=0):
+    """Generate random detection results and annotations."""
+    rng = np.random.default_rng(seed)
+    det_results = []
+    annotations = []
+    for _ in range(num_imgs):
+        num_gts = rng.integers(1, 10)
+        xy = rng.uniform(0, 400, (num_gts, 2))
+        gt_bboxes = np.hstack((xy, xy + rng.uniform(10, 200, (num_gts, 2))))
+        gt_labels = rng.integers(0, num_classes, num_gts)
+        annotations.append(
+            dict(
+                bboxes=gt_bboxes.astype(np.float32),
+                labels=gt_labels,
+                gt_is_group_ofs=rng.random(num_gts) < 0.2))
+        # jitter the gt bboxes to get detections of various quality
+        inds = rng.integers(0, num_gts, num_dets)
+        bboxes = gt_bboxes[inds] + rng.normal(0, 15, (num_dets, 4))
+        labels = np.where(
+            rng.random(num_dets) < 0.7, gt_labels[inds],
+            rng.integers(0, num_classes, num_dets))
+        scores = rng.random((num_dets, 1))
+        dets = np.hstack((bboxes, scores)).astype(np.float32)
+        det_results.append([dets[labels == i] for i in range(num_classes)])
+    return det_results, annotations
+
+
+def main():
+    args = parse_args()
+    det_results, annotations = random_results(args.num_imgs, args.num_classes,
+                                              args.num_dets, args.seed)
+    kwargs = dict(logger='silent', nproc=args.nproc)
+    if args.use_group_of:
+        kwargs.update(ioa_thr=0.5, use_group_of=True)
+        per_image_fn = per_image_tpfp_openimages
+    else:
+        per_image_fn = per_image_tpfp_default
+
+    start = time.perf_counter()
+    per_image_map, _ = eval_map(
+        det_results, annotations, tpfp_fn=per_image_fn, **kwargs)
+    per_image_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched_map, _ = eval_map(det_results, annotations, **kwargs)
+    batched_time = time.perf_counter() - start
+
+    print(f'per-image (nproc={args.nproc}) time: {per_image_time:8.2f}s  '
+          f'mAP: {per_image_map:.4f}')
+    print(f'batched              time: {batched_time:8.2f}s  '
+          f'mAP: {batched_map:.4f}')
+    print(f'speedup: {per_image_time / batched_time:.2f}x  '
+          f'identical: {per_image_map == batched_map}')
+
+
+if __name__ == '__main__':
+    main()
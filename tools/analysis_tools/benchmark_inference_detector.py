@@ -0,0 +1,88 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import os.path as osp
+import time
+
+import numpy as np
+import torch
+from mmengine.utils import scandir
+
+from mmdet.apis import inference_detector, init_detector
+
+IMG_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.ppm', '.bmp', '.pgm', '.tif',
+                  '.tiff', '.webp')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the throughput of inference_detector with '
+        'and without batching')
+    parser.add_argument('config', help='test config file path')
+    parser.add_argument('--checkpoint', help='checkpoint file')
+    parser.add_argument(
+        '--img-dir',
+        help='directory of images, random images are used if not specified')
+    parser.add_argument(
+        '--num-imgs', type=int, default=200, help='number of images')
+    parser.add_argument(
+        '--img-shape',
+        type=int,
+        nargs=2,
+        default=[480, 640],
+        help='(h, w) of the random images')
+    parser.add_argument(
+        '--batch-size', type=int, default=8, help='batch size of inference')
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=4,
+        help='number of threads running the test pipeline')
+    parser.add_argument(
+        '--device', default='cuda:0', help='device used for inference')
+    args = parser.parse_args()
+    return args
+
+
+def load_imgs(args):
+    """Get the image files or generate random images."""
+    if args.img_dir is not None:
+        imgs = sorted(
+            osp.join(args.img_dir, name)
+            for name in scandir(args.img_dir, IMG_EXTENSIONS, recursive=True))
+        return imgs[:args.num_imgs]
+    rng = np.random.default_rng(0)
+    return [
+        rng.integers(0, 256, (*args.img_shape, 3), dtype=np.uint8)
+        for _ in range(args.num_imgs)
+    ]
+
+
+def measure(model, imgs, **kwargs):
+    """Return the throughput in images per second."""
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    inference_detector(model, imgs, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return len(imgs) / (time.perf_counter() - start)
+
+
+def main():
+    args = parse_args()
+    model = init_detector(args.config, args.checkpoint, device=args.device)
+    imgs = load_imgs(args)
+    # warm up
+    inference_detector(model, imgs[:args.batch_size])
+
+    loop_fps = measure(model, imgs)
+    batched_fps = measure(
+        model, imgs, batch_size=args.batch_size, num_workers=args.num_workers)
+    print(f'one by one                        : {loop_fps:8.2f} img/s')
+    print(f'batch_size={args.batch_size}, num_workers={args.num_workers} '
+          f': {batched_fps:8.2f} img/s')
+    print(f'speedup: {batched_fps / loop_fps:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import argparse
+import time
+
+import numpy as np
+import torch
+from mmengine.structures import InstanceData
+
+from mmdet.models.trackers import BaseTracker
+from mmdet.registry import MODELS
+from mmdet.structures import DetDataSample
+from mmdet.utils import register_all_modules
+
+
+class MemoTracker(BaseTracker):
+    """Tracker that takes the ground-truth ids, which only benchmarks how the
+    memo of the tracks is updated and queried."""
+
+    def track(self, data_sample: DetDataSample) -> None:
+        frame_id = data_sample.metainfo['frame_id']
+        if frame_id == 0:
+            self.reset()
+        pred_instances = data_sample.pred_instances
+        if not self.empty:
+            # e.g. the appearance and motion cues of SORT and DeepSORT
+            self.get('embeds', self.ids, num_samples=10, behavior='mean')
+            self.get('bboxes', self.ids)
+        self.update(
+            ids=pred_instances.instances_id,
+            bboxes=pred_instances.bboxes,
+            embeds=pred_instances.embeds,
+            labels=pred_instances.labels,
+            scores=pred_instances.scores,
+            frame_ids=frame_id)
+
+
+TRACKERS = dict(
+    MemoTracker=dict(num_frames_retain=30),
+    ByteTracker=dict(
+        type='ByteTracker',
+        motion=dict(type='KalmanFilter'),
+        obj_score_thrs=dict(high=0.6, low=0.1),
+        init_track_thr=0.7,
+        weight_iou_with_det_scores=True,
+        match_iou_thrs=dict(high=0.1, low=0.5, tentative=0.3),
+        num_frames_retain=30),
+    OCSORTTracker=dict(
+        type='OCSORTTracker',
+        motion=dict(type='KalmanFilter'),
+        obj_score_thr=0.3,
+        init_track_thr=0.7,
+        weight_iou_with_det_scores=True,
+        match_iou_thr=0.3,
+        num_tentatives=3,
+        vel_consist_weight=0.2,
+        vel_delta_t=3,
+        num_frames_retain=30))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the per-frame latency of trackers on '
+        'synthetic crowded sequences')
+    parser.add_argument(
+        '--trackers',
+        nargs='+',
+        default=list(TRACKERS.keys()),
+        choices=list(TRACKERS.keys()),
+        help='trackers to benchmark')
+    parser.add_argument(
+        '--num-frames', type=int, default=300, help='number of frames')
+    parser.add_argument(
+        '--num-objs',
+        type=int,
+        default=200,
+        help='number of objects in each frame')
+    parser.add_argument(
+        '--memo-len',
+        type=int,
+        default=30,
+        help='number of the latest values kept for each track')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    return args
+
+
+def synthetic_sequence(num_frames, num_objs, img_size=1920, seed=0):
+    """Generate the detections of objects moving with constant velocity.
+
+    About 2% of the objects leave the image and are replaced by new objects
+    in each frame, and 10% of the detections are missed. The detections
+    keep the ground-truth ids and appearance embeddings of the objects.
+    """
+    rng = np.random.default_rng(seed)
+    obj_ids = np.arange(num_objs)
+    embeds = rng.normal(0, 1, (num_objs, 128))
+    xy = rng.uniform(0, img_size, (num_objs, 2))
+    wh = rng.uniform(20, 80, (num_objs, 2)) * np.array([1, 2.5])
+    velocity = rng.normal(0, 3, (num_objs, 2))
+    frames = []
+    for frame_id in range(num_frames):
+        xy += velocity
+        renew = rng.random(num_objs) < 0.02
+        xy[renew] = rng.uniform(0, img_size, (renew.sum(), 2))
+        obj_ids[renew] = obj_ids.max() + 1 + np.arange(renew.sum())
+        visible = rng.random(num_objs) > 0.1
+        num_dets = int(visible.sum())
+        centers = xy[visible] + rng.normal(0, 1, (num_dets, 2))
+        bboxes = np.hstack(
+            (centers - wh[visible] / 2, centers + wh[visible] / 2))
+        data_sample = DetDataSample(metainfo=dict(frame_id=frame_id))
+        data_sample.pred_instances = InstanceData(
+            bboxes=torch.from_numpy(bboxes).float(),
+            labels=torch.zeros(num_dets, dtype=torch.long),
+            scores=torch.from_numpy(rng.uniform(0.3, 1, num_dets)).float(),
+            instances_id=torch.from_numpy(obj_ids[visible]),
+            embeds=torch.from_numpy(embeds[visible] +
+                                    rng.normal(0, 0.1, (num_dets,
+                                                        128))).float())
+        frames.append(data_sample)
+    return frames
+
+
+def main():
+    args = parse_args()
+    register_all_modules()
+    frames = synthetic_sequence(args.num_frames, args.num_objs, seed=args.seed)
+
+    for name in args.trackers:
+        cfg = dict(TRACKERS[name], memo_len=args.memo_len)
+        if name == 'MemoTracker':
+            tracker = MemoTracker(**cfg)
+        else:
+            tracker = MODELS.build(cfg)
+        latencies = []
+        num_tracks = []
+        for data_sample in frames:
+            start = time.perf_counter()
+            tracker.track(data_sample=data_sample)
+            latencies.append(time.perf_counter() - start)
+            num_tracks.append(len(tracker.tracks))
+        # the first frames are warmup
+        latencies = np.array(latencies[10:]) * 1000
+        print(f'{name:14s} tracks: {np.mean(num_tracks):7.1f}  '
+              f'latency (ms) mean: {latencies.mean():7.2f}  '
+              f'p50: {np.percentile(latencies, 50):7.2f}  '
+              f'p95: {np.percentile(latencies, 95):7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,10 @@ import argparse
 
 from mmengine.fileio import dump, load
 from mmengine.logging import print_log
-from mmengine.utils import ProgressBar
 from pycocotools.coco import COCO
 from pycocotools.cocoeval import COCOeval
 
-from mmdet.models.utils import weighted_boxes_fusion
+from mmdet.models.utils import batched_weighted_boxes_fusion
 
 
 def parse_args():
@@ -14,7 +13,7 @@ def parse_args():
         prediction results using Weighted \
         Boxes Fusion from multiple models.')
     parser.add_argument(
-        'pred-results',
+        'pred_results',
         type=str,
         nargs='+',
         help='files of prediction results \
@@ -64,9 +63,6 @@ def parse_args():
 def main():
     args = parse_args()
 
-    assert len(args.models_name) == len(args.pred_results), \
-        'the quantities of model names and prediction results are not equal'
-
     cocoGT = COCO(args.annotation)
 
     predicts_raw = []
@@ -98,32 +94,35 @@ def main():
     for i, pred_single in enumerate(predicts_raw):
         for pred in pred_single:
             p = predict[str(pred['image_id'])]
-            p['bboxes_list'][i].append(pred['bbox'])
+            # wbf takes the boxes in (x1, y1, x2, y2) format
+            x, y, w, h = pred['bbox']
+            p['bboxes_list'][i].append([x, y, x + w, y + h])
             p['scores_list'][i].append(pred['score'])
             p['labels_list'][i].append(pred['category_id'])
 
+    # fuse the results of all images at once
+    image_ids = list(predict.keys())
+    fused_results = batched_weighted_boxes_fusion(
+        [predict[image_id]['bboxes_list'] for image_id in image_ids],
+        [predict[image_id]['scores_list'] for image_id in image_ids],
+        [predict[image_id]['labels_list'] for image_id in image_ids],
+        weights=args.weights,
+        iou_thr=args.fusion_iou_thr,
+        skip_box_thr=args.skip_box_thr,
+        conf_type=args.conf_type)
+
     result = []
-    prog_bar = ProgressBar(len(predict))
-    for image_id, res in predict.items():
-        bboxes, scores, labels = weighted_boxes_fusion(
-            res['bboxes_list'],
-            res['scores_list'],
-            res['labels_list'],
-            weights=args.weights,
-            iou_thr=args.fusion_iou_thr,
-            skip_box_thr=args.skip_box_thr,
-            conf_type=args.conf_type)
-
-        for bbox, score, label in zip(bboxes, scores, labels):
+    for image_id, (bboxes, scores, labels) in zip(image_ids, fused_results):
+        bboxes[:, 2:] -= bboxes[:, :2]
+        for bbox, score, label in zip(bboxes.tolist(), scores.tolist(),
+                                      labels.tolist()):
             result.append({
-                'bbox': bbox.numpy().tolist(),
-                'category_id': int(label),
+                'bbox': bbox,
+                'category_id': label,
                 'image_id': int(image_id),
-                'score': float(score)
+                'score': score
             })
 
-        prog_bar.update()
-
     if args.save_fusion_results:
         out_file = args.out_dir + '/fusion_results.json'
         dump(result, file=out_file)
@@ -0,0 +1,90 @@
+# Copyright (c) OpenMMLab. All rights reserved.
+import glob
+import os.path as osp
+import time
+from argparse import ArgumentParser
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import numpy as np
+from mmdet_handler import MMdetHandler
+from mmengine.config import Config
+
+
+def parse_args():
+    parser = ArgumentParser(
+        description='Replay images against the TorchServe handler locally, '
+        'without a running server, and report latency and throughput.')
+    parser.add_argument('img', help='Image file or folder of images')
+    parser.add_argument('config', help='Config file')
+    parser.add_argument('checkpoint', help='Checkpoint file')
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=8,
+        help='number of requests in a batch of TorchServe')
+    parser.add_argument(
+        '--num-batches', type=int, default=50, help='number of batches')
+    parser.add_argument(
+        '--num-warmup',
+        type=int,
+        default=2,
+        help='number of warmup batches excluded from the statistics')
+    parser.add_argument(
+        '--gpu-id', type=int, default=0, help='id of gpu used by handler')
+    args = parser.parse_args()
+    return args
+
+
+def main(args):
+    if osp.isdir(args.img):
+        img_files = sorted(
+            glob.glob(osp.join(args.img, '*.jpg')) +
+            glob.glob(osp.join(args.img, '*.png')))
+    else:
+        img_files = [args.img]
+    assert len(img_files) > 0, f'No image is found in {args.img}'
+    # the handler receives raw bytes of images in the requests
+    bodies = []
+    for img_file in img_files:
+        with open(img_file, 'rb') as f:
+            bodies.append(f.read())
+
+    with TemporaryDirectory() as tmpdir:
+        # the model archive contains the config as `config.py`
+        Config.fromfile(args.config).dump(osp.join(tmpdir, 'config.py'))
+        context = SimpleNamespace(
+            system_properties=dict(model_dir=tmpdir, gpu_id=args.gpu_id),
+            manifest=dict(
+                model=dict(serializedFile=osp.abspath(args.checkpoint))))
+        handler = MMdetHandler()
+        handler.initialize(context)
+
+    latencies = []
+    num_imgs = 0
+    for i in range(args.num_warmup + args.num_batches):
+        start = i * args.batch_size
+        data = [
+            dict(body=bodies[j % len(bodies)])
+            for j in range(start, start + args.batch_size)
+        ]
+        tic = time.perf_counter()
+        output = handler.postprocess(
+            handler.inference(handler.preprocess(data)))
+        toc = time.perf_counter()
+        assert len(output) == len(data)
+        if i >= args.num_warmup:
+            latencies.append(toc - tic)
+            num_imgs += len(data)
+
+    latencies = np.array(latencies) * 1000
+    print(f'batch size: {args.batch_size}, batches: {len(latencies)}')
+    print(f'latency (ms/batch): mean {latencies.mean():.1f}, '
+          f'p50 {np.percentile(latencies, 50):.1f}, '
+          f'p95 {np.percentile(latencies, 95):.1f}')
+    print(f'throughput: {num_imgs / latencies.sum() * 1000:.2f} img/s')
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    main(args)
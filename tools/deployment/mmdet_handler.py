@@ -1,6 +1,7 @@
 # Copyright (c) OpenMMLab. All rights reserved.
 import base64
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import mmcv
 import numpy as np
@@ -12,6 +13,8 @@ from mmdet.apis import inference_detector, init_detector
 
 class MMdetHandler(BaseHandler):
     threshold = 0.5
+    # number of threads decoding the images of a batch
+    num_decode_workers = 4
 
     def initialize(self, context):
         properties = context.system_properties
@@ -26,47 +29,48 @@ class MMdetHandler(BaseHandler):
         checkpoint = os.path.join(model_dir, serialized_file)
         self.config_file = os.path.join(model_dir, 'config.py')
 
-        self.model = init_detector(self.config_file, checkpoint, self.device)
+        self.model = init_detector(
+            self.config_file, checkpoint, device=self.device)
+        self.executor = ThreadPoolExecutor(self.num_decode_workers)
         self.initialized = True
 
-    def preprocess(self, data):
-        images = []
-
-        for row in data:
-            image = row.get('data') or row.get('body')
-            if isinstance(image, str):
-                image = base64.b64decode(image)
-            image = mmcv.imfrombytes(image)
-            images.append(image)
+    @staticmethod
+    def decode(row):
+        image = row.get('data') or row.get('body')
+        if isinstance(image, str):
+            image = base64.b64decode(image)
+        return mmcv.imfrombytes(image)
 
-        return images
+    def preprocess(self, data):
+        # decoding images with cv2 releases the GIL
+        return list(self.executor.map(self.decode, data))
 
     def inference(self, data, *args, **kwargs):
-        results = inference_detector(self.model, data)
+        # forward the whole batch of TorchServe as one padded batch
+        results = inference_detector(
+            self.model, data, batch_size=max(len(data), 1))
         return results
 
     def postprocess(self, data):
         # Format output following the example ObjectDetectionHandler format
+        classes = self.model.dataset_meta['classes']
         output = []
         for data_sample in data:
             pred_instances = data_sample.pred_instances
-            bboxes = pred_instances.bboxes.cpu().numpy().astype(
+            # filter the predictions before converting them to lists
+            keep = pred_instances.scores >= self.threshold
+            bboxes = pred_instances.bboxes[keep].cpu().numpy().astype(
                 np.float32).tolist()
-            labels = pred_instances.labels.cpu().numpy().astype(
+            labels = pred_instances.labels[keep].cpu().numpy().astype(
                 np.int32).tolist()
-            scores = pred_instances.scores.cpu().numpy().astype(
+            scores = pred_instances.scores[keep].cpu().numpy().astype(
                 np.float32).tolist()
-            preds = []
-            for idx in range(len(labels)):
-                cls_score, bbox, cls_label = scores[idx], bboxes[idx], labels[
-                    idx]
-                if cls_score >= self.threshold:
-                    class_name = self.model.dataset_meta['classes'][cls_label]
-                    result = dict(
-                        class_label=cls_label,
-                        class_name=class_name,
-                        bbox=bbox,
-                        score=cls_score)
-                    preds.append(result)
-            output.append(preds)
+            output.append([
+                dict(
+                    class_label=label,
+                    class_name=classes[label],
+                    bbox=bbox,
+                    score=score)
+                for label, bbox, score in zip(labels, bboxes, scores)
+            ])
         return output